@@ -1,16 +1,89 @@
 import time
+
+# ---------- BOOT TIMING ----------
+# Stage timestamps (ms since the first line ran) so boot-to-advertising can be
+# measured. Also reported over UART with {"t":"boot"}.
+BOOT_T0 = time.monotonic()
+boot_timing = []
+
+
+def boot_mark(stage):
+    boot_timing.append((stage, int((time.monotonic() - BOOT_T0) * 1000)))
+    print(f"[BOOT {boot_timing[-1][1]}ms] {stage}")
+
+
+# ---------- BLE ----------
+# Set up and start advertising before anything else is imported or drawn, so
+# a phone can connect as early as possible after a cold boot.
+from adafruit_ble import BLERadio
+from adafruit_ble.advertising.standard import ProvideServicesAdvertisement
+from adafruit_ble.services.nordic import UARTService
+
+from adv_policy import make_policy
+
+boot_mark("ble_imports")
+
+BLE_DEVICE_NAME = "FaustoBD"
+BLE_ADV_POLICY = "adaptive"  # see adv_policy.ADV_POLICIES; "fixed" = old 0.1 s behaviour
+BLE_ADV_RESTART = 60  # re-arm advertising at least this often (seconds)
+
+
+def ble_log(message):
+    print(f"[BLE {time.monotonic():.3f}] {message}")
+
+
+ble = BLERadio()
+# Sometimes BLE holds onto an old name or connection.
+# Force name setting:
+try:
+    ble.name = BLE_DEVICE_NAME
+    ble_log(f"Set BLE name to: {ble.name}")
+except Exception as e:
+    ble_log(f"Warning: Could not set BLE name: {e}")
+
+uart = UARTService()
+advertisement = ProvideServicesAdvertisement(uart)
+# Use only a complete_name to keep the advertising payload simple and compatible.
+# If you run into size issues, prefer a shorter complete_name rather than also
+# setting short_name, which can increase packet size and cause truncation.
+advertisement.complete_name = BLE_DEVICE_NAME
+# If you really need a short name, you can enable this, but try leaving it
+# disabled first for best compatibility:
+# advertisement.short_name = "Fausto"
+
+adv_policy = make_policy(BLE_ADV_POLICY)
+adv_policy.on_boot(time.monotonic())
+
+ble_log(f"BLE initialized, ready to advertise as {BLE_DEVICE_NAME} (policy={BLE_ADV_POLICY})")
+
+boot_advertising = False  # advertising was started here and is still running
+try:
+    _boot_interval = adv_policy.interval(time.monotonic())
+    ble.start_advertising(advertisement, interval=_boot_interval)
+    boot_advertising = True
+    ble_log(f"Started advertising name={BLE_DEVICE_NAME}, interval={_boot_interval}s (boot)")
+except Exception as e:
+    ble_log(f"Early advertising failed, main loop will retry: {e}")
+boot_mark("advertising")
+
+# ---------- Everything else ----------
+# E-ink driver modules (fourwire, adafruit_ssd1680), bitmap_label and base64
+# are imported on first use, or prewarmed while idle (see prewarm_step).
 import json
 import board
 import displayio
 import terminalio
-import base64
-from fourwire import FourWire
 
-from adafruit_display_text import label, bitmap_label
-from adafruit_ble import BLERadio
-from adafruit_ble.advertising.standard import ProvideServicesAdvertisement
-from adafruit_ble.services.nordic import UARTService
-import adafruit_ssd1680
+from adafruit_display_text import label
+
+from playlist import Playlist, ORDER_CUSTOM
+from transfer_cache import PartialCache
+import uart_codec
+from render_pool import RenderPool, HeapStats
+from poller import AdaptivePoller
+from telemetry import default_telemetry
+
+boot_mark("imports")
 
 # ---------- ON-BOARD DISPLAY (for text) ----------
 display = board.DISPLAY  # On-board TFT display
@@ -32,10 +105,19 @@ text_label = label.Label(
 text_label.anchor_point = (0.5, 0.5)
 text_label.anchored_position = (display.width // 2, display.height // 2)
 splash.append(text_label)
+boot_mark("tft")
 
 # ---------- E-INK DISPLAY (for images) ----------
 # Will be initialized lazily when needed (to avoid "too many display busses" error)
 eink_display = None
+EINK_WIDTH = 250
+EINK_HEIGHT = 122
+EINK_ROTATION = 270
+EINK_REFRESH_WAIT = 6  # seconds for a full SSD1680 refresh to physically settle
+EINK_MARGIN = 6  # pixels of margin around content
+RX_BUFFER_LEN = 4096  # largest image payload accepted (full 250x122 panel is 3813 B)
+IMAGE_RX_TIMEOUT = 20  # seconds without image data before a transfer is given up
+POLL_BUSY_WINDOW = 0.05  # poll flat out this long after a read; the app writes chunks 30 ms apart
 
 
 def set_text(t, c=0x00FFFF):
@@ -60,6 +142,10 @@ def init_eink_display(force_reinit=False):
         return eink_display
     
     print("Initializing e-ink display..." + (" (forced reinit)" if force_reinit else ""))
+    # Imported here rather than at boot so advertising starts sooner
+    from fourwire import FourWire
+    import adafruit_ssd1680
+
     # Release displays to free up the bus and reset driver state
     displayio.release_displays()
     eink_display = None  # Clear old reference
@@ -77,10 +163,10 @@ def init_eink_display(force_reinit=False):
     # Initialize e-ink display - match test-eink.py exactly
     eink_display = adafruit_ssd1680.SSD1680(
         display_bus,
-        width=250,
-        height=122,
+        width=EINK_WIDTH,
+        height=EINK_HEIGHT,
         busy_pin=epd_busy,
-        rotation=270,
+        rotation=EINK_ROTATION,
         colstart=-8,  # Comment out for older displays
     )
     
@@ -88,6 +174,13 @@ def init_eink_display(force_reinit=False):
     return eink_display
 
 
+def eink_frame_size():
+    """Framebuffer size the e-ink display expects, accounting for rotation."""
+    if EINK_ROTATION in (90, 270):
+        return EINK_HEIGHT, EINK_WIDTH
+    return EINK_WIDTH, EINK_HEIGHT
+
+
 def _mix_seed(seed, value):
     seed = (seed ^ (value & 0xFFFFFFFF)) & 0xFFFFFFFF
     seed = (seed * 1664525 + 1013904223) & 0xFFFFFFFF
@@ -98,10 +191,18 @@ def _rand01(seed):
     return ((seed >> 8) & 0xFFFFFF) / 16777215.0
 
 
-def generate_ink_blot(bitmap, seed):
-    """Generate mirrored Rorschach-style blot into a 1-bit bitmap."""
-    w = bitmap.width
-    h = bitmap.height
+def generate_ink_blot(bitmap, seed, w=None, h=None):
+    """Generate mirrored Rorschach-style blot into a 1-bit bitmap.
+    w/h limit it to the top-left region of a larger (pooled) bitmap."""
+    for _ in ink_blot_rows(bitmap, seed, w, h):
+        pass
+
+
+def ink_blot_rows(bitmap, seed, w=None, h=None):
+    """Same as generate_ink_blot, but yields after each row so the work can be
+    spread across idle time in the main loop."""
+    w = bitmap.width if w is None else w
+    h = bitmap.height if h is None else h
     half_w = w // 2
 
     blob_count = 8 + int(_rand01(_mix_seed(seed, 0xA5A5)) * 6)  # 8..13
@@ -150,265 +251,267 @@ def generate_ink_blot(bitmap, seed):
             mirror_x = w - 1 - x
             bitmap[x, y] = bit
             bitmap[mirror_x, y] = bit
+        yield y
 
 
-def render_image(binary_data, width, height, prompt_text=""):
-    """Render 1-bit packed binary image data to e-ink display with stacked layout:
+def compose_frame(screen_bitmap, binary_data, width, height, prompt_text=""):
+    """Compose the stacked ink-blot layout into a full-screen 2-colour bitmap.
     - Top: image region (center-cropped from source)
     - Bottom: prompt text region
+
+    This is a generator that yields between stages so the playlist can build the
+    next frame in idle time; render_image simply drains it.
     """
-    try:
-        print(f"Rendering image to e-ink: {width}x{height}, data length: {len(binary_data)} bytes")
-        if prompt_text:
-            print(f"Prompt text: {prompt_text[:50]}...")
-        
-        # Initialize e-ink display (force reinit to reset driver's refresh timer)
-        eink = init_eink_display(force_reinit=True)
-        
-        expected_bytes = (width * height + 7) // 8  # Ceiling division
-        if len(binary_data) < expected_bytes:
-            print(f"Warning: Expected {expected_bytes} bytes, got {len(binary_data)}")
-        
-        # Get ACTUAL display dimensions (accounts for rotation)
-        # Don't hardcode - query from the display object
-        display_width = eink.width
-        display_height = eink.height
-        print(f"Actual display dimensions: {display_width}x{display_height}")
-        
-        # Margins for cleaner look
-        MARGIN = 6  # Pixels of margin around content
-        
-        # Always use a stacked layout for the ink-blot style:
-        # image on top, text at the bottom.
-        # Keep a guaranteed text band when prompt text is present.
-        min_text_band = 30 if prompt_text else 0
-        max_text_band = 44
-        text_height = min(max_text_band, min_text_band + (len(prompt_text) // 24) * 8)
-        text_height = min(text_height, max(0, display_height - MARGIN * 3 - 24))
-
-        image_width = display_width - MARGIN * 2
-        image_height = display_height - text_height - MARGIN * 3
-        image_height = max(24, image_height)
-
-        text_width = display_width - MARGIN * 2
-        image_x = MARGIN
-        image_y = MARGIN
-        text_area_x = MARGIN
-        # Nudge text band slightly lower to better align with panel optics.
-        text_area_y = image_y + image_height + MARGIN + 2
-        layout = "stacked"
-        
-        print(f"Layout: {layout}, image area: {image_width}x{image_height} at ({image_x},{image_y}), text area: {text_width}x{text_height} at ({text_area_x},{text_area_y})")
-        
-        # Ensure image dimensions match expected square size
-        # Crop to fit the 122x122 square area
-        actual_width = min(width, image_width)
-        actual_height = min(height, image_height)
-        
-        print(f"Original image: {width}x{height}, displaying: {actual_width}x{actual_height} in {image_width}x{image_height} area")
-        
-        # Create bitmap for the image (2 colors = 1 bit per pixel, but value_count=2)
-        img_bitmap = displayio.Bitmap(actual_width, actual_height, 2)
-        
-        # Create palette: [0] = White, [1] = Black
-        img_palette = displayio.Palette(2)
-        img_palette[0] = 0xFFFFFF  # White
-        img_palette[1] = 0x000000  # Black
-        
-        # Build a deterministic seed from payload+prompt and generate a mirrored ink blot.
-        seed = _mix_seed(0xC0FFEE, len(binary_data))
-        for b in binary_data[:128]:
-            seed = _mix_seed(seed, b)
-        for ch in prompt_text[:96]:
-            seed = _mix_seed(seed, ord(ch))
-        generate_ink_blot(img_bitmap, seed)
-        print(f"Generated ink blot in {actual_width}x{actual_height} area (seed={seed})")
-        
-        # Create a full-screen bitmap filled with white (to prevent tiling)
-        screen_bitmap = displayio.Bitmap(display_width, display_height, 2)
-        # Fill with white (palette index 0) using x,y indexing
-        for y in range(display_height):
-            for x in range(display_width):
-                screen_bitmap[x, y] = 0
-        
-        # Copy the image bitmap to the image area (position set by layout)
-        # Center the image within the image area
-        center_x_offset = max(0, (image_width - actual_width) // 2)
-        center_y_offset = max(0, (image_height - actual_height) // 2)
-        
-        # Ensure we don't exceed bounds
-        copy_height = min(actual_height, image_height - center_y_offset)
-        copy_width = min(actual_width, image_width - center_x_offset)
-        
-        # Copy using explicit (x, y) coordinates
-        # Image starts at (image_x, image_y) set by layout
-        for y in range(copy_height):
-            for x in range(copy_width):
-                src_x = x
-                src_y = y
-                dst_x = image_x + center_x_offset + x
-                dst_y = image_y + center_y_offset + y
-                if dst_y < display_height and dst_x < display_width:
-                    screen_bitmap[dst_x, dst_y] = img_bitmap[src_x, src_y]
-        
-        print(f"Image placed: {actual_width}x{actual_height} at ({image_x + center_x_offset}, {image_y + center_y_offset})")
-        
-        # Render text in the text area if prompt is provided
-        # text_area_x and text_area_y are already set by the layout logic above
-        if prompt_text:
-            try:
-                # Word wrap text to fit within text area
-                # Estimate: terminalio.FONT is about 6 pixels wide per character
-                chars_per_line = max(1, text_width // 6)  # Rough estimate
-                max_lines = max(1, text_height // 8)  # Rough estimate for line height
-                max_chars = chars_per_line * max_lines
-                
-                # Simple word wrapping function
-                def wrap_text(text, max_width_chars):
-                    words = text.split()
-                    lines = []
-                    current_line = ""
-                    
-                    for word in words:
-                        # If adding this word would exceed the line, start a new line
-                        test_line = current_line + (" " if current_line else "") + word
-                        if len(test_line) <= max_width_chars:
-                            current_line = test_line
+    expected_bytes = (width * height + 7) // 8  # Ceiling division
+    if len(binary_data) < expected_bytes:
+        print(f"Warning: Expected {expected_bytes} bytes, got {len(binary_data)}")
+
+    display_width = screen_bitmap.width
+    display_height = screen_bitmap.height
+    print(f"Actual display dimensions: {display_width}x{display_height}")
+
+    # Margins for cleaner look
+    MARGIN = EINK_MARGIN
+
+    # Always use a stacked layout for the ink-blot style:
+    # image on top, text at the bottom.
+    # Keep a guaranteed text band when prompt text is present.
+    min_text_band = 30 if prompt_text else 0
+    max_text_band = 44
+    text_height = min(max_text_band, min_text_band + (len(prompt_text) // 24) * 8)
+    text_height = min(text_height, max(0, display_height - MARGIN * 3 - 24))
+
+    image_width = display_width - MARGIN * 2
+    image_height = display_height - text_height - MARGIN * 3
+    image_height = max(24, image_height)
+
+    text_width = display_width - MARGIN * 2
+    image_x = MARGIN
+    image_y = MARGIN
+    text_area_x = MARGIN
+    # Nudge text band slightly lower to better align with panel optics.
+    text_area_y = image_y + image_height + MARGIN + 2
+    layout = "stacked"
+
+    print(f"Layout: {layout}, image area: {image_width}x{image_height} at ({image_x},{image_y}), text area: {text_width}x{text_height} at ({text_area_x},{text_area_y})")
+
+    # Ensure image dimensions match expected square size
+    # Crop to fit the 122x122 square area
+    actual_width = min(width, image_width)
+    actual_height = min(height, image_height)
+
+    print(f"Original image: {width}x{height}, displaying: {actual_width}x{actual_height} in {image_width}x{image_height} area")
+
+    # Pooled scratch bitmap for the blot; only its top-left actual_width x
+    # actual_height region is used
+    img_bitmap = render_pool.scratch
+
+    # Build a deterministic seed from payload+prompt and generate a mirrored ink blot.
+    seed = _mix_seed(0xC0FFEE, len(binary_data))
+    for b in binary_data[:128]:
+        seed = _mix_seed(seed, b)
+    for ch in prompt_text[:96]:
+        seed = _mix_seed(seed, ord(ch))
+    for _ in ink_blot_rows(img_bitmap, seed, actual_width, actual_height):
+        yield
+    print(f"Generated ink blot in {actual_width}x{actual_height} area (seed={seed})")
+
+    # Fill the full-screen bitmap with white (palette index 0) to prevent tiling
+    screen_bitmap.fill(0)
+    yield
+
+    # Copy the image bitmap to the image area (position set by layout)
+    # Center the image within the image area
+    center_x_offset = max(0, (image_width - actual_width) // 2)
+    center_y_offset = max(0, (image_height - actual_height) // 2)
+
+    # Ensure we don't exceed bounds
+    copy_height = min(actual_height, image_height - center_y_offset)
+    copy_width = min(actual_width, image_width - center_x_offset)
+
+    # Copy using explicit (x, y) coordinates, one row per step
+    # Image starts at (image_x, image_y) set by layout
+    for y in range(copy_height):
+        for x in range(copy_width):
+            src_x = x
+            src_y = y
+            dst_x = image_x + center_x_offset + x
+            dst_y = image_y + center_y_offset + y
+            if dst_y < display_height and dst_x < display_width:
+                screen_bitmap[dst_x, dst_y] = img_bitmap[src_x, src_y]
+        yield
+
+    print(f"Image placed: {actual_width}x{actual_height} at ({image_x + center_x_offset}, {image_y + center_y_offset})")
+
+    # Render text in the text area if prompt is provided
+    # text_area_x and text_area_y are already set by the layout logic above
+    if prompt_text:
+        try:
+            # Word wrap text to fit within text area
+            # Estimate: terminalio.FONT is about 6 pixels wide per character
+            chars_per_line = max(1, text_width // 6)  # Rough estimate
+            max_lines = max(1, text_height // 8)  # Rough estimate for line height
+            max_chars = chars_per_line * max_lines
+
+            # Simple word wrapping function
+            def wrap_text(text, max_width_chars):
+                words = text.split()
+                lines = []
+                current_line = ""
+
+                for word in words:
+                    # If adding this word would exceed the line, start a new line
+                    test_line = current_line + (" " if current_line else "") + word
+                    if len(test_line) <= max_width_chars:
+                        current_line = test_line
+                    else:
+                        if current_line:
+                            lines.append(current_line)
+                        # If word itself is too long, truncate it
+                        if len(word) > max_width_chars:
+                            current_line = word[:max_width_chars]
                         else:
-                            if current_line:
-                                lines.append(current_line)
-                            # If word itself is too long, truncate it
-                            if len(word) > max_width_chars:
-                                current_line = word[:max_width_chars]
-                            else:
-                                current_line = word
-                    
-                    if current_line:
-                        lines.append(current_line)
-                    
-                    return "\n".join(lines[:max_lines])  # Limit to max_lines
-                
-                wrapped_text = wrap_text(prompt_text[:max_chars], chars_per_line)
-                print(f"Rendering text ({len(wrapped_text)} chars, {wrapped_text.count(chr(10))+1} lines): '{wrapped_text[:50]}...'")
-                
-                # Create bitmap label for text rendering with wrapped text
-                text_label = bitmap_label.Label(
-                    terminalio.FONT,
-                    text=wrapped_text,
-                    color=0x000000,
-                )
-                
-                # bitmap_label.Label is a TileGrid - access its bitmap
-                label_bitmap = text_label.bitmap
-                
-                if label_bitmap:
-                    # Get dimensions - limit to text area size
-                    label_w = min(label_bitmap.width, text_width)
-                    label_h = min(label_bitmap.height, text_height)
-                    
-                    print(f"Label bitmap: {label_bitmap.width}x{label_bitmap.height}, using {label_w}x{label_h}")
-                    
-                    # Bottom-align text in the text band.
-                    text_y_offset = max(0, text_height - label_h)
-                    # Center text horizontally in the text area (if text is narrower than text_width)
-                    text_x_offset = max(0, (text_width - label_w) // 2)
-                    
-                    print(f"Text centered: x_offset={text_x_offset}, y_offset={text_y_offset}")
-                    
-                    # Copy label bitmap to the text area of screen bitmap, centered
-                    # Ensure we don't exceed bounds
-                    copy_h = min(label_h, text_height - text_y_offset)
-                    copy_w = min(label_w, text_width - text_x_offset)
-                    
-                    # Use explicit (x, y) coordinates for clarity
-                    for y in range(copy_h):
-                        for x in range(copy_w):
-                            dst_y = text_area_y + text_y_offset + y
-                            dst_x = text_area_x + text_x_offset + x
-                            if dst_y < display_height and dst_x < display_width:
-                                # Try to access label_bitmap with (x, y) or linear indexing
-                                try:
-                                    pixel_val = label_bitmap[x, y]
-                                except (TypeError, IndexError):
-                                    # Fallback to linear indexing
-                                    src_idx = y * label_bitmap.width + x
-                                    if src_idx < label_bitmap.width * label_bitmap.height:
-                                        pixel_val = label_bitmap[src_idx]
-                                    else:
-                                        pixel_val = 0
-                                
-                                # 0 = white/background, non-zero = black/foreground
-                                if pixel_val != 0:
-                                    screen_bitmap[dst_x, dst_y] = 1  # Black
+                            current_line = word
+
+                if current_line:
+                    lines.append(current_line)
+
+                return "\n".join(lines[:max_lines])  # Limit to max_lines
+
+            wrapped_text = wrap_text(prompt_text[:max_chars], chars_per_line)
+            print(f"Rendering text ({len(wrapped_text)} chars, {wrapped_text.count(chr(10))+1} lines): '{wrapped_text[:50]}...'")
+
+            # Pooled bitmap label for text rendering with wrapped text
+            text_label = render_pool.text_label(terminalio.FONT, wrapped_text)
+
+            # bitmap_label.Label is a TileGrid - access its bitmap
+            label_bitmap = text_label.bitmap
+
+            if label_bitmap:
+                # Get dimensions - limit to text area size
+                label_w = min(label_bitmap.width, text_width)
+                label_h = min(label_bitmap.height, text_height)
+
+                print(f"Label bitmap: {label_bitmap.width}x{label_bitmap.height}, using {label_w}x{label_h}")
+
+                # Bottom-align text in the text band.
+                text_y_offset = max(0, text_height - label_h)
+                # Center text horizontally in the text area (if text is narrower than text_width)
+                text_x_offset = max(0, (text_width - label_w) // 2)
+
+                print(f"Text centered: x_offset={text_x_offset}, y_offset={text_y_offset}")
+
+                # Copy label bitmap to the text area of screen bitmap, centered
+                # Ensure we don't exceed bounds
+                copy_h = min(label_h, text_height - text_y_offset)
+                copy_w = min(label_w, text_width - text_x_offset)
+
+                # Use explicit (x, y) coordinates for clarity
+                for y in range(copy_h):
+                    for x in range(copy_w):
+                        dst_y = text_area_y + text_y_offset + y
+                        dst_x = text_area_x + text_x_offset + x
+                        if dst_y < display_height and dst_x < display_width:
+                            # Try to access label_bitmap with (x, y) or linear indexing
+                            try:
+                                pixel_val = label_bitmap[x, y]
+                            except (TypeError, IndexError):
+                                # Fallback to linear indexing
+                                src_idx = y * label_bitmap.width + x
+                                if src_idx < label_bitmap.width * label_bitmap.height:
+                                    pixel_val = label_bitmap[src_idx]
                                 else:
-                                    screen_bitmap[dst_x, dst_y] = 0  # White
-                    
-                    print(f"Text rendered in text area: {label_w}x{label_h} at ({text_area_x}, {text_area_y})")
-                else:
-                    print("Warning: Could not access label bitmap, text will not be displayed")
-                    
-            except Exception as text_err:
-                print(f"Text rendering error: {text_err}")
-                print(f"Error type: {type(text_err).__name__}")
-
-        # Keep any rows below the text band explicitly white to avoid artifacts.
-        bottom_start = min(display_height, text_area_y + text_height)
-        for y in range(bottom_start, display_height):
-            for x in range(display_width):
-                screen_bitmap[x, y] = 0
-        
-        print(f"Screen bitmap size: {screen_bitmap.width}x{screen_bitmap.height}")
-        print(f"Display size: {display_width}x{display_height}")
-        
-        # Create TileGrid for the full-screen bitmap
-        # Explicitly set to 1x1 tiles to prevent any tiling behavior
-        screen_tile = displayio.TileGrid(
-            screen_bitmap, 
-            pixel_shader=img_palette,
-            width=1,
-            height=1,
-            tile_width=screen_bitmap.width,
-            tile_height=screen_bitmap.height,
-            x=0,
-            y=0
-        )
-        
-        # Create a new group for the e-ink display (clear any previous content)
-        # Match test-eink.py pattern exactly
-        eink_group = displayio.Group()
-        # Remove any existing items
-        while len(eink_group) > 0:
-            eink_group.pop()
-        # Add only our single full-screen tile
-        eink_group.append(screen_tile)
-        
-        # Set root group on e-ink display - match test-eink.py pattern
-        eink.root_group = eink_group
-        
+                                    pixel_val = 0
+
+                            # 0 = white/background, non-zero = black/foreground
+                            if pixel_val != 0:
+                                screen_bitmap[dst_x, dst_y] = 1  # Black
+                            else:
+                                screen_bitmap[dst_x, dst_y] = 0  # White
+                    yield
+
+                print(f"Text rendered in text area: {label_w}x{label_h} at ({text_area_x}, {text_area_y})")
+            else:
+                print("Warning: Could not access label bitmap, text will not be displayed")
+
+        except Exception as text_err:
+            print(f"Text rendering error: {text_err}")
+            print(f"Error type: {type(text_err).__name__}")
+
+    # Keep any rows below the text band explicitly white to avoid artifacts.
+    bottom_start = min(display_height, text_area_y + text_height)
+    for y in range(bottom_start, display_height):
+        for x in range(display_width):
+            screen_bitmap[x, y] = 0
+
+    print(f"Screen bitmap size: {screen_bitmap.width}x{screen_bitmap.height}")
+    print(f"Display size: {display_width}x{display_height}")
+
+
+def show_frame(frame, wait=True):
+    """Put a composed pooled frame on the e-ink display and refresh it.
+
+    With wait=False the call returns right after the refresh command so the main
+    loop keeps servicing BLE; the caller must leave the panel alone for
+    EINK_REFRESH_WAIT seconds.
+    """
+    eink = init_eink_display()
+    # The frame's group holds a single full-screen 1x1 TileGrid (no tiling)
+    eink.root_group = frame.group
+    render_pool.mark_shown(frame)
+
+    if wait:
         # Small delay to ensure framebuffer is fully written before refresh
         # This can help prevent partial/incomplete image issues
         time.sleep(0.5)
-        print("Framebuffer ready, starting refresh...")
-        
-        # Refresh the e-ink display - match test-eink.py pattern exactly
-        eink.refresh()
-        print("Refresh command sent")
-        
-        print(f"Split layout rendered: {width}x{height} image + text")
-        
+    print("Framebuffer ready, starting refresh...")
+
+    # Refresh the e-ink display - match test-eink.py pattern exactly
+    eink.refresh()
+    print("Refresh command sent")
+
+    if wait:
         # Wait for the physical refresh to complete
         # E-ink displays need time for the physical update (electrophoretic particles moving)
         # The SSD1680 typically takes 3-5 seconds for a full refresh
         # Using a longer wait to ensure complete refresh
-        refresh_wait = 6
-        print(f"Waiting {refresh_wait}s for physical e-ink refresh to complete...")
-        time.sleep(refresh_wait)
+        print(f"Waiting {EINK_REFRESH_WAIT}s for physical e-ink refresh to complete...")
+        time.sleep(EINK_REFRESH_WAIT)
         print("E-ink refresh complete")
-        
+
+
+def render_image(binary_data, width, height, prompt_text=""):
+    """Render 1-bit packed binary image data to e-ink display with stacked layout
+    (see compose_frame) and block until the panel has refreshed."""
+    try:
+        print(f"Rendering image to e-ink: {width}x{height}, data length: {len(binary_data)} bytes")
+        if prompt_text:
+            print(f"Prompt text: {prompt_text[:50]}...")
+
+        # Initialize e-ink display (force reinit to reset driver's refresh timer)
+        init_eink_display(force_reinit=True)
+
+        # The blot scratch and text label are shared with the playlist
+        # composer; a frame it has half-composed must start over afterwards
+        if playlist_state["composer"] is not None:
+            playlist_state["composer"] = None
+            playlist_state["entry"] = None
+
+        frame = render_pool.acquire_frame()
+        try:
+            for _ in compose_frame(frame.bitmap, binary_data, width, height, prompt_text):
+                pass
+            show_frame(frame)
+        finally:
+            render_pool.release_frame(frame)
+        print(f"Split layout rendered: {width}x{height} image + text")
+        heap_stats.sample()
+        print(f"Heap after render: free={heap_stats.free} largest={heap_stats.largest} min_largest={heap_stats.min_largest}")
+
         # Re-initialize on-board display after e-ink is done
         # (Note: This will break the on-board display until next reboot, but e-ink works)
         # For now, we'll leave it - the e-ink display is what matters for images
-            
+
     except Exception as e:
         print(f"Image render error: {e}")
         print(f"Error type: {type(e).__name__}")
@@ -427,49 +530,66 @@ def parse_color(h, default=0x00FFFF):
     return default
 
 
+# Render/receive buffers, allocated once from the e-ink geometry
+_frame_w, _frame_h = eink_frame_size()
+render_pool = RenderPool(
+    _frame_w,
+    _frame_h,
+    _frame_w - EINK_MARGIN * 2,
+    _frame_h - EINK_MARGIN * 3,
+    RX_BUFFER_LEN,
+)
+heap_stats = HeapStats()
+heap_stats.sample()
+boot_mark("buffers")
+
+# Battery/temperature sampler; "bat" is answered from its cache
+telemetry = default_telemetry()
+boot_mark("telemetry")
+
 # Image handling state
 image_state = {
     "receiving": False,
     "width": 0,
     "height": 0,
     "expected_len": 0,
-    "data": bytearray(),
+    "data": render_pool.rx,  # pooled receive buffer; only the first "rx" bytes are valid
+    "rx": 0,  # bytes received so far
     "last_chunk_time": 0,  # Track when last chunk was received
     "prompt": "",  # Store prompt text for split layout
     "transfer_id": None,  # Transfer identifier used by rn-ble-test ACK flow
     "last_progress_sent": -1,  # Last progress % reported to app
 }
 
+# Interrupted transfers kept for a grace period so the app can resume them
+partials = PartialCache()
 
-# ---------- BLE ----------
-BLE_DEVICE_NAME = "FaustoBD"
-BLE_ADV_INTERVAL = 0.1
-
-
-def ble_log(message):
-    print(f"[BLE {time.monotonic():.3f}] {message}")
 
+def received_data():
+    """Zero-copy view of the bytes received so far."""
+    return memoryview(image_state["data"])[:image_state["rx"]]
 
-ble = BLERadio()
-# Sometimes BLE holds onto an old name or connection.
-# Force name setting:
-try:
-    ble.name = BLE_DEVICE_NAME
-    ble_log(f"Set BLE name to: {ble.name}")
-except Exception as e:
-    ble_log(f"Warning: Could not set BLE name: {e}")
 
-uart = UARTService()
-advertisement = ProvideServicesAdvertisement(uart)
-# Use only a complete_name to keep the advertising payload simple and compatible.
-# If you run into size issues, prefer a shorter complete_name rather than also
-# setting short_name, which can increase packet size and cause truncation.
-advertisement.complete_name = BLE_DEVICE_NAME
-# If you really need a short name, you can enable this, but try leaving it
-# disabled first for best compatibility:
-# advertisement.short_name = "Fausto"
-
-ble_log(f"BLE initialized, ready to advertise as {BLE_DEVICE_NAME}")
+def reset_image_state(park=False):
+    """Clear the receive state. With park=True an unfinished transfer that has an
+    id is kept in `partials` so the sender can {"t":"resume"} it later."""
+    if park and image_state["receiving"] and image_state["transfer_id"]:
+        if partials.park(
+            image_state["transfer_id"],
+            image_state["width"],
+            image_state["height"],
+            image_state["expected_len"],
+            image_state["prompt"],
+            bytes(received_data()),  # the pooled buffer is reused, so copy
+            time.monotonic(),
+        ):
+            print(f"Parked partial transfer {image_state['transfer_id']} at {image_state['rx']}B")
+    image_state["receiving"] = False
+    image_state["rx"] = 0
+    image_state["prompt"] = ""
+    image_state["transfer_id"] = None
+    image_state["last_chunk_time"] = 0
+    image_state["last_progress_sent"] = -1
 
 
 def send_uart_json(payload):
@@ -479,36 +599,561 @@ def send_uart_json(payload):
     except Exception as e:
         print("UART JSON write failed:", repr(e), payload)
 
-while True:
-    ble_log("WAITING for connection")
-    set_text("Waiting for BLE...", 0x00FFFF)
 
-    # Always try to stop any prior advertising; ignore errors if it wasn't active.
+# Per-connection link settings; "encoding" is negotiated with {"t":"hello"}.
+# "frame_rest" holds the start of a bin1 frame cut off at the end of a read.
+link_state = {"encoding": "json", "frame_rest": b""}
+FRAME_REST_MAX = 1024  # a partial frame larger than this is dropped
+
+
+def send_uart_msg(payload):
+    """Send a reply in the negotiated encoding. Messages without a binary form
+    (and every message on a JSON link) go out as JSON."""
+    if link_state["encoding"] == uart_codec.ENCODING:
+        try:
+            frame = uart_codec.encode(payload)
+        except Exception as e:
+            # A value out of the frame's range; JSON can still carry it
+            print("UART frame encode failed, sending JSON:", repr(e), payload)
+            frame = None
+        if frame is not None:
+            try:
+                uart.write(frame)
+            except Exception as e:
+                print("UART frame write failed:", repr(e), payload)
+            return
+    send_uart_json(payload)
+
+
+def resume_transfer(transfer_id, now):
+    """Answer {"t":"resume","id":...} with the committed offset of a parked
+    transfer and continue receiving it, or ok=0 so the sender starts over.
+    Returns the reply."""
+    partial = partials.take(transfer_id, now)
+    if partial is None:
+        print(f"No partial transfer to resume for id={transfer_id}")
+        return {"t": "ack", "id": transfer_id, "st": "resume", "ok": 0, "rx": 0}
+
+    progress = (len(partial.data) * 100) // partial.expected_len
+    image_state["receiving"] = True
+    image_state["width"] = partial.width
+    image_state["height"] = partial.height
+    image_state["expected_len"] = partial.expected_len
+    image_state["prompt"] = partial.prompt
+    image_state["transfer_id"] = transfer_id
+    image_state["data"][:len(partial.data)] = partial.data
+    image_state["rx"] = len(partial.data)
+    image_state["last_chunk_time"] = now
+    image_state["last_progress_sent"] = progress - progress % 10
+
+    print(f"Resuming transfer {transfer_id} at {len(partial.data)}/{partial.expected_len} bytes")
+    queue_text(f"Resuming: {progress}%", 0xFFFF00)
+    return {
+        "t": "ack",
+        "id": transfer_id,
+        "st": "resume",
+        "ok": 1,
+        "rx": len(partial.data),
+        "len": partial.expected_len,
+    }
+
+
+# ---------- PLAYLIST ----------
+# Stored images rotated on the e-ink panel without a phone connected.
+# The next frame is composed a few steps at a time from the main loop so a
+# rotation is only a refresh.
+PLAYLIST_COMPOSE_STEPS = 2  # compose_frame steps per main-loop tick
+
+playlist = Playlist()
+if playlist.load() and len(playlist):
+    playlist.start(time.monotonic())
+    print(f"Playlist loaded: {len(playlist)} images every {playlist.interval}s")
+
+boot_mark("playlist")
+
+last_image = None  # (width, height, data, prompt) of the last completed transfer
+playlist_state = {
+    "entry": None,  # playlist entry the frame below is (being) composed for
+    "frame": None,  # framebuffer for that entry
+    "composer": None,  # compose_frame generator, None once the frame is ready
+    "busy_until": 0,  # panel is mid-refresh until this monotonic time
+}
+
+
+def service_playlist(now):
+    """Compose the next playlist frame in idle time and rotate when it is due.
+
+    Each call runs at most PLAYLIST_COMPOSE_STEPS compose steps or one
+    non-blocking refresh, so it is safe to call from the BLE loops.
+    """
+    if not playlist.active or now < playlist_state["busy_until"]:
+        return
+    entry = playlist.peek_next()
+    if entry is None:
+        return
+
+    if playlist_state["entry"] is not entry:
+        # The frame on screen stays untouched; compose into a free pooled one.
+        render_pool.release_frame(playlist_state["frame"])
+        playlist_state["frame"] = render_pool.acquire_frame()
+        playlist_state["composer"] = compose_frame(
+            playlist_state["frame"].bitmap, entry.data, entry.width, entry.height, entry.prompt
+        )
+        playlist_state["entry"] = entry
+
+    composer = playlist_state["composer"]
+    if composer is not None:
+        try:
+            for _ in range(PLAYLIST_COMPOSE_STEPS):
+                next(composer)
+        except StopIteration:
+            playlist_state["composer"] = None
+        return
+
+    if not playlist.due(now):
+        return
+    # Wait out the driver's refresh guard instead of tripping it
+    too_soon = getattr(eink_display, "time_to_refresh", 0)
+    if too_soon > 0:
+        playlist.next_due = now + too_soon
+        return
     try:
-        ble.stop_advertising()
-        ble_log("Ensured advertising is stopped before starting")
+        show_frame(playlist_state["frame"], wait=False)
     except Exception as e:
-        ble_log(f"Note: stop_advertising (pre-start) ignored: {e}")
+        # Most likely the driver's "refresh too soon" guard; try again later.
+        print("Playlist refresh failed:", repr(e))
+        playlist.next_due = now + EINK_REFRESH_WAIT
+        return
+    playlist.advance(now)
+    playlist_state["busy_until"] = now + EINK_REFRESH_WAIT
+    heap_stats.sample()
+
+
+def handle_playlist_command(msg, now):
+    """Apply a {"t":"pl","op":...} edit and return the playlist status reply.
 
-    # Start advertising with error handling
+    ops: add (last received image), del {"i"}, clr, int {"s"}, ord {"v": "seq" |
+    "shuf" | [indices]}, on, off, ls
+    """
+    op = msg.get("op", "ls")
     try:
-        ble.start_advertising(advertisement, interval=BLE_ADV_INTERVAL)
-        ble_log(f"Started advertising name={BLE_DEVICE_NAME}, interval={BLE_ADV_INTERVAL}s")
-        # Give advertising a moment to start broadcasting
-        time.sleep(0.1)
+        if op == "add":
+            if last_image is None:
+                raise ValueError("no image received yet")
+            playlist.add(*last_image)
+        elif op == "del":
+            playlist.remove(int(msg.get("i", -1)))
+        elif op == "clr":
+            playlist.clear()
+        elif op == "int":
+            playlist.set_interval(msg.get("s", 0))
+        elif op == "ord":
+            order = msg.get("v", "seq")
+            if isinstance(order, list):
+                playlist.set_order(ORDER_CUSTOM, order)
+            else:
+                playlist.set_order(order)
+        elif op == "on":
+            if not playlist.start(now):
+                raise ValueError("playlist empty")
+        elif op == "off":
+            playlist.stop()
+        elif op != "ls":
+            raise ValueError("unknown op")
     except Exception as e:
-        ble_log(f"Failed to start advertising: {e}")
-        set_text("Adv error!", 0xFF0000)
-        time.sleep(2)  # Wait longer before retrying on error
-        continue
+        print("Playlist command failed:", op, repr(e))
+        return {"t": "pl", "ok": 0, "err": str(e)}
+
+    if op in ("add", "del", "clr", "ord"):
+        playlist_state["entry"] = None  # order changed; recompose next frame
+    if op in ("add", "del", "clr", "int", "ord"):
+        playlist.save()
+    status = playlist.status()
+    status["ok"] = 1
+    return status
+
+
+def check_image_timeout(now):
+    """Give up on (and park) a transfer that has had no data for
+    IMAGE_RX_TIMEOUT seconds. Returns True if it timed out."""
+    last = image_state["last_chunk_time"]
+    if image_state["receiving"] and last > 0 and now - last > IMAGE_RX_TIMEOUT:
+        print("Image receive timeout! Resetting...")
+        reset_image_state(park=True)
+        set_text("Timeout!", 0xFF0000)
+        return True
+    return False
+
+
+def receive_image_chunk(raw):
+    """Append one raw UART read to the image being received; report progress and
+    render once complete."""
+    global last_image
+    try:
+        current_time = time.monotonic()
+
+        if check_image_timeout(current_time):
+            return
+
+        # Process as image chunk
+        # react-native-ble-plx's writeWithoutResponse DECODES base64 before sending
+        # So we receive RAW BINARY data, not base64 strings
+        # Just append the raw bytes directly!
+        # Copy into the pooled buffer; bytes past expected_len are dropped
+        rx = image_state["rx"]
+        take = min(len(raw), image_state["expected_len"] - rx)
+        image_state["data"][rx:rx + take] = memoryview(raw)[:take]
+        image_state["rx"] = rx + take
+
+        # Log progress periodically
+        if image_state["rx"] % 500 < len(raw):
+            print(f"Chunk: {len(raw)}B, total: {image_state['rx']}/{image_state['expected_len']}")
+
+        image_state["last_chunk_time"] = current_time
+
+        # Update progress on display every 10%
+        progress = (image_state["rx"] * 100) // image_state["expected_len"] if image_state["expected_len"] > 0 else 0
+        if progress % 10 == 0 or image_state["rx"] >= image_state["expected_len"]:
+            set_text(f"Receiving: {progress}%", 0xFFFF00)
+        if image_state["transfer_id"] and progress != image_state["last_progress_sent"] and progress % 10 == 0:
+            send_uart_msg({
+                "t": "prog",
+                "id": image_state["transfer_id"],
+                "pct": progress,
+                "rx": image_state["rx"],
+            })
+            image_state["last_progress_sent"] = progress
+
+        # Check if complete
+        if image_state["rx"] >= image_state["expected_len"]:
+            print("Image complete! Rendering...")
+            # Send completion ACK before the long e-ink refresh so the app
+            # does not timeout while the panel is physically updating.
+            if image_state["transfer_id"]:
+                send_uart_msg({
+                    "t": "ack",
+                    "id": image_state["transfer_id"],
+                    "st": "rendering",
+                    "ok": 1,
+                })
+            # Render image to display with prompt text
+            render_ok = True
+            try:
+                render_image(
+                    received_data(),
+                    image_state["width"],
+                    image_state["height"],
+                    image_state["prompt"]
+                )
+            except Exception as render_err:
+                render_ok = False
+                print("Render exception after image complete:", render_err)
+
+            if render_ok:
+                last_image = (
+                    image_state["width"],
+                    image_state["height"],
+                    bytes(received_data()),
+                    image_state["prompt"],
+                )
+                playlist.touch(time.monotonic())
+
+            if image_state["transfer_id"] and not render_ok:
+                send_uart_msg({
+                    "t": "ack",
+                    "id": image_state["transfer_id"],
+                    "st": "render_error",
+                    "ok": 0,
+                })
+            # Reset state
+            reset_image_state()
+    except Exception as e:
+        print("Image decode error:", e)
+        print(f"Error type: {type(e).__name__}")
+        if image_state["transfer_id"]:
+            send_uart_msg({
+                "t": "ack",
+                "id": image_state["transfer_id"],
+                "st": "decode_error",
+                "ok": 0,
+            })
+        reset_image_state()
+        set_text("Image error!", 0xFF0000)
+
+
+# ---------- PREWARM ----------
+# Modules deferred at boot, imported one per idle tick once advertising runs.
+PREWARM_MODULES = ["fourwire", "adafruit_ssd1680", "adafruit_display_text.bitmap_label"]
+
+
+def prewarm_step():
+    """Import the next deferred module so the first render does not pay for it."""
+    if not PREWARM_MODULES:
+        return
+    name = PREWARM_MODULES.pop(0)
+    try:
+        __import__(name)
+    except ImportError as e:
+        print("Prewarm failed:", name, repr(e))
+    boot_mark("prewarm " + name)
+
+
+# ---------- CONTROL MESSAGES ----------
+TEXT_ACK = {"ok": True}
+# Text updates are queued and drawn once per control message (or batch), so a
+# later op in a batch supersedes an earlier one before anything is drawn.
+pending_text = {"text": None, "color": 0x00FFFF}
 
-    # Wait for connection with timeout check
-    connection_timeout = 60  # 60 seconds timeout
+
+def queue_text(t, c=0x00FFFF):
+    pending_text["text"] = t
+    pending_text["color"] = c
+
+
+def flush_text():
+    text = pending_text["text"]
+    if text is not None:
+        pending_text["text"] = None  # a text that fails to draw is not retried
+        set_text(text, pending_text["color"])
+
+
+def start_image_transfer(msg, is_compact_start):
+    """Switch the receive loop to binary for an image_start / {"t":"img"} command.
+    Returns the start ACK (None for legacy starts without a transfer id)."""
+    # ALWAYS reset state when receiving a new image_start
+    # This handles cases where previous transfer was incomplete
+    if image_state["receiving"]:
+        print("Warning: Cancelling previous incomplete transfer")
+
+    # Completely reset all image state
+    image_state["receiving"] = True
+    image_state["width"] = msg.get("w", 0)
+    image_state["height"] = msg.get("h", 0)
+    image_state["expected_len"] = msg.get("len", 0)
+    image_state["prompt"] = msg.get("p", "") if is_compact_start else msg.get("prompt", "")
+    image_state["transfer_id"] = msg.get("id", None) if is_compact_start else None
+    image_state["rx"] = 0  # Reuse the pooled buffer from the start
+    image_state["last_chunk_time"] = time.monotonic()
+    image_state["last_progress_sent"] = -1
+    partials.discard(image_state["transfer_id"])
+
+    # Validate the incoming parameters
+    if (
+        image_state["expected_len"] <= 0
+        or image_state["expected_len"] > RX_BUFFER_LEN
+        or image_state["width"] <= 0
+        or image_state["height"] <= 0
+    ):
+        print(f"Invalid image params: w={image_state['width']}, h={image_state['height']}, len={image_state['expected_len']}")
+        reply = None
+        if image_state["transfer_id"]:
+            reply = {
+                "t": "ack",
+                "id": image_state["transfer_id"],
+                "st": "bad_params",
+                "ok": 0,
+            }
+        image_state["receiving"] = False
+        image_state["transfer_id"] = None
+        queue_text("Invalid image!", 0xFF0000)
+        return reply
+
+    print(f"Image start: {image_state['width']}x{image_state['height']}, {image_state['expected_len']} bytes")
+    if image_state["prompt"]:
+        print(f"Prompt: {image_state['prompt'][:50]}...")
+    print(f"Waiting for {image_state['expected_len']} bytes...")
+    queue_text("Receiving...", 0xFFFF00)
+    if not image_state["transfer_id"]:
+        return None
+    return {
+        "t": "ack",
+        "id": image_state["transfer_id"],
+        "st": "start",
+        "ok": 1,
+        "rx": 0,
+        "len": image_state["expected_len"],
+    }
+
+
+def handle_message(msg):
+    """Execute one decoded control message and return its reply (or None)."""
+    # Check for image command: support both legacy and rn-ble-test compact protocol.
+    is_legacy_start = msg.get("cmd") == "image_start"
+    is_compact_start = msg.get("t") == "img"
+    if is_legacy_start or is_compact_start:
+        return start_image_transfer(msg, is_compact_start)
+
+    if msg.get("t") == "bat":
+        # Cached reply: no sensor I/O here, so fetchBatteryData clears its spinner at once
+        return telemetry.report()
+
+    if msg.get("t") == "resume":
+        return resume_transfer(msg.get("id"), time.monotonic())
+
+    if msg.get("t") == "boot":
+        return {"t": "boot", "st": boot_timing}
+
+    if msg.get("t") == "mem":
+        # Heap watermarks recorded after every render
+        return heap_stats.report()
+
+    if msg.get("t") == "hello":
+        # The sender lists the encodings it understands; replies switch to
+        # bin1 frames for prog/ack/bat/ok. The hello reply itself is JSON.
+        offered = msg.get("enc") or []
+        link_state["encoding"] = uart_codec.ENCODING if uart_codec.ENCODING in offered else "json"
+        return {"t": "hello", "enc": link_state["encoding"]}
+
+    if msg.get("t") == "pl":
+        return handle_playlist_command(msg, time.monotonic())
+
+    # Regular text message
+    txt = msg.get("text") or ""
+    if not isinstance(txt, str):
+        raise ValueError("text must be a string")
+    if not txt:
+        return None
+    queue_text(txt, parse_color(msg.get("color"), 0x00FFFF))
+    return TEXT_ACK
+
+
+def handle_control(s):
+    """Run one line of control text and send a single reply.
+
+    Accepts a JSON object ({"text": "...", "color": "#RRGGBB"}, {"t": ...}), a
+    JSON array of such objects, or {"t":"batch","ops":[...]}. Batched ops run in
+    order, text updates are drawn once at the end and the device answers with
+    one {"t":"batch","ok":..,"n":..,"r":[reply per op]}. Anything that is not
+    JSON is shown as plain text.
+    """
+    try:
+        msg = json.loads(s)
+    except Exception:
+        msg = None
+
+    if isinstance(msg, list):
+        run_ops(msg, batched=True)
+    elif isinstance(msg, dict) and msg.get("t") == "batch":
+        ops = msg.get("ops", [])
+        if not isinstance(ops, list):
+            print("Batch rejected, ops is not a list:", repr(ops))
+            send_uart_json({"t": "batch", "ok": 0, "n": 0, "r": [], "err": "bad_ops"})
+            return
+        run_ops(ops, batched=True)
+    elif isinstance(msg, dict):
+        run_ops([msg])
+    else:
+        run_ops([{"text": s}])
+
+
+def handle_frames(raw):
+    """Run bin1 control frames (see uart_codec). Bytes after an image-start
+    frame in the same read are the first image chunk; a frame cut off at the
+    end of the read is kept until the next one."""
+    link_state["frame_rest"] = b""
+    try:
+        frames, used = uart_codec.decode(raw)
+    except Exception as e:
+        print("Frame decode error:", repr(e))
+        return
+    for msg in frames:
+        run_ops([msg])
+    if used < len(raw):
+        if image_state["receiving"]:
+            receive_image_chunk(raw[used:])
+        elif len(raw) - used > FRAME_REST_MAX:
+            print("Dropping oversized partial frame:", len(raw) - used, "bytes")
+        else:
+            link_state["frame_rest"] = bytes(raw[used:])
+
+
+def run_ops(ops, batched=False):
+    """Execute decoded control ops in order and send a single reply."""
+    replies = []
+    for op in ops:
+        if image_state["receiving"]:
+            # An image start switched the link to binary; nothing may follow it.
+            replies.append({"ok": 0, "err": "after_img"})
+            continue
+        if not isinstance(op, dict):
+            replies.append({"ok": 0, "err": "bad_op"})
+            continue
+        try:
+            replies.append(handle_message(op))
+        except Exception as e:
+            print("Control op failed:", repr(e), op)
+            replies.append({"ok": 0, "err": str(e)})
+    flush_text()
+
+    if batched:
+        ok = all(r is None or r.get("ok", 1) for r in replies)
+        send_uart_json({"t": "batch", "ok": 1 if ok else 0, "n": len(replies), "r": replies})
+    elif replies[0] is TEXT_ACK and link_state["encoding"] == "json":
+        try:
+            uart.write(b'{"ok":true}\n')
+        except Exception as e:
+            print("ACK write failed:", repr(e))
+    elif replies[0] is not None:
+        send_uart_msg(replies[0])
+
+
+# ---------- UART TRACE ----------
+# Set to a CIRCUITPY path (e.g. "/uart.trc") to record every raw UART read with
+# its timestamp for tools/uart_replay.py. Needs a writable filesystem.
+UART_TRACE_PATH = None
+rx_trace = None
+if UART_TRACE_PATH:
+    from uart_trace import TraceWriter, CONNECT as TRACE_CONNECT, DISCONNECT as TRACE_DISCONNECT
+
+    rx_trace = TraceWriter(UART_TRACE_PATH, time.monotonic())
+
+boot_mark("ready")
+
+while True:
+    ble_log("WAITING for connection")
+    set_text("Waiting for BLE...", 0x00FFFF)
+
+    if boot_advertising:
+        # Advertising has been running since early boot; keep it
+        boot_advertising = False
+    else:
+        # Always try to stop any prior advertising; ignore errors if it wasn't active.
+        try:
+            ble.stop_advertising()
+            ble_log("Ensured advertising is stopped before starting")
+        except Exception as e:
+            ble_log(f"Note: stop_advertising (pre-start) ignored: {e}")
+
+        # Start advertising with error handling
+        adv_interval = adv_policy.interval(time.monotonic())
+        try:
+            ble.start_advertising(advertisement, interval=adv_interval)
+            ble_log(f"Started advertising name={BLE_DEVICE_NAME}, interval={adv_interval}s")
+            # Give advertising a moment to start broadcasting
+            time.sleep(0.1)
+        except Exception as e:
+            ble_log(f"Failed to start advertising: {e}")
+            set_text("Adv error!", 0xFF0000)
+            time.sleep(2)  # Wait longer before retrying on error
+            continue
+
+    # Wait for connection; restart advertising when the policy backs off the
+    # interval, or periodically to re-arm a stuck advertiser
     start_wait = time.monotonic()
+    adv_change_at = adv_policy.next_change(start_wait)
     while not ble.connected:
-        if time.monotonic() - start_wait > connection_timeout:
+        now = time.monotonic()
+        if adv_change_at is not None and now >= adv_change_at:
+            ble_log("Advertising backoff - restarting with a slower interval")
+            break
+        if now - start_wait > BLE_ADV_RESTART:
             ble_log("Connection timeout - restarting advertising")
             break  # Break out to restart advertising
+        service_playlist(time.monotonic())
+        prewarm_step()
+        telemetry.poll()
+        if len(partials):
+            partials.expire(time.monotonic())
         time.sleep(0.1)
 
     # If we broke due to timeout, restart the loop and re-advertise
@@ -529,19 +1174,30 @@ while True:
     ble_log("CONNECTED")
     set_text("Connected ✅", 0x00FF00)
 
+    if rx_trace:
+        rx_trace.event(TRACE_CONNECT, time.monotonic())
+    link_error = False
+    # adafruit_ble's UARTService has nothing to block on, so the poller sleeps:
+    # not at all while data keeps arriving, backing off to 0.2 s once it stops
+    # (also when a transfer stalls).
+    poller = AdaptivePoller(busy_window=POLL_BUSY_WINDOW)
     while ble.connected:
         if uart.in_waiting:
             try:
                 raw = uart.read(uart.in_waiting)
             except Exception as e:
                 print("UART read error:", repr(e))
+                link_error = True
                 break
 
             if not raw:
                 continue
+            poller.note_data()
+            if rx_trace:
+                rx_trace.read(raw, time.monotonic())
 
             # Debug: log what we're receiving
-            print(f"RX: {len(raw)}B, recv={image_state['receiving']}, data={len(image_state['data']) if image_state['receiving'] else 0}")
+            print(f"RX: {len(raw)}B, recv={image_state['receiving']}, data={image_state['rx'] if image_state['receiving'] else 0}")
 
             # If receiving image data, handle binary chunks
             if image_state["receiving"]:
@@ -550,122 +1206,28 @@ while True:
                 is_new_command = False
                 try:
                     test_str = raw.decode("utf-8").strip()
-                    if test_str.startswith("{") and ('"cmd"' in test_str or '"t"' in test_str):
+                    if test_str[:1] in ("{", "[") and ('"cmd"' in test_str or '"t"' in test_str):
                         print("Detected new command while receiving - resetting state")
-                        image_state["receiving"] = False
-                        image_state["data"] = bytearray()
-                        image_state["prompt"] = ""
-                        image_state["transfer_id"] = None
-                        image_state["last_chunk_time"] = 0
-                        image_state["last_progress_sent"] = -1
+                        reset_image_state(park=True)
                         is_new_command = True
                         # Fall through to JSON processing below
                 except:
                     pass  # Not a JSON command, continue as image data
                 
                 if not is_new_command:
-                    try:
-                        current_time = time.monotonic()
-                        
-                        # Check for timeout (20 seconds without receiving data)
-                        if image_state["last_chunk_time"] > 0:
-                            time_since_last = current_time - image_state["last_chunk_time"]
-                            if time_since_last > 20:
-                                print("Image receive timeout! Resetting...")
-                                image_state["receiving"] = False
-                                image_state["data"] = bytearray()
-                                image_state["prompt"] = ""
-                                image_state["transfer_id"] = None
-                                image_state["last_chunk_time"] = 0
-                                image_state["last_progress_sent"] = -1
-                                set_text("Timeout!", 0xFF0000)
-                                continue
-                        
-                        # Process as image chunk
-                        # react-native-ble-plx's writeWithoutResponse DECODES base64 before sending
-                        # So we receive RAW BINARY data, not base64 strings
-                        # Just append the raw bytes directly!
-                        image_state["data"].extend(raw)
-                        
-                        # Log progress periodically
-                        if len(image_state["data"]) % 500 < len(raw):
-                            print(f"Chunk: {len(raw)}B, total: {len(image_state['data'])}/{image_state['expected_len']}")
-                        
-                        image_state["last_chunk_time"] = current_time
-                        
-                        # Update progress on display every 10%
-                        progress = (len(image_state["data"]) * 100) // image_state["expected_len"] if image_state["expected_len"] > 0 else 0
-                        if progress % 10 == 0 or len(image_state["data"]) >= image_state["expected_len"]:
-                            set_text(f"Receiving: {progress}%", 0xFFFF00)
-                        if image_state["transfer_id"] and progress != image_state["last_progress_sent"] and progress % 10 == 0:
-                            send_uart_json({
-                                "t": "prog",
-                                "id": image_state["transfer_id"],
-                                "pct": progress,
-                                "rx": len(image_state["data"]),
-                            })
-                            image_state["last_progress_sent"] = progress
-                        
-                        # Check if complete
-                        if len(image_state["data"]) >= image_state["expected_len"]:
-                            print("Image complete! Rendering...")
-                            # Truncate to expected length
-                            image_state["data"] = image_state["data"][:image_state["expected_len"]]
-                            # Send completion ACK before the long e-ink refresh so the app
-                            # does not timeout while the panel is physically updating.
-                            if image_state["transfer_id"]:
-                                send_uart_json({
-                                    "t": "ack",
-                                    "id": image_state["transfer_id"],
-                                    "st": "rendering",
-                                    "ok": 1,
-                                })
-                            # Render image to display with prompt text
-                            render_ok = True
-                            try:
-                                render_image(
-                                    image_state["data"],
-                                    image_state["width"],
-                                    image_state["height"],
-                                    image_state["prompt"]
-                                )
-                            except Exception as render_err:
-                                render_ok = False
-                                print("Render exception after image complete:", render_err)
-
-                            if image_state["transfer_id"] and not render_ok:
-                                send_uart_json({
-                                    "t": "ack",
-                                    "id": image_state["transfer_id"],
-                                    "st": "render_error",
-                                    "ok": 0,
-                                })
-                            # Reset state
-                            image_state["receiving"] = False
-                            image_state["data"] = bytearray()
-                            image_state["prompt"] = ""
-                            image_state["transfer_id"] = None
-                            image_state["last_chunk_time"] = 0
-                            image_state["last_progress_sent"] = -1
-                    except Exception as e:
-                        print("Image decode error:", e)
-                        print(f"Error type: {type(e).__name__}")
-                        if image_state["transfer_id"]:
-                            send_uart_json({
-                                "t": "ack",
-                                "id": image_state["transfer_id"],
-                                "st": "decode_error",
-                                "ok": 0,
-                            })
-                        image_state["receiving"] = False
-                        image_state["data"] = bytearray()
-                        image_state["prompt"] = ""
-                        image_state["transfer_id"] = None
-                        image_state["last_chunk_time"] = 0
-                        image_state["last_progress_sent"] = -1
-                        set_text("Image error!", 0xFF0000)
+                    receive_image_chunk(raw)
                     continue
 
+            if link_state["frame_rest"]:
+                raw = link_state["frame_rest"] + raw
+                link_state["frame_rest"] = b""
+            if uart_codec.is_frame(raw):
+                try:
+                    handle_frames(raw)
+                except Exception as e:
+                    print("Control frame failed:", repr(e))
+                continue
+
             # React Native's writeWithoutResponse decodes base64 before sending,
             # so we should receive raw UTF-8 bytes. Try UTF-8 first, then base64 as fallback.
             try:
@@ -674,6 +1236,8 @@ while True:
             except Exception:
                 # Fall back to base64 decode (in case library behavior differs)
                 try:
+                    import base64
+
                     decoded = base64.b64decode(raw)
                     s = decoded.decode("utf-8", "ignore").strip()
                 except Exception as e:
@@ -682,91 +1246,31 @@ while True:
 
             print("RX:", s)
 
-            # Try JSON {"text": "...", "color": "#RRGGBB"} or {"cmd": "image_start", ...}
+            # One bad message must not take the connection (or the firmware) down
             try:
-                msg = json.loads(s)
-                
-                # Check for image command: support both legacy and rn-ble-test compact protocol.
-                is_legacy_start = msg.get("cmd") == "image_start"
-                is_compact_start = msg.get("t") == "img"
-                if is_legacy_start or is_compact_start:
-                    # ALWAYS reset state when receiving a new image_start
-                    # This handles cases where previous transfer was incomplete
-                    if image_state["receiving"]:
-                        print("Warning: Cancelling previous incomplete transfer")
-                    
-                    # Completely reset all image state
-                    image_state["receiving"] = True
-                    image_state["width"] = msg.get("w", 0)
-                    image_state["height"] = msg.get("h", 0)
-                    image_state["expected_len"] = msg.get("len", 0)
-                    image_state["prompt"] = msg.get("p", "") if is_compact_start else msg.get("prompt", "")
-                    image_state["transfer_id"] = msg.get("id", None) if is_compact_start else None
-                    image_state["data"] = bytearray()  # Fresh buffer
-                    image_state["last_chunk_time"] = time.monotonic()
-                    image_state["last_progress_sent"] = -1
-                    
-                    # Validate the incoming parameters
-                    if image_state["expected_len"] <= 0 or image_state["width"] <= 0 or image_state["height"] <= 0:
-                        print(f"Invalid image params: w={image_state['width']}, h={image_state['height']}, len={image_state['expected_len']}")
-                        if image_state["transfer_id"]:
-                            send_uart_json({
-                                "t": "ack",
-                                "id": image_state["transfer_id"],
-                                "st": "bad_params",
-                                "ok": 0,
-                            })
-                        image_state["receiving"] = False
-                        image_state["transfer_id"] = None
-                        set_text("Invalid image!", 0xFF0000)
-                        continue
-                    
-                    print(f"Image start: {image_state['width']}x{image_state['height']}, {image_state['expected_len']} bytes")
-                    if image_state["prompt"]:
-                        print(f"Prompt: {image_state['prompt'][:50]}...")
-                    print(f"Waiting for {image_state['expected_len']} bytes...")
-                    set_text("Receiving...", 0xFFFF00)
-                    if image_state["transfer_id"]:
-                        send_uart_json({
-                            "t": "ack",
-                            "id": image_state["transfer_id"],
-                            "st": "start",
-                            "ok": 1,
-                            "rx": 0,
-                            "len": image_state["expected_len"],
-                        })
-                    continue
-                
-                if msg.get("t") == "bat":
-                    # Minimal telemetry response so rn-ble-test fetchBatteryData can clear loading.
-                    send_uart_json({"t": "bat", "mv": 0, "pct": 0, "tmp": None, "src": "unsupported"})
-                    continue
-
-                # Regular text message
-                txt = msg.get("text") or ""
-                col = parse_color(msg.get("color"), 0x00FFFF)
-            except Exception:
-                txt = s
-                col = 0x00FFFF
-
-            if txt:
-                set_text(txt, col)
-
-                try:
-                    uart.write(b'{"ok":true}\n')
-                except Exception as e:
-                    print("ACK write failed:", repr(e))
+                handle_control(s)
+            except Exception as e:
+                print("Control message failed:", repr(e), s)
 
-        time.sleep(0.05)
+        # Checked every pass: a stalled sender sends nothing to trigger it
+        if image_state["receiving"]:
+            check_image_timeout(time.monotonic())
+        else:
+            service_playlist(time.monotonic())
+            prewarm_step()
+            telemetry.poll()
+        poller.wait()
 
     ble_log("DISCONNECTED")
-    # Reset image state on disconnect
-    image_state["receiving"] = False
-    image_state["data"] = bytearray()
-    image_state["prompt"] = ""
-    image_state["transfer_id"] = None
-    image_state["last_chunk_time"] = 0
-    image_state["last_progress_sent"] = -1
+    if rx_trace:
+        rx_trace.event(TRACE_DISCONNECT, time.monotonic())
+        rx_trace.flush()
+    # A disconnect is clean if the link did not fail and no transfer was cut off
+    clean_disconnect = not link_error and not image_state["receiving"]
+    # Reset image state on disconnect, keeping an unfinished transfer for resume
+    reset_image_state(park=True)
+    link_state["encoding"] = "json"
+    link_state["frame_rest"] = b""
 
     # Always try to stop advertising to ensure a clean state
     try:
@@ -775,6 +1279,9 @@ while True:
     except Exception as e:
         ble_log(f"Error stopping advertising on disconnect: {e}")
 
-    # Small delay after disconnect before restarting advertising to ensure clean state
-    time.sleep(0.5)
+    # After a clean disconnect re-advertise fast right away; otherwise give the
+    # stack a short settle delay first
+    settle = adv_policy.on_disconnect(time.monotonic(), clean=clean_disconnect)
+    if settle:
+        time.sleep(settle)
     # loop repeats, advertising will restart at the top
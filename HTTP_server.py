@@ -1,15 +1,25 @@
 # Feather ESP32-S3 Reverse TFT — Wi-Fi AP with HTTP form using adafruit_httpserver
 # Requires: lib/adafruit_display_text/, lib/adafruit_httpserver/
 
+import json
+import os
 import time
 import board
+import bitmaptools
 import displayio
 import terminalio
 import digitalio
 from adafruit_display_text import label
 import wifi
 import socketpool
-from adafruit_httpserver import Request, Response, Server, POST, Redirect
+from adafruit_httpserver import (Request, Response, ChunkedResponse, JSONResponse, SSEResponse, Server,
+                                 Status, GET, POST, PATCH, Redirect, OK_200, NOT_FOUND_404, NO_REQUEST)
+from event_hub import EventHub
+from form_codec import url_decode
+from image_upload import ImageUpload
+from scheduler import Scheduler
+from static_files import StaticFiles, byte_range, content_type
+from text_pager import TextPager, TextView
 
 # ---------- CONFIG ----------
 AP_SSID = "CapstoneTestWifi"
@@ -18,7 +28,15 @@ ROTATION = 0
 TEXT_COLOR = 0xFFFFFF
 BG_COLOR = 0x000000
 SCALE = 1
+MAX_SCALE = 4
+ALIGNMENTS = ("left", "center", "right")
+MAX_TEXT = 1024  # characters accepted through the JSON API
 PADDING = 8
+AUTO_PAGE = 5  # seconds per page for long text; 0 pages only through /api/page
+STATIC_ROOT = "/static"  # built by tools/build_static.py, served at /static/...
+MAX_EVENT_STREAMS = 3  # open /events streams (each holds a socket)
+PING_INTERVAL = 15  # seconds between keepalive events on idle streams
+HTTP_BUDGET = 0.02  # seconds of request handling per main-loop tick
 # ---------------------------
 
 # Power on TFT rail
@@ -47,64 +65,47 @@ bg_palette[0] = BG_COLOR
 bg = displayio.TileGrid(bg_bitmap, pixel_shader=bg_palette)
 root.append(bg)
 
-text_label = label.Label(
-    terminalio.FONT,
-    text="",
-    color=TEXT_COLOR,
-    line_spacing=1.1,
-)
-text_label.anchor_point = (0, 0)
-text_label.anchored_position = (PADDING, PADDING)
-root.append(text_label)
-
-
-def set_text(msg):
-    # Simple word-wrap to fit width at current scale
-    cols = max(1, (display.width - 2 * PADDING) // (terminalio.FONT.get_bounding_box()[0] * SCALE))
-    lines_out = []
-    for paragraph in (msg.replace("\r", "")).split("\n"):
-        words = paragraph.split(" ")
-        line = ""
-        for w in words:
-            candidate = w if not line else (line + " " + w)
-            if len(candidate) <= cols:
-                line = candidate
-            else:
-                lines_out.append(line)
-                line = w
-        lines_out.append(line)
-    text_label.text = "\n".join(lines_out)
-    text_label.scale = SCALE
+# Text: one label per row; only the page on screen is laid out and drawn
+char_w, char_h = terminalio.FONT.get_bounding_box()
+pager = TextPager(display.width - 2 * PADDING, display.height - 2 * PADDING, char_w, char_h)
+text_labels = []
+for _ in range(pager.rows(1)):
+    row_label = label.Label(terminalio.FONT, text="", color=TEXT_COLOR)
+    root.append(row_label)
+    text_labels.append(row_label)
+viewer = TextView(pager, text_labels, PADDING, PADDING, display=display, auto=AUTO_PAGE)
+
+# Images from POST /api/image cover the text until the text changes
+image_palette = displayio.Palette(2)
+image_bitmap = displayio.Bitmap(display.width, display.height, 2)
+image_tile = displayio.TileGrid(image_bitmap, pixel_shader=image_palette)
+image_tile.hidden = True
+root.append(image_tile)
+
+
+page_version = 0  # bumped whenever the text on screen changes
+text_source = ""  # the text as sent, before wrapping
+text_scale = SCALE
+text_align = "left"
+
+
+def set_text(msg, scale=None, align=None):
+    global page_version, text_source, text_scale, text_align
+    if scale is not None:
+        text_scale = scale
+    if align is not None:
+        text_align = align
+    text_source = msg
+    # Long messages page every AUTO_PAGE seconds, or with POST /api/page
+    viewer.set_text(msg, text_scale, text_align, time.monotonic())
+    image_tile.hidden = True
+    page_version += 1
 
 
 def show_lines(lines):
     set_text("\n".join(lines))
 
 
-def url_decode(s):
-    # Decode application/x-www-form-urlencoded: '+' becomes space, %HH decoded
-    if s is None:
-        return ""
-    out = []
-    i = 0
-    while i < len(s):
-        c = s[i]
-        if c == '+':
-            out.append(' ')
-            i += 1
-        elif c == '%' and i + 2 < len(s):
-            try:
-                out.append(chr(int(s[i+1:i+3], 16)))
-                i += 3
-            except Exception:
-                out.append('%')
-                i += 1
-        else:
-            out.append(c)
-            i += 1
-    return ''.join(out)
-
-
 show_lines(["Starting AP…"])
 
 # Start AP
@@ -126,38 +127,129 @@ show_lines([
 ])
 
 # HTTP server
+STREAMED_ROUTES = ("/api/image",)
+
+
+class UploadServer(Server):
+    # adafruit_httpserver reads the whole body before routing. For
+    # STREAMED_ROUTES it is left on the socket (apart from what came in with
+    # the headers, in request.body) for the handler to read in chunks.
+    def _receive_request(self, sock, client_address):
+        header_bytes = self._receive_header_bytes(sock)
+        if not header_bytes:
+            return None
+        request = Request(self, sock, client_address, header_bytes)
+        if request.path not in STREAMED_ROUTES:
+            content_length = int(request.headers.get("Content-Length") or 0)
+            request.body = self._receive_body_bytes(sock, request.body, content_length)
+        return request
+
+
 pool = socketpool.SocketPool(wifi.radio)
-server = Server(pool, "/static", debug=True)
-
-
-def html_page(message):
-    return (
-        "<!doctype html><html><head><meta name=\"viewport\" content=\"width=device-width,initial-scale=1\">"
-        "<title>Feather Text</title>"
-        "<style>body{font-family:system-ui;margin:1rem;}" \
-        "input,button,textarea{font:inherit;padding:.6rem;width:100%;margin:.5rem 0;}" \
-        "code{background:#eee;padding:.2rem .4rem;border-radius:.25rem}</style></head><body>"
-        "<h2>Capstone Test</h2>"
-        "<p>Connected to <b>" + AP_SSID + "</b>. Send text to the TFT:</p>"
-        "<form method=\"POST\" action=\"/submit\">"
-        "<textarea name=\"t\" rows=\"6\" placeholder=\"Type here...\"></textarea>"
-        "<button type=\"submit\">Show</button>"
-        "</form>"
-        "<hr>"
-        "<h3>Background color</h3>"
-        "<form method=\"POST\" action=\"/color\">"
-        "<div style=\"display:flex;gap:.5rem;flex-wrap:wrap\">"
-        "<button name=\"color\" value=\"#00FF00\" type=\"submit\" style=\"background:#00FF00\">Green</button>"
-        "<button name=\"color\" value=\"#AA0088\" type=\"submit\" style=\"background:#AA0088;color:#fff\">Purple</button>"
-        "<button name=\"color\" value=\"#000000\" type=\"submit\" style=\"background:#000;color:#fff\">Black</button>"
-        "<button name=\"color\" value=\"#FFFFFF\" type=\"submit\" style=\"background:#fff\">White</button>"
-        "</div>"
-        "<div>Or hex: <input name=\"hex\" placeholder=\"#RRGGBB or RRGGBB\"> <button type=\"submit\">Set</button></div>"
-        "</form>"
-        "<p>Or GET: <code>/?t=Hello%20World</code></p>"
-        "<p>Current: <code>" + message.replace("<", "&lt;").replace(">", "&gt;") + "</code></p>"
-        "</body></html>"
-    )
+server = UploadServer(pool, "/static", debug=True)
+
+
+# The page is static bytes around one slot, the escaped text on screen. It
+# is rendered once per page_version and served with an ETag, so a browser
+# that already has this version gets a 304 without the page.
+PAGE_TOP = (
+    "<!doctype html><html><head><meta name=\"viewport\" content=\"width=device-width,initial-scale=1\">"
+    "<title>Feather Text</title>"
+    "<style>body{font-family:system-ui;margin:1rem;}" \
+    "input,button,textarea{font:inherit;padding:.6rem;width:100%;margin:.5rem 0;}" \
+    "code{background:#eee;padding:.2rem .4rem;border-radius:.25rem}</style></head><body>"
+    "<h2>Capstone Test</h2>"
+    "<p>Connected to <b>" + AP_SSID + "</b>. Send text to the TFT:</p>"
+    "<form method=\"POST\" action=\"/submit\">"
+    "<textarea name=\"t\" rows=\"6\" placeholder=\"Type here...\"></textarea>"
+    "<button type=\"submit\">Show</button>"
+    "</form>"
+    "<hr>"
+    "<h3>Background color</h3>"
+    "<form method=\"POST\" action=\"/color\">"
+    "<div style=\"display:flex;gap:.5rem;flex-wrap:wrap\">"
+    "<button name=\"color\" value=\"#00FF00\" type=\"submit\" style=\"background:#00FF00\">Green</button>"
+    "<button name=\"color\" value=\"#AA0088\" type=\"submit\" style=\"background:#AA0088;color:#fff\">Purple</button>"
+    "<button name=\"color\" value=\"#000000\" type=\"submit\" style=\"background:#000;color:#fff\">Black</button>"
+    "<button name=\"color\" value=\"#FFFFFF\" type=\"submit\" style=\"background:#fff\">White</button>"
+    "</div>"
+    "<div>Or hex: <input name=\"hex\" placeholder=\"#RRGGBB or RRGGBB\"> <button type=\"submit\">Set</button></div>"
+    "</form>"
+    "<p>Or GET: <code>/?t=Hello%20World</code></p>"
+    "<p>Current: <code id=\"cur\">"
+).encode("utf-8")
+# Changes arrive over /events and forms post JSON, so the page updates in
+# place; without EventSource (or when the stream cap is hit) it reloads
+PAGE_BOTTOM = (
+    "</code></p><script>"
+    "var cur=document.getElementById('cur'),live=false;"
+    "if(window.EventSource){var es=new EventSource('/events');"
+    "es.addEventListener('state',function(e){var s=JSON.parse(e.data);live=true;"
+    "cur.textContent=s.text;document.body.style.borderLeft='.5rem solid '+s.color;});"
+    "es.onerror=function(){if(es.readyState==2)live=false;};}"
+    "function post(url,body){fetch(url,{method:'POST',headers:{'Content-Type':'application/json'},"
+    "body:JSON.stringify(body)}).then(function(){if(!live)location.reload();});}"
+    "document.querySelectorAll('form').forEach(function(f){f.addEventListener('submit',function(ev){"
+    "if(!window.fetch)return;ev.preventDefault();var b=ev.submitter;"
+    "if(f.t)post('/api/text',{text:f.t.value});"
+    "else post('/api/color',{color:b&&b.name=='color'?b.value:f.hex.value});});});"
+    "</script></body></html>"
+).encode("utf-8")
+
+NOT_MODIFIED_304 = Status(304, "Not Modified")
+# Random per boot, so an ETag from before a reset never matches
+PAGE_TAG = "%08x" % int.from_bytes(os.urandom(4), "big")
+page_cache = [-1, "", b""]  # page_version, ETag, body
+
+
+def html_page():
+    # (etag, body) of the current page, rendered only when the text changed
+    if page_cache[0] != page_version:
+        shown = text_source.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+        page_cache[0] = page_version
+        page_cache[1] = '"%s-%d"' % (PAGE_TAG, page_version)
+        page_cache[2] = b"".join((PAGE_TOP, shown.encode("utf-8"), PAGE_BOTTOM))
+    return page_cache[1], page_cache[2]
+
+
+NO_CONTENT_204 = Status(204, "No Content")
+BAD_REQUEST_400 = Status(400, "Bad Request")
+SERVICE_UNAVAILABLE_503 = Status(503, "Service Unavailable")
+hub = EventHub(MAX_EVENT_STREAMS, PING_INTERVAL)
+
+
+def state():
+    return {"text": text_source, "color": "#%06X" % bg_palette[0], "scale": text_scale,
+            "align": text_align, "version": page_version}
+
+
+def state_json():
+    return json.dumps(state())
+
+
+def publish_state():
+    # Push the new state to every open page
+    hub.publish(state_json(), time.monotonic())
+
+
+def json_field(request, name):
+    # One string field from a JSON object body, or None
+    try:
+        data = request.json()
+    except ValueError:
+        return None
+    value = data.get(name) if isinstance(data, dict) else None
+    return value if isinstance(value, str) else None
+
+
+@server.route("/events")
+def events(request: Request):
+    if hub.full():
+        return Response(request, "Too many open pages", status=SERVICE_UNAVAILABLE_503,
+                        headers={"Retry-After": str(PING_INTERVAL)})
+    stream = SSEResponse(request)
+    hub.add(stream)
+    return stream
 
 
 @server.route("/")
@@ -167,8 +259,14 @@ def index(request: Request):
     msg = query.get("t")
     if msg:
         set_text(url_decode(msg))
+        publish_state()
         return Redirect(request, "/")
-    return Response(request, html_page(text_label.text), content_type="text/html")
+    etag, body = html_page()
+    # no-cache: the browser keeps the page but asks each time, with If-None-Match
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag in (request.headers.get("If-None-Match") or ""):
+        return Response(request, "", status=NOT_MODIFIED_304, headers=headers)
+    return Response(request, body, content_type="text/html", headers=headers)
 
 
 @server.route("/submit", POST)
@@ -176,10 +274,39 @@ def submit(request: Request):
     form = request.form_data
     msg = form.get("t") if form else None
     if msg is not None:
-        set_text(url_decode(msg))
+        # form_data values arrive already decoded
+        set_text(msg)
+        publish_state()
     return Redirect(request, "/")
 
 
+PARTIAL_CONTENT_206 = Status(206, "Partial Content")
+RANGE_NOT_SATISFIABLE_416 = Status(416, "Range Not Satisfiable")
+static = StaticFiles(STATIC_ROOT)
+
+
+@server.route("/static/...")
+def static_file(request: Request):
+    # Streams one file in 1 KB pieces; prefers name.gz, honours one Range
+    name = request.path[len("/static/"):]
+    found = static.lookup(name, request.headers.get("Accept-Encoding") or "")
+    if found is None:
+        return Response(request, "Not Found", status=NOT_FOUND_404)
+    filename, size, gzipped = found
+    headers = static.headers(name, gzipped)
+    span = byte_range(request.headers.get("Range"), size)
+    if span is None:
+        headers["Content-Range"] = "bytes */%d" % size
+        return Response(request, "", status=RANGE_NOT_SATISFIABLE_416, headers=headers)
+    start, stop, partial = span
+    status = OK_200
+    if partial:
+        status = PARTIAL_CONTENT_206
+        headers["Content-Range"] = "bytes %d-%d/%d" % (start, stop - 1, size)
+    return ChunkedResponse(request, static.stream(filename, start, stop), status=status,
+                           headers=headers, content_type=content_type(name))
+
+
 def parse_hex_color(s):
     if not s:
         return None
@@ -194,6 +321,14 @@ def parse_hex_color(s):
         return None
 
 
+def apply_color(color_val):
+    try:
+        bg_palette[0] = color_val
+    except Exception:
+        pass
+    publish_state()
+
+
 @server.route("/color", POST)
 def set_color(request: Request):
     form = request.form_data
@@ -202,16 +337,230 @@ def set_color(request: Request):
         btn = form.get("color")
         hex_in = form.get("hex")
         if btn:
-            color_val = parse_hex_color(url_decode(btn))
+            color_val = parse_hex_color(btn)
         if color_val is None and hex_in:
-            color_val = parse_hex_color(url_decode(hex_in))
+            color_val = parse_hex_color(hex_in)
 
     if color_val is not None:
-        try:
-            bg_palette[0] = color_val
-        except Exception:
-            pass
+        apply_color(color_val)
     return Redirect(request, "/")
 
 
-server.serve_forever(ip)
\ No newline at end of file
+def check_patch(patch):
+    # A state change from the JSON API as {key: value} ready to apply, or an
+    # error message. Nothing is applied here, so a bad batch changes nothing.
+    if not isinstance(patch, dict):
+        return "expected an object"
+    out = {}
+    for key, value in patch.items():
+        if key == "text":
+            if not isinstance(value, str) or len(value) > MAX_TEXT:
+                return "text: a string of at most %d characters" % MAX_TEXT
+        elif key == "color":
+            value = parse_hex_color(value) if isinstance(value, str) else None
+            if value is None:
+                return "color: \"#RRGGBB\""
+        elif key == "scale":
+            if not isinstance(value, int) or isinstance(value, bool) or not 1 <= value <= MAX_SCALE:
+                return "scale: 1 to %d" % MAX_SCALE
+        elif key == "align":
+            if value not in ALIGNMENTS:
+                return "align: one of " + ", ".join(ALIGNMENTS)
+        else:
+            return "unknown field: " + str(key)
+        out[key] = value
+    return out
+
+
+def update_state(patch):
+    # Everything in one checked patch lands in a single display refresh
+    display.auto_refresh = False
+    try:
+        if "color" in patch:
+            bg_palette[0] = patch["color"]
+        if "text" in patch or "scale" in patch or "align" in patch:
+            set_text(patch.get("text", text_source), patch.get("scale"), patch.get("align"))
+    finally:
+        display.auto_refresh = True
+    publish_state()
+
+
+def json_error(request, message, status=BAD_REQUEST_400):
+    return JSONResponse(request, {"error": message}, status=status)
+
+
+@server.route("/api/text", POST)
+def api_text(request: Request):
+    # {"text": "..."} -> 204; the open pages get the change over /events
+    msg = json_field(request, "text")
+    if msg is None or len(msg) > MAX_TEXT:
+        return Response(request, "Expected {\"text\": \"...\"}", status=BAD_REQUEST_400)
+    update_state({"text": msg})
+    return Response(request, "", status=NO_CONTENT_204)
+
+
+@server.route("/api/page", POST)
+def api_page(request: Request):
+    # {"page": "next"} or {"page": "prev"} -> 204; past the last page is the first
+    page = json_field(request, "page")
+    if page == "next":
+        viewer.next_page()
+    elif page == "prev":
+        viewer.prev_page()
+    else:
+        return Response(request, "Expected {\"page\": \"next\"} or \"prev\"", status=BAD_REQUEST_400)
+    return Response(request, "", status=NO_CONTENT_204)
+
+
+@server.route("/api/color", POST)
+def api_color(request: Request):
+    color_val = parse_hex_color(json_field(request, "color"))
+    if color_val is None:
+        return Response(request, "Expected {\"color\": \"#RRGGBB\"}", status=BAD_REQUEST_400)
+    update_state({"color": color_val})
+    return Response(request, "", status=NO_CONTENT_204)
+
+
+@server.route("/api/state", [GET, PATCH])
+def api_state(request: Request):
+    # GET: the current state. PATCH: any of text, color, scale, align.
+    if request.method == PATCH:
+        try:
+            patch = check_patch(request.json())
+        except ValueError:
+            patch = "invalid JSON"
+        if isinstance(patch, str):
+            return json_error(request, patch)
+        update_state(patch)
+    return JSONResponse(request, state())
+
+
+@server.route("/api/batch", POST)
+def api_batch(request: Request):
+    # A list of patches, applied in order as one change: one refresh, one event
+    try:
+        patches = request.json()
+    except ValueError:
+        return json_error(request, "invalid JSON")
+    if not isinstance(patches, list) or not patches:
+        return json_error(request, "expected a non-empty list of changes")
+    merged = {}
+    for i, patch in enumerate(patches):
+        checked = check_patch(patch)
+        if isinstance(checked, str):
+            return json_error(request, "change %d: %s" % (i, checked))
+        merged.update(checked)
+    update_state(merged)
+    return JSONResponse(request, state())
+
+
+ACCEPTED_202 = Status(202, "Accepted")
+PAYLOAD_TOO_LARGE_413 = Status(413, "Payload Too Large")
+CONTINUE_100 = b"HTTP/1.1 100 Continue\r\n\r\n"
+upload = ImageUpload(display.width, display.height)
+image_pending = [False]  # a complete upload is waiting for show_image()
+
+
+def receive_image(request, length, error):
+    # Read the body in CHUNK_SIZE pieces, feeding upload until it fails. A
+    # rejected body is still read to the end (it is at most max_length()),
+    # so the client gets the error response rather than a reset connection.
+    got = len(request.body)
+    if error is None:
+        error = upload.feed(request.body)
+    chunk = upload.chunk
+    view = memoryview(chunk)
+    while got < length:
+        try:
+            n = request.connection.recv_into(chunk, min(len(chunk), length - got))
+        except OSError:  # timed out or reset
+            n = 0
+        if not n:
+            return error or "body ended after %d of %d bytes" % (got, length)
+        got += n
+        if error is None:
+            error = upload.feed(view[:n])
+    return error
+
+
+@server.route("/api/image", POST)
+def api_image(request: Request):
+    # A 1-bit image: packed bits with ?w=&h=, or a PBM (P4) or 1-bit BMP body.
+    # Streamed into the framebuffer; the display refreshes once, from the main loop.
+    try:
+        length = int(request.headers.get("Content-Length") or 0)
+    except ValueError:
+        length = 0
+    if length > upload.max_length():
+        return json_error(request, "at most %d bytes" % upload.max_length(), PAYLOAD_TOO_LARGE_413)
+    query = request.query_params or {}
+    error = upload.begin(length, query.get("w"), query.get("h"))
+    if "100-continue" in (request.headers.get("Expect") or "").lower():
+        # The client waits for this before sending the body
+        if error is not None:
+            return json_error(request, error)
+        request.connection.send(CONTINUE_100)
+    error = receive_image(request, length, error)
+    if error is not None:
+        return json_error(request, error)
+    image_pending[0] = True
+    return JSONResponse(request, {"format": upload.format, "width": upload.width,
+                                  "height": upload.height}, status=ACCEPTED_202)
+
+
+def show_image():
+    # Blit a finished upload to the screen, centred on white, in one refresh
+    if not image_pending[0]:
+        return
+    image_pending[0] = False
+    ink, paper = (0, 1) if upload.invert else (1, 0)
+    image_palette[ink] = 0x000000
+    image_palette[paper] = 0xFFFFFF
+    x = (image_bitmap.width - upload.width) // 2
+    y = (image_bitmap.height - upload.height) // 2
+    display.auto_refresh = False
+    try:
+        image_bitmap.fill(paper)
+        for row in range(upload.height):
+            bitmaptools.arrayblit(image_bitmap, upload.row(row), x, y + row, x + upload.width, y + row + 1)
+        image_tile.hidden = False
+    finally:
+        display.auto_refresh = True
+
+
+# ---------- main loop ----------
+# Requests are served for up to HTTP_BUDGET per tick; then the tasks that are
+# due run. Add periodic work (animation, sensors) with loop.every().
+loop = Scheduler(HTTP_BUDGET)
+
+
+def serve_http():
+    return server.poll() != NO_REQUEST
+
+
+def tick_events(now):
+    hub.tick(now, state_json)
+
+
+def tick_image(now):
+    show_image()
+
+
+def tick_pager(now):
+    viewer.tick(now)
+
+
+events_task = loop.every("events", 0, tick_events)
+image_task = loop.every("image", 0, tick_image)
+pager_task = loop.every("pager", 0.1, tick_pager)
+
+
+@server.route("/api/loop")
+def api_loop(request: Request):
+    # Per-tick HTTP time and task lateness
+    return JSONResponse(request, loop.report())
+
+
+server.start(ip)
+while True:
+    loop.tick(serve_http)
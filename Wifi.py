@@ -9,6 +9,9 @@ import digitalio
 from adafruit_display_text import label
 import wifi
 import socketpool
+from http_engine import HTTPEngine, ResponseBuffer, http_response
+from form_codec import url_decode
+from text_pager import TextPager, TextView
 
 # Use the WiFi radio singleton
 radio = wifi.radio
@@ -21,6 +24,11 @@ TEXT_COLOR = 0xFFFFFF
 BG_COLOR = 0x000000
 SCALE = 1              # text size multiplier
 PADDING = 8               # px margin around text
+AUTO_PAGE = 5             # s per page for long messages; 0 pages only with /?p=next
+MAX_CLIENTS = 4           # simultaneous HTTP connections
+CLIENT_TIMEOUT = 5        # s without progress before a client is dropped
+KEEP_ALIVE = True         # reuse connections for HTTP/1.1 clients
+REQUEST_BUFFER = 4096     # bytes per client; larger requests get 413
 # ---------------------------
 
 tft_power = digitalio.DigitalInOut(board.TFT_I2C_POWER)
@@ -46,36 +54,19 @@ bg_palette[0] = BG_COLOR
 bg = displayio.TileGrid(bg_bitmap, pixel_shader=bg_palette)
 root.append(bg)
 
-# Text label (we’ll update .text)
-text_label = label.Label(
-    terminalio.FONT,
-    text="",
-    color=TEXT_COLOR,
-    line_spacing=1.1,
-)
-# anchor top-left, add padding
-text_label.anchor_point = (0, 0)
-text_label.anchored_position = (PADDING, PADDING)
-root.append(text_label)
+# Text: one label per row; only the page on screen is laid out and drawn
+char_w, char_h = terminalio.FONT.get_bounding_box()
+pager = TextPager(display.width - 2 * PADDING, display.height - 2 * PADDING, char_w, char_h)
+text_labels = []
+for _ in range(pager.rows(1)):
+    row_label = label.Label(terminalio.FONT, text="", color=TEXT_COLOR)
+    root.append(row_label)
+    text_labels.append(row_label)
+viewer = TextView(pager, text_labels, PADDING, PADDING, display=display, auto=AUTO_PAGE)
 
 def set_text(msg: str):
-    # Simple word-wrap to fit display width at current SCALE
-    cols = max(1, (display.width - 2 * PADDING) // (terminalio.FONT.get_bounding_box()[0] * SCALE))
-    lines_out = []
-    for paragraph in (msg.replace("\r", "")).split("\n"):
-        words = paragraph.split(" ")
-        line = ""
-        for w in words:
-            candidate = w if not line else (line + " " + w)
-            if len(candidate) <= cols:
-                line = candidate
-            else:
-                lines_out.append(line)
-                line = w
-        lines_out.append(line)
-    text_label.text = "\n".join(lines_out)
-    # Recenter vertically if you prefer top-left; we keep top-left.
-    text_label.scale = SCALE
+    # Long messages page every AUTO_PAGE seconds, or with /?p=next
+    viewer.set_text(msg, SCALE, now=time.monotonic())
 
 def show_lines(lines):
     set_text("\n".join(lines))
@@ -106,13 +97,12 @@ srv.settimeout(0)
 srv.setsockopt(pool.SOL_SOCKET, pool.SO_REUSEADDR, 1)
 # Bind to all interfaces (empty string) on port 80
 srv.bind(("", 80))
-srv.listen(1)
+srv.listen(MAX_CLIENTS)
 
-HTML_FORM = f"""\
-HTTP/1.1 200 OK\r
-Content-Type: text/html; charset=utf-8\r
-Connection: close\r
-\r
+# Responses are built once, as bytes with the right Content-Length, in a
+# Connection: close and a keep-alive variant (indexed by keep_alive)
+FORM_HEAD = b"HTTP/1.1 200 OK\r\nContent-Type: text/html; charset=utf-8\r\n"
+FORM_TOP = f"""\
 <!doctype html><html><head><meta name="viewport" content="width=device-width,initial-scale=1">
 <title>Feather Text</title>
 <style>
@@ -127,105 +117,60 @@ code{{background:#eee;padding:.2rem .4rem;border-radius:.25rem}}
 <button type="submit">Show</button>
 </form>
 <p>Or GET: <code>/?t=Hello%20World</code></p>
-</body></html>
-"""
-
-HTML_REDIRECT = "HTTP/1.1 303 See Other\r\nLocation: /\r\nConnection: close\r\nContent-Length: 0\r\n\r\n"
-
-def url_decode(s: str) -> str:
-    out, i = [], 0
-    while i < len(s):
-        c = s[i]
-        if c == '+':
-            out.append(' '); i += 1
-        elif c == '%' and i + 2 < len(s):
-            try:
-                out.append(chr(int(s[i+1:i+3], 16))); i += 3
-            except Exception:
-                out.append('%'); i += 1
+<p>Long text pages by itself, or: <a href="/?p=prev">previous page</a> · <a href="/?p=next">next page</a></p>
+<p>Showing: <code>""".encode("utf-8")
+FORM_BOTTOM = b"</code></p>\n</body></html>\n"
+
+HTML_REDIRECT = tuple(http_response("303 See Other", "Location: /\r\n", b"", ka) for ka in (False, True))
+
+# The form page's only dynamic part (the text on screen) is assembled here
+PAGE_TEXT_MAX = 1024  # bytes of escaped text shown on the form page
+# 64 bytes for the Content-Length and Connection headers render() adds
+page_buffer = ResponseBuffer(len(FORM_HEAD) + 64 + len(FORM_TOP) + len(FORM_BOTTOM) + PAGE_TEXT_MAX)
+
+def escaped_text(text: str, limit: int) -> bytes:
+    # HTML-escaped UTF-8, cut to at most limit bytes without splitting a
+    # character or an entity
+    out = text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").encode("utf-8")
+    if len(out) <= limit:
+        return out
+    end = limit
+    while end > 0 and out[end] & 0xC0 == 0x80:  # continuation byte: back to the lead byte
+        end -= 1
+    amp = out.rfind(b"&", 0, end)  # every & in the output starts an entity
+    if amp >= 0 and out.find(b";", amp, end) < 0:
+        end = amp
+    return out[:end]
+
+def form_page(keep_alive: bool):
+    shown = escaped_text(viewer.text, PAGE_TEXT_MAX)
+    return page_buffer.render(FORM_HEAD, (FORM_TOP, shown, FORM_BOTTOM), keep_alive)
+
+def handle_request(req, keep_alive: bool):
+    # req is the engine's http_parser.RequestParser; fields are raw memoryviews
+    method = req.method
+    if method == "GET":
+        t = req.form_field(b"t", query=True)
+    elif method == "POST":
+        t = req.form_field(b"t")
+    else:
+        t = None
+    if t is not None:
+        msg = url_decode(t)
+        set_text(msg)
+        return HTML_REDIRECT[keep_alive]
+    p = req.form_field(b"p", query=True)
+    if p is not None:
+        if bytes(p) == b"prev":
+            viewer.prev_page()
         else:
-            out.append(c); i += 1
-    return ''.join(out)
-
-def add_content_length(content: str) -> str:
-    """Add Content-Length header to HTTP response"""
-    lines = content.split("\r\n")
-    # Find the blank line separating headers from body
-    for i, line in enumerate(lines):
-        if line == "":
-            body = "\r\n".join(lines[i+1:])
-            body_len = len(body.encode("utf-8"))
-            # Insert Content-Length before blank line
-            lines.insert(i, f"Content-Length: {body_len}")
-            return "\r\n".join(lines)
-    return content
-
-def handle_request(raw: bytes):
-    if not raw:
-        return HTML_FORM
-    head = raw.split(b"\r\n", 1)[0].decode("utf-8", "ignore")
-    parts = head.split(" ")
-    method = parts[0] if parts else "GET"
-    path = parts[1] if len(parts) > 1 else "/"
+            viewer.next_page()
+        return HTML_REDIRECT[keep_alive]
+    return form_page(keep_alive)
 
-    if method == "GET":
-        if "?" in path and "t=" in path:
-            q = path.split("?", 1)[1]
-            tval = ""
-            for kv in q.split("&"):
-                if kv.startswith("t="):
-                    tval = kv[2:]; break
-            msg = url_decode(tval)
-            set_text(msg)
-            return HTML_REDIRECT
-        return HTML_FORM
-
-    if method == "POST":
-        # crude parse body
-        try:
-            header, body = raw.split(b"\r\n\r\n", 1)
-        except ValueError:
-            return HTML_FORM
-        # form-encoded: t=...
-        if b"t=" in body:
-            t = body.split(b"t=", 1)[1]
-            amp = t.find(b"&")
-            if amp != -1:
-                t = t[:amp]
-            msg = url_decode(t.decode("utf-8", "ignore"))
-            set_text(msg)
-            return HTML_REDIRECT
-        return HTML_FORM
-
-    return HTML_FORM
-
-# 5) Serve forever
+# 5) Serve forever: every client gets its own slot, nobody waits on a slow phone
+engine = HTTPEngine(srv, handle_request, max_conns=MAX_CLIENTS, rx_size=REQUEST_BUFFER,
+                    timeout=CLIENT_TIMEOUT, keep_alive=KEEP_ALIVE)
 while True:
-    try:
-        client, _ = srv.accept()
-    except Exception:
-        time.sleep(0.05)
-        continue
-    try:
-        client.settimeout(5)
-        req = client.recv(2048)
-        if req:
-            resp = handle_request(req)
-            # Add Content-Length header for proper HTTP
-            resp = add_content_length(resp)
-            # Send response in chunks if needed
-            resp_bytes = resp.encode("utf-8")
-            sent = 0
-            while sent < len(resp_bytes):
-                chunk = client.send(resp_bytes[sent:])
-                if chunk == 0:
-                    break
-                sent += chunk
-    except Exception as e:
-        # Ignore errors, just close the connection
-        pass
-    finally:
-        try:
-            client.close()
-        except Exception:
-            pass
+    engine.poll()
+    viewer.tick(time.monotonic())
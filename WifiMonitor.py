@@ -9,6 +9,10 @@ import digitalio
 from adafruit_display_text import label
 import wifi
 import socketpool
+from client_stats import ConnectionStats
+from http_engine import http_response
+from http_parser import COMPLETE, INCOMPLETE, RequestParser
+from poller import AdaptivePoller
 
 # Use the WiFi radio singleton
 radio = wifi.radio
@@ -21,6 +25,8 @@ TEXT_COLOR = 0xFFFFFF
 BG_COLOR = 0x000000
 SCALE = 1                 # text size multiplier
 PADDING = 8                # px margin around text
+REDRAW_INTERVAL = 0.25    # s; the TFT redraws at most 4 times a second
+CLIENT_TIME = 1.0         # s; the most one client may hold up the loop
 # ---------------------------
 
 # Initialize TFT display
@@ -96,90 +102,108 @@ srv.setsockopt(pool.SOL_SOCKET, pool.SO_REUSEADDR, 1)
 srv.bind(("0.0.0.0", 80))
 srv.listen(5)
 
-# Simple response
-SIMPLE_RESPONSE = """HTTP/1.1 200 OK\r
-Content-Type: text/plain\r
-Connection: close\r
-Content-Length: 17\r
-\r
-Connected!
-"""
+# Responses; every connection is closed after one
+SIMPLE_RESPONSE = http_response("200 OK", "Content-Type: text/plain\r\n", b"Connected!\n", False)
+METRICS_HEADERS = "Content-Type: text/plain; version=0.0.4\r\n"
 
-connection_count = 0
-connection_history = []
+stats = ConnectionStats(now=time.monotonic())
+request = RequestParser(1024)
+redraw_state = {"pending": False, "next": 0.0}
+poller = AdaptivePoller(first_idle_sleep=0.005, max_sleep=0.05)
 
-# Main loop
-while True:
+
+def send_all(sock, data):
+    """Send all of ``data``; returns the bytes that went out."""
+    view = memoryview(data)
+    sent = 0
+    while sent < len(view):
+        try:
+            n = sock.send(view[sent:])
+        except OSError:
+            break
+        if not n:
+            break
+        sent += n
+    return sent
+
+
+def handle_client(client, accepted):
+    """Read one request and answer it. Returns (bytes read, bytes sent).
+    A client gets CLIENT_TIME seconds from accept, reads and send included."""
+    # Read until the request (headers and any body) is complete
+    request.clear()
+    deadline = accepted + CLIENT_TIME
+    state = request.parse()
+    while state == INCOMPLETE and time.monotonic() < deadline:
+        try:
+            # A blocking read may only wait for what is left of the deadline
+            client.settimeout(max(0, deadline - time.monotonic()))
+            if not request.recv_into(client):
+                break
+        except OSError:
+            break
+        state = request.parse()
+    if state == COMPLETE and request.path == "/metrics":
+        body = stats.metrics(time.monotonic())
+        response = http_response("200 OK", METRICS_HEADERS, body, False)
+    else:
+        response = SIMPLE_RESPONSE
+    client.settimeout(max(0, deadline - time.monotonic()))
+    return request.n, send_all(client, response)
+
+
+def draw_status():
+    """Show the latest connection and the last three on the TFT."""
+    recent = stats.recent(3)
+    latest = recent[-1]
+    t = time.localtime(latest.when)
+    lines = [
+        f"Connection #{latest.num}",
+        f"IP: {latest.ip}",
+        f"Time: {t.tm_hour:02d}:{t.tm_min:02d}:{t.tm_sec:02d}",
+        "",
+        f"Total: {stats.count}  Clients: {len(stats.clients)}",
+        "",
+    ]
+    if len(recent) > 1:
+        lines.append("Recent:")
+        for conn in recent:
+            lines.append(f"  #{conn.num}: {conn.ip}")
+    show_lines(lines)
+
+
+def monitor_step():
+    """One pass of the main loop: serve at most one client, then redraw the
+    TFT if something changed and REDRAW_INTERVAL has passed. Returns True
+    if a client was served."""
     try:
         client, addr = srv.accept()
-        connection_count += 1
+    except OSError:
+        client = None
+    if client is not None:
+        accepted = time.monotonic()
         ip_str = str(addr[0]) if addr else "unknown"
-        timestamp = time.localtime()
-        time_str = f"{timestamp.tm_hour:02d}:{timestamp.tm_min:02d}:{timestamp.tm_sec:02d}"
-        
-        # Add to history (keep last 10)
-        connection_history.append({
-            "num": connection_count,
-            "ip": ip_str,
-            "time": time_str
-        })
-        if len(connection_history) > 10:
-            connection_history.pop(0)
-        
-        # Show connection info on TFT
-        display_lines = [
-            f"Connection #{connection_count}",
-            f"IP: {ip_str}",
-            f"Time: {time_str}",
-            "",
-            "Total: " + str(connection_count),
-            ""
-        ]
-        
-        # Show recent connections (last 3)
-        if len(connection_history) > 1:
-            display_lines.append("Recent:")
-            for conn in connection_history[-3:]:
-                display_lines.append(f"  #{conn['num']}: {conn['ip']}")
-        
-        show_lines(display_lines)
-        
-        # Small delay to let client send data
-        time.sleep(0.05)
-        
-    except Exception as accept_err:
-        time.sleep(0.05)
-        continue
-    
-    try:
-        client.settimeout(1.0)
-        
-        # Simple read
-        req = b""
-        for _ in range(5):
-            try:
-                data = client.recv(1024)
-                if data:
-                    req += data
-                    if b"\r\n\r\n" in req:
-                        break
-                    time.sleep(0.01)
-                else:
-                    break
-            except:
-                break
-        
-        # Send simple response
+        bytes_in = bytes_out = 0
         try:
-            client.send(SIMPLE_RESPONSE.encode("utf-8"))
-        except:
-            pass
-            
-    except Exception:
-        pass
-    finally:
-        try:
-            client.close()
+            bytes_in, bytes_out = handle_client(client, accepted)
         except Exception:
             pass
+        finally:
+            try:
+                client.close()
+            except Exception:
+                pass
+        now = time.monotonic()
+        stats.record(ip_str, now, time.time(), bytes_in, bytes_out, now - accepted)
+        redraw_state["pending"] = True
+    now = time.monotonic()
+    if redraw_state["pending"] and now >= redraw_state["next"]:
+        draw_status()
+        redraw_state["pending"] = False
+        redraw_state["next"] = now + REDRAW_INTERVAL
+    return client is not None
+
 
+# Main loop
+while True:
+    poller.wait(busy=monitor_step())
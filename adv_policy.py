@@ -0,0 +1,73 @@
+# Advertising policy for the BLE session loop in BLE-final.py.
+#
+# Right after boot or a disconnect the badge advertises fast so a phone finds it
+# quickly, then backs off step by step to a slow interval to save radio time.
+
+ADV_MIN_INTERVAL = 0.02  # BLE spec limits for the advertising interval
+ADV_MAX_INTERVAL = 10.24
+
+
+class AdvertisingPolicy:
+    """Decides the advertising interval from the time since the last burst started.
+
+    Schedule: ``fast_interval`` for ``fast_window`` seconds, then the interval is
+    multiplied by ``backoff`` every ``step_window`` seconds up to ``slow_interval``.
+    ``now`` is passed in by the caller (usually ``time.monotonic()``).
+    """
+
+    def __init__(self, name, fast_interval=0.1, fast_window=30, slow_interval=1.0,
+                 backoff=2.0, step_window=30, settle_delay=0.0):
+        self.name = name
+        self.fast_interval = _clamp(fast_interval)
+        self.slow_interval = max(self.fast_interval, _clamp(slow_interval))
+        self.fast_window = fast_window
+        self.backoff = backoff
+        self.step_window = step_window
+        self.settle_delay = settle_delay  # wait before re-advertising after an unclean disconnect
+        self.burst_start = 0
+
+    def on_boot(self, now):
+        self.burst_start = now
+
+    def on_disconnect(self, now, clean=True):
+        """Start a new fast burst. Returns how long to wait before advertising."""
+        delay = 0 if clean else self.settle_delay
+        self.burst_start = now + delay
+        return delay
+
+    def interval(self, now):
+        elapsed = now - self.burst_start
+        if elapsed < self.fast_window or self.backoff <= 1:
+            return self.fast_interval
+        steps = 1 + int((elapsed - self.fast_window) // self.step_window)
+        interval = self.fast_interval * (self.backoff ** steps)
+        return min(interval, self.slow_interval)
+
+    def next_change(self, now):
+        """Monotonic time at which interval() changes next, or None once fully backed off."""
+        if self.interval(now) >= self.slow_interval:
+            return None
+        elapsed = now - self.burst_start
+        if elapsed < self.fast_window:
+            return self.burst_start + self.fast_window
+        steps = 1 + int((elapsed - self.fast_window) // self.step_window)
+        return self.burst_start + self.fast_window + steps * self.step_window
+
+
+def _clamp(interval):
+    return min(ADV_MAX_INTERVAL, max(ADV_MIN_INTERVAL, interval))
+
+
+# Presets selectable with BLE_ADV_POLICY in BLE-final.py.
+# "fixed" reproduces the old behaviour: 0.1 s forever, 0.5 s pause after every disconnect.
+ADV_POLICIES = {
+    "fixed": dict(fast_interval=0.1, backoff=1, settle_delay=0.5),
+    "adaptive": dict(fast_interval=0.03, fast_window=30, slow_interval=1.0,
+                     backoff=2.0, step_window=30, settle_delay=0.5),
+    "low_power": dict(fast_interval=0.1, fast_window=10, slow_interval=2.0,
+                      backoff=2.0, step_window=15, settle_delay=0.5),
+}
+
+
+def make_policy(name):
+    return AdvertisingPolicy(name, **ADV_POLICIES[name])
@@ -0,0 +1,167 @@
+# Per-client connection analytics for WifiMonitor.py: requests, bytes in and
+# out, handling latency and last-seen time for each client IP, the last few
+# connections for the TFT, and the latency of the last requests for
+# percentiles. Everything lives in storage allocated up front (records are
+# reused, rings are overwritten), so a busy AP does not grow the heap.
+# metrics() renders it all as Prometheus text for /metrics.
+
+from array import array
+
+MAX_CLIENTS = 16  # clients tracked; the one seen longest ago makes room
+HISTORY = 10  # connections kept for the TFT
+LATENCY_WINDOW = 64  # requests the latency percentiles are taken over
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+class Client:
+    __slots__ = ("ip", "requests", "bytes_in", "bytes_out", "latency_sum", "latency_max",
+                 "first_seen", "last_seen")
+
+    def __init__(self):
+        self.reset("", 0.0)
+
+    def reset(self, ip, now):
+        self.ip = ip
+        self.requests = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.latency_sum = 0.0
+        self.latency_max = 0.0
+        self.first_seen = now
+        self.last_seen = now
+
+
+class Connection:
+    __slots__ = ("num", "ip", "when")
+
+    def __init__(self):
+        self.num = 0
+        self.ip = ""
+        self.when = 0  # time.time(), for the clock shown on the TFT
+
+
+class ConnectionStats:
+    """Analytics for every connection since boot. Times are passed in:
+    ``now`` from ``time.monotonic()``, ``when`` from ``time.time()``."""
+
+    __slots__ = ("clients", "_spare", "_history", "_head", "_latency", "_lat_pos", "_lat_n",
+                 "count", "evicted", "bytes_in", "bytes_out", "latency_sum", "started")
+
+    def __init__(self, max_clients=MAX_CLIENTS, history=HISTORY, window=LATENCY_WINDOW, now=0.0):
+        self.clients = {}  # ip -> Client
+        self._spare = [Client() for _ in range(max_clients)]
+        self._history = [Connection() for _ in range(history)]
+        self._head = 0  # next history slot to overwrite
+        self._latency = array("f", [0.0] * window)
+        self._lat_pos = 0
+        self._lat_n = 0
+        self.count = 0
+        self.evicted = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.latency_sum = 0.0
+        self.started = now
+
+    def record(self, ip, now, when, bytes_in, bytes_out, latency):
+        """Account one handled connection."""
+        client = self.clients.get(ip)
+        if client is None:
+            client = self._new_client(ip, now)
+        client.requests += 1
+        client.bytes_in += bytes_in
+        client.bytes_out += bytes_out
+        client.latency_sum += latency
+        if latency > client.latency_max:
+            client.latency_max = latency
+        client.last_seen = now
+
+        self.count += 1
+        self.bytes_in += bytes_in
+        self.bytes_out += bytes_out
+        self.latency_sum += latency
+        self._latency[self._lat_pos] = latency
+        self._lat_pos = (self._lat_pos + 1) % len(self._latency)
+        self._lat_n = min(self._lat_n + 1, len(self._latency))
+
+        conn = self._history[self._head]
+        self._head = (self._head + 1) % len(self._history)
+        conn.num = self.count
+        conn.ip = ip
+        conn.when = when
+        return conn
+
+    def _new_client(self, ip, now):
+        if self._spare:
+            client = self._spare.pop()
+        else:
+            oldest = None
+            for c in self.clients.values():
+                if oldest is None or c.last_seen < oldest.last_seen:
+                    oldest = c
+            del self.clients[oldest.ip]
+            self.evicted += 1
+            client = oldest
+        client.reset(ip, now)
+        self.clients[ip] = client
+        return client
+
+    def recent(self, n):
+        """The last ``n`` connections, oldest first."""
+        size = len(self._history)
+        n = min(n, self.count, size)
+        return [self._history[(self._head - n + i) % size] for i in range(n)]
+
+    def quantile(self, q):
+        """Latency at quantile ``q`` over the last LATENCY_WINDOW requests."""
+        if not self._lat_n:
+            return 0.0
+        window = sorted(self._latency[:self._lat_n])
+        return window[min(self._lat_n - 1, int(q * self._lat_n))]
+
+    def metrics(self, now):
+        """Prometheus text exposition (version 0.0.4) of everything above."""
+        out = []
+        add = out.append
+
+        def family(name, kind, text):
+            add("# HELP wifimonitor_%s %s\n# TYPE wifimonitor_%s %s\n" % (name, text, name, kind))
+
+        family("uptime_seconds", "gauge", "Seconds since the monitor started.")
+        add("wifimonitor_uptime_seconds %.3f\n" % (now - self.started))
+        family("connections_total", "counter", "Connections handled.")
+        add("wifimonitor_connections_total %d\n" % self.count)
+        family("received_bytes_total", "counter", "Request bytes read.")
+        add("wifimonitor_received_bytes_total %d\n" % self.bytes_in)
+        family("sent_bytes_total", "counter", "Response bytes written.")
+        add("wifimonitor_sent_bytes_total %d\n" % self.bytes_out)
+        family("clients", "gauge", "Clients tracked.")
+        add("wifimonitor_clients %d\n" % len(self.clients))
+        family("clients_evicted_total", "counter", "Clients dropped to make room for new ones.")
+        add("wifimonitor_clients_evicted_total %d\n" % self.evicted)
+        family("request_duration_seconds", "summary",
+               "Accept to response sent; quantiles over the last %d requests." % len(self._latency))
+        for q in QUANTILES:
+            add("wifimonitor_request_duration_seconds{quantile=\"%s\"} %.6f\n" % (q, self.quantile(q)))
+        add("wifimonitor_request_duration_seconds_sum %.6f\n" % self.latency_sum)
+        add("wifimonitor_request_duration_seconds_count %d\n" % self.count)
+
+        per_client = (
+            ("client_requests_total", "counter", "Requests per client.", "%d", "requests"),
+            ("client_received_bytes_total", "counter", "Request bytes read per client.", "%d", "bytes_in"),
+            ("client_sent_bytes_total", "counter", "Response bytes written per client.", "%d", "bytes_out"),
+            ("client_request_duration_seconds_sum", "counter", "Handling time per client.", "%.6f",
+             "latency_sum"),
+            ("client_request_duration_seconds_max", "gauge", "Slowest request per client.", "%.6f",
+             "latency_max"),
+            ("client_last_seen_seconds", "gauge", "Uptime when the client was last seen.", "%.3f",
+             "last_seen"),
+        )
+        for name, kind, text, fmt, attr in per_client:
+            family(name, kind, text)
+            line = "wifimonitor_%s{client=\"%%s\"} %s\n" % (name, fmt)
+            for client in self.clients.values():
+                value = getattr(client, attr)
+                if attr == "last_seen":
+                    value -= self.started
+                add(line % (client.ip, value))
+        return "".join(out)
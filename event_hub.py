@@ -0,0 +1,80 @@
+# Server-Sent Events fan-out for HTTP_server.py: pushes state changes to
+# every open /events stream, caps how many streams hold sockets, and pings
+# idle streams so dead ones are noticed and proxies keep live ones open.
+#
+# A stream is anything with send_event(data, event=None) and close(), such
+# as adafruit_httpserver's SSEResponse. A stream whose send fails is dropped.
+
+MAX_STREAMS = 3  # sockets kept for /events; the rest of the pool serves requests
+PING_INTERVAL = 15  # seconds without an event before every stream is pinged
+
+
+class EventHub:
+    """Open event streams. ``now`` is passed in by the caller (usually
+    ``time.monotonic()``)."""
+
+    __slots__ = ("max_streams", "ping_interval", "streams", "fresh", "last_event",
+                 "published", "pings", "dropped")
+
+    def __init__(self, max_streams=MAX_STREAMS, ping_interval=PING_INTERVAL):
+        self.max_streams = max_streams
+        self.ping_interval = ping_interval
+        self.streams = []
+        self.fresh = []  # added, but their response headers are not sent yet
+        self.last_event = 0.0
+        self.published = 0
+        self.pings = 0
+        self.dropped = 0
+
+    def full(self):
+        return len(self.streams) >= self.max_streams
+
+    def add(self, stream):
+        """Register a stream. It gets the current state on the next tick(),
+        once the server has sent its response headers."""
+        self.streams.append(stream)
+        self.fresh.append(stream)
+
+    def publish(self, data, now, event="state"):
+        """Send one event to every stream that is already open."""
+        self.last_event = now
+        self.published += 1
+        for stream in list(self.streams):
+            if stream not in self.fresh:
+                self._send(stream, data, event)
+
+    def tick(self, now, snapshot):
+        """Call from the main loop after server.poll(). ``snapshot()`` gives
+        the current state; it is only called when a new stream needs it."""
+        if self.fresh:
+            data = snapshot()
+            fresh, self.fresh = self.fresh, []
+            for stream in fresh:
+                self._send(stream, data, "state")
+        if self.streams and now - self.last_event >= self.ping_interval:
+            self.last_event = now
+            self.pings += 1
+            for stream in list(self.streams):
+                self._send(stream, "", "ping")
+
+    def close(self):
+        for stream in self.streams:
+            self._close(stream)
+        self.streams = []
+        self.fresh = []
+
+    def _send(self, stream, data, event):
+        try:
+            stream.send_event(data, event=event)
+        except OSError:
+            # The viewer went away (phone asleep, tab closed): free the socket
+            self.streams.remove(stream)
+            self.dropped += 1
+            self._close(stream)
+
+    @staticmethod
+    def _close(stream):
+        try:
+            stream.close()
+        except OSError:
+            pass
@@ -0,0 +1,159 @@
+# Decoder for application/x-www-form-urlencoded values and query strings,
+# shared by Wifi.py and HTTP_server.py.
+#
+# Works on bytes: the input is copied once into a buffer allocated up front
+# and decoded in place ('+' -> space, %HH through a lookup table). The
+# decoder jumps from one '%' or '+' to the next with find() and moves the
+# plain runs between them with slice assignment. The result is decoded as
+# UTF-8 once at the end, so multibyte characters come out whole.
+
+_HAS_FIND = hasattr(bytearray, "find")
+
+# Hex digit value per byte, 255 for anything else
+_HEX = bytearray(b"\xff" * 256)
+for _i in range(10):
+    _HEX[48 + _i] = _i
+for _i in range(6):
+    _HEX[65 + _i] = _HEX[97 + _i] = 10 + _i
+
+
+class FormDecoder:
+    """Decodes into one reusable ``size``-byte buffer; a longer input gets a
+    larger buffer, which is then kept."""
+
+    __slots__ = ("buf", "view")
+
+    def __init__(self, size=1024):
+        self.buf = bytearray(size)
+        self.view = memoryview(self.buf)
+
+    def _find(self, sub, start, end):
+        if _HAS_FIND:
+            return self.buf.find(sub, start, end)
+        i = bytes(self.view[start:end]).find(sub)
+        return i + start if i >= 0 else -1
+
+    def decode_into(self, data):
+        """Decode ``data`` (str, bytes, bytearray or memoryview) in the
+        buffer. Returns the decoded length; the bytes are ``view[:length]``."""
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        n = len(data)
+        if n > len(self.buf):
+            self.buf = bytearray(n)
+            self.view = memoryview(self.buf)
+        buf, view, hexval = self.buf, self.view, _HEX
+        find = buf.find if _HAS_FIND else self._find
+        buf[0:n] = data
+        pct = find(b"%", 0, n)
+        plus = find(b"+", 0, n)
+        if pct < 0 and plus < 0:
+            return n
+        i = out = 0
+        while True:
+            if pct < 0:
+                j = plus if plus >= 0 else n
+            elif 0 <= plus < pct:
+                j = plus
+            else:
+                j = pct
+            if j > i:
+                # Plain run: slide it left over the bytes escapes freed up
+                if out != i:
+                    buf[out:out + j - i] = view[i:j]
+                out += j - i
+            if j == n:
+                return out
+            if j == plus:
+                buf[out] = 32
+                i = j + 1
+                plus = find(b"+", i, n)
+            else:
+                # Decode a whole run of consecutive escapes without searching
+                while True:
+                    if j + 2 < n:
+                        hi = hexval[buf[j + 1]]
+                        lo = hexval[buf[j + 2]]
+                    else:
+                        hi = lo = 255
+                    if hi | lo < 16:
+                        buf[out] = hi << 4 | lo
+                        i = j + 3
+                    else:
+                        buf[out] = 37  # not an escape: keep the '%'
+                        i = j + 1
+                    out += 1
+                    if i < n and buf[i] == 37:
+                        j = i
+                        continue
+                    break
+                pct = find(b"%", i, n)
+                continue
+            out += 1
+
+    def decode(self, data):
+        """Decoded text of ``data``; invalid UTF-8 becomes U+FFFD."""
+        out = self.decode_into(data)
+        try:
+            return str(self.view[:out], "utf-8")
+        except UnicodeError:
+            return _replace_invalid(self.view[:out])
+
+
+def _replace_invalid(data):
+    # str(data, "utf-8", "replace") by hand: CircuitPython ignores the errors
+    # argument and raises. Valid runs are decoded as they are; each maximal
+    # invalid subpart (a bad lead byte, or a sequence cut short) becomes one
+    # U+FFFD, as CPython does.
+    parts = []
+    n = len(data)
+    start = i = 0
+    while i < n:
+        b = data[i]
+        if b < 0x80:
+            i += 1
+            continue
+        # Continuation bytes still needed, and the range of the first one
+        # (which rules out overlong forms, surrogates and > U+10FFFF)
+        if 0xC2 <= b <= 0xDF:
+            need, lo, hi = 1, 0x80, 0xBF
+        elif b == 0xE0:
+            need, lo, hi = 2, 0xA0, 0xBF
+        elif b == 0xED:
+            need, lo, hi = 2, 0x80, 0x9F
+        elif 0xE1 <= b <= 0xEF:
+            need, lo, hi = 2, 0x80, 0xBF
+        elif b == 0xF0:
+            need, lo, hi = 3, 0x90, 0xBF
+        elif 0xF1 <= b <= 0xF3:
+            need, lo, hi = 3, 0x80, 0xBF
+        elif b == 0xF4:
+            need, lo, hi = 3, 0x80, 0x8F
+        else:
+            need, lo, hi = 0, 0, 0
+        j = i + 1
+        while need and j < n and lo <= data[j] <= hi:
+            j += 1
+            need -= 1
+            lo, hi = 0x80, 0xBF
+        if need == 0 and j > i + 1:
+            i = j
+            continue
+        parts.append(str(data[start:i], "utf-8"))
+        parts.append("\ufffd")
+        start = i = j
+    parts.append(str(data[start:n], "utf-8"))
+    return "".join(parts)
+
+
+_decoder = None
+
+
+def url_decode(data):
+    """Form/query value to str, using a decoder shared by all callers."""
+    global _decoder
+    if data is None:
+        return ""
+    if _decoder is None:
+        _decoder = FormDecoder()
+    return _decoder.decode(data)
@@ -0,0 +1,370 @@
+# Non-blocking multi-client HTTP/1.1 engine for Wifi.py.
+#
+# One listening socket and up to max_conns clients, each a small state
+# machine: READING until http_parser has a whole request, WRITING until the
+# response is out, then back to READING (keep-alive) or closed. Nothing
+# blocks: select.poll is used when the socket stack supports it, otherwise
+# every pass tries accept/recv_into/send on each socket in turn and sleeps
+# adaptively (poller.AdaptivePoller) when nothing happened.
+
+import errno
+import time
+
+from http_parser import ERROR, INCOMPLETE, RequestParser
+from poller import AdaptivePoller
+
+try:
+    import select
+except ImportError:
+    select = None
+
+FREE = 0
+READING = 1
+WRITING = 2
+
+_WOULD_BLOCK = (errno.EAGAIN, getattr(errno, "EWOULDBLOCK", errno.EAGAIN), errno.ETIMEDOUT)
+
+_CLOSE_END = b"\r\nConnection: close\r\n\r\n"
+_KEEP_ALIVE_END = b"\r\nConnection: keep-alive\r\n\r\n"
+
+
+def http_response(status, headers, body, keep_alive):
+    """A complete response as bytes, with Content-Length and Connection set.
+    Build these once at startup; ``headers`` is "" or CRLF-terminated lines."""
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    head = "HTTP/1.1 %s\r\n%sContent-Length: %d" % (status, headers, len(body))
+    return head.encode("utf-8") + (_KEEP_ALIVE_END if keep_alive else _CLOSE_END) + body
+
+
+ERRORS = {
+    400: http_response("400 Bad Request", "", b"", False),
+    413: http_response("413 Payload Too Large", "", b"", False),
+    431: http_response("431 Request Header Fields Too Large", "", b"", False),
+    501: http_response("501 Not Implemented", "", b"", False),
+    505: http_response("505 HTTP Version Not Supported", "", b"", False),
+}
+SERVER_ERROR = http_response("500 Internal Server Error", "", b"", False)
+
+
+def _would_block(e):
+    return getattr(e, "errno", None) in _WOULD_BLOCK or (e.args and e.args[0] in _WOULD_BLOCK)
+
+
+class ResponseBuffer:
+    """Assembles responses with dynamic parts in one buffer allocated up
+    front. ``render`` returns a memoryview into it that stays valid until the
+    next ``render``; HTTPEngine copies whatever the first send leaves over."""
+
+    __slots__ = ("buf", "view")
+
+    def __init__(self, size=4096):
+        self.buf = bytearray(size)
+        self.view = memoryview(self.buf)
+
+    def _put(self, pos, data):
+        end = pos + len(data)
+        if end > len(self.buf):
+            raise ValueError("response larger than %d bytes" % len(self.buf))
+        self.buf[pos:end] = data
+        return end
+
+    def render(self, head, parts, keep_alive):
+        """``head`` is the status line and headers (bytes, CRLF-terminated,
+        without Content-Length/Connection); ``parts`` are the body pieces."""
+        length = 0
+        for part in parts:
+            length += len(part)
+        pos = self._put(0, head)
+        pos = self._put(pos, b"Content-Length: ")
+        pos = self._put(pos, str(length).encode())
+        pos = self._put(pos, _KEEP_ALIVE_END if keep_alive else _CLOSE_END)
+        for part in parts:
+            pos = self._put(pos, part)
+        return self.view[:pos]
+
+
+class Connection:
+    """One client slot. Its parser (and so its receive buffer) is allocated
+    once, when the engine is created, and reused by every client that gets
+    this slot."""
+
+    __slots__ = ("sock", "addr", "state", "parser", "keep_alive", "tx", "tx_pos", "deadline", "requests")
+
+    def __init__(self, size):
+        self.parser = RequestParser(size)
+        self.sock = None
+        self.addr = None
+        self.state = FREE
+        self.requests = 0
+        self.deadline = 0.0
+        self.reset()
+
+    def reset(self):
+        self.keep_alive = False
+        self.tx = None
+        self.tx_pos = 0
+
+
+class HTTPEngine:
+    """Serves ``server_sock`` (bound and listening) without ever blocking.
+
+    ``handler(request, keep_alive)`` gets the http_parser.RequestParser
+    holding one complete request and returns the full response: bytes (sent as is) or a
+    bytearray/memoryview from a ResponseBuffer. It must send
+    ``Connection: keep-alive`` or ``close`` to match ``keep_alive``.
+    Call ``poll()`` from the main loop; ``poll(0)`` never waits.
+    """
+
+    def __init__(self, server_sock, handler, max_conns=4, rx_size=2048, timeout=5.0,
+                 keep_alive=True, max_wait=0.05, use_select=None, clock=time.monotonic,
+                 sleep=time.sleep):
+        self.server = server_sock
+        self.handler = handler
+        self.timeout = timeout
+        self.keep_alive = keep_alive
+        self.max_wait = max_wait
+        self.clock = clock
+        self.conns = [Connection(rx_size) for _ in range(max_conns)]
+        self.idle = AdaptivePoller(first_idle_sleep=0.002, max_sleep=max_wait, sleep=sleep)
+        self.accepted = 0
+        self.served = 0
+        self.timeouts = 0
+        self.rejected = 0
+        self.evicted = 0
+        server_sock.settimeout(0)
+
+        self._poll = None
+        self._keys = {}
+        self._listening = False
+        if use_select is not False and select is not None and hasattr(select, "poll"):
+            try:
+                self._poll = select.poll()
+                self._poll.register(server_sock, select.POLLIN)
+                self._listening = True
+            except (TypeError, ValueError, OSError, AttributeError):
+                if use_select:
+                    raise
+                self._poll = None
+        self._index(server_sock, None)
+
+    @property
+    def mode(self):
+        return "poll" if self._poll is not None else "scan"
+
+    def active(self):
+        return sum(1 for c in self.conns if c.state != FREE)
+
+    # ---------- main loop ----------
+    def poll(self, timeout=None):
+        """Accept, read and write whatever is ready. Waits up to ``timeout``
+        seconds for activity (default: select.poll blocks up to max_wait, the
+        scan backs off adaptively up to max_wait). Returns the number of
+        sockets that made progress."""
+        if self._poll is not None:
+            work = self._poll_events(self.max_wait if timeout is None else timeout)
+        else:
+            work = self._scan()
+            if work:
+                self.idle.note_data()
+            elif timeout is None:
+                self.idle.wait()
+            elif timeout > 0:
+                self.idle._sleep(timeout)
+        self._expire(self.clock())
+        return work
+
+    def _poll_events(self, timeout):
+        self._sync_listening()
+        work = 0
+        for event in self._poll.poll(int(timeout * 1000)):
+            key, flags = event[0], event[1]
+            if key not in self._keys:
+                continue
+            conn = self._keys[key]
+            if conn is None:
+                work += self._accept()
+            elif flags & (select.POLLHUP | select.POLLERR) and not flags & select.POLLIN:
+                self._close(conn)
+            elif conn.state == READING:
+                work += self._read(conn)
+            elif conn.state == WRITING:
+                work += self._write(conn)
+        return work
+
+    def _scan(self):
+        work = self._accept()
+        for conn in self.conns:
+            if conn.state == READING:
+                work += self._read(conn)
+            elif conn.state == WRITING:
+                work += self._write(conn)
+        return work
+
+    def _expire(self, now):
+        for conn in self.conns:
+            if conn.state != FREE and now > conn.deadline:
+                self.timeouts += 1
+                self._close(conn)
+
+    # ---------- accepting ----------
+    def _free_slot(self):
+        for conn in self.conns:
+            if conn.state == FREE:
+                return conn
+        # Full: give the slot of the longest-idle keep-alive client to the newcomer
+        idle = None
+        for conn in self.conns:
+            if conn.state == READING and conn.parser.n == 0 and conn.requests:
+                if idle is None or conn.deadline < idle.deadline:
+                    idle = conn
+        return idle
+
+    def _sync_listening(self):
+        # With every slot busy the listener is not polled, so pending clients
+        # wait in the backlog instead of waking the loop again and again
+        want = self._free_slot() is not None
+        if want != self._listening:
+            self._poll.modify(self.server, select.POLLIN if want else 0)
+            self._listening = want
+
+    def _accept(self):
+        accepted = 0
+        while True:
+            conn = self._free_slot()
+            if conn is None:
+                return accepted
+            try:
+                sock, addr = self.server.accept()
+            except OSError as e:
+                if not _would_block(e):
+                    self.rejected += 1
+                return accepted
+            if conn.state != FREE:
+                self.evicted += 1
+                self._close(conn)
+            sock.settimeout(0)
+            conn.sock = sock
+            conn.addr = addr
+            conn.state = READING
+            conn.requests = 0
+            conn.reset()
+            conn.parser.clear()
+            conn.deadline = self.clock() + self.timeout
+            self._index(sock, conn)
+            if self._poll is not None:
+                self._poll.register(sock, select.POLLIN)
+            self.accepted += 1
+            accepted += 1
+
+    # ---------- reading ----------
+    def _read(self, conn):
+        try:
+            got = conn.parser.recv_into(conn.sock)
+        except OSError as e:
+            if _would_block(e):
+                return 0
+            self._close(conn)
+            return 1
+        if got is None:  # buffer full
+            return self._respond(conn, ERRORS[conn.parser.error], False)
+        if not got:
+            self._close(conn)
+            return 1
+        conn.deadline = self.clock() + self.timeout
+        self._dispatch(conn)
+        return 1
+
+    def _dispatch(self, conn):
+        # Run the handler once the whole request is buffered
+        parser = conn.parser
+        result = parser.parse()
+        if result == INCOMPLETE:
+            return
+        if result == ERROR:
+            self._respond(conn, ERRORS.get(parser.error, ERRORS[400]), False)
+            return
+        keep_alive = self.keep_alive and parser.keep_alive
+        try:
+            response = self.handler(parser, keep_alive)
+        except Exception as e:
+            print("HTTP handler error:", e)
+            self._respond(conn, SERVER_ERROR, False)
+            return
+        conn.requests += 1
+        self.served += 1
+        self._respond(conn, response, keep_alive)
+
+    # ---------- writing ----------
+    def _respond(self, conn, response, keep_alive):
+        conn.keep_alive = keep_alive
+        conn.tx = memoryview(response)
+        conn.tx_pos = 0
+        conn.state = WRITING
+        if self._poll is not None:
+            self._poll.modify(conn.sock, select.POLLOUT)
+        # Most responses fit the socket's send buffer: try right away
+        self._write(conn)
+        if conn.state == WRITING and not isinstance(response, bytes):
+            # A borrowed buffer is reused by the next render; keep the rest
+            conn.tx = memoryview(bytes(conn.tx[conn.tx_pos:]))
+            conn.tx_pos = 0
+        return 1
+
+    def _write(self, conn):
+        try:
+            sent = conn.sock.send(conn.tx[conn.tx_pos:])
+        except OSError as e:
+            if _would_block(e):
+                return 0
+            self._close(conn)
+            return 1
+        conn.tx_pos += sent
+        conn.deadline = self.clock() + self.timeout
+        if conn.tx_pos < len(conn.tx):
+            return 1 if sent else 0
+        if not conn.keep_alive:
+            self._close(conn)
+            return 1
+        # Keep the connection; pipelined bytes stay in the parser
+        conn.reset()
+        conn.parser.next_request()
+        conn.state = READING
+        if self._poll is not None:
+            self._poll.modify(conn.sock, select.POLLIN)
+        if conn.parser.n:
+            self._dispatch(conn)
+        return 1
+
+    # ---------- bookkeeping ----------
+    def _index(self, sock, conn):
+        self._keys[sock] = conn
+        if hasattr(sock, "fileno"):
+            # CPython's poll reports file descriptors, MicroPython's the socket
+            self._keys[sock.fileno()] = conn
+
+    def _close(self, conn):
+        sock = conn.sock
+        if sock is not None:
+            self._keys.pop(sock, None)
+            if hasattr(sock, "fileno"):
+                self._keys.pop(sock.fileno(), None)
+            if self._poll is not None:
+                try:
+                    self._poll.unregister(sock)
+                except (KeyError, ValueError, OSError):
+                    pass
+            try:
+                sock.close()
+            except OSError:
+                pass
+        conn.sock = None
+        conn.addr = None
+        conn.state = FREE
+        conn.reset()
+        conn.parser.clear()
+
+    def close(self):
+        for conn in self.conns:
+            if conn.state != FREE:
+                self._close(conn)
@@ -0,0 +1,402 @@
+# Incremental HTTP/1.1 request parser over one fixed buffer, shared by
+# Wifi.py (through http_engine) and WifiMonitor.py.
+#
+# Bytes go straight from the socket into the buffer with recv_into. parse()
+# picks up where it stopped, so a request may arrive in any number of
+# pieces. The request line is kept as offsets into the buffer; the header
+# block is found with one search for its blank line and scanned for the few
+# headers the parser needs (case-insensitively). A Content-Length body stays where it
+# landed; a chunked body is de-chunked in place. Form fields are returned as
+# memoryviews of the still-encoded bytes, nothing is copied.
+
+INCOMPLETE = 0
+COMPLETE = 1
+ERROR = 2
+
+_REQUEST_LINE = 0
+_HEADERS = 1
+_BODY = 2
+_CHUNK_SIZE = 3
+_CHUNK_DATA = 4
+_CHUNK_END = 5
+_TRAILERS = 6
+_DONE = 7
+_FAILED = 8
+
+_HAS_FIND = hasattr(bytearray, "find")
+_MAX_TRAILERS = 8
+
+
+class RequestParser:
+    """Parses one request at a time out of a ``size``-byte buffer.
+
+    Feed it with ``recv_into(sock)`` (or ``feed(data)``), then call
+    ``parse()`` until it returns COMPLETE or ERROR. On ERROR, ``error`` holds
+    the status code to answer with (400, 413, 431, 501 or 505). After a
+    response, ``next_request()`` keeps any pipelined bytes and starts over.
+    """
+
+    __slots__ = ("buf", "view", "size", "max_headers", "n", "pos", "phase", "error",
+                 "method_start", "method_end", "path_end", "target_end", "query_start", "version_start", "line_end",
+                 "scan", "head_end", "content_length", "chunked",
+                 "connection", "body_start", "body_end", "remaining", "trailers")
+
+    def __init__(self, size=2048, max_headers=24):
+        self.buf = bytearray(size)
+        self.view = memoryview(self.buf)
+        self.size = size
+        self.max_headers = max_headers
+        self.n = 0
+        self.reset()
+
+    def reset(self):
+        """Forget the current request (the buffer contents are kept)."""
+        self.pos = 0
+        self.phase = _REQUEST_LINE
+        self.error = 0
+        self.method_start = self.method_end = self.path_end = 0
+        self.target_end = self.query_start = 0
+        self.version_start = self.line_end = 0
+        self.scan = 0
+        self.head_end = 0
+        self.content_length = 0
+        self.chunked = False
+        self.connection = b""
+        self.body_start = self.body_end = 0
+        self.remaining = 0
+        self.trailers = 0
+
+    def clear(self):
+        self.n = 0
+        self.reset()
+
+    def next_request(self):
+        """Start on the next request, keeping bytes that arrived after this one."""
+        rest = self.n - self.pos
+        if rest > 0 and self.pos:
+            self.buf[0:rest] = self.view[self.pos:self.n]
+        self.n = max(0, rest)
+        self.reset()
+
+    # ---------- input ----------
+    def room(self):
+        if self.n == self.size and self.phase in (_CHUNK_SIZE, _CHUNK_DATA, _CHUNK_END, _TRAILERS):
+            self._compact()
+        return self.size - self.n
+
+    def recv_into(self, sock):
+        """One ``sock.recv_into`` into the free part of the buffer. Returns
+        the byte count (0: the peer closed), or None when the buffer is full
+        (``error`` is then set). Socket exceptions propagate."""
+        room = self.room()
+        if room == 0:
+            self._fail(431 if self.phase < _BODY else 413)
+            return None
+        got = sock.recv_into(self.view[self.n:], room)
+        self.n += got
+        return got
+
+    def feed(self, data):
+        """Copy bytes in (for tests and benchmarks); returns how many fit."""
+        take = min(len(data), self.room())
+        self.buf[self.n:self.n + take] = data[:take]
+        self.n += take
+        return take
+
+    # ---------- parsing ----------
+    def parse(self):
+        """Advance over the bytes received so far: INCOMPLETE, COMPLETE or ERROR."""
+        while True:
+            phase = self.phase
+            if phase == _REQUEST_LINE:
+                end = self._find(b"\r\n\r\n", self.pos, self.n)
+                if end >= 0 and self._whole_head(self.pos, end):
+                    continue
+            elif phase == _DONE:
+                return COMPLETE
+            if phase == _FAILED:
+                return ERROR
+            if phase == _BODY:
+                if self.n < self.body_end:
+                    return INCOMPLETE
+                self.pos = self.body_end
+                self.phase = _DONE
+                continue
+            if phase == _CHUNK_DATA:
+                if not self._chunk_data():
+                    return INCOMPLETE
+                continue
+            if phase == _CHUNK_END:
+                if self.n - self.pos < 2:
+                    return INCOMPLETE
+                if self.buf[self.pos] != 13 or self.buf[self.pos + 1] != 10:
+                    return self._fail(400)
+                self.pos += 2
+                self.phase = _CHUNK_SIZE
+                continue
+            if phase == _HEADERS:
+                if self._headers() == INCOMPLETE and self.phase == _HEADERS:
+                    return INCOMPLETE
+                continue
+            end = self._find(b"\r\n", self.pos, self.n)
+            if end < 0:
+                if self.n == self.size and self.pos == 0:
+                    return self._fail(431 if phase < _BODY else 413)
+                return INCOMPLETE
+            start = self.pos
+            self.pos = end + 2
+            if phase == _REQUEST_LINE:
+                if end > start and self._request_line(start, end) == ERROR:
+                    return ERROR
+            elif phase == _CHUNK_SIZE:
+                if self._chunk_size(start, end) == ERROR:
+                    return ERROR
+            elif end == start:  # _TRAILERS: blank line ends the body
+                self.phase = _DONE
+            else:
+                self.trailers += 1
+                if self.trailers > _MAX_TRAILERS:
+                    return self._fail(431)
+
+    def _fail(self, status):
+        self.error = status
+        self.phase = _FAILED
+        return ERROR
+
+    def _find(self, sub, start, end):
+        if _HAS_FIND:
+            return self.buf.find(sub, start, end)
+        i = bytes(self.view[start:end]).find(sub)
+        return i + start if i >= 0 else -1
+
+    def _request_line(self, start, end):
+        sp1 = self._find(b" ", start, end)
+        sp2 = self._find(b" ", sp1 + 1, end) if sp1 > start else -1
+        if sp2 < 0 or sp2 == sp1 + 1 or self._find(b" ", sp2 + 1, end) >= 0:
+            return self._fail(400)
+        version = bytes(self.view[sp2 + 1:end])
+        if version != b"HTTP/1.1" and version != b"HTTP/1.0":
+            return self._fail(505 if version[:5] == b"HTTP/" else 400)
+        method = bytes(self.view[start:sp1])
+        if not (method.isalpha() and method.isupper()):
+            return self._fail(400)
+        self.method_start = start
+        self.method_end = sp1
+        self.target_end = sp2
+        q = self._find(b"?", sp1 + 1, sp2)
+        self.path_end = q if q >= 0 else sp2
+        self.query_start = q + 1 if q >= 0 else sp2
+        self.version_start = sp2 + 1
+        self.line_end = end
+        self.phase = _HEADERS
+        return INCOMPLETE
+
+    def _whole_head(self, start, end):
+        # Fast path for the usual request: the request line and every header
+        # arrived together (end is where the blank line starts), so both are
+        # checked in one go on one copy of the head. Anything this does not
+        # accept (a blank line before the request line, a malformed line, too
+        # many headers, folding, a chunked body) returns False and goes through
+        # the line-by-line path, which also picks the error status.
+        head = bytes(self.view[start:end + 2])
+        parts = head.split(b" ", 2)
+        if len(parts) != 3:
+            return False
+        method, target, rest = parts
+        if not target or b"\r\n" in target or not rest.startswith((b"HTTP/1.1\r\n", b"HTTP/1.0\r\n")):
+            return False
+        if not (method.isalpha() and method.isupper()):
+            return False
+        head = head.lower()  # the request line holds no CRLF, so only headers match below
+        if head.count(b"\r\n") - 1 > self.max_headers or b"\r\n " in head or b"\r\n\t" in head:
+            return False
+        if b"\r\ntransfer-encoding:" in head:
+            return False
+        value = self._value(head, b"\r\ncontent-length:")
+        if value is not None:
+            if not value or not value.isdigit():
+                return False
+            self.content_length = int(str(value, "ascii"))
+        value = self._value(head, b"\r\nconnection:")
+        if value is not None:
+            self.connection = value
+        sp1 = start + len(method)
+        sp2 = sp1 + 1 + len(target)
+        q = target.find(b"?")
+        self.method_start = start
+        self.method_end = sp1
+        self.target_end = sp2
+        self.path_end = sp1 + 1 + q if q >= 0 else sp2
+        self.query_start = sp1 + 2 + q if q >= 0 else sp2
+        self.version_start = sp2 + 1
+        self.line_end = sp2 + 9
+        self.pos = end + 4
+        self._end_of_head()
+        return True
+
+    def _headers(self):
+        # The whole header block at once: one search for the blank line that
+        # ends it, then a lowercased copy is searched for the headers we need
+        start = self.pos
+        if self.n - start >= 2 and self.buf[start] == 13 and self.buf[start + 1] == 10:
+            self.pos = start + 2
+            return self._end_of_head()
+        end = self._find(b"\r\n\r\n", max(start, self.scan), self.n)
+        if end < 0:
+            self.scan = max(start, self.n - 3)
+            return INCOMPLETE
+        self.pos = end + 4
+        head = bytes(self.view[start - 2:end + 2]).lower()  # every line starts with CRLF
+        if head.count(b"\r\n") - 1 > self.max_headers:
+            return self._fail(431)
+        if b"\r\n " in head or b"\r\n\t" in head:  # obsolete line folding
+            return self._fail(400)
+        value = self._value(head, b"\r\ncontent-length:")
+        if value is not None:
+            if not value or not value.isdigit():
+                return self._fail(400)
+            self.content_length = int(str(value, "ascii"))
+        value = self._value(head, b"\r\ntransfer-encoding:")
+        if value is not None:
+            if value != b"chunked":
+                return self._fail(501)
+            self.chunked = True
+        value = self._value(head, b"\r\nconnection:")
+        if value is not None:
+            self.connection = value
+        return self._end_of_head()
+
+    @staticmethod
+    def _value(head, key):
+        i = head.find(key)
+        if i < 0:
+            return None
+        return head[i + len(key):head.find(b"\r\n", i + 2)].strip()
+
+    def _end_of_head(self):
+        self.head_end = self.pos
+        self.body_start = self.body_end = self.pos
+        if self.chunked:
+            self.content_length = 0
+            self.phase = _CHUNK_SIZE
+        elif self.content_length:
+            if self.head_end + self.content_length > self.size:
+                return self._fail(413)
+            self.body_end = self.head_end + self.content_length
+            self.phase = _BODY
+        else:
+            self.phase = _DONE
+        return INCOMPLETE
+
+    def _chunk_size(self, start, end):
+        semi = self._find(b";", start, end)
+        digits = bytes(self.view[start:semi if semi >= 0 else end]).strip()
+        if not digits or len(digits) > 8 or digits.strip(b"0123456789abcdefABCDEF"):
+            return self._fail(400)
+        size = int(str(digits, "ascii"), 16)
+        if size == 0:
+            self.phase = _TRAILERS
+            return INCOMPLETE
+        # The decoded body plus this chunk's framing must fit the buffer
+        if self.body_end + size + 2 > self.size:
+            return self._fail(413)
+        self.remaining = size
+        self.phase = _CHUNK_DATA
+        return INCOMPLETE
+
+    def _chunk_data(self):
+        take = min(self.remaining, self.n - self.pos)
+        if take <= 0:
+            return False
+        if self.pos != self.body_end:
+            self.buf[self.body_end:self.body_end + take] = self.view[self.pos:self.pos + take]
+        self.body_end += take
+        self.pos += take
+        self.remaining -= take
+        self.content_length += take
+        if self.remaining:
+            return False
+        self.phase = _CHUNK_END
+        return True
+
+    def _compact(self):
+        # Chunk framing already consumed leaves a gap after the decoded body
+        gap = self.pos - self.body_end
+        if gap > 0:
+            rest = self.n - self.pos
+            self.buf[self.body_end:self.body_end + rest] = self.view[self.pos:self.n]
+            self.n -= gap
+            self.pos = self.body_end
+
+    # ---------- results ----------
+    @property
+    def method(self):
+        return str(self.view[self.method_start:self.method_end], "ascii")
+
+    @property
+    def path(self):
+        """Request target without the query string (still %-encoded). If it
+        is not valid UTF-8, only its ASCII bytes are kept."""
+        raw = self.view[self.method_end + 1:self.path_end]
+        try:
+            return str(raw, "utf-8")
+        except UnicodeError:
+            # Not str(raw, "utf-8", "ignore"): CircuitPython ignores the errors argument
+            return str(bytes([b for b in raw if b < 0x80]), "ascii")
+
+    @property
+    def query(self):
+        return self.view[self.query_start:self.target_end]
+
+    @property
+    def body(self):
+        return self.view[self.body_start:self.body_end]
+
+    @property
+    def version(self):
+        return str(self.view[self.version_start:self.line_end], "ascii")
+
+    @property
+    def keep_alive(self):
+        if self.buf[self.line_end - 1] == 49:  # HTTP/1.1
+            return self.connection != b"close"
+        return self.connection == b"keep-alive"
+
+    def header(self, name):
+        """Value of header ``name`` (lowercase bytes) as a memoryview, or None."""
+        start = self.line_end
+        head = bytes(self.view[start:self.head_end]).lower()
+        i = head.find(b"\r\n" + name + b":")
+        if i < 0:
+            return None
+        vs = start + i + len(name) + 3
+        ve = start + head.find(b"\r\n", i + 2)
+        buf = self.buf
+        while vs < ve and buf[vs] in (32, 9):
+            vs += 1
+        while ve > vs and buf[ve - 1] in (32, 9):
+            ve -= 1
+        return self.view[vs:ve]
+
+    def form_field(self, name, query=False):
+        """Raw (still encoded) value of ``name`` from an urlencoded body, or
+        from the query string with ``query=True``, as a memoryview. Only whole
+        field names match: ``t`` does not match inside ``st=``. None if absent."""
+        if query:
+            start, end = self.query_start, self.target_end
+        else:
+            start, end = self.body_start, self.body_end
+        buf = self.buf
+        klen = len(name)
+        while start < end:
+            amp = self._find(b"&", start, end)
+            field_end = end if amp < 0 else amp
+            eq = start + klen
+            if eq < field_end and buf[eq] == 61:  # "="
+                for i in range(klen):
+                    if buf[start + i] != name[i]:
+                        break
+                else:
+                    return self.view[eq + 1:field_end]
+            start = field_end + 1
+        return None
@@ -0,0 +1,268 @@
+# Streaming decoder for 1-bit images posted to HTTP_server.py: packed bits of
+# a given width and height, a binary PBM (P4) or a 1-bit BMP. Each chunk read
+# off the socket is copied straight into one preallocated framebuffer, so an
+# upload never needs the whole body in RAM. Sizes are checked against the
+# framebuffer before any pixel data is accepted.
+#
+# The framebuffer holds the image as it arrived, minus headers and row
+# padding: rows of ``row_bits`` bits, most significant bit first, a set bit
+# is black (white when ``invert`` is set, for BMPs whose palette says so).
+
+RAW = "raw"
+PBM = "pbm"
+BMP = "bmp"
+HEADER_MAX = 160  # PBM/BMP header bytes accepted, palette included
+CHUNK_SIZE = 512  # bytes read off the socket at a time
+
+# UNPACK[8 * b:8 * b + 8] are the eight pixel values of byte b
+UNPACK = bytearray(2048)
+for _b in range(256):
+    for _i in range(8):
+        UNPACK[8 * _b + _i] = (_b >> (7 - _i)) & 1
+del _b, _i
+
+
+def _u16(buf, at):
+    return buf[at] | buf[at + 1] << 8
+
+
+def _u32(buf, at):
+    return _u16(buf, at) | _u16(buf, at + 2) << 16
+
+
+def _number(text):
+    # Positive int from a query value, or 0
+    try:
+        value = int(text)
+    except (TypeError, ValueError):
+        return 0
+    return value if value > 0 else 0
+
+
+class ImageUpload:
+    """One upload at a time into a framebuffer of up to ``max_width`` x
+    ``max_height`` pixels.
+
+    Call begin() with the Content-Length (and the size, for packed bits),
+    then feed() the body in pieces until ``done``. Both return an error
+    message, or None. The image is complete when ``done`` is set and no
+    error came back; row() then gives its pixels one row at a time.
+    """
+
+    __slots__ = ("max_width", "max_height", "frame", "chunk", "header", "row_buf",
+                 "format", "width", "height", "row_bits", "invert", "length", "received",
+                 "header_len", "_fill", "_pos", "_stride", "_row_bytes", "_rows", "_flip")
+
+    def __init__(self, max_width, max_height, chunk_size=CHUNK_SIZE):
+        self.max_width = max_width
+        self.max_height = max_height
+        # Rows padded to whole bytes is the largest layout any format needs
+        self.frame = bytearray((max_width + 7) // 8 * max_height)
+        self.chunk = bytearray(chunk_size)
+        self.header = bytearray(HEADER_MAX)
+        self.row_buf = bytearray((max_width + 7) // 8 * 8 + 8)
+        self.format = None
+        self.width = self.height = self.row_bits = 0
+        self.invert = False
+        self.length = self.received = self.header_len = 0
+        self._fill = self._pos = 0
+        self._stride = self._row_bytes = self._rows = 0
+        self._flip = False
+
+    def max_length(self):
+        """Longest body that could hold an acceptable image."""
+        bmp_stride = (self.max_width + 31) // 32 * 4
+        return HEADER_MAX + max(len(self.frame), bmp_stride * self.max_height)
+
+    @property
+    def done(self):
+        return self.received >= self.length
+
+    @property
+    def remaining(self):
+        return self.length - self.received
+
+    def begin(self, length, width=None, height=None):
+        """Start an upload of ``length`` bytes. With ``width`` and ``height``
+        (ints or query strings) the body is packed bits, otherwise it must
+        start with a PBM or BMP header."""
+        self.format = None
+        self.length = length
+        self.received = self._fill = self._pos = 0
+        self.invert = False
+        if length <= 0:
+            return "empty body"
+        if width is None and height is None:
+            return None  # the header says which format and how big
+        self.format = RAW
+        self.header_len = 0
+        error = self._size(_number(width), _number(height))
+        if error:
+            return error
+        self.row_bits = self.width
+        packed = (self.width * self.height + 7) // 8
+        # Rows are not byte-aligned, so the bits go in as one run
+        self._stride = self._row_bytes = packed
+        self._rows = 1
+        self._flip = False
+        return self._check_length(packed)
+
+    def feed(self, data):
+        """Take the next piece of the body (bytes or a memoryview)."""
+        n = min(len(data), self.length - self.received)
+        start = 0
+        if self.format is None:
+            start = min(n, HEADER_MAX - self._fill)
+            self.header[self._fill:self._fill + start] = data[:start]
+            self._fill += start
+            self.received += start
+            error = self._parse_header()
+            if error:
+                return error
+            if self.format is None:
+                if self.done:
+                    return "body ended inside the image header"
+                return None
+            # Bytes past the header that arrived with it are pixels
+            self._pixels(self.header, self.header_len, self._fill)
+        self._pixels(data, start, n)
+        self.received += n - start
+        return None
+
+    def row(self, y):
+        """Pixel values (0 or 1, one byte each) of image row ``y``, as a
+        memoryview into a reused buffer."""
+        bit = y * self.row_bits
+        first = bit >> 3
+        last = (bit + self.width + 7) >> 3
+        out = self.row_buf
+        frame = self.frame
+        table = memoryview(UNPACK)
+        for i in range(last - first):
+            b = frame[first + i] << 3
+            out[i << 3:(i << 3) + 8] = table[b:b + 8]
+        skip = bit & 7
+        return memoryview(out)[skip:skip + self.width]
+
+    def _size(self, width, height):
+        if not width or not height:
+            return "width and height must be positive integers"
+        if width > self.max_width or height > self.max_height:
+            return "image is %dx%d, at most %dx%d fits" % (width, height, self.max_width, self.max_height)
+        self.width = width
+        self.height = height
+        return None
+
+    def _check_length(self, pixel_bytes):
+        expected = self.header_len + pixel_bytes
+        if self.length != expected:
+            return "Content-Length is %d, a %dx%d image needs %d" % (
+                self.length, self.width, self.height, expected)
+        return None
+
+    def _rows_of(self, stride, row_bytes, rows, flip):
+        # Layout of the pixel data in the body; unpadded top-down rows are one run
+        if stride == row_bytes and not flip:
+            stride = row_bytes = stride * rows
+            rows = 1
+        self._stride = stride
+        self._row_bytes = row_bytes
+        self._rows = rows
+        self._flip = flip
+
+    def _parse_header(self):
+        # Sets format and header_len once the whole header is in; an error
+        # message if it never can be
+        fill = self._fill
+        if fill < 2:
+            return None
+        magic = self.header[0] << 8 | self.header[1]
+        if magic == 0x5034:  # "P4"
+            return self._parse_pbm(fill)
+        if magic == 0x424D:  # "BM"
+            return self._parse_bmp(fill)
+        return "expected a PBM (P4) or BMP body, or ?w=&h= for packed bits"
+
+    def _parse_pbm(self, fill):
+        # P4 <ws> width <ws> height <one ws> pixels; "#" starts a comment
+        buf = self.header
+        values = []
+        i = 2
+        while len(values) < 2:
+            while i < fill and (buf[i] in b" \t\r\n" or buf[i] == 35):
+                if buf[i] == 35:
+                    while i < fill and buf[i] != 10:
+                        i += 1
+                i += 1
+            start = i
+            while i < fill and 48 <= buf[i] <= 57:
+                i += 1
+            if i >= fill:
+                return "PBM header too long" if fill >= HEADER_MAX else None
+            if i == start or buf[i] not in b" \t\r\n":
+                return "malformed PBM header"
+            values.append(int(str(buf[start:i], "ascii")))
+        error = self._size(values[0], values[1])
+        if error:
+            return error
+        self.header_len = i + 1  # the single whitespace byte before the pixels
+        row_bytes = (self.width + 7) // 8
+        self.row_bits = row_bytes * 8
+        self._rows_of(row_bytes, row_bytes, self.height, False)
+        self.format = PBM
+        return self._check_length(row_bytes * self.height)
+
+    def _parse_bmp(self, fill):
+        buf = self.header
+        if fill < 18:
+            return None
+        offset = _u32(buf, 10)
+        dib = _u32(buf, 14)
+        if offset > HEADER_MAX or dib < 40 or offset < 14 + dib + 8:
+            return "unsupported BMP header"
+        if fill < offset:
+            return "BMP header too long" if fill >= HEADER_MAX else None
+        if _u16(buf, 28) != 1 or _u32(buf, 30) != 0:
+            return "only uncompressed 1-bit BMPs are supported"
+        width = _u32(buf, 18)
+        height = _u32(buf, 22)
+        flip = True  # rows are stored bottom-up unless the height is negative
+        if height & 0x80000000:
+            height = 0x100000000 - height
+            flip = False
+        if width & 0x80000000:
+            return "malformed BMP header"
+        error = self._size(width, height)
+        if error:
+            return error
+        # Palette entries are B, G, R, 0; whichever is darker is black
+        p = 14 + dib
+        light0 = buf[p] + buf[p + 1] + buf[p + 2]
+        light1 = buf[p + 4] + buf[p + 5] + buf[p + 6]
+        self.invert = light1 > light0
+        self.header_len = offset
+        row_bytes = (width + 7) // 8
+        stride = (width + 31) // 32 * 4
+        self.row_bits = row_bytes * 8
+        self._rows_of(stride, row_bytes, height, flip)
+        self.format = BMP
+        return self._check_length(stride * height)
+
+    def _pixels(self, data, start, end):
+        # Copy body bytes data[start:end] to where they belong in the frame,
+        # dropping row padding
+        stride = self._stride
+        row_bytes = self._row_bytes
+        frame = self.frame
+        pos = self._pos
+        while start < end:
+            row = pos // stride
+            col = pos - row * stride
+            n = min(end - start, stride - col)
+            if col < row_bytes:
+                take = min(n, row_bytes - col)
+                at = (self._rows - 1 - row if self._flip else row) * row_bytes + col
+                frame[at:at + take] = data[start:start + take]
+            start += n
+            pos += n
+        self._pos = pos
@@ -0,0 +1,195 @@
+# Playlist state for BLE-final.py: stored images, rotation interval and order.
+
+import random
+import struct
+
+PLAYLIST_PATH = "/playlist.bin"
+PLAYLIST_MAGIC = b"PL1"
+MAX_ENTRIES = 8
+MIN_INTERVAL = 180  # SSD1680 FeatherWing: no more than one full refresh per 180 s
+DEFAULT_INTERVAL = 300
+
+ORDER_SEQ = "seq"
+ORDER_SHUFFLE = "shuf"
+ORDER_CUSTOM = "custom"
+_ORDER_CODES = (ORDER_SEQ, ORDER_SHUFFLE, ORDER_CUSTOM)
+
+
+class PlaylistEntry:
+    __slots__ = ("width", "height", "data", "prompt")
+
+    def __init__(self, width, height, data, prompt=""):
+        self.width = width
+        self.height = height
+        self.data = bytes(data)
+        self.prompt = prompt
+
+
+class Playlist:
+    """Ordered set of stored images rotated on a fixed interval.
+
+    The caller owns the clock: every method that needs the time takes ``now``
+    (seconds, usually ``time.monotonic()``) so the schedule can be driven by a
+    fake clock off-device.
+    """
+
+    def __init__(self, interval=DEFAULT_INTERVAL, min_interval=MIN_INTERVAL):
+        self.entries = []
+        self.min_interval = min_interval
+        self.interval = max(interval, min_interval)
+        self.mode = ORDER_SEQ
+        self.order = []
+        self.position = -1  # index into self.order of the frame on screen
+        self.active = False
+        self.next_due = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    # ---- editing ----
+    def add(self, width, height, data, prompt=""):
+        if len(self.entries) >= MAX_ENTRIES:
+            raise ValueError("playlist full")
+        self.entries.append(PlaylistEntry(width, height, data, prompt))
+        self._rebuild_order()
+        return len(self.entries) - 1
+
+    def remove(self, index):
+        if index < 0 or index >= len(self.entries):
+            raise IndexError("no such entry")
+        self.entries.pop(index)
+        if self.mode == ORDER_CUSTOM:
+            self.order = [i - (i > index) for i in self.order if i != index]
+        self._rebuild_order()
+
+    def clear(self):
+        self.entries = []
+        self.order = []
+        self.position = -1
+        self.active = False
+
+    def set_interval(self, seconds):
+        """Set the rotation interval, clamped to the panel refresh limit."""
+        self.interval = max(int(seconds), self.min_interval)
+        return self.interval
+
+    def set_order(self, mode, indices=None):
+        if mode == ORDER_CUSTOM:
+            if not indices:
+                raise ValueError("custom order needs indices")
+            for i in indices:
+                if i < 0 or i >= len(self.entries):
+                    raise IndexError("no such entry")
+            self.mode = ORDER_CUSTOM
+            self.order = list(indices)
+            self.position = -1
+            return
+        if mode not in (ORDER_SEQ, ORDER_SHUFFLE):
+            raise ValueError("unknown order")
+        self.mode = mode
+        self._rebuild_order()
+
+    def _rebuild_order(self):
+        if self.mode == ORDER_CUSTOM:
+            # Keep the explicit order; fall back to sequential once it is empty.
+            if self.order:
+                return
+            self.mode = ORDER_SEQ
+        self.order = list(range(len(self.entries)))
+        if self.mode == ORDER_SHUFFLE:
+            # random.shuffle is not available on CircuitPython
+            for i in range(len(self.order) - 1, 0, -1):
+                j = random.randint(0, i)
+                self.order[i], self.order[j] = self.order[j], self.order[i]
+        self.position = -1
+
+    # ---- scheduling ----
+    def start(self, now):
+        if not self.entries:
+            return False
+        self.active = True
+        # First frame is due immediately; the caller still honours the
+        # panel's own refresh guard before drawing it.
+        self.next_due = now
+        return True
+
+    def stop(self):
+        self.active = False
+
+    def touch(self, now):
+        """Something else refreshed the panel: push the next rotation back."""
+        if self.active:
+            self.next_due = now + self.interval
+
+    def peek_next(self):
+        """Entry that will be shown on the next rotation, or None."""
+        if not self.order:
+            return None
+        return self.entries[self.order[(self.position + 1) % len(self.order)]]
+
+    def due(self, now):
+        return self.active and bool(self.order) and now >= self.next_due
+
+    def advance(self, now):
+        """Mark the peeked entry as shown and schedule the next rotation."""
+        self.position = (self.position + 1) % len(self.order)
+        if self.position == len(self.order) - 1 and self.mode == ORDER_SHUFFLE:
+            self._rebuild_order()
+            self.position = -1
+        self.next_due = now + self.interval
+
+    def status(self):
+        return {
+            "t": "pl",
+            "n": len(self.entries),
+            "on": 1 if self.active else 0,
+            "int": self.interval,
+            "ord": self.mode,
+            "seq": list(self.order),
+            "pos": self.position,
+        }
+
+    # ---- persistence ----
+    def save(self, path=PLAYLIST_PATH):
+        """Write the playlist to flash. Returns False if the filesystem is read-only."""
+        try:
+            with open(path, "wb") as f:
+                f.write(PLAYLIST_MAGIC)
+                order = bytes(self.order) if self.mode == ORDER_CUSTOM else b""
+                f.write(struct.pack("<IBBB", self.interval, _ORDER_CODES.index(self.mode), len(self.entries), len(order)))
+                f.write(order)
+                for e in self.entries:
+                    prompt = e.prompt.encode("utf-8")
+                    f.write(struct.pack("<HHIH", e.width, e.height, len(e.data), len(prompt)))
+                    f.write(prompt)
+                    f.write(e.data)
+            return True
+        except OSError as e:
+            print("Playlist save skipped:", e)
+            return False
+
+    def load(self, path=PLAYLIST_PATH):
+        try:
+            with open(path, "rb") as f:
+                if f.read(3) != PLAYLIST_MAGIC:
+                    return False
+                interval, mode, count, order_len = struct.unpack("<IBBB", f.read(7))
+                mode = _ORDER_CODES[mode]
+                order = list(f.read(order_len)) if mode == ORDER_CUSTOM else None
+                entries = []
+                for _ in range(count):
+                    w, h, n, plen = struct.unpack("<HHIH", f.read(10))
+                    prompt = f.read(plen).decode("utf-8")
+                    entries.append(PlaylistEntry(w, h, f.read(n), prompt))
+        except Exception as e:
+            print("Playlist load skipped:", e)
+            return False
+        self.entries = entries
+        self.interval = max(interval, self.min_interval)
+        self.mode = mode
+        if order is not None:
+            self.order = order
+            self.position = -1
+        else:
+            self._rebuild_order()
+        return True
@@ -0,0 +1,65 @@
+# Adaptive sleep for the connected loop in BLE-final.py.
+#
+# While a transfer is active or data keeps arriving the loop barely sleeps, so
+# the UART RX buffer is drained as fast as BLE fills it. Once the link goes
+# quiet the sleep doubles each idle pass up to max_sleep, so an idle badge
+# wakes a handful of times per second instead of 20.
+
+import time
+
+
+class AdaptivePoller:
+    """Decides how long the main loop sleeps between ``uart.in_waiting`` checks.
+
+    ``waitable`` is optional: an object with ``wait(timeout)`` that returns early
+    when data arrives (for BLE stacks that expose one). Without it the poller
+    falls back to ``sleep``, which may be replaced for simulated clocks.
+
+    With ``busy_window`` set, the loop also stays busy for that many seconds
+    after the last data, so the gaps between a sender's writes are not slept
+    through, but a stalled sender lets it back off.
+    """
+
+    def __init__(self, busy_sleep=0.0, first_idle_sleep=0.005, max_sleep=0.2, factor=2.0,
+                 waitable=None, sleep=time.sleep, busy_window=0.0, clock=time.monotonic):
+        self.busy_sleep = busy_sleep
+        self.first_idle_sleep = first_idle_sleep
+        self.max_sleep = max_sleep
+        self.factor = factor
+        self.waitable = waitable
+        self._sleep = sleep
+        self.busy_window = busy_window
+        self._clock = clock
+        self.delay = first_idle_sleep
+        self._saw_data = False
+        self._last_data = None
+        self.wakeups = 0
+        self.slept = 0.0
+
+    def note_data(self):
+        """Call whenever a read returned data; the next wait will be short."""
+        self._saw_data = True
+        if self.busy_window:
+            self._last_data = self._clock()
+
+    def recently_busy(self):
+        last = self._last_data
+        return last is not None and self._clock() - last < self.busy_window
+
+    def next_delay(self, busy=False):
+        if busy or self._saw_data or (self.busy_window and self.recently_busy()):
+            self._saw_data = False
+            self.delay = self.first_idle_sleep
+            return self.busy_sleep
+        delay = self.delay
+        self.delay = min(self.max_sleep, self.delay * self.factor)
+        return delay
+
+    def wait(self, busy=False):
+        delay = self.next_delay(busy)
+        self.wakeups += 1
+        self.slept += delay
+        if self.waitable is not None and delay > 0:
+            self.waitable.wait(delay)
+        else:
+            self._sleep(delay)
@@ -0,0 +1,128 @@
+# Preallocated render/receive buffers and heap watermarks for BLE-final.py.
+#
+# Every buffer a render or transfer needs is allocated once at startup from the
+# e-ink geometry and handed out again and again, so a long-running badge does
+# not fragment its heap with per-render Bitmaps, Groups and bytearrays.
+
+import gc
+
+import displayio
+
+
+class Frame:
+    """A full-screen 2-colour framebuffer with the TileGrid/Group that shows it."""
+
+    __slots__ = ("bitmap", "group", "in_use")
+
+    def __init__(self, width, height, palette):
+        self.bitmap = displayio.Bitmap(width, height, 2)
+        tile = displayio.TileGrid(
+            self.bitmap,
+            pixel_shader=palette,
+            width=1,
+            height=1,
+            tile_width=width,
+            tile_height=height,
+            x=0,
+            y=0,
+        )
+        self.group = displayio.Group()
+        self.group.append(tile)
+        self.in_use = False
+
+
+class RenderPool:
+    """Framebuffers, blot scratch, receive buffer and text scratch, allocated once.
+
+    Three frames cover the worst case: one on the panel, one being composed by
+    the playlist and one for an incoming transfer.
+    """
+
+    def __init__(self, frame_width, frame_height, scratch_width, scratch_height, rx_len, frames=3):
+        # [0] = White, [1] = Black
+        self.palette = displayio.Palette(2)
+        self.palette[0] = 0xFFFFFF
+        self.palette[1] = 0x000000
+        self.frames = [Frame(frame_width, frame_height, self.palette) for _ in range(frames)]
+        self.on_screen = None
+        self.scratch = displayio.Bitmap(scratch_width, scratch_height, 2)
+        self.rx = bytearray(rx_len)
+        self._text_label = None
+
+    def acquire_frame(self):
+        for frame in self.frames:
+            if not frame.in_use:
+                frame.in_use = True
+                return frame
+        raise RuntimeError("no free framebuffer")
+
+    def release_frame(self, frame):
+        if frame is not None and frame is not self.on_screen:
+            frame.in_use = False
+
+    def mark_shown(self, frame):
+        """``frame`` is now on the panel; the frame it replaced becomes free."""
+        previous = self.on_screen
+        self.on_screen = frame
+        if previous is not None and previous is not frame:
+            previous.in_use = False
+
+    def text_label(self, font, text):
+        """Reusable bitmap_label for rendering prompt text into a frame."""
+        if self._text_label is None:
+            from adafruit_display_text import bitmap_label
+
+            self._text_label = bitmap_label.Label(font, text=text, color=0x000000)
+        else:
+            self._text_label.text = text
+        return self._text_label
+
+
+def largest_free_block(limit):
+    """Size of the largest bytearray we can allocate, found by bisection (bytes).
+
+    Only meaningful right after gc.collect(); costs about log2(limit) allocations.
+    """
+    lo, hi = 0, limit
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        try:
+            probe = bytearray(mid)
+            del probe
+            lo = mid
+        except MemoryError:
+            hi = mid - 1
+    return lo
+
+
+class HeapStats:
+    """Free-heap and largest-free-block samples with low watermarks."""
+
+    def __init__(self, probe_limit=256 * 1024):
+        self.probe_limit = probe_limit
+        self.samples = 0
+        self.free = None
+        self.largest = None
+        self.min_free = None
+        self.min_largest = None
+
+    def sample(self):
+        gc.collect()
+        mem_free = getattr(gc, "mem_free", None)  # CircuitPython only
+        self.free = mem_free() if mem_free else None
+        self.largest = largest_free_block(min(self.probe_limit, self.free or self.probe_limit))
+        if self.free is not None and (self.min_free is None or self.free < self.min_free):
+            self.min_free = self.free
+        if self.min_largest is None or self.largest < self.min_largest:
+            self.min_largest = self.largest
+        self.samples += 1
+
+    def report(self):
+        return {
+            "t": "mem",
+            "free": self.free,
+            "lfb": self.largest,
+            "min_free": self.min_free,
+            "min_lfb": self.min_largest,
+            "n": self.samples,
+        }
@@ -0,0 +1,123 @@
+# Cooperative main loop for HTTP_server.py: serves HTTP requests for up to a
+# time budget per tick, then runs the periodic tasks that are due (event
+# pings, display updates, sensors), then sleeps until the next task is due.
+#
+# A request cannot be interrupted, so the budget is checked between
+# requests: a tick serves at least one waiting request and stops starting
+# new ones once the budget is spent. Each tick records how long it spent in
+# HTTP, and each task how late it ran, so a starved task shows up in report().
+
+import time
+
+HTTP_BUDGET = 0.02  # seconds of request handling per tick before tasks run
+IDLE_SLEEP = 0.005  # longest sleep when idle, so new connections wait little
+
+
+class Task:
+    """A function called as ``func(now)`` every ``period`` seconds (every
+    tick for 0)."""
+
+    __slots__ = ("name", "period", "func", "due", "runs", "late_max", "time_max")
+
+    def __init__(self, name, period, func):
+        self.name = name
+        self.period = period
+        self.func = func
+        self.due = 0.0  # runs on the first tick
+        self.runs = 0
+        self.late_max = 0.0
+        self.time_max = 0.0
+
+
+class Scheduler:
+    """Ticks of ``serve()`` calls followed by due tasks.
+
+    ``clock`` and ``sleep`` may be replaced for simulated time.
+    """
+
+    __slots__ = ("budget", "idle_sleep", "clock", "sleep", "tasks", "ticks", "requests",
+                 "http_last", "http_max", "http_total", "over_budget", "sleeps")
+
+    def __init__(self, budget=HTTP_BUDGET, idle_sleep=IDLE_SLEEP, clock=time.monotonic, sleep=time.sleep):
+        self.budget = budget
+        self.idle_sleep = idle_sleep
+        self.clock = clock
+        self.sleep = sleep
+        self.tasks = []
+        self.ticks = 0
+        self.requests = 0
+        self.http_last = 0.0  # seconds in serve() during the last tick
+        self.http_max = 0.0
+        self.http_total = 0.0
+        self.over_budget = 0  # ticks whose last request ran past the budget
+        self.sleeps = 0
+
+    def every(self, name, period, func):
+        task = Task(name, period, func)
+        self.tasks.append(task)
+        return task
+
+    def tick(self, serve):
+        """One pass of the main loop. ``serve()`` handles at most one
+        request and returns False when none was waiting. Returns the
+        number of requests served."""
+        clock = self.clock
+        start = now = clock()
+        served = 0
+        while serve():
+            served += 1
+            now = clock()
+            if now - start >= self.budget:
+                break
+        else:
+            now = clock()
+        spent = now - start
+        self.ticks += 1
+        self.requests += served
+        self.http_last = spent
+        self.http_total += spent
+        if spent > self.http_max:
+            self.http_max = spent
+        if spent > self.budget:
+            self.over_budget += 1
+
+        wake = now + self.idle_sleep
+        for task in self.tasks:
+            if now >= task.due:
+                late = now - task.due if task.runs else 0.0
+                if late > task.late_max:
+                    task.late_max = late
+                task.func(now)
+                task.runs += 1
+                t = clock()
+                if t - now > task.time_max:
+                    task.time_max = t - now
+                now = t
+                # Keep the cadence, unless the task fell a whole period behind
+                task.due += task.period
+                if task.due <= now:
+                    task.due = now + task.period
+            if task.period and task.due < wake:
+                wake = task.due
+
+        if not served:
+            delay = wake - clock()
+            if delay > 0:
+                self.sleeps += 1
+                self.sleep(delay)
+        return served
+
+    def report(self):
+        ms = 1000
+        return {
+            "ticks": self.ticks,
+            "requests": self.requests,
+            "http_ms_last": round(self.http_last * ms, 2),
+            "http_ms_max": round(self.http_max * ms, 2),
+            "http_ms_mean": round(self.http_total * ms / max(1, self.ticks), 3),
+            "budget_ms": self.budget * ms,
+            "over_budget": self.over_budget,
+            "sleeps": self.sleeps,
+            "tasks": {t.name: {"runs": t.runs, "late_ms_max": round(t.late_max * ms, 2),
+                               "ms_max": round(t.time_max * ms, 2)} for t in self.tasks},
+        }
@@ -0,0 +1,120 @@
+# Static files for HTTP_server.py: precompressed .gz siblings, long-lived
+# caching for content-hashed names, byte ranges, and streaming through one
+# reusable buffer. tools/build_static.py produces the hashed names and .gz files.
+
+import os
+
+CHUNK_SIZE = 1024
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+CONTENT_TYPES = {
+    "html": "text/html; charset=utf-8",
+    "css": "text/css",
+    "js": "application/javascript",
+    "json": "application/json",
+    "txt": "text/plain; charset=utf-8",
+    "svg": "image/svg+xml",
+    "png": "image/png",
+    "jpg": "image/jpeg",
+    "bmp": "image/bmp",
+    "ico": "image/x-icon",
+    "woff2": "font/woff2",
+}
+
+
+def is_hashed(name):
+    """True for names like ``app.1a2b3c4d.js`` (8 hex digits before the extension)."""
+    parts = name.rsplit("/", 1)[-1].split(".")
+    if len(parts) < 3 or len(parts[-2]) != 8:
+        return False
+    return not parts[-2].strip("0123456789abcdef")
+
+
+def content_type(name):
+    return CONTENT_TYPES.get(name.rsplit(".", 1)[-1].lower(), "application/octet-stream")
+
+
+def byte_range(value, size):
+    """(start, stop, partial) for a Range header over ``size`` bytes, or None
+    when it cannot be satisfied. A missing, malformed or multi-range header
+    means the whole file, as HTTP allows."""
+    if not value or not value.startswith("bytes=") or "," in value:
+        return 0, size, False
+    first, dash, last = value[6:].strip().partition("-")
+    if not dash or not (first or last) or not (first + last).isdigit():
+        return 0, size, False
+    if not first:  # bytes=-N: the last N bytes
+        start = max(0, size - int(last))
+        stop = size
+    else:
+        start = int(first)
+        stop = min(size, int(last) + 1) if last else size
+        if last and stop <= start:
+            return 0, size, False
+    if start >= size:
+        return None
+    return start, stop, True
+
+
+class StaticFiles:
+    """Files under ``root``, streamed in ``chunk_size`` pieces through a buffer
+    allocated once. The caller sends the pieces before asking for the next."""
+
+    __slots__ = ("root", "buf", "view")
+
+    def __init__(self, root, chunk_size=CHUNK_SIZE):
+        self.root = root.rstrip("/")
+        self.buf = bytearray(chunk_size)
+        self.view = memoryview(self.buf)
+
+    def lookup(self, name, accept_encoding=""):
+        """(filename, size, gzipped) for URL path ``name`` (relative to the
+        root), or None. The .gz sibling wins when the client takes gzip."""
+        if not name or name[0] == "/" or "\\" in name or ".." in name.split("/"):
+            return None
+        filename = self.root + "/" + name
+        if "gzip" in accept_encoding:
+            size = self._size(filename + ".gz")
+            if size is not None:
+                return filename + ".gz", size, True
+        size = self._size(filename)
+        if size is None:
+            return None
+        return filename, size, False
+
+    @staticmethod
+    def _size(filename):
+        try:
+            st = os.stat(filename)
+        except OSError:
+            return None
+        if st[0] & 0x4000:  # a directory
+            return None
+        return st[6]
+
+    @staticmethod
+    def headers(name, gzipped):
+        headers = {
+            "Cache-Control": IMMUTABLE if is_hashed(name) else REVALIDATE,
+            "Accept-Ranges": "bytes",
+            "Vary": "Accept-Encoding",
+        }
+        if gzipped:
+            headers["Content-Encoding"] = "gzip"
+        return headers
+
+    def stream(self, filename, start, stop):
+        """Yield bytes ``start``..``stop`` of the file as memoryviews of the
+        shared buffer; each one is only valid until the next is requested."""
+        view = self.view
+        with open(filename, "rb") as f:
+            if start:
+                f.seek(start)
+            left = stop - start
+            while left > 0:
+                got = f.readinto(view[:min(len(view), left)])
+                if not got:
+                    break
+                left -= got
+                yield view[:got]
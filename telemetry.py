@@ -0,0 +1,150 @@
+# Background battery / temperature / uptime sampler for BLE-final.py.
+#
+# Readers are plain callables so the hardware can be swapped for fakes on
+# CPython. Sampling happens from the main loop's idle time; answering
+# {"t":"bat"} only copies cached numbers into a preallocated reply.
+
+import time
+
+SAMPLE_PERIOD = 10.0  # seconds between hardware reads
+EMA_ALPHA = 0.3  # weight of the newest sample
+
+# Resting LiPo cell voltage (mV) -> percent, used when the reader has no gauge
+_LIPO_CURVE = ((4200, 100), (4100, 90), (4000, 78), (3900, 64), (3800, 50),
+               (3700, 32), (3600, 15), (3500, 6), (3300, 0))
+
+
+def lipo_percent(mv):
+    if mv >= _LIPO_CURVE[0][0]:
+        return 100
+    for (hi_mv, hi_pct), (lo_mv, lo_pct) in zip(_LIPO_CURVE, _LIPO_CURVE[1:]):
+        if mv >= lo_mv:
+            return lo_pct + (hi_pct - lo_pct) * (mv - lo_mv) // (hi_mv - lo_mv)
+    return 0
+
+
+class Telemetry:
+    """Smoothed battery and chip-temperature readings plus uptime.
+
+    battery: callable -> (millivolts, percent or None), or None if absent
+    temperature: callable -> degrees C, or None if absent
+    """
+
+    __slots__ = ("battery", "temperature", "source", "period", "alpha", "clock",
+                 "started", "next_sample", "mv", "pct", "tmp", "samples", "errors", "_reply")
+
+    def __init__(self, battery=None, temperature=None, source="unsupported",
+                 period=SAMPLE_PERIOD, alpha=EMA_ALPHA, clock=time.monotonic):
+        self.battery = battery
+        self.temperature = temperature
+        self.source = source if battery is not None else "unsupported"
+        self.period = period
+        self.alpha = alpha
+        self.clock = clock
+        self.started = clock()
+        self.next_sample = self.started
+        self.mv = None
+        self.pct = None
+        self.tmp = None
+        self.samples = 0
+        self.errors = 0
+        self._reply = {"t": "bat", "mv": 0, "pct": 0, "tmp": None, "src": self.source, "up": 0}
+
+    def _smooth(self, previous, value):
+        if value is None:
+            return previous
+        if previous is None:
+            return value
+        return previous + self.alpha * (value - previous)
+
+    def poll(self, now=None):
+        """Read the hardware if a sample is due. Call from idle time only."""
+        now = self.clock() if now is None else now
+        if now < self.next_sample:
+            return False
+        self.next_sample = now + self.period
+        if self.battery is not None:
+            try:
+                mv, pct = self.battery()
+                if pct is None:
+                    pct = lipo_percent(mv)
+                self.mv = self._smooth(self.mv, mv)
+                self.pct = self._smooth(self.pct, pct)
+            except Exception as e:
+                self.errors += 1
+                print("Battery read failed:", repr(e))
+        if self.temperature is not None:
+            try:
+                self.tmp = self._smooth(self.tmp, self.temperature())
+            except Exception as e:
+                self.errors += 1
+                print("Temperature read failed:", repr(e))
+        self.samples += 1
+        return True
+
+    def report(self, now=None):
+        """The cached {"t":"bat"} reply. No I/O; the dict is reused between calls."""
+        now = self.clock() if now is None else now
+        reply = self._reply
+        reply["mv"] = int(self.mv) if self.mv is not None else 0
+        reply["pct"] = max(0, min(100, int(self.pct))) if self.pct is not None else 0
+        reply["tmp"] = round(self.tmp, 1) if self.tmp is not None else None
+        reply["up"] = int(now - self.started)
+        return reply
+
+
+# ---------- hardware readers ----------
+def fuel_gauge_reader(i2c=None):
+    """MAX17048 fuel gauge (present on the Feather ESP32-S3 Reverse TFT)."""
+    import board
+    import adafruit_max1704x
+
+    sensor = adafruit_max1704x.MAX17048(i2c or board.I2C())
+
+    def read():
+        return sensor.cell_voltage * 1000, sensor.cell_percent
+
+    return read
+
+
+def vbat_reader(pin, divider=2):
+    """Battery voltage through an analog divider (e.g. board.VOLTAGE_MONITOR)."""
+    import analogio
+
+    adc = analogio.AnalogIn(pin)
+
+    def read():
+        return adc.value / 65535 * adc.reference_voltage * divider * 1000, None
+
+    return read
+
+
+def cpu_temperature_reader():
+    import microcontroller
+
+    def read():
+        return microcontroller.cpu.temperature
+
+    return read
+
+
+def default_telemetry():
+    """Telemetry wired to whatever battery/temperature hardware this board has."""
+    battery, source = None, "unsupported"
+    try:
+        battery, source = fuel_gauge_reader(), "fuel_gauge"
+    except Exception as e:
+        print("No fuel gauge:", repr(e))
+        try:
+            import board
+
+            battery, source = vbat_reader(board.VOLTAGE_MONITOR), "vbat"
+        except Exception as e2:
+            print("No battery monitor pin:", repr(e2))
+    try:
+        temperature = cpu_temperature_reader()
+        temperature()
+    except Exception as e:
+        print("No CPU temperature:", repr(e))
+        temperature = None
+    return Telemetry(battery=battery, temperature=temperature, source=source)
@@ -0,0 +1,212 @@
+# Paged text for the TFT in Wifi.py and HTTP_server.py. A message is word
+# wrapped one page at a time, only as far as the page being shown, and each
+# page's line breaks are kept for a few pages per scale, so flipping back and
+# forth or toggling the scale does not wrap again. Only the lines on screen
+# are drawn, into a fixed pool of one label per row.
+#
+# Wrapping: "\n" starts a new line, lines break at the last space that fits,
+# and a word longer than a line is split. Lines are (start, end) offsets into
+# the message, so nothing is copied until a label shows it.
+
+CACHED_PAGES = 8  # pages whose line breaks are kept, over all scales
+LINE_SPACING = 1.1
+AUTO_PAGE = 5.0  # seconds per page when auto-scrolling
+
+
+def next_line(text, pos, cols):
+    """The line starting at ``pos`` as (start, end, where the next line starts)."""
+    end = text.find("\n", pos)
+    if end < 0:
+        end = len(text)
+    if end - pos <= cols:
+        return pos, end, end + 1
+    space = text.rfind(" ", pos + 1, pos + cols + 1)
+    if space < 0:
+        return pos, pos + cols, pos + cols  # a word longer than the line
+    # A space that ends the paragraph ends this line, not the next one
+    return pos, space, space + 2 if space + 1 == end else space + 1
+
+
+class TextPager:
+    """Line breaks of one message, page by page, for a text area of
+    ``width`` x ``height`` pixels in a ``char_w`` x ``char_h`` font."""
+
+    __slots__ = ("width", "height", "char_w", "char_h", "line_spacing", "text", "_starts", "_pages", "_order")
+
+    def __init__(self, width, height, char_w, char_h, line_spacing=LINE_SPACING):
+        self.width = width
+        self.height = height
+        self.char_w = char_w
+        self.char_h = char_h
+        self.line_spacing = line_spacing
+        self.set_text("")
+
+    def set_text(self, text):
+        self.text = text.replace("\r", "")
+        self._starts = {}  # scale -> offsets where pages 0, 1, ... start
+        self._pages = {}  # (scale, page) -> line spans
+        self._order = []  # keys of _pages, oldest first
+
+    def cols(self, scale):
+        return max(1, self.width // (self.char_w * scale))
+
+    def pitch(self, scale):
+        """Pixels from one line to the next."""
+        return int(self.char_h * self.line_spacing) * scale
+
+    def rows(self, scale):
+        return max(1, (self.height - self.char_h * scale) // self.pitch(scale) + 1)
+
+    def has_page(self, page, scale):
+        return page >= 0 and self._start(page, scale) is not None
+
+    def page(self, page, scale):
+        """Line spans of ``page`` (an empty list past the end)."""
+        key = (scale, page)
+        spans = self._pages.get(key)
+        if spans is not None:
+            return spans
+        start = self._start(page, scale)
+        if start is None:
+            return []
+        spans, _ = self._wrap(start, scale)
+        self._keep(key, spans)
+        return spans
+
+    def _start(self, page, scale):
+        # Offset where ``page`` starts, wrapping the pages before it if needed;
+        # None past the end
+        starts = self._starts.get(scale)
+        if starts is None:
+            starts = self._starts[scale] = [0]
+        while len(starts) <= page:
+            last = starts[-1]
+            if last >= len(self.text):
+                return None
+            spans, end = self._wrap(last, scale)
+            self._keep((scale, len(starts) - 1), spans)
+            starts.append(end)
+        start = starts[page]
+        return start if page == 0 or start < len(self.text) else None
+
+    def _wrap(self, pos, scale):
+        # One page of lines from ``pos``, and where the next page starts. A
+        # trailing newline adds no line; an empty message is one empty line.
+        text = self.text
+        cols = self.cols(scale)
+        spans = []
+        for _ in range(self.rows(scale)):
+            if pos >= len(text) and (spans or pos):
+                break
+            start, end, pos = next_line(text, pos, cols)
+            spans.append((start, end))
+        return spans, pos
+
+    def _keep(self, key, spans):
+        if key in self._pages:
+            return
+        if len(self._order) >= CACHED_PAGES:
+            del self._pages[self._order.pop(0)]
+        self._pages[key] = spans
+        self._order.append(key)
+
+
+class TextView:
+    """Shows one page of a TextPager in ``labels``: one label per row, at
+    least as many as the pager has rows at scale 1. Labels are only
+    touched when what they show changes. With ``display``, a page is drawn
+    with auto_refresh off, so it appears in one refresh."""
+
+    __slots__ = ("pager", "labels", "display", "x", "y", "scale", "align", "page", "auto",
+                 "next_flip", "_shown", "_placed")
+
+    def __init__(self, pager, labels, x, y, display=None, auto=AUTO_PAGE):
+        self.pager = pager
+        self.labels = labels
+        self.display = display
+        self.x = x
+        self.y = y
+        self.scale = 1
+        self.align = "left"
+        self.page = 0
+        self.auto = auto  # seconds per page, 0 to page by hand
+        self.next_flip = 0.0
+        self._shown = [None] * len(labels)
+        self._placed = [None] * len(labels)
+
+    @property
+    def text(self):
+        return self.pager.text
+
+    def set_text(self, text, scale=None, align=None, now=0.0):
+        if scale is not None:
+            self.scale = scale
+        if align is not None:
+            self.align = align
+        self.pager.set_text(text)
+        self.page = 0
+        self.next_flip = now + self.auto
+        self.draw()
+
+    def show_page(self, page):
+        """Show ``page`` if it exists; returns whether it does."""
+        if not self.pager.has_page(page, self.scale):
+            return False
+        self.page = page
+        self.draw()
+        return True
+
+    def next_page(self):
+        # Wraps around to the first page after the last
+        if not self.show_page(self.page + 1):
+            self.show_page(0)
+
+    def prev_page(self):
+        if self.page:
+            self.show_page(self.page - 1)
+
+    def tick(self, now):
+        """Auto-scroll: the next page every ``auto`` seconds, if there is
+        more than one. Returns True if the page changed."""
+        if not self.auto or now < self.next_flip:
+            return False
+        self.next_flip = now + self.auto
+        if self.page == 0 and not self.pager.has_page(1, self.scale):
+            return False
+        self.next_page()
+        return True
+
+    def draw(self):
+        display = self.display
+        auto = display.auto_refresh if display is not None else False
+        if auto:
+            display.auto_refresh = False
+        try:
+            self._draw()
+        finally:
+            if auto:
+                display.auto_refresh = True
+
+    def _draw(self):
+        pager = self.pager
+        text = pager.text
+        scale = self.scale
+        spans = pager.page(self.page, scale)
+        pitch = pager.pitch(scale)
+        if self.align == "center":
+            anchor, x = 0.5, self.x + pager.width // 2
+        elif self.align == "right":
+            anchor, x = 1.0, self.x + pager.width
+        else:
+            anchor, x = 0.0, self.x
+        for i, lbl in enumerate(self.labels):
+            line = text[spans[i][0]:spans[i][1]] if i < len(spans) else ""
+            if line != self._shown[i]:
+                lbl.text = line
+                self._shown[i] = line
+            place = (anchor, x, self.y + i * pitch, scale)
+            if place != self._placed[i]:
+                lbl.scale = scale
+                lbl.anchor_point = (anchor, 0)
+                lbl.anchored_position = (x, self.y + i * pitch)
+                self._placed[i] = place
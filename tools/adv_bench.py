@@ -0,0 +1,195 @@
+"""Advertising-policy benchmark for the BLE-final.py session loop (runs on CPython).
+
+Drives the same wait/connect/disconnect loop as BLE-final.py against a fake
+BLERadio on a simulated clock. A scripted central scans with a fixed window and
+interval, so we can measure time-to-connect and advertising duty cycle for each
+policy in adv_policy.ADV_POLICIES.
+
+    python3 tools/adv_bench.py [--json] [--seed N]
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from adv_policy import ADV_POLICIES, make_policy  # noqa: E402
+
+ADV_EVENT_S = 0.0015  # radio-on time of one advertising event (3 channels, ~31 B payload)
+ADV_DELAY_MAX = 0.010  # BLE adds 0-10 ms of random delay to every advertising event
+BLE_ADV_RESTART = 60  # mirrors BLE-final.py
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class ScriptedCentral:
+    """A phone that starts scanning ``gap`` seconds after the previous session
+    ended, stays connected for ``hold`` seconds, then disconnects (cleanly or not).
+    """
+
+    def __init__(self, sessions, scan_window=0.03, scan_interval=0.06):
+        self.sessions = list(sessions)  # [(gap, hold, clean), ...]
+        self.scan_window = scan_window
+        self.scan_interval = scan_interval
+        self.index = 0
+        self.scan_start = self.sessions[0][0] if self.sessions else None
+        self.connect_times = []
+
+    def done(self):
+        return self.index >= len(self.sessions)
+
+    def hears(self, t):
+        """True if an advertising event at time t falls into one of our scan windows."""
+        if self.scan_start is None or t < self.scan_start:
+            return False
+        return (t - self.scan_start) % self.scan_interval < self.scan_window
+
+    def connected_at(self, t):
+        self.connect_times.append(t - self.scan_start)
+        gap, hold, clean = self.sessions[self.index]
+        return t + hold, clean
+
+    def disconnected_at(self, t):
+        self.index += 1
+        self.scan_start = t + self.sessions[self.index][0] if not self.done() else None
+
+
+class FakeBLERadio:
+    """Just enough of adafruit_ble.BLERadio for the session loop."""
+
+    def __init__(self, clock, central, rng):
+        self.clock = clock
+        self.central = central
+        self.rng = rng
+        self.adv_interval = None
+        self.next_event = None
+        self.adv_events = 0
+        self.adv_starts = 0
+        self.conn_until = None
+        self.last_clean = True
+
+    def start_advertising(self, advertisement, interval=0.1):
+        self.adv_interval = interval
+        self.next_event = self.clock.now
+        self.adv_starts += 1
+
+    def stop_advertising(self):
+        self._run_until(self.clock.now)
+        self.adv_interval = None
+
+    @property
+    def connected(self):
+        self._run_until(self.clock.now)
+        return self.conn_until is not None
+
+    def _run_until(self, now):
+        if self.conn_until is not None and now >= self.conn_until:
+            self.central.disconnected_at(self.conn_until)
+            self.conn_until = None
+        if self.adv_interval is None:
+            return
+        while self.next_event <= now:
+            t = self.next_event
+            self.adv_events += 1
+            self.next_event = t + self.adv_interval + self.rng.uniform(0, ADV_DELAY_MAX)
+            if self.central.hears(t):
+                # The stack stops advertising by itself once a central connects.
+                self.conn_until, self.last_clean = self.central.connected_at(t)
+                self.adv_interval = None
+                return
+
+
+def run_session_loop(policy, radio, clock):
+    """Mirror of the BLE-final.py main loop, minus display and UART work."""
+    policy.on_boot(clock.now)
+    while not radio.central.done():
+        adv_interval = policy.interval(clock.now)
+        radio.start_advertising(None, interval=adv_interval)
+        clock.sleep(0.1)
+        start_wait = clock.now
+        adv_change_at = policy.next_change(start_wait)
+        while not radio.connected:
+            if adv_change_at is not None and clock.now >= adv_change_at:
+                break
+            if clock.now - start_wait > BLE_ADV_RESTART:
+                break
+            clock.sleep(0.1)
+        if not radio.connected:
+            radio.stop_advertising()
+            continue
+        radio.stop_advertising()
+        while radio.connected:
+            clock.sleep(0.05)
+        settle = policy.on_disconnect(clock.now, clean=radio.last_clean)
+        if settle:
+            clock.sleep(settle)
+
+
+SCENARIOS = {
+    # Phone reconnects a second or two after each session (app restarts, page flips).
+    "quick_reconnect": [(1.0, 20.0, True)] * 20,
+    # Badge mostly idle; a phone shows up every few minutes.
+    "mostly_idle": [(300.0, 30.0, True)] * 6,
+    # Flaky floor: links drop mid-session and the phone retries at once.
+    "flaky_link": [(0.5, 8.0, False)] * 30,
+}
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return float("nan")
+    k = max(0, min(len(ordered) - 1, int(math.ceil(pct / 100.0 * len(ordered))) - 1))
+    return ordered[k]
+
+
+def bench(policy_name, scenario, seed):
+    clock = FakeClock()
+    central = ScriptedCentral(SCENARIOS[scenario])
+    radio = FakeBLERadio(clock, central, random.Random(seed))
+    run_session_loop(make_policy(policy_name), radio, clock)
+    ttc = central.connect_times
+    return {
+        "policy": policy_name,
+        "scenario": scenario,
+        "connects": len(ttc),
+        "ttc_mean_ms": round(1000 * sum(ttc) / len(ttc), 1),
+        "ttc_p95_ms": round(1000 * percentile(ttc, 95), 1),
+        "adv_events": radio.adv_events,
+        "adv_restarts": radio.adv_starts,
+        "adv_duty_pct": round(100.0 * radio.adv_events * ADV_EVENT_S / clock.now, 3),
+        "sim_seconds": round(clock.now, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    results = [bench(p, s, args.seed) for s in SCENARIOS for p in ADV_POLICIES]
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'scenario':<16}{'policy':<11}{'ttc mean':>10}{'ttc p95':>10}{'duty %':>9}{'restarts':>10}")
+    for r in results:
+        print(f"{r['scenario']:<16}{r['policy']:<11}{r['ttc_mean_ms']:>8.1f}ms{r['ttc_p95_ms']:>8.1f}ms"
+              f"{r['adv_duty_pct']:>9.3f}{r['adv_restarts']:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Run BLE-final.py on CPython against the blesim simulator.
+
+A scripted central (JSON list of steps, see tools/blesim/central.py) drives the
+virtual UART, or a TCP client does with --listen (each client is one BLE
+connection, raw bytes both ways). Prints a JSON report: radio events, UART
+counters, replies, transfers (throughput, last chunk to refresh), e-ink
+refreshes with timing and framebuffer hashes, and TFT text changes.
+
+    python3 tools/ble_sim.py tools/blesim/scripts/image_transfer.json [--capture out/]
+    python3 tools/ble_sim.py --listen 127.0.0.1:9000 --realtime
+"""
+
+import argparse
+import json
+import os
+import socket
+import sys
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(TOOLS_DIR, ".."))
+sys.path.insert(0, TOOLS_DIR)
+
+from blesim import ScriptedCentral, Simulator, SocketCentral  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("script", nargs="?", help="JSON list of central steps")
+    parser.add_argument("--listen", metavar="HOST:PORT", help="bridge a TCP client to the UART instead of a script")
+    parser.add_argument("--firmware", help="firmware file (default: BLE-final.py)")
+    parser.add_argument("--realtime", action="store_true", help="really sleep instead of skipping sleeps")
+    parser.add_argument("--until", type=float, default=600.0, help="hard stop (simulated seconds)")
+    parser.add_argument("--rx-buffer", type=int, default=512, help="UART RX buffer size (bytes)")
+    parser.add_argument("--capture", metavar="DIR", help="write each e-ink refresh as a PNG")
+    parser.add_argument("--flash", metavar="DIR", help="directory standing in for the CIRCUITPY root")
+    parser.add_argument("--record", metavar="FILE", help="record every UART read to a trace (see tools/uart_replay.py)")
+    parser.add_argument("--log", metavar="FILE", help="write the firmware's console output here")
+    parser.add_argument("--report", metavar="FILE", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    if args.listen:
+        host, port = args.listen.rsplit(":", 1)
+        listener = socket.create_server((host, int(port)))
+        central = SocketCentral(listener=listener)
+    elif args.script:
+        with open(args.script) as f:
+            central = ScriptedCentral(json.load(f))
+    else:
+        parser.error("give a script or --listen")
+
+    log = open(args.log, "w") if args.log else None
+    try:
+        sim = Simulator(
+            central,
+            realtime=args.realtime,
+            rx_buffer=args.rx_buffer,
+            capture_dir=args.capture,
+            flash_dir=args.flash,
+            until=args.until,
+            log=log,
+            trace_path=args.record,
+            **({"firmware": args.firmware} if args.firmware else {}),
+        )
+        report = sim.run()
+    finally:
+        if log is not None:
+            log.close()
+
+    text = json.dumps(report, indent=2)
+    if args.report:
+        with open(args.report, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 1 if report["error"] or report["central_errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
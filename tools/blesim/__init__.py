@@ -0,0 +1,19 @@
+"""Host-side simulator for BLE-final.py (CPython).
+
+Runs the firmware unmodified against stand-ins for board, displayio, fourwire,
+terminalio, adafruit_ble, adafruit_ssd1680 and adafruit_display_text (see
+stubs/), a virtual UART fed by a scripted or socket-driven central, and
+displays that record e-ink refreshes (timing, hash, optional PNG). Device
+reads can be recorded to a uart_trace file and replayed with TraceCentral.
+
+    from blesim import Simulator, ScriptedCentral
+    report = Simulator(ScriptedCentral(steps)).run()
+
+The command-line front end is tools/ble_sim.py.
+"""
+
+from .central import ScriptedCentral, SocketCentral, TraceCentral
+from .clock import SimClock, SimulationEnd
+from .simulator import Simulator
+
+__all__ = ["Simulator", "ScriptedCentral", "SocketCentral", "TraceCentral", "SimClock", "SimulationEnd"]
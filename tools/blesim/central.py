@@ -0,0 +1,278 @@
+# The phone side of a simulated session: a scripted central that behaves like
+# rn-ble-test (start command, wait for the start ACK, 180-byte chunks), a
+# replayer for recorded UART traces, or a bridge that forwards a stream socket
+# to the virtual UART.
+
+import json
+import random
+import socket
+
+from .uart import ReplyParser
+
+import uart_trace
+
+APP_CHUNK = 180  # rn-ble-test CHUNK_SIZE
+APP_GAP = 0.03  # delay between chunk writes in rn-ble-test
+ACK_TIMEOUT = 10.0
+
+
+def _matches(msg, pattern):
+    return all(msg.get(k) == v for k, v in pattern.items())
+
+
+class _Central:
+    def start(self, sim):
+        self.sim = sim
+        self.parser = ReplyParser()
+        self.messages = []  # (time, message) received from the device
+
+    def collect(self, now):
+        data = self.sim.uart.take_tx()
+        if data:
+            for msg in self.parser.feed(data):
+                self.messages.append((now, msg))
+        return data
+
+
+class ScriptedCentral(_Central):
+    """Runs a list of steps against the device.
+
+    Every step may carry "at" (absolute sim time) or "after" (seconds after the
+    previous step finished). Steps ("do"):
+
+    - connect: wait for advertising, connect at its next advertising event
+    - disconnect
+    - write: "text" (sent as UTF-8, add your own newline), "json" (object,
+      newline added) or "hex"
+    - image: an rn-ble-test transfer; "w", "h", "len", "p" (prompt), "id",
+      "seed" (payload bytes), "chunk", "gap", "wait_ack" (default true)
+    - wait: "seconds", or "for" (fields a reply must match) with "timeout"
+    - end: stop the run
+    """
+
+    def __init__(self, steps, linger=2.0):
+        self.steps = list(steps)
+        self.linger = linger
+        self.transfers = []
+        self.errors = []
+
+    def start(self, sim):
+        super().start(sim)
+        self._script = self._run()
+        self._wait = None
+
+    def pump(self, now):
+        self.collect(now)
+        while self._script is not None:
+            if self._wait is not None and not self._wait(now):
+                return
+            try:
+                self._wait = next(self._script)
+            except StopIteration:
+                self._script = None
+                self.sim.finish(now + self.linger)
+
+    # ---- waits (generator yields a predicate of the current time) ----
+    def _until(self, t):
+        return lambda now: now >= t
+
+    def _reply(self, pattern, timeout, found):
+        since = len(self.messages)
+        deadline = self.sim.clock.now() + timeout
+
+        def ready(now):
+            for t, msg in self.messages[since:]:
+                if _matches(msg, pattern):
+                    found.append((t, msg))
+                    return True
+            if now >= deadline:
+                found.append((None, None))
+                return True
+            return False
+
+        return ready
+
+    # ---- steps ----
+    def _run(self):
+        last_done = 0.0
+        for index, step in enumerate(self.steps):
+            if "at" in step:
+                yield self._until(step["at"])
+            elif "after" in step:
+                yield self._until(last_done + step["after"])
+            action = getattr(self, "_do_" + step.get("do", ""), None)
+            if action is None:
+                raise ValueError("step %d: unknown action %r" % (index, step.get("do")))
+            result = action(step)
+            if result is not None:
+                yield from result
+            last_done = self.sim.clock.now()
+
+    def _do_connect(self, step):
+        radio = self.sim.radio
+        yield lambda now: radio.advertising
+        yield self._until(self.sim.clock.now() + radio.adv_interval)
+        radio.connect()
+
+    def _do_disconnect(self, step):
+        self.sim.radio.disconnect()
+
+    def _do_write(self, step):
+        if "json" in step:
+            data = (json.dumps(step["json"]) + "\n").encode("utf-8")
+        elif "hex" in step:
+            data = bytes.fromhex(step["hex"])
+        else:
+            data = step.get("text", "").encode("utf-8")
+        self.sim.uart.central_write(data)
+
+    def _do_wait(self, step):
+        if "for" in step:
+            found = []
+            yield self._reply(step["for"], step.get("timeout", ACK_TIMEOUT), found)
+            if found[0][0] is None:
+                self.errors.append("timed out waiting for %r" % (step["for"],))
+        else:
+            yield self._until(self.sim.clock.now() + step.get("seconds", 0))
+
+    def _do_end(self, step):
+        self.sim.finish(self.sim.clock.now())
+        yield lambda now: False
+
+    def _do_image(self, step):
+        w, h = step.get("w", 122), step.get("h", 122)
+        length = step.get("len", (w * h + 7) // 8)
+        transfer_id = step.get("id")
+        chunk, gap = step.get("chunk", APP_CHUNK), step.get("gap", APP_GAP)
+        payload = random.Random(step.get("seed", 1)).randbytes(length)
+        start = {"t": "img", "w": w, "h": h, "len": length, "p": step.get("p", "")}
+        if transfer_id:
+            start["id"] = transfer_id
+        record = {"id": transfer_id, "len": length, "start": round(self.sim.clock.now(), 4)}
+        self.transfers.append(record)
+        self.sim.uart.central_write((json.dumps(start) + "\n").encode("utf-8"))
+
+        if transfer_id and step.get("wait_ack", True):
+            found = []
+            yield self._reply({"t": "ack", "id": transfer_id, "st": "start"}, ACK_TIMEOUT, found)
+            record["start_ack"] = None if found[0][0] is None else round(found[0][0], 4)
+            if found[0][1] is None or not found[0][1].get("ok"):
+                self.errors.append("transfer %s: start not acknowledged" % transfer_id)
+                return
+        for offset in range(0, length, chunk):
+            if not self.sim.radio.connected:
+                self.errors.append("transfer %s: disconnected at %d" % (transfer_id, offset))
+                return
+            self.sim.uart.central_write(payload[offset:offset + chunk])
+            record["last_chunk"] = round(self.sim.clock.now(), 4)
+            if offset + chunk < length:
+                yield self._until(self.sim.clock.now() + gap)
+
+
+class TraceCentral(_Central):
+    """Replays a uart_trace recording.
+
+    Each READ record is delivered only once the device has read the previous
+    one, so the firmware sees exactly the recorded read boundaries (the merges
+    and splits that matter). ``speed`` scales the recorded gaps (1.0 = as
+    recorded, 4.0 = four times faster); None delivers the next record as soon as
+    the previous one was read. ``probe(now)`` is called on every pump.
+    """
+
+    def __init__(self, records, speed=1.0, linger=10.0, probe=None):
+        self.records = list(records)
+        self.speed = speed
+        self.linger = linger
+        self.probe = probe
+        self.transfers = []
+        self.errors = []
+
+    def start(self, sim):
+        super().start(sim)
+        self.index = 0
+        self.base = None  # sim time that trace time 0 maps to
+        self.delivered = 0
+
+    def pump(self, now):
+        self.collect(now)
+        if self.probe is not None:
+            self.probe(now)
+        radio = self.sim.radio
+        while self.index < len(self.records):
+            t, kind, data = self.records[self.index]
+            if self.sim.uart.rx:
+                return  # previous read not consumed yet
+            if kind != uart_trace.DISCONNECT and not radio.connected:
+                if not radio.advertising:
+                    return
+                radio.connect()
+            if self.base is None:
+                self.base = now - (t / self.speed if self.speed else 0.0)
+            if self.speed and now < self.base + t / self.speed:
+                return
+            self.index += 1
+            if kind == uart_trace.READ:
+                self.sim.uart.central_write(data)
+                self.delivered += len(data)
+            elif kind == uart_trace.DISCONNECT:
+                radio.disconnect()
+        if self.index == len(self.records) and not self.sim.uart.rx:
+            self.index += 1
+            self.sim.finish(now + self.linger)
+
+
+class SocketCentral(_Central):
+    """Forwards a stream socket to the virtual UART.
+
+    With a connected socket (e.g. one end of socket.socketpair()) the central
+    connects at once and the run ends when the peer closes it. With a listening
+    socket every accepted client is one BLE connection.
+    """
+
+    def __init__(self, sock=None, listener=None):
+        self.sock = sock
+        self.listener = listener
+        self.transfers = []
+        self.errors = []
+        for s in (sock, listener):
+            if s is not None:
+                s.setblocking(False)
+
+    def pump(self, now):
+        radio = self.sim.radio
+        if self.sock is None and self.listener is not None:
+            try:
+                self.sock, _ = self.listener.accept()
+                self.sock.setblocking(False)
+            except (BlockingIOError, socket.timeout):
+                return
+        if self.sock is None:
+            return
+        if not radio.connected:
+            if radio.advertising:
+                radio.connect()
+            return
+        while True:
+            try:
+                data = self.sock.recv(4096)
+            except BlockingIOError:
+                break
+            except OSError:
+                data = b""
+            if not data:
+                self._closed(now)
+                return
+            self.sim.uart.central_write(data)
+        data = self.collect(now)
+        if data:
+            try:
+                self.sock.sendall(data)
+            except OSError:
+                self._closed(now)
+
+    def _closed(self, now):
+        self.sim.radio.disconnect()
+        self.sock.close()
+        self.sock = None
+        if self.listener is None:
+            self.sim.finish(now + 1.0)
@@ -0,0 +1,18 @@
+"""Pass/fail bookkeeping shared by the check and benchmark scripts in tools/."""
+
+
+class Checks:
+    """Call with (ok, what) for each check: prints "ok    what" or
+    "FAIL  what" unless ``quiet`` (the scripts' --json mode), and keeps the
+    failed descriptions in ``failures`` for the exit code and JSON output."""
+
+    def __init__(self, quiet=False):
+        self.quiet = quiet
+        self.failures = []
+
+    def __call__(self, ok, what):
+        if not self.quiet:
+            print(("ok    " if ok else "FAIL  ") + what)
+        if not ok:
+            self.failures.append(what)
+        return ok
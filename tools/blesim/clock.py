@@ -0,0 +1,70 @@
+# Simulated clock and the fake ``time`` module the firmware imports.
+#
+# In "fast" mode time.sleep() returns at once and the skipped time is added to
+# time.monotonic(), while real CPU time still counts. Compute-heavy paths (blot
+# generation, composition) keep their real cost, but a 6 s e-ink settle wait or
+# a 60 s advertising timeout costs nothing. "realtime" mode really sleeps and is
+# what socket-driven sessions use.
+
+import time as _time
+import types
+
+
+class SimulationEnd(BaseException):
+    """Raised from inside the firmware to stop a run.
+
+    BaseException so the firmware's ``except Exception`` blocks let it through.
+    """
+
+
+class SimClock:
+    def __init__(self, realtime=False, on_tick=None):
+        self.realtime = realtime
+        self.on_tick = on_tick  # called on every sleep/monotonic so the sim can pump events
+        self._t0 = _time.monotonic()
+        self.skipped = 0.0
+        self.slept = 0.0
+        self.sleeps = 0
+
+    def now(self):
+        return _time.monotonic() - self._t0 + self.skipped
+
+    def monotonic(self):
+        if self.on_tick is not None:
+            self.on_tick()
+        return self.now()
+
+    def sleep(self, seconds):
+        seconds = max(0.0, seconds)
+        if self.on_tick is not None:
+            self.on_tick()  # deliver what the firmware wrote before it blocks
+        self.sleeps += 1
+        self.slept += seconds
+        if self.realtime:
+            _time.sleep(seconds)
+        else:
+            self.skipped += seconds
+        if self.on_tick is not None:
+            self.on_tick()
+
+    def discount(self, seconds):
+        """Take host-side work the device does not do (e.g. hashing a refresh)
+        out of simulated time (fast mode only)."""
+        if not self.realtime:
+            self.skipped -= seconds
+
+    def advance_to(self, t):
+        """Skip forward to simulated time ``t`` (fast mode only)."""
+        if not self.realtime and t > self.now():
+            self.skipped += t - self.now()
+
+    def time_module(self):
+        """A ``time`` module whose monotonic/sleep run on this clock."""
+        module = types.ModuleType("time")
+        for name in dir(_time):
+            if not name.startswith("__"):
+                setattr(module, name, getattr(_time, name))
+        module.monotonic = self.monotonic
+        module.monotonic_ns = lambda: int(self.monotonic() * 1e9)
+        module.sleep = self.sleep
+        return module
@@ -0,0 +1,79 @@
+# Simulated displays: the built-in TFT (board.DISPLAY) and the SSD1680 e-ink
+# panel. E-ink refreshes are recorded with their timing and a hash of what was
+# on the panel, and optionally written out as PNGs.
+
+import os
+
+from . import framebuffer
+
+
+class SimDisplay:
+    """What displayio.Display / EPaperDisplay expose to the firmware."""
+
+    def __init__(self, sim, kind, width, height, rotation=0, background=0x000000):
+        self.sim = sim
+        self.kind = kind
+        self._width = width
+        self._height = height
+        self.rotation = rotation
+        self.background = background
+        self.root_group = None
+        self.auto_refresh = True
+        self.released = False
+
+    @property
+    def width(self):
+        return self._height if self.rotation in (90, 270) else self._width
+
+    @property
+    def height(self):
+        return self._width if self.rotation in (90, 270) else self._height
+
+    def snapshot(self):
+        """RGB pixels of the current root_group, in the rotated (logical) frame."""
+        return framebuffer.render(self.root_group, self.width, self.height, self.background)
+
+    def refresh(self, *args, **kwargs):
+        return True
+
+
+class SimEPaper(SimDisplay):
+    """SSD1680 panel with the driver's 'refresh too soon' guard.
+
+    ``refresh_time`` is how long the physical update takes; ``busy`` is true for
+    that long after each refresh.
+    """
+
+    def __init__(self, sim, width, height, rotation=0, seconds_per_frame=180, refresh_time=3.5):
+        super().__init__(sim, "eink", width, height, rotation, background=0xFFFFFF)
+        self.seconds_per_frame = seconds_per_frame
+        self.refresh_time = refresh_time
+        self.auto_refresh = False
+        self._last_refresh = None
+
+    @property
+    def time_to_refresh(self):
+        if self._last_refresh is None:
+            return 0.0
+        return max(0.0, self._last_refresh + self.seconds_per_frame - self.sim.clock.now())
+
+    @property
+    def busy(self):
+        return self._last_refresh is not None and self.sim.clock.now() < self._last_refresh + self.refresh_time
+
+    def refresh(self, *args, **kwargs):
+        if self.released:
+            raise RuntimeError("Display released")
+        if self.time_to_refresh > 0:
+            raise RuntimeError("Refresh too soon")
+        now = self.sim.clock.now()
+        self._last_refresh = now
+        self.sim.record_refresh(self, now)
+        return True
+
+
+def save_png(display, pixels, directory, index):
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, "%s-%03d.png" % (display.kind, index))
+    framebuffer.write_png(path, display.width, display.height, pixels)
+    return path
@@ -0,0 +1,32 @@
+# Loads selected top-level functions and constants out of a firmware script
+# without running the rest of it (BLE-final.py cannot be imported: its name
+# has a hyphen and importing it would start the BLE main loop).
+
+import ast
+
+
+def load_defs(path, names, namespace=None):
+    """Exec the top-level ``def``s, classes and simple assignments named in ``names``.
+
+    Functions see ``namespace`` as their globals, so the caller supplies
+    whatever else they reference (modules, pools, state dicts). Returns the
+    namespace.
+    """
+    namespace = {} if namespace is None else namespace
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), path)
+    wanted = set(names)
+    body = []
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.ClassDef)) and node.name in wanted:
+            body.append(node)
+            wanted.discard(node.name)
+        elif isinstance(node, ast.Assign):
+            targets = [t.id for t in node.targets if isinstance(t, ast.Name)]
+            if any(t in wanted for t in targets):
+                body.append(node)
+                wanted.difference_update(targets)
+    if wanted:
+        raise KeyError("not found in %s: %s" % (path, ", ".join(sorted(wanted))))
+    exec(compile(ast.Module(body=body, type_ignores=[]), path, "exec"), namespace)
+    return namespace
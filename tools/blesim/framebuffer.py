@@ -0,0 +1,83 @@
+# Flattens a displayio Group tree (the stand-ins in stubs/displayio.py) into
+# RGB pixels, hashes it and writes PNGs with nothing but zlib.
+
+import hashlib
+import struct
+import zlib
+
+
+def render(root, width, height, background=0x000000):
+    """RGB bytearray (3 bytes per pixel, row-major) of what ``root`` shows."""
+    pixels = bytearray(width * height * 3)
+    if background:
+        r, g, b = background >> 16 & 0xFF, background >> 8 & 0xFF, background & 0xFF
+        pixels[:] = bytes((r, g, b)) * (width * height)
+    if root is not None:
+        _draw(root, pixels, width, height, 0, 0, 1)
+    return pixels
+
+
+def _draw(node, pixels, width, height, ox, oy, scale):
+    if getattr(node, "hidden", False):
+        return
+    if hasattr(node, "pixel_shader"):  # TileGrid; everything else is a Group
+        _draw_tilegrid(node, pixels, width, height, ox, oy, scale)
+        return
+    # A group's position is in its parent's (scaled) coordinates
+    ox += node.x * scale
+    oy += node.y * scale
+    scale *= node.scale
+    for child in node:
+        _draw(child, pixels, width, height, ox, oy, scale)
+
+
+def _draw_tilegrid(grid, pixels, width, height, ox, oy, scale):
+    bitmap = grid.bitmap
+    shader = grid.pixel_shader
+    tw, th = grid.tile_width, grid.tile_height
+    tiles_per_row = max(1, bitmap.width // tw)
+    x0 = ox + grid.x * scale
+    y0 = oy + grid.y * scale
+    for ty in range(grid.height):
+        for tx in range(grid.width):
+            tile = grid[tx, ty]
+            sx0 = (tile % tiles_per_row) * tw
+            sy0 = (tile // tiles_per_row) * th
+            for y in range(th):
+                for x in range(tw):
+                    color = shader.color_of(bitmap[sx0 + x, sy0 + y])
+                    if color is None:
+                        continue
+                    px = x0 + (tx * tw + x) * scale
+                    py = y0 + (ty * th + y) * scale
+                    for dy in range(scale):
+                        row = py + dy
+                        if row < 0 or row >= height:
+                            continue
+                        for dx in range(scale):
+                            col = px + dx
+                            if 0 <= col < width:
+                                i = (row * width + col) * 3
+                                pixels[i] = color >> 16 & 0xFF
+                                pixels[i + 1] = color >> 8 & 0xFF
+                                pixels[i + 2] = color & 0xFF
+
+
+def digest(pixels):
+    return hashlib.sha1(bytes(pixels)).hexdigest()[:16]
+
+
+def write_png(path, width, height, pixels):
+    """8-bit RGB PNG of an RGB bytearray from render()."""
+    stride = width * 3
+    raw = b"".join(b"\x00" + bytes(pixels[y * stride:(y + 1) * stride]) for y in range(height))
+
+    def chunk(kind, data):
+        body = kind + data
+        return struct.pack(">I", len(data)) + body + struct.pack(">I", zlib.crc32(body) & 0xFFFFFFFF)
+
+    with open(path, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        f.write(chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)))
+        f.write(chunk(b"IDAT", zlib.compress(raw, 6)))
+        f.write(chunk(b"IEND", b""))
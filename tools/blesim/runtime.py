@@ -0,0 +1,26 @@
+# The simulator the stand-in modules in stubs/ talk to. Set by Simulator.run()
+# for the duration of one firmware run; displayio, terminalio and the label
+# stand-ins also work without one (e.g. in tools/render_bench.py).
+
+_current = None
+
+
+def current():
+    if _current is None:
+        raise RuntimeError("stand-in module used outside a blesim run")
+    return _current
+
+
+def active():
+    """The running simulator, or None when stand-ins are used on their own."""
+    return _current
+
+
+def install(sim):
+    global _current
+    _current = sim
+
+
+def uninstall():
+    global _current
+    _current = None
@@ -0,0 +1,247 @@
+# Runs BLE-final.py unmodified on CPython against the stand-in modules in
+# stubs/, a virtual UART, a fake BLE radio and recording displays.
+
+import builtins
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time as _time
+
+from . import displays, framebuffer, runtime
+from .clock import SimClock, SimulationEnd
+from .uart import VirtualUART
+
+import uart_trace
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+STUBS_DIR = os.path.join(PACKAGE_DIR, "stubs")
+REPO_ROOT = os.path.abspath(os.path.join(PACKAGE_DIR, "..", ".."))
+DEFAULT_FIRMWARE = os.path.join(REPO_ROOT, "BLE-final.py")
+
+TFT_WIDTH = 240  # Feather ESP32-S3 Reverse TFT
+TFT_HEIGHT = 135
+
+
+class SimRadio:
+    """BLERadio state: advertising and one connection, driven by the central."""
+
+    def __init__(self, sim):
+        self.sim = sim
+        self.name = "CIRCUITPY"
+        self.advertising = False
+        self.adv_interval = 0.1
+        self.adv_started = None
+        self.connected = False
+        self.events = []  # (time, event, detail)
+
+    def _event(self, name, detail=None):
+        self.events.append((round(self.sim.clock.now(), 4), name, detail))
+
+    def is_connected(self):
+        self.sim.pump()
+        return self.connected
+
+    def start_advertising(self, advertisement, interval):
+        if self.connected:
+            raise RuntimeError("Already connected")
+        self.advertising = True
+        self.adv_interval = interval
+        self.adv_started = self.sim.clock.now()
+        self._event("adv_start", interval)
+
+    def stop_advertising(self):
+        if self.advertising:
+            self.advertising = False
+            self._event("adv_stop")
+
+    def connect(self):
+        # The stack stops advertising when a central connects
+        self.advertising = False
+        self.connected = True
+        if self.sim.uart.trace is not None:
+            self.sim.uart.trace.event(uart_trace.CONNECT, self.sim.clock.now())
+        self._event("connect", round(self.sim.clock.now() - self.adv_started, 4))
+
+    def disconnect(self):
+        if self.connected:
+            self.connected = False
+            self._event("disconnect")
+            if self.sim.uart.trace is not None:
+                self.sim.uart.trace.event(uart_trace.DISCONNECT, self.sim.clock.now())
+
+
+class Simulator:
+    """One firmware run.
+
+    central: a ScriptedCentral or SocketCentral (see central.py)
+    realtime: really sleep instead of skipping sleeps (see clock.py)
+    capture_dir: write every e-ink refresh as a PNG here
+    flash_dir: where CIRCUITPY root files (e.g. /playlist.bin) are kept; a
+        fresh temporary directory by default
+    until: hard stop, in simulated seconds
+    trace_path: record every device read to this uart_trace file
+
+    While running, ``globals`` is the firmware's module namespace, so probes
+    can watch e.g. ``image_state``.
+    """
+
+    def __init__(self, central, firmware=DEFAULT_FIRMWARE, realtime=False, rx_buffer=512,
+                 capture_dir=None, flash_dir=None, until=600.0, log=None,
+                 battery_mv=3900, cpu_temperature=32.0, eink_refresh_time=3.5, trace_path=None):
+        self.central = central
+        self.firmware = firmware
+        self.capture_dir = capture_dir
+        self.flash_dir = flash_dir or tempfile.mkdtemp(prefix="blesim-flash-")
+        self.until = until
+        self.log = log
+        self.battery_mv = battery_mv
+        self.cpu_temperature = cpu_temperature
+        self.eink_refresh_time = eink_refresh_time
+        self.trace_path = trace_path
+        self.globals = {}
+        self.clock = SimClock(realtime=realtime, on_tick=self.pump)
+        self.uart = VirtualUART(self.clock, rx_buffer)
+        self.uart.on_poll = self.pump
+        self.radio = SimRadio(self)
+        self.tft = displays.SimDisplay(self, "tft", TFT_WIDTH, TFT_HEIGHT)
+        self.eink = None
+        self.refreshes = []
+        self.texts = []
+        self.error = None
+        self._pumping = False
+
+    # ---- hooks used by the stand-in modules ----
+    def pump(self):
+        if self._pumping:
+            return
+        self._pumping = True
+        try:
+            now = self.clock.now()
+            self.central.pump(now)
+            if now >= self.until:
+                raise SimulationEnd()
+        finally:
+            self._pumping = False
+
+    def finish(self, t):
+        """End the run at simulated time ``t`` (or earlier if already due)."""
+        self.until = min(self.until, t)
+
+    def attach_eink(self, bus, width, height, rotation, seconds_per_frame):
+        self.eink = displays.SimEPaper(self, width, height, rotation, seconds_per_frame, self.eink_refresh_time)
+        return self.eink
+
+    def release_displays(self):
+        self.tft.released = True
+        if self.eink is not None:
+            self.eink.released = True
+
+    def record_refresh(self, display, now):
+        started = _time.perf_counter()
+        pixels = display.snapshot()
+        previous = self.refreshes[-1]["t"] if self.refreshes else None
+        entry = {
+            "t": round(now, 4),
+            "since_prev": None if previous is None else round(now - previous, 4),
+            "hash": framebuffer.digest(pixels),
+        }
+        if self.capture_dir:
+            entry["png"] = displays.save_png(display, pixels, self.capture_dir, len(self.refreshes))
+        self.refreshes.append(entry)
+        self.clock.discount(_time.perf_counter() - started)
+
+    def note_text(self, label, text):
+        if getattr(label, "log_text", True):
+            self.texts.append((round(self.clock.now(), 4), text))
+
+    def snapshot_tft(self, path):
+        framebuffer.write_png(path, self.tft.width, self.tft.height, self.tft.snapshot())
+
+    # ---- running ----
+    def _open(self, real_open):
+        flash_dir = self.flash_dir
+
+        def sim_open(file, *args, **kwargs):
+            # CIRCUITPY root files ("/playlist.bin") live in flash_dir
+            if isinstance(file, str) and os.path.dirname(file) == "/":
+                file = os.path.join(flash_dir, file[1:])
+            return real_open(file, *args, **kwargs)
+
+        return sim_open
+
+    def run(self):
+        """Run the firmware until the script ends or ``until``; returns report()."""
+        saved_path = list(sys.path)
+        saved_modules = dict(sys.modules)
+        real_open = builtins.open
+        os.makedirs(self.flash_dir, exist_ok=True)
+        # Fresh copies of the repo's helper modules, bound to the simulated clock
+        for name, module in list(sys.modules.items()):
+            path = getattr(module, "__file__", None)
+            if path and os.path.dirname(os.path.abspath(path)) == REPO_ROOT:
+                del sys.modules[name]
+        sys.path[:0] = [STUBS_DIR, REPO_ROOT, os.path.dirname(PACKAGE_DIR)]
+        sys.modules["time"] = self.clock.time_module()
+        builtins.open = self._open(real_open)
+        runtime.install(self)
+        if self.trace_path:
+            self.uart.trace = uart_trace.TraceWriter(self.trace_path, self.clock.now(), flush_bytes=1 << 20)
+        self.central.start(self)
+        out = self.log if self.log is not None else io.StringIO()
+        with real_open(self.firmware, encoding="utf-8") as f:
+            code = compile(f.read(), self.firmware, "exec")
+        self.globals = {"__name__": "__main__", "__file__": self.firmware, "__builtins__": builtins}
+        wall_start = _time.perf_counter()
+        try:
+            with contextlib.redirect_stdout(out):
+                exec(code, self.globals)
+        except SimulationEnd:
+            pass
+        except Exception as e:
+            self.error = "%s: %s" % (type(e).__name__, e)
+        finally:
+            self.wall_time = _time.perf_counter() - wall_start
+            runtime.uninstall()
+            builtins.open = real_open
+            if self.uart.trace is not None:
+                self.uart.trace.flush()
+            sys.path[:] = saved_path
+            sys.modules.clear()
+            sys.modules.update(saved_modules)
+        return self.report()
+
+    def report(self):
+        uart = self.uart
+        transfers = []
+        for record in self.central.transfers:
+            entry = dict(record)
+            last = record.get("last_chunk")
+            after = [r for r in self.refreshes if last is not None and r["t"] >= last]
+            if last is not None:
+                entry["throughput"] = round(record["len"] / max(1e-9, last - record["start"]), 1)
+            if after:
+                entry["refresh"] = after[0]["t"]
+                entry["chunk_to_refresh"] = round(after[0]["t"] - last, 4)
+            transfers.append(entry)
+        return {
+            "firmware": os.path.relpath(self.firmware, REPO_ROOT),
+            "mode": "realtime" if self.clock.realtime else "fast",
+            "sim_time": round(self.clock.now(), 3),
+            "wall_time": round(self.wall_time, 3),
+            "error": self.error,
+            "radio": self.radio.events,
+            "uart": {
+                "writes": uart.writes,
+                "reads": len(uart.reads),
+                "rx_bytes": uart.rx_bytes,
+                "tx_bytes": uart.tx_bytes,
+                "dropped": uart.dropped,
+            },
+            "replies": [(round(t, 4), msg) for t, msg in self.central.messages],
+            "transfers": transfers,
+            "refreshes": self.refreshes,
+            "tft_text": self.texts,
+            "central_errors": self.central.errors,
+        }
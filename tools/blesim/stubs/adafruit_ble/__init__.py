@@ -0,0 +1,34 @@
+# CPython stand-in for adafruit_ble: BLERadio backed by the simulator's radio.
+
+from blesim import runtime
+
+
+class BLERadio:
+    def __init__(self, adapter=None):
+        self._radio = runtime.current().radio
+
+    @property
+    def name(self):
+        return self._radio.name
+
+    @name.setter
+    def name(self, value):
+        self._radio.name = value
+
+    @property
+    def connected(self):
+        return self._radio.is_connected()
+
+    @property
+    def connections(self):
+        return (object(),) if self._radio.is_connected() else ()
+
+    @property
+    def advertising(self):
+        return self._radio.advertising
+
+    def start_advertising(self, advertisement, scan_response=None, interval=0.1, timeout=None):
+        self._radio.start_advertising(advertisement, interval)
+
+    def stop_advertising(self):
+        self._radio.stop_advertising()
@@ -0,0 +1,8 @@
+# CPython stand-in for adafruit_ble.advertising.
+
+
+class Advertisement:
+    def __init__(self):
+        self.complete_name = None
+        self.short_name = None
+        self.connectable = True
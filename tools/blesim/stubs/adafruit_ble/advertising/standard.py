@@ -0,0 +1,9 @@
+# CPython stand-in for adafruit_ble.advertising.standard.
+
+from adafruit_ble.advertising import Advertisement
+
+
+class ProvideServicesAdvertisement(Advertisement):
+    def __init__(self, *services):
+        super().__init__()
+        self.services = services
@@ -0,0 +1,5 @@
+# CPython stand-in for adafruit_ble.services.
+
+
+class Service:
+    pass
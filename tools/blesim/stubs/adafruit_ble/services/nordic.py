@@ -0,0 +1,26 @@
+# CPython stand-in for adafruit_ble.services.nordic: the UART is the
+# simulator's VirtualUART (see blesim/uart.py).
+
+from blesim import runtime
+from adafruit_ble.services import Service
+
+
+class UARTService(Service):
+    def __init__(self, service=None, buffer_size=64):
+        self._uart = runtime.current().uart
+
+    @property
+    def in_waiting(self):
+        return self._uart.in_waiting
+
+    def read(self, nbytes=None):
+        return self._uart.read(nbytes)
+
+    def readline(self):
+        return self._uart.readline()
+
+    def write(self, buf):
+        return self._uart.write(buf)
+
+    def reset_input_buffer(self):
+        self._uart.reset_input_buffer()
@@ -0,0 +1 @@
+# CPython stand-in for adafruit_display_text (label and bitmap_label).
@@ -0,0 +1,8 @@
+# CPython stand-in for adafruit_display_text.bitmap_label; same as the label
+# stand-in, whose ``bitmap`` already holds the rendered text.
+
+from adafruit_display_text import label
+
+
+class Label(label.Label):
+    log_text = False  # prompt text composed into e-ink frames, not TFT text
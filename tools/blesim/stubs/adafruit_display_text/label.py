@@ -0,0 +1,101 @@
+# CPython stand-in for adafruit_display_text.label. Text is rasterised with the
+# stand-in terminalio glyphs into one Bitmap shown by a TileGrid.
+
+import displayio
+
+from blesim import runtime
+
+
+def rasterize(font, text, line_spacing=1.25):
+    """Bitmap (value 1 = ink) sized to ``text``, one row of cells per line."""
+    cell_w, cell_h = font.get_bounding_box()
+    lines = text.split("\n") if text else [""]
+    pitch = int(cell_h * line_spacing)
+    width = max(1, max(len(line) for line in lines) * cell_w)
+    height = (len(lines) - 1) * pitch + cell_h
+    bitmap = displayio.Bitmap(width, height, 2)
+    for row, line in enumerate(lines):
+        top = row * pitch
+        for col, ch in enumerate(line):
+            left = col * cell_w
+            for y, mask in enumerate(font.glyph_rows(ch)):
+                if not mask:
+                    continue
+                for x in range(cell_w):
+                    if mask & (1 << (cell_w - 1 - x)):
+                        bitmap[left + x, top + y] = 1
+    return bitmap
+
+
+class Label(displayio.Group):
+    def __init__(self, font, *, text="", color=0xFFFFFF, background_color=None, line_spacing=1.25,
+                 scale=1, x=0, y=0, anchor_point=None, anchored_position=None, **kwargs):
+        super().__init__(scale=scale, x=x, y=y)
+        self.font = font
+        self.line_spacing = line_spacing
+        self._palette = displayio.Palette(2)
+        self._palette[0] = 0x000000 if background_color is None else background_color
+        if background_color is None:
+            self._palette.make_transparent(0)
+        self._palette[1] = color
+        self._color = color
+        self._anchor_point = anchor_point
+        self._anchored_position = anchored_position
+        self._text = None
+        self.bitmap = None
+        self.text = text
+
+    @property
+    def text(self):
+        return self._text
+
+    @text.setter
+    def text(self, new_text):
+        if new_text == self._text:
+            return
+        self._text = new_text
+        self.bitmap = rasterize(self.font, new_text, self.line_spacing)
+        while len(self):
+            self.pop()
+        self.append(displayio.TileGrid(self.bitmap, pixel_shader=self._palette))
+        self._place()
+        sim = runtime.active()
+        if sim is not None:
+            sim.note_text(self, new_text)
+
+    @property
+    def color(self):
+        return self._color
+
+    @color.setter
+    def color(self, color):
+        self._color = color
+        self._palette[1] = color
+
+    @property
+    def bounding_box(self):
+        return 0, 0, self.bitmap.width, self.bitmap.height
+
+    @property
+    def anchor_point(self):
+        return self._anchor_point
+
+    @anchor_point.setter
+    def anchor_point(self, point):
+        self._anchor_point = point
+        self._place()
+
+    @property
+    def anchored_position(self):
+        return self._anchored_position
+
+    @anchored_position.setter
+    def anchored_position(self, position):
+        self._anchored_position = position
+        self._place()
+
+    def _place(self):
+        if self._anchor_point is None or self._anchored_position is None or self.bitmap is None:
+            return
+        self.x = int(self._anchored_position[0] - self._anchor_point[0] * self.bitmap.width * self.scale)
+        self.y = int(self._anchored_position[1] - self._anchor_point[1] * self.bitmap.height * self.scale)
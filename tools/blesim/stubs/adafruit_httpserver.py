@@ -0,0 +1,346 @@
+# CPython stand-in for adafruit_httpserver: the subset HTTP_server.py uses
+# (Server with routes, Request, Response, ChunkedResponse, FileResponse,
+# JSONResponse, SSEResponse, Redirect, Status). Like the library it serves one connection
+# per poll(), reads the request through the same _receive_request() steps,
+# closes the connection after the response (an SSEResponse keeps it until
+# its close()), and serves files under root_path for GETs no route matches.
+# The socket source can be CPython's socket module.
+
+import json
+import os
+import time
+import traceback
+from urllib.parse import unquote_plus
+
+GET = "GET"
+POST = "POST"
+PATCH = "PATCH"
+
+NO_REQUEST = "no_request"
+REQUEST_HANDLED_RESPONSE_SENT = "request_handled_response_sent"
+CONNECTION_TIMED_OUT = "connection_timed_out"
+
+
+class Status:
+    def __init__(self, code, text):
+        self.code = code
+        self.text = text
+
+    def __str__(self):
+        return "%d %s" % (self.code, self.text)
+
+
+OK_200 = Status(200, "OK")
+MOVED_PERMANENTLY_301 = Status(301, "Moved Permanently")
+FOUND_302 = Status(302, "Found")
+TEMPORARY_REDIRECT_307 = Status(307, "Temporary Redirect")
+PERMANENT_REDIRECT_308 = Status(308, "Permanent Redirect")
+BAD_REQUEST_400 = Status(400, "Bad Request")
+NOT_FOUND_404 = Status(404, "Not Found")
+INTERNAL_SERVER_ERROR_500 = Status(500, "Internal Server Error")
+
+
+class Headers:
+    """Case-insensitive header mapping."""
+
+    def __init__(self, items=None):
+        self._items = {}
+        for name, value in (items or {}).items():
+            self[name] = value
+
+    def __setitem__(self, name, value):
+        self._items[name.lower()] = (name, value)
+
+    def __getitem__(self, name):
+        return self._items[name.lower()][1]
+
+    def __contains__(self, name):
+        return name.lower() in self._items
+
+    def get(self, name, default=None):
+        item = self._items.get(name.lower())
+        return default if item is None else item[1]
+
+    def items(self):
+        return [item for item in self._items.values()]
+
+
+def _pairs(text):
+    out = {}
+    for pair in text.split("&"):
+        if pair:
+            key, _, value = pair.partition("=")
+            out[key] = value
+    return out
+
+
+class Request:
+    def __init__(self, server, connection, client_address, raw_request):
+        self.server = server
+        self.connection = connection
+        self.client_address = client_address
+        head, _, self.body = raw_request.partition(b"\r\n\r\n")
+        lines = head.decode("utf-8", "replace").split("\r\n")
+        self.method, target, self.http_version = lines[0].split(" ", 2)
+        self.path, _, query = target.partition("?")
+        # Query values are left encoded; form values are decoded (see form_data)
+        self.query_params = _pairs(query)
+        self.headers = Headers()
+        for line in lines[1:]:
+            name, _, value = line.partition(":")
+            self.headers[name.strip()] = value.strip()
+        self._form_data = None
+
+    @property
+    def form_data(self):
+        if self._form_data is None and self.method == POST:
+            if "x-www-form-urlencoded" in self.headers.get("Content-Type", ""):
+                raw = _pairs(self.body.decode("utf-8", "replace"))
+                self._form_data = {k: unquote_plus(v) for k, v in raw.items()}
+        return self._form_data
+
+    def json(self):
+        return json.loads(self.body) if self.body else None
+
+
+class Response:
+    def __init__(self, request, body="", *, status=OK_200, headers=None, cookies=None,
+                 content_type=None):
+        self._request = request
+        self._body = body
+        self._status = status
+        self._headers = Headers(dict(headers.items()) if headers else None)
+        self._content_type = content_type
+
+    def _send(self):
+        body = self._body.encode("utf-8") if isinstance(self._body, str) else bytes(self._body)
+        lines = ["HTTP/1.1 %s" % self._status,
+                 "Content-Type: %s" % (self._content_type or "text/plain"),
+                 "Content-Length: %d" % len(body),
+                 "Connection: close"]
+        lines.extend("%s: %s" % item for item in self._headers.items())
+        data = ("\r\n".join(lines) + "\r\n\r\n").encode("utf-8") + body
+        self._request.connection.sendall(data)
+        self._request.server.bytes_sent += len(data)
+
+
+class ChunkedResponse(Response):
+    def __init__(self, request, body, *, status=OK_200, headers=None, cookies=None,
+                 content_type=None):
+        super().__init__(request, body, status=status, headers=headers, content_type=content_type)
+
+    def _send(self):
+        lines = ["HTTP/1.1 %s" % self._status,
+                 "Content-Type: %s" % (self._content_type or "text/plain"),
+                 "Transfer-Encoding: chunked",
+                 "Connection: close"]
+        lines.extend("%s: %s" % item for item in self._headers.items())
+        self._send_bytes(("\r\n".join(lines) + "\r\n\r\n").encode("utf-8"))
+        for chunk in self._body:
+            if len(chunk):
+                self._send_bytes(b"%x\r\n" % len(chunk))
+                self._send_bytes(chunk)
+                self._send_bytes(b"\r\n")
+        self._send_bytes(b"0\r\n\r\n")
+
+    def _send_bytes(self, data):
+        self._request.connection.sendall(data)
+        self._request.server.bytes_sent += len(data)
+
+
+class FileResponse(Response):
+    def __init__(self, request, filename, root_path=None, *, status=OK_200, headers=None,
+                 content_type=None, buffer_size=1024):
+        super().__init__(request, status=status, headers=headers, content_type=content_type)
+        self._path = (root_path or "").rstrip("/") + "/" + filename.lstrip("/")
+        self._buffer_size = buffer_size
+
+    def _send(self):
+        # Like the library: Content-Length from the file size, then reads of buffer_size
+        size = os.stat(self._path)[6]
+        lines = ["HTTP/1.1 %s" % self._status,
+                 "Content-Type: %s" % (self._content_type or "application/octet-stream"),
+                 "Content-Length: %d" % size,
+                 "Connection: close"]
+        lines.extend("%s: %s" % item for item in self._headers.items())
+        data = ("\r\n".join(lines) + "\r\n\r\n").encode("utf-8")
+        self._request.connection.sendall(data)
+        self._request.server.bytes_sent += len(data)
+        with open(self._path, "rb") as f:
+            while True:
+                chunk = f.read(self._buffer_size)
+                if not chunk:
+                    break
+                self._request.connection.sendall(chunk)
+                self._request.server.bytes_sent += len(chunk)
+
+
+class JSONResponse(Response):
+    def __init__(self, request, data, *, headers=None, status=OK_200):
+        super().__init__(request, json.dumps(data), headers=headers, status=status,
+                         content_type="application/json")
+
+
+class SSEResponse(Response):
+    def __init__(self, request, headers=None):
+        super().__init__(request, headers=headers, content_type="text/event-stream")
+        self._headers["Cache-Control"] = "no-cache"
+
+    def _send(self):
+        lines = ["HTTP/1.1 %s" % self._status,
+                 "Content-Type: %s" % self._content_type,
+                 "Connection: keep-alive"]
+        lines.extend("%s: %s" % item for item in self._headers.items())
+        self._send_bytes(("\r\n".join(lines) + "\r\n\r\n").encode("utf-8"))
+
+    def _send_bytes(self, data):
+        self._request.connection.sendall(data)
+        self._request.server.bytes_sent += len(data)
+
+    def send_event(self, data, event=None, id=None, retry=None, custom_fields=None):
+        message = ""
+        if event:
+            message += "event: %s\n" % event
+        if id is not None:
+            message += "id: %s\n" % id
+        if retry is not None:
+            message += "retry: %d\n" % retry
+        for name, value in (custom_fields or {}).items():
+            message += "%s: %s\n" % (name, value)
+        message += "data: %s\n\n" % data
+        self._send_bytes(message.encode("utf-8"))
+
+    def close(self):
+        self._request.connection.close()
+
+
+class Redirect(Response):
+    def __init__(self, request, url, *, permanent=False, preserve_method=False, status=None,
+                 headers=None):
+        if status is None:
+            if permanent:
+                status = PERMANENT_REDIRECT_308 if preserve_method else MOVED_PERMANENTLY_301
+            else:
+                status = TEMPORARY_REDIRECT_307 if preserve_method else FOUND_302
+        headers = dict(headers or {})
+        headers["Location"] = url
+        super().__init__(request, status=status, headers=headers)
+
+
+class Server:
+    def __init__(self, socket_source, root_path=None, *, debug=False):
+        self._pool = socket_source
+        self.root_path = root_path
+        self.debug = debug
+        self._routes = []
+        self._sock = None
+        self.host = self.port = None
+        self._buffer = bytearray(1024)  # request_buffer_size
+        self.requests = 0
+        self.bytes_sent = 0  # simulator helpers: response bytes written,
+        self.handler_cpu = 0.0  # and thread CPU seconds spent in route handlers
+
+    def route(self, path, methods=GET):
+        methods = methods if isinstance(methods, (list, tuple, set)) else (methods,)
+
+        def register(handler):
+            self._routes.append((path, tuple(methods), handler))
+            return handler
+        return register
+
+    def start(self, host, port=80):
+        pool = self._pool
+        self._sock = pool.socket(pool.AF_INET, pool.SOCK_STREAM)
+        self._sock.setsockopt(pool.SOL_SOCKET, pool.SO_REUSEADDR, 1)
+        self._sock.bind((host, port))
+        self._sock.listen(10)
+        self._sock.setblocking(False)
+        self.host, self.port = self._sock.getsockname()[:2]
+
+    def stop(self):
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+    def serve_forever(self, host, port=80):
+        self.start(host, port)
+        while True:
+            self.poll()
+
+    def poll(self):
+        try:
+            conn, addr = self._sock.accept()
+        except (BlockingIOError, OSError):
+            return NO_REQUEST
+        keep = False
+        try:
+            conn.settimeout(1.0)
+            request = self._receive_request(conn, addr)
+            if request is None:
+                return CONNECTION_TIMED_OUT
+            keep = isinstance(self._handle(request), SSEResponse)
+        except TimeoutError:
+            return CONNECTION_TIMED_OUT
+        finally:
+            if not keep:
+                conn.close()
+        self.requests += 1
+        return REQUEST_HANDLED_RESPONSE_SENT
+
+    def _receive_header_bytes(self, sock):
+        # Whole recv_into()s until the blank line, so some body may come along
+        received = b""
+        while b"\r\n\r\n" not in received:
+            length = sock.recv_into(self._buffer, len(self._buffer))
+            if not length:
+                break
+            received += self._buffer[:length]
+        return received
+
+    def _receive_body_bytes(self, sock, received_body_bytes, content_length):
+        while len(received_body_bytes) < content_length:
+            length = sock.recv_into(self._buffer, len(self._buffer))
+            if not length:
+                break
+            received_body_bytes += self._buffer[:length]
+        return received_body_bytes[:content_length]
+
+    def _receive_request(self, sock, client_address):
+        header_bytes = self._receive_header_bytes(sock)
+        if not header_bytes:
+            return None
+        request = Request(self, sock, client_address, header_bytes)
+        content_length = int(request.headers.get("Content-Length") or 0)
+        request.body = self._receive_body_bytes(sock, request.body, content_length)
+        return request
+
+    @staticmethod
+    def _matches(route, path):
+        if route.endswith("/..."):  # any number of segments below the prefix
+            return path.startswith(route[:-3]) and len(path) > len(route) - 3
+        return route == path
+
+    def _handle(self, request):
+        for path, methods, handler in self._routes:
+            if self._matches(path, request.path) and request.method in methods:
+                t0 = time.thread_time()
+                try:
+                    response = handler(request)
+                except Exception:  # like the library: log it and answer 500
+                    traceback.print_exc()
+                    response = Response(request, "Internal Server Error", status=INTERNAL_SERVER_ERROR_500)
+                self.handler_cpu += time.thread_time() - t0
+                break
+        else:
+            if request.method == GET and self.root_path and self._is_file(request.path):
+                response = FileResponse(request, request.path, self.root_path)
+            else:
+                response = Response(request, "Not Found", status=NOT_FOUND_404)
+        response._send()
+        return response
+
+    def _is_file(self, path):
+        try:
+            return not os.stat(self.root_path.rstrip("/") + path)[0] & 0x4000
+        except OSError:
+            return False
@@ -0,0 +1,8 @@
+# CPython stand-in for adafruit_ssd1680: an SSD1680 e-ink panel that the
+# simulator records refreshes from (see blesim/displays.py).
+
+from blesim import runtime
+
+
+def SSD1680(bus, *, width, height, rotation=0, seconds_per_frame=180, **kwargs):
+    return runtime.current().attach_eink(bus, width, height, rotation, seconds_per_frame)
@@ -0,0 +1,19 @@
+# CPython stand-in for analogio; the battery divider reads the simulator's
+# battery voltage.
+
+from blesim import runtime
+
+
+class AnalogIn:
+    reference_voltage = 3.3
+
+    def __init__(self, pin):
+        self.pin = pin
+
+    @property
+    def value(self):
+        volts = runtime.current().battery_mv / 1000 / 2  # board's 1:2 divider
+        return max(0, min(65535, int(volts / self.reference_voltage * 65535)))
+
+    def deinit(self):
+        pass
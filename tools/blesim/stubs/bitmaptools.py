@@ -0,0 +1,23 @@
+# CPython stand-in for CircuitPython's bitmaptools: arrayblit, the one call
+# HTTP_server.py uses, with the same argument order and checks.
+
+
+def arrayblit(bitmap, data, x1=0, y1=0, x2=-1, y2=-1, skip_index=None):
+    """Copy ``data`` (one pixel value per byte, row-major) into the rectangle
+    x1..x2, y1..y2 of ``bitmap``."""
+    if x2 == -1:
+        x2 = bitmap.width
+    if y2 == -1:
+        y2 = bitmap.height
+    width = x2 - x1
+    if x1 < 0 or y1 < 0 or x2 > bitmap.width or y2 > bitmap.height or width < 0 or y2 < y1:
+        raise ValueError("out of range of target")
+    if len(data) < width * (y2 - y1):
+        raise ValueError("input buffer too short")
+    i = 0
+    for y in range(y1, y2):
+        for x in range(x1, x2):
+            value = data[i]
+            if value != skip_index:
+                bitmap[x, y] = value
+            i += 1
@@ -0,0 +1,46 @@
+# CPython stand-in for the Feather ESP32-S3 Reverse TFT's board module.
+
+from blesim import runtime
+
+
+class Pin:
+    def __init__(self, name):
+        self.name = name
+
+    def __repr__(self):
+        return "board." + self.name
+
+
+D9 = Pin("D9")
+D10 = Pin("D10")
+SCK = Pin("SCK")
+MOSI = Pin("MOSI")
+MISO = Pin("MISO")
+SDA = Pin("SDA")
+SCL = Pin("SCL")
+VOLTAGE_MONITOR = Pin("VOLTAGE_MONITOR")
+TFT_I2C_POWER = Pin("TFT_I2C_POWER")
+
+DISPLAY = runtime.current().tft
+
+
+class _Bus:
+    def __init__(self, kind):
+        self.kind = kind
+
+    def try_lock(self):
+        return True
+
+    def unlock(self):
+        pass
+
+    def deinit(self):
+        pass
+
+
+def SPI():
+    return _Bus("SPI")
+
+
+def I2C():
+    return _Bus("I2C")
@@ -0,0 +1,158 @@
+# CPython stand-in for CircuitPython's displayio: the subset BLE-final.py and
+# render_pool.py use, with the same indexing rules and errors.
+
+from blesim import runtime
+
+
+class Bitmap:
+    def __init__(self, width, height, value_count):
+        if value_count < 1 or value_count > 256:
+            raise ValueError("value_count must be 1..256")
+        self.width = width
+        self.height = height
+        self.value_count = value_count
+        self._data = bytearray(width * height)
+
+    def _offset(self, index):
+        if isinstance(index, tuple):
+            x, y = index
+            if x < 0 or y < 0 or x >= self.width or y >= self.height:
+                raise IndexError("pixel coordinates out of bounds")
+            return y * self.width + x
+        if index < 0 or index >= len(self._data):
+            raise IndexError("index out of bounds")
+        return index
+
+    def __getitem__(self, index):
+        return self._data[self._offset(index)]
+
+    def __setitem__(self, index, value):
+        if value < 0 or value >= self.value_count:
+            raise ValueError("pixel value out of range")
+        self._data[self._offset(index)] = value
+
+    def fill(self, value):
+        self._data[:] = bytes((value,)) * len(self._data)
+
+    def dirty(self, x1=0, y1=0, x2=-1, y2=-1):
+        pass
+
+
+class Palette:
+    def __init__(self, color_count):
+        self._colors = [0] * color_count
+        self._transparent = [False] * color_count
+
+    def __len__(self):
+        return len(self._colors)
+
+    def __getitem__(self, index):
+        return self._colors[index]
+
+    def __setitem__(self, index, color):
+        if isinstance(color, (tuple, list)):
+            color = color[0] << 16 | color[1] << 8 | color[2]
+        self._colors[index] = color & 0xFFFFFF
+
+    def make_transparent(self, index):
+        self._transparent[index] = True
+
+    def make_opaque(self, index):
+        self._transparent[index] = False
+
+    def is_transparent(self, index):
+        return self._transparent[index]
+
+    def color_of(self, index):
+        """Simulator helper: RGB of a pixel value, or None if transparent."""
+        if index >= len(self._colors) or self._transparent[index]:
+            return None
+        return self._colors[index]
+
+
+class _Layer:
+    _parent = None
+
+
+class TileGrid(_Layer):
+    def __init__(self, bitmap, *, pixel_shader, width=1, height=1, tile_width=None, tile_height=None,
+                 default_tile=0, x=0, y=0):
+        self.bitmap = bitmap
+        self.pixel_shader = pixel_shader
+        self.width = width
+        self.height = height
+        self.tile_width = bitmap.width if tile_width is None else tile_width
+        self.tile_height = bitmap.height if tile_height is None else tile_height
+        self.x = x
+        self.y = y
+        self.hidden = False
+        self._tiles = [default_tile] * (width * height)
+
+    def _tile_index(self, index):
+        if isinstance(index, tuple):
+            return index[1] * self.width + index[0]
+        return index
+
+    def __getitem__(self, index):
+        return self._tiles[self._tile_index(index)]
+
+    def __setitem__(self, index, tile):
+        self._tiles[self._tile_index(index)] = tile
+
+
+class Group(_Layer):
+    def __init__(self, *, scale=1, x=0, y=0):
+        self.scale = scale
+        self.x = x
+        self.y = y
+        self.hidden = False
+        self._layers = []
+
+    def _adopt(self, layer):
+        if layer._parent is not None:
+            raise ValueError("Layer already in a group")
+        layer._parent = self
+
+    def append(self, layer):
+        self._adopt(layer)
+        self._layers.append(layer)
+
+    def insert(self, index, layer):
+        self._adopt(layer)
+        self._layers.insert(index, layer)
+
+    def pop(self, index=-1):
+        layer = self._layers.pop(index)
+        layer._parent = None
+        return layer
+
+    def remove(self, layer):
+        self._layers.remove(layer)
+        layer._parent = None
+
+    def index(self, layer):
+        return self._layers.index(layer)
+
+    def __len__(self):
+        return len(self._layers)
+
+    def __getitem__(self, index):
+        return self._layers[index]
+
+    def __setitem__(self, index, layer):
+        self._adopt(layer)
+        self._layers[index]._parent = None
+        self._layers[index] = layer
+
+    def __delitem__(self, index):
+        self.pop(index)
+
+    def __iter__(self):
+        return iter(list(self._layers))
+
+    def __contains__(self, layer):
+        return layer in self._layers
+
+
+def release_displays():
+    runtime.current().release_displays()
@@ -0,0 +1,16 @@
+# CPython stand-in for CircuitPython's fourwire display bus.
+
+
+class FourWire:
+    def __init__(self, spi_bus, *, command, chip_select, reset=None, baudrate=24000000, polarity=0, phase=0):
+        self.spi_bus = spi_bus
+        self.command = command
+        self.chip_select = chip_select
+        self.reset_pin = reset
+        self.baudrate = baudrate
+
+    def reset(self):
+        pass
+
+    def send(self, command, data):
+        pass
@@ -0,0 +1,14 @@
+# CPython stand-in for microcontroller (only cpu.temperature is used).
+
+from blesim import runtime
+
+
+class _Processor:
+    @property
+    def temperature(self):
+        return runtime.current().cpu_temperature
+
+    frequency = 240000000
+
+
+cpu = _Processor()
@@ -0,0 +1,104 @@
+# CPython stand-in for CircuitPython's socketpool, backed by real sockets on
+# 127.0.0.1 (see tools/run_server.py). Works without a blesim run.
+#
+# Port 80 cannot be bound without root, so every bound port is moved up by
+# $SOCKETPOOL_PORT_OFFSET (8000 by default: port 80 is served on 8080).
+# Errors follow CircuitPython: a timed-out call raises OSError(ETIMEDOUT),
+# one that would block raises OSError(EAGAIN).
+
+import errno
+import os
+import socket as _socket
+
+PORT_OFFSET = int(os.environ.get("SOCKETPOOL_PORT_OFFSET", "8000"))
+
+
+def _oserror(e):
+    if isinstance(e, _socket.timeout):
+        return OSError(errno.ETIMEDOUT, "timed out")
+    if isinstance(e, BlockingIOError):
+        return OSError(errno.EAGAIN, "would block")
+    return e
+
+
+class Socket:
+    def __init__(self, sock):
+        self._sock = sock
+
+    def fileno(self):
+        return self._sock.fileno()
+
+    def settimeout(self, timeout):
+        self._sock.settimeout(timeout)
+
+    def setblocking(self, flag):
+        self._sock.setblocking(flag)
+
+    def setsockopt(self, level, optname, value):
+        self._sock.setsockopt(level, optname, value)
+
+    def bind(self, address):
+        host, port = address
+        self._sock.bind(("127.0.0.1", port + PORT_OFFSET))
+
+    def listen(self, backlog):
+        self._sock.listen(backlog)
+
+    def getsockname(self):
+        return self._sock.getsockname()
+
+    def accept(self):
+        try:
+            sock, address = self._sock.accept()
+        except OSError as e:
+            raise _oserror(e) from None
+        return Socket(sock), address
+
+    def connect(self, address):
+        try:
+            self._sock.connect(address)
+        except OSError as e:
+            raise _oserror(e) from None
+
+    def recv_into(self, buffer, bufsize=0):
+        try:
+            return self._sock.recv_into(buffer, bufsize)
+        except OSError as e:
+            raise _oserror(e) from None
+
+    def send(self, data):
+        try:
+            return self._sock.send(data)
+        except OSError as e:
+            raise _oserror(e) from None
+
+    def sendall(self, data):
+        try:
+            self._sock.sendall(data)
+        except OSError as e:
+            raise _oserror(e) from None
+
+    def close(self):
+        self._sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class SocketPool:
+    AF_INET = _socket.AF_INET
+    SOCK_STREAM = _socket.SOCK_STREAM
+    SOL_SOCKET = _socket.SOL_SOCKET
+    SO_REUSEADDR = _socket.SO_REUSEADDR
+    IPPROTO_TCP = _socket.IPPROTO_TCP
+    EAGAIN = errno.EAGAIN
+    ETIMEDOUT = errno.ETIMEDOUT
+
+    def __init__(self, radio):
+        self.radio = radio
+
+    def socket(self, family=AF_INET, type=SOCK_STREAM, proto=0):
+        return Socket(_socket.socket(family, type, proto))
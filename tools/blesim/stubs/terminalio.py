@@ -0,0 +1,30 @@
+# CPython stand-in for terminalio. FONT has terminalio's 6x12 cell, but its
+# glyphs are placeholder patterns derived from the character code: layout and
+# framebuffer hashes are stable, the text itself is not legible.
+
+
+class _BuiltinFont:
+    def __init__(self, width=6, height=12):
+        self.width = width
+        self.height = height
+        self._glyphs = {}
+
+    def get_bounding_box(self):
+        return self.width, self.height
+
+    def glyph_rows(self, ch):
+        """Simulator helper: 12 row masks (bit 5 = leftmost column) for ``ch``."""
+        rows = self._glyphs.get(ch)
+        if rows is None:
+            rows = [0] * self.height
+            code = ord(ch)
+            if ch.strip():
+                seed = (code * 2654435761) & 0xFFFFFFFF
+                for y in range(2, 10):
+                    seed = (seed * 1664525 + 1013904223) & 0xFFFFFFFF
+                    rows[y] = (seed >> 11) & 0x3E  # columns 0-4, column 5 is spacing
+            self._glyphs[ch] = rows
+        return rows
+
+
+FONT = _BuiltinFont()
@@ -0,0 +1,33 @@
+# CPython stand-in for CircuitPython's wifi module: an access point that is
+# really the loopback interface, for running the HTTP scripts on a PC (see
+# tools/run_server.py). Works without a blesim run.
+
+import ipaddress
+
+
+class Radio:
+    def __init__(self):
+        self.enabled = True
+        self.ap_active = False
+        self.ap_ssid = None
+        self.connected = False
+        self.ipv4_address_ap = None
+        self.ipv4_address = None
+
+    def start_ap(self, ssid, password="", *, channel=1, authmode=None, max_connections=4):
+        if password and len(password) < 8:
+            raise ValueError("password must be 8-63 characters")
+        self.ap_ssid = ssid
+        self.ap_active = True
+        self.ipv4_address_ap = ipaddress.IPv4Address("127.0.0.1")
+
+    def stop_ap(self):
+        self.ap_active = False
+        self.ipv4_address_ap = None
+
+    def connect(self, ssid, password="", *, channel=0, bssid=None, timeout=None):
+        self.connected = True
+        self.ipv4_address = ipaddress.IPv4Address("127.0.0.1")
+
+
+radio = Radio()
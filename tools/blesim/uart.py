@@ -0,0 +1,103 @@
+# Virtual Nordic UART: the device end looks like adafruit_ble's UARTService,
+# the host end is what a scripted or socket-driven central writes to.
+
+import json
+
+import uart_codec
+
+
+class VirtualUART:
+    """Bounded RX buffer filled by central writes; TX bytes collected for the central.
+
+    Every central write is one BLE write: it lands in the RX buffer whole, and
+    bytes that do not fit are dropped (and counted), as with the real
+    characteristic buffer. ``uart.read(uart.in_waiting)`` returns everything
+    buffered, so writes that arrive between two polls are merged.
+    """
+
+    def __init__(self, clock, rx_buffer=512):
+        self.clock = clock
+        self.capacity = rx_buffer
+        self.rx = bytearray()
+        self.tx = bytearray()
+        self.rx_bytes = 0
+        self.tx_bytes = 0
+        self.dropped = 0
+        self.writes = 0
+        self.reads = []  # (time, nbytes) of every device read
+        self.on_poll = None  # the simulator pumps central events here
+        self.trace = None  # uart_trace.TraceWriter recording device reads
+
+    # ---- central side ----
+    def central_write(self, data):
+        room = self.capacity - len(self.rx)
+        self.rx += data[:room]
+        self.dropped += max(0, len(data) - room)
+        self.writes += 1
+
+    def take_tx(self):
+        data = bytes(self.tx)
+        self.tx.clear()
+        return data
+
+    # ---- device side (UARTService API) ----
+    @property
+    def in_waiting(self):
+        if self.on_poll is not None:
+            self.on_poll()
+        return len(self.rx)
+
+    def read(self, nbytes=None):
+        n = len(self.rx) if nbytes is None else min(nbytes, len(self.rx))
+        if not n:
+            return None
+        data = bytes(self.rx[:n])
+        del self.rx[:n]
+        self.rx_bytes += n
+        self.reads.append((self.clock.now(), n))
+        if self.trace is not None:
+            self.trace.read(data, self.clock.now())
+        return data
+
+    def readline(self):
+        end = self.rx.find(b"\n")
+        return self.read(end + 1 if end >= 0 else len(self.rx))
+
+    def write(self, data):
+        self.tx += data
+        self.tx_bytes += len(data)
+        return len(data)
+
+    def reset_input_buffer(self):
+        self.rx.clear()
+
+
+class ReplyParser:
+    """Splits the device's TX stream into messages: JSON lines and bin1 frames."""
+
+    def __init__(self):
+        self.buf = bytearray()
+
+    def feed(self, data):
+        self.buf += data
+        messages = []
+        while self.buf:
+            if self.buf[0] == uart_codec.MAGIC:
+                frames, used = uart_codec.decode(self.buf)
+                if not used:
+                    break
+                messages.extend(frames)
+                del self.buf[:used]
+                continue
+            end = self.buf.find(b"\n")
+            if end < 0:
+                break
+            line = bytes(self.buf[:end]).decode("utf-8", "replace").strip()
+            del self.buf[:end + 1]
+            if not line:
+                continue
+            try:
+                messages.append(json.loads(line))
+            except ValueError:
+                messages.append({"raw": line})
+        return messages
@@ -0,0 +1,185 @@
+"""Boot import-cost benchmark for BLE-final.py's lazy imports (runs on CPython).
+
+Runs BLE-final.py unmodified in the blesim simulator with the stub modules in
+blesim/stubs. Every import of a module in COSTS advances the simulated clock
+by its cost, once per run, so the stubs cost what the real libraries would.
+The firmware is run twice:
+
+- lazy: as written. BLE modules, then advertising, then everything else. The
+  e-ink driver, bitmap_label and base64 wait for first use or for prewarm.
+- eager: the layout before the change. Every costed module that the lazy run
+  imports after advertising starts (prewarm included) is imported before the
+  BLE modules.
+
+For each run it prints the stages boot_mark() recorded, the costed imports in
+each stage, and when advertising started (ms since boot). The difference is
+what the lazy imports save. It checks that nothing deferred is imported
+before advertising starts, and that the lazy run advertises sooner. Exits 1 if
+a check fails.
+
+The default costs are rough CircuitPython 9 import times on an ESP32-S3 with
+the libraries as .mpy: near zero for built-in modules, tens of ms for
+libraries. Use --cost NAME=MS to plug in numbers measured on a board (time
+an import in the REPL with supervisor.ticks_ms()).
+
+    python3 tools/boot_bench.py [--cost adafruit_ssd1680=40] [--json]
+"""
+
+import argparse
+import builtins
+import json
+import os
+import sys
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(TOOLS_DIR, ".."))
+sys.path.insert(0, TOOLS_DIR)
+
+from blesim import ScriptedCentral, Simulator  # noqa: E402
+from blesim.checks import Checks  # noqa: E402
+
+# Simulated import cost (ms) per module
+COSTS = {
+    # adafruit_ble and the display libraries are .mpy packages in lib/
+    "adafruit_ble": 250,
+    "adafruit_ble.advertising.standard": 60,
+    "adafruit_ble.services.nordic": 40,
+    "adafruit_display_text": 30,
+    "adafruit_display_text.label": 60,
+    "adafruit_display_text.bitmap_label": 50,
+    "adafruit_ssd1680": 40,
+    "base64": 20,
+    # Built into the firmware
+    "board": 1,
+    "displayio": 1,
+    "terminalio": 1,
+    "fourwire": 1,
+    "json": 1,
+    # The repo's helper modules, compiled from .py on the board
+    "adv_policy": 25,
+    "playlist": 40,
+    "transfer_cache": 25,
+    "uart_codec": 35,
+    "render_pool": 25,
+    "poller": 15,
+    "telemetry": 30,
+}
+DEFERRED = ("fourwire", "adafruit_ssd1680", "adafruit_display_text.bitmap_label", "base64")
+BLE_MODULE = "adafruit_ble"
+
+
+class CostedImports:
+    """builtins.__import__ wrapper that charges COSTS to the simulated clock.
+
+    With ``eager`` set, the first import of adafruit_ble first imports those
+    modules, as the top of the old BLE-final.py did.
+    """
+
+    def __init__(self, sim, costs, eager=()):
+        self.sim = sim
+        self.costs = costs
+        self.eager = list(eager)
+        self.charged = {}  # name -> index of the boot stage it was imported in
+        self._import = builtins.__import__
+
+    def __enter__(self):
+        builtins.__import__ = self
+        return self
+
+    def __exit__(self, *exc):
+        builtins.__import__ = self._import
+
+    def _charge(self, name):
+        if name in self.costs and name not in self.charged:
+            self.charged[name] = len(self.sim.globals.get("boot_timing", ()))
+            self.sim.clock.advance_to(self.sim.clock.now() + self.costs[name] / 1000)
+
+    def __call__(self, name, globals=None, locals=None, fromlist=(), level=0):
+        if level == 0:
+            if name == BLE_MODULE and self.eager:
+                eager, self.eager = self.eager, []
+                for module in eager:
+                    self(module)
+            self._charge(name)
+            for item in fromlist or ():
+                self._charge(name + "." + item)
+        return self._import(name, globals, locals, fromlist, level)
+
+
+def run(costs, eager=()):
+    steps = [
+        {"at": 5.0, "do": "connect"},  # after prewarm has run
+        {"after": 0.5, "do": "write", "json": {"t": "boot"}},
+        {"do": "wait", "for": {"t": "boot"}, "timeout": 5},
+        {"after": 0.5, "do": "end"},
+    ]
+    central = ScriptedCentral(steps)
+    sim = Simulator(central, until=30.0)
+    with CostedImports(sim, costs, eager) as imports:
+        report = sim.run()
+    marks = [(stage, ms) for stage, ms in sim.globals.get("boot_timing", [])]
+    stages = [{"stage": stage, "ms": ms, "imports": []} for stage, ms in marks]
+    stages.append({"stage": "(after boot)", "ms": None, "imports": []})
+    for name, index in imports.charged.items():
+        stages[min(index, len(marks))]["imports"].append(name)
+    return {
+        "error": report["error"] or "; ".join(report["central_errors"]) or None,
+        "adv_ms": dict(marks).get("advertising"),
+        "stages": [s for s in stages if s["ms"] is not None or s["imports"]],
+        "imports": imports.charged,
+        "marks": dict(marks),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cost", action="append", default=[], metavar="NAME=MS",
+                        help="import cost of a module in ms (repeatable)")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args()
+    costs = dict(COSTS)
+    for item in args.cost:
+        name, _, ms = item.partition("=")
+        costs[name] = float(ms)
+    check = Checks(quiet=args.json)
+    failures = check.failures
+
+    lazy = run(costs)
+    adv_stage = next((i for i, s in enumerate(lazy["stages"]) if s["stage"] == "advertising"), None)
+    after_adv = [name for name, index in lazy["imports"].items()
+                 if adv_stage is not None and index > adv_stage]
+    eager = run(costs, eager=sorted(set(after_adv) | set(DEFERRED), key=list(costs).index))
+
+    check(lazy["error"] is None and eager["error"] is None,
+          f"both runs finished ({lazy['error']}, {eager['error']})")
+    early = [name for name in DEFERRED
+             if name in lazy["imports"] and adv_stage is not None and lazy["imports"][name] <= adv_stage]
+    check(adv_stage is not None and not early, f"nothing deferred is imported before advertising {early}")
+    saved = (eager["adv_ms"] or 0) - (lazy["adv_ms"] or 0)
+    check(lazy["adv_ms"] is not None and saved > 0,
+          f"lazy imports advertise sooner ({lazy['adv_ms']} vs {eager['adv_ms']} ms)")
+    deferred_ms = sum(costs[name] for name in DEFERRED)
+    moved_ms = sum(costs[name] for name in set(after_adv) | set(DEFERRED))
+
+    results = {"costs": costs, "lazy": lazy, "eager": eager, "saved_ms": round(saved, 1),
+               "deferred_ms": deferred_ms, "after_advertising_ms": moved_ms, "failures": failures}
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for name, result in (("lazy", lazy), ("eager", eager)):
+            print()
+            print(f"{name}: advertising starts at {result['adv_ms']} ms")
+            for s in result["stages"]:
+                cost = sum(costs[m] for m in s["imports"])
+                ms = "" if s["ms"] is None else s["ms"]
+                print(f"  {s['stage']:<44}{ms:>7}  {cost:>5g} ms imports  {', '.join(s['imports'])}")
+        print()
+        print(f"advertising starts {saved} ms sooner; {moved_ms:g} ms of imports now run after it, "
+              f"{deferred_ms:g} ms of them deferred to first use or prewarm")
+        if failures:
+            print(f"{len(failures)} checks failed")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
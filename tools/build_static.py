@@ -0,0 +1,120 @@
+"""Build step for HTTP_server.py's static files (runs on CPython).
+
+Copies every file under SRC to OUT (copy OUT to /static on CIRCUITPY).
+Assets get a content hash in their name (``style.css`` becomes
+``style.1a2b3c4d.css``) so the server can let browsers cache them for a year.
+References to them in .css and .html files are rewritten to the hashed names
+first. HTML files keep their names, because they are the entry points. A
+gzip-compressed ``.gz`` sibling is written when it saves at least --min-saving
+of the size. manifest.json maps each source name to its built name.
+
+    python3 tools/build_static.py SRC OUT [--gzip-only] [--min-saving 0.1]
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from static_files import CONTENT_TYPES  # noqa: E402
+
+# Already compressed; gzip would only add its header
+NO_GZIP = {"png", "jpg", "woff2", "gz"}
+
+
+def source_files(src):
+    for dirpath, dirnames, filenames in os.walk(src):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            path = os.path.join(dirpath, filename)
+            yield os.path.relpath(path, src).replace(os.sep, "/")
+
+
+def build_order(names):
+    # Rewritten files last: everything else first, then CSS, then HTML
+    def rank(name):
+        ext = name.rsplit(".", 1)[-1].lower()
+        return {"css": 1, "html": 2}.get(ext, 0)
+    return sorted(names, key=lambda name: (rank(name), name))
+
+
+def hashed_name(name, data):
+    digest = hashlib.sha256(data).hexdigest()[:8]
+    head, dot, ext = name.rpartition(".")
+    if not dot or "/" in ext:
+        return name + "." + digest
+    return "%s.%s.%s" % (head, digest, ext)
+
+
+def rewrite(data, manifest):
+    text = data.decode("utf-8")
+    for name, built in manifest.items():
+        # Whole names only: "style.css" must not match inside "mystyle.css"
+        text = re.sub(r"(?<![\w.-])" + re.escape(name) + r"(?![\w.-])", built, text)
+    return text.encode("utf-8")
+
+
+def build(src, out, gzip_only=False, min_saving=0.1):
+    """Build SRC into OUT; returns a list of (source, built, size, gz size or None)."""
+    manifest = {}
+    report = []
+    for name in build_order(source_files(src)):
+        with open(os.path.join(src, name), "rb") as f:
+            data = f.read()
+        ext = name.rsplit(".", 1)[-1].lower()
+        if ext in ("css", "html"):
+            data = rewrite(data, manifest)
+        built = name if ext == "html" else hashed_name(name, data)
+        manifest[name] = built
+        path = os.path.join(out, *built.split("/"))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        packed = None
+        if ext not in NO_GZIP:
+            packed = gzip.compress(data, compresslevel=9, mtime=0)
+            if len(packed) > len(data) * (1 - min_saving):
+                packed = None
+        if packed is not None:
+            with open(path + ".gz", "wb") as f:
+                f.write(packed)
+        if packed is None or not gzip_only:
+            with open(path, "wb") as f:
+                f.write(data)
+        report.append((name, built, len(data), None if packed is None else len(packed)))
+    with open(os.path.join(out, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("src", help="source directory")
+    parser.add_argument("out", help="output directory (emptied first)")
+    parser.add_argument("--gzip-only", action="store_true",
+                        help="drop the uncompressed copy when a .gz exists (saves flash; "
+                             "clients without gzip then get 404)")
+    parser.add_argument("--min-saving", type=float, default=0.1,
+                        help="keep a .gz only if it is at least this much smaller")
+    args = parser.parse_args()
+
+    if os.path.abspath(args.src) == os.path.abspath(args.out):
+        parser.error("SRC and OUT must differ")
+    if os.path.isdir(args.out):
+        shutil.rmtree(args.out)
+    report = build(args.src, args.out, args.gzip_only, args.min_saving)
+    unknown = sorted({name.rsplit(".", 1)[-1] for name, _, _, _ in report} - set(CONTENT_TYPES))
+    for name, built, size, packed in report:
+        gz = "%7d gz" % packed if packed is not None else "%10s" % "-"
+        print(f"{name:<30} {built:<38} {size:>8} {gz}")
+    if unknown:
+        print("served as application/octet-stream: " + ", ".join(unknown))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+"""JSON vs. bin1 encode/decode benchmark for the BLE UART control messages (runs on CPython).
+
+Times encode and decode of each high-frequency message and counts the control
+bytes one image transfer costs in each encoding.
+
+    python3 tools/codec_bench.py [--number 20000] [--image-len 1861]
+"""
+
+import argparse
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import uart_codec  # noqa: E402
+
+TRANSFER_ID = "m4x7k2"
+
+MESSAGES = {
+    "img": {"t": "img", "id": TRANSFER_ID, "w": 122, "h": 122, "len": 1861, "p": "The ink remembers what you forget"},
+    "prog": {"t": "prog", "id": TRANSFER_ID, "pct": 40, "rx": 760},
+    "ack": {"t": "ack", "id": TRANSFER_ID, "st": "start", "ok": 1, "rx": 0, "len": 1861},
+    "bat": {"t": "bat", "mv": 3912, "pct": 81, "tmp": 31.5, "src": "vbat", "up": 5400},
+    "ok": {"ok": True},
+}
+REQUESTS = ("img",)  # sent by the app; everything else is a device reply
+
+
+def json_encode(msg):
+    # Same as send_uart_json in BLE-final.py
+    return (json.dumps(msg) + "\n").encode("utf-8")
+
+
+def json_decode(raw):
+    return json.loads(raw.decode("utf-8").strip())
+
+
+def bin_encode(name, msg):
+    if name in REQUESTS:
+        return uart_codec.encode_request(msg)
+    return bytes(uart_codec.encode(msg))
+
+
+def bin_decode(raw):
+    return uart_codec.decode(raw)[0][0]
+
+
+def transfer_messages(image_len):
+    """Control messages of one image transfer, as BLE-final.py emits them."""
+    msgs = [MESSAGES["img"], dict(MESSAGES["ack"], len=image_len)]
+    for pct in range(10, 101, 10):
+        msgs.append({"t": "prog", "id": TRANSFER_ID, "pct": pct, "rx": image_len * pct // 100})
+    msgs.append({"t": "ack", "id": TRANSFER_ID, "st": "rendering", "ok": 1})
+    return msgs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=20000, help="iterations per timing")
+    parser.add_argument("--image-len", type=int, default=1861)
+    args = parser.parse_args()
+    n = args.number
+
+    print(f"{'message':<8}{'json B':>8}{'bin1 B':>8}{'json enc':>11}{'bin1 enc':>11}{'json dec':>11}{'bin1 dec':>11}")
+    for name, msg in MESSAGES.items():
+        j = json_encode(msg)
+        b = bin_encode(name, msg)
+        decoded = bin_decode(b)
+        assert decoded == msg, (decoded, msg)
+        t_je = timeit.timeit(lambda: json_encode(msg), number=n) / n * 1e6
+        t_be = timeit.timeit(lambda: bin_encode(name, msg), number=n) / n * 1e6
+        t_jd = timeit.timeit(lambda: json_decode(j), number=n) / n * 1e6
+        t_bd = timeit.timeit(lambda: bin_decode(b), number=n) / n * 1e6
+        print(f"{name:<8}{len(j):>8}{len(b):>8}{t_je:>9.2f}us{t_be:>9.2f}us{t_jd:>9.2f}us{t_bd:>9.2f}us")
+
+    msgs = transfer_messages(args.image_len)
+    json_bytes = sum(len(json_encode(m)) for m in msgs)
+    bin_bytes = sum(len(bin_encode("img" if m.get("t") == "img" else "", m)) for m in msgs)
+    print()
+    print(f"one {args.image_len} B transfer: {len(msgs)} control messages, "
+          f"{json_bytes} B as JSON vs {bin_bytes} B as bin1 ({100.0 * bin_bytes / json_bytes:.0f}%)")
+
+
+if __name__ == "__main__":
+    main()
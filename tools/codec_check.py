@@ -0,0 +1,136 @@
+"""bin1 link checks for BLE-final.py (runs on CPython).
+
+Runs BLE-final.py unmodified in the blesim simulator, negotiates bin1 with
+{"t":"hello"} and sends each case as one or more UART writes, far enough apart
+that the device reads them separately. Covers frames cut off inside the header
+or the payload, a complete frame followed by the start of the next one,
+transfer ids that bin1 cannot carry (not ASCII, or longer than
+uart_codec.MAX_ID_LEN bytes) and the uptime in bat replies. For each case it
+checks the replies, whether each went out as a frame or as JSON, and the text
+drawn on the TFT. Exits 1 if a check fails.
+
+    python3 tools/codec_check.py [--verbose]
+"""
+
+import argparse
+import json
+import os
+import sys
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(TOOLS_DIR, ".."))
+sys.path.insert(0, TOOLS_DIR)
+
+import uart_codec  # noqa: E402
+from blesim import ScriptedCentral, Simulator  # noqa: E402
+from blesim.checks import Checks  # noqa: E402
+
+GAP = 0.5  # seconds between writes; longer than the poller's idle sleep
+LONG_ID = "x" * (uart_codec.MAX_ID_LEN + 1)
+
+BAT = uart_codec.encode_request({"t": "bat"})
+TEXT = uart_codec.encode_request({"text": "Split", "color": "#00FF00"})
+TEXT2 = uart_codec.encode_request({"text": "Second", "color": "#0000FF"})
+TEXT3 = uart_codec.encode_request({"text": "Third", "color": "#FF0000"})
+
+
+def as_json(msg):
+    return (json.dumps(msg) + "\n").encode("utf-8")
+
+
+def bat_reply(msg):
+    return msg.get("t") == "bat" and "mv" in msg and isinstance(msg.get("up"), int) and msg["up"] > 0
+
+
+def refused(transfer_id):
+    return {"t": "ack", "id": transfer_id, "st": "resume", "ok": 0, "rx": 0}
+
+
+# (name, writes, expected [(reply or predicate, "bin1" | "json")], TFT texts drawn or None to skip)
+CASES = [
+    ("hello", [as_json({"t": "hello", "enc": ["bin1"]})], [({"t": "hello", "enc": "bin1"}, "json")], []),
+    ("bat frame", [BAT], [(bat_reply, "bin1")], []),
+    ("frame cut in the header", [BAT[:2], BAT[2:]], [(bat_reply, "bin1")], []),
+    ("frame cut in the payload", [TEXT[:7], TEXT[7:]], [({"ok": True}, "bin1")], ["Split"]),
+    ("magic byte alone", [TEXT2[:1], TEXT2[1:]], [({"ok": True}, "bin1")], ["Second"]),
+    ("frame then a cut frame", [BAT + TEXT[:3], TEXT[3:]],
+     [(bat_reply, "bin1"), ({"ok": True}, "bin1")], ["Split"]),
+    ("frame cut in three", [TEXT3[:1], TEXT3[1:5], TEXT3[5:]], [({"ok": True}, "bin1")], ["Third"]),
+    ("non-ASCII resume id", [as_json({"t": "resume", "id": "café"})], [(refused("café"), "json")], []),
+    ("resume id longer than MAX_ID_LEN", [as_json({"t": "resume", "id": LONG_ID})],
+     [(refused(LONG_ID), "json")], []),
+    # An ack frame always carries "len"
+    ("ASCII resume id", [uart_codec.encode_request({"t": "resume", "id": "r1"})],
+     [(dict(refused("r1"), len=0), "bin1")], []),
+    ("non-ASCII image id", [as_json({"t": "img", "id": "über", "w": 8, "h": 8, "len": 8})],
+     [({"t": "ack", "id": "über", "st": "start", "ok": 1, "rx": 0, "len": 8}, "json")], ["Receiving..."]),
+    ("its image bytes", [b"\x00" * 8],
+     [({"t": "prog", "id": "über", "pct": 100, "rx": 8}, "json"),
+      ({"t": "ack", "id": "über", "st": "rendering", "ok": 1}, "json")], None),
+    ("still alive", [BAT], [(bat_reply, "bin1")], []),
+]
+
+
+class CaseCentral(ScriptedCentral):
+    """ScriptedCentral that remembers when each case's first write went out."""
+
+    def __init__(self, steps):
+        super().__init__(steps)
+        self.cases = []
+
+    def _do_write(self, step):
+        if step.get("first"):
+            self.cases.append(self.sim.clock.now())
+        super()._do_write(step)
+
+
+def matches(expected, msg):
+    return expected(msg) if callable(expected) else expected == msg
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--verbose", action="store_true", help="print every reply and TFT text")
+    args = parser.parse_args()
+
+    steps = [{"at": 1.0, "do": "connect"}, {"after": 1.0, "do": "wait", "seconds": 0}]
+    for _, writes, _, _ in CASES:
+        for i, data in enumerate(writes):
+            steps.append({"after": GAP, "do": "write", "hex": data.hex(), "first": i == 0})
+        steps.append({"do": "wait", "seconds": 0})
+    # The image refresh blocks the loop for EINK_REFRESH_WAIT
+    steps.append({"after": 10.0, "do": "end"})
+    central = CaseCentral(steps)
+    sim = Simulator(central)
+    formats = []  # (time, "bin1" | "json") per device write
+
+    def write(data, _write=sim.uart.write):
+        formats.append((sim.clock.now(), "bin1" if uart_codec.is_frame(data) else "json"))
+        return _write(data)
+    sim.uart.write = write
+    report = sim.run()
+
+    check = Checks()
+    failures = check.failures
+
+    check(report["error"] is None, f"firmware ran without error ({report['error']})")
+    bounds = central.cases + [float("inf")]
+    for i, (name, _, expected, drawn) in enumerate(CASES):
+        start, end = bounds[i], bounds[i + 1]
+        replies = [msg for t, msg in central.messages if start <= t < end]
+        kinds = [kind for t, kind in formats if start <= t < end]
+        texts = [text for t, text in report["tft_text"] if start <= t < end]
+        if args.verbose:
+            print(f"      {name}: replies {replies} as {kinds}, tft {texts}")
+        ok = len(replies) == len(expected) and all(matches(e, m) for (e, _), m in zip(expected, replies))
+        check(ok, f"{name}: {len(expected)} expected repl{'y' if len(expected) == 1 else 'ies'} ({replies})")
+        check(kinds == [kind for _, kind in expected], f"{name}: sent as {[kind for _, kind in expected]} ({kinds})")
+        if drawn is not None:
+            check(texts == drawn, f"{name}: TFT draws {drawn} ({texts})")
+    if failures:
+        print(f"{len(failures)} checks failed")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+"""Control-message dispatcher checks for BLE-final.py (runs on CPython).
+
+Runs BLE-final.py unmodified in the blesim simulator and sends one UART
+write per case: single ops, JSON-array and {"t":"batch"} batches, and
+malformed messages. For each case it checks the replies the device sends
+(exactly one per write) and the text drawn on the TFT. The last case asks for
+{"t":"bat"} to show the firmware survived everything before it. Exits 1 if a
+check fails.
+
+    python3 tools/dispatch_check.py [--verbose]
+"""
+
+import argparse
+import json
+import os
+import sys
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(TOOLS_DIR, ".."))
+sys.path.insert(0, TOOLS_DIR)
+
+from blesim import ScriptedCentral, Simulator  # noqa: E402
+from blesim.checks import Checks  # noqa: E402
+
+GAP = 0.5  # seconds between cases; every reply arrives well within it
+OK = {"ok": True}
+START = {"t": "img", "id": "d1", "w": 8, "h": 8, "len": 8}
+
+
+def batch_reply(replies, ok=1):
+    return {"t": "batch", "ok": ok, "n": len(replies), "r": replies}
+
+
+def bat_reply(msg):
+    return msg.get("t") == "bat" and "mv" in msg
+
+
+# (name, what is written, check of the replies, TFT texts drawn or None to skip)
+CASES = [
+    ("single text", {"text": "Hello", "color": "#FF0000"}, [OK], ["Hello"]),
+    ("single bat", {"t": "bat"}, [bat_reply], []),
+    ("single op without a reply", {"text": ""}, [], []),
+    ("plain text line", "not json at all", [OK], ["not json at all"]),
+    ("array batch", [{"text": "A"}, {"text": "B", "color": "#00FF00"}, {"t": "pl", "op": "ls"}],
+     [lambda m: m.get("t") == "batch" and m.get("ok") == 1 and m.get("n") == 3
+      and m["r"][:2] == [OK, OK] and m["r"][2].get("t") == "pl"],
+     ["B"]),
+    ("envelope batch", {"t": "batch", "ops": [{"text": "C"}, {"text": "D"}]}, [batch_reply([OK, OK])], ["D"]),
+    ("empty batch", {"t": "batch", "ops": []}, [batch_reply([])], []),
+    ("empty array", [], [batch_reply([])], []),
+    ("ops is a number", {"t": "batch", "ops": 5}, [{"t": "batch", "ok": 0, "n": 0, "r": [], "err": "bad_ops"}], []),
+    ("ops is a string", {"t": "batch", "ops": "text"},
+     [{"t": "batch", "ok": 0, "n": 0, "r": [], "err": "bad_ops"}], []),
+    ("ops is an object", {"t": "batch", "ops": {"text": "E"}},
+     [{"t": "batch", "ok": 0, "n": 0, "r": [], "err": "bad_ops"}], []),
+    ("malformed ops in a batch", [{"text": "F"}, 5, "G", None, [1], {"t": "pl", "op": "nope"}],
+     [lambda m: m.get("t") == "batch" and m.get("ok") == 0 and m.get("n") == 6 and m["r"][0] == OK
+      and m["r"][1:5] == [{"ok": 0, "err": "bad_op"}] * 4 and m["r"][5].get("ok") == 0],
+     ["F"]),
+    ("bad field types", {"text": 5, "color": 7}, [{"ok": 0, "err": "text must be a string"}], []),
+    ("bad colour", {"text": "I", "color": 7}, [OK], ["I"]),
+    ("op after an image start", {"t": "batch", "ops": [START, {"text": "H"}]},
+     [batch_reply([{"t": "ack", "id": "d1", "st": "start", "ok": 1, "rx": 0, "len": 8},
+                   {"ok": 0, "err": "after_img"}], ok=0)],
+     ["Receiving..."]),
+    ("image bytes", "\x00" * 8, [{"t": "prog", "id": "d1", "pct": 100, "rx": 8},
+                                 {"t": "ack", "id": "d1", "st": "rendering", "ok": 1}], None),
+    ("still alive", {"t": "bat"}, [bat_reply], []),
+]
+
+
+class CaseCentral(ScriptedCentral):
+    """ScriptedCentral that remembers when each write went out."""
+
+    def __init__(self, steps):
+        super().__init__(steps)
+        self.writes = []
+
+    def _do_write(self, step):
+        self.writes.append(self.sim.clock.now())
+        super()._do_write(step)
+
+
+def matches(expected, msg):
+    return expected(msg) if callable(expected) else expected == msg
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--verbose", action="store_true", help="print every reply and TFT text")
+    args = parser.parse_args()
+
+    steps = [{"at": 1.0, "do": "connect"}, {"after": 1.0, "do": "wait", "seconds": 0}]
+    for _, sent, _, _ in CASES:
+        text = sent if isinstance(sent, str) else json.dumps(sent)
+        steps += [{"after": GAP, "do": "write", "text": text + "\n" if "\x00" not in text else text},
+                  {"do": "wait", "seconds": 0}]
+    # The last image refresh blocks the loop for EINK_REFRESH_WAIT
+    steps.append({"after": 10.0, "do": "end"})
+    central = CaseCentral(steps)
+    report = Simulator(central).run()
+
+    check = Checks()
+    failures = check.failures
+
+    check(report["error"] is None, f"firmware ran without error ({report['error']})")
+    bounds = central.writes + [float("inf")]
+    for i, (name, sent, expected, drawn) in enumerate(CASES):
+        start, end = bounds[i], bounds[i + 1]
+        replies = [msg for t, msg in central.messages if start <= t < end]
+        texts = [text for t, text in report["tft_text"] if start <= t < end]
+        if args.verbose:
+            print(f"      {name}: replies {replies}, tft {texts}")
+        ok = len(replies) == len(expected) and all(matches(e, m) for e, m in zip(expected, replies))
+        check(ok, f"{name}: {len(expected)} expected repl{'y' if len(expected) == 1 else 'ies'} ({replies})")
+        if drawn is not None:
+            check(texts == drawn, f"{name}: TFT draws {drawn} ({texts})")
+    if failures:
+        print(f"{len(failures)} checks failed")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
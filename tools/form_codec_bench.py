@@ -0,0 +1,86 @@
+"""Decode-throughput benchmark for form_codec.url_decode (runs on CPython).
+
+Decodes long form values (about 1 KB and 4 KB of plain text, text with a
+'+' per word, and percent-encoded UTF-8) with the shared decoder and with
+the old per-character decoder from Wifi.py (tools/wifi_legacy.py), and
+reports microseconds per value and MB/s of encoded input. The old decoder's
+output is wrong for the UTF-8 values (see tools/form_codec_conformance.py);
+it is timed anyway as the baseline.
+
+    python3 tools/form_codec_bench.py [--seconds 0.5] [--json]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(TOOLS_DIR, ".."))
+sys.path.insert(0, TOOLS_DIR)
+
+import wifi_legacy  # noqa: E402
+from form_codec import url_decode  # noqa: E402
+
+PATTERNS = {
+    "plain": "TheQuickBrownFoxJumpsOverTheLazyDog.",
+    "plus": "the+quick+brown+fox+jumps+over+",
+    "utf8": "h%C3%A9llo+w%C3%B6rld+%E2%9C%85+",
+}
+SIZES = {"1k": 1024, "4k": 4096}
+
+
+def value(pattern, size):
+    return (pattern * (size // len(pattern) + 1))[:size].rstrip("%0123456789ABCDEF") or pattern
+
+
+def rate(fn, seconds):
+    """Calls per second of fn, best of three windows."""
+    best = 0.0
+    for _ in range(3):
+        count = 0
+        t0 = time.perf_counter()
+        end = t0 + seconds / 3
+        while True:
+            for _ in range(10):
+                fn()
+            count += 10
+            now = time.perf_counter()
+            if now >= end:
+                break
+        best = max(best, count / (now - t0))
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=0.5, help="time per case")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args()
+
+    impls = (("form_codec", url_decode), ("legacy", wifi_legacy.url_decode))
+    results = []
+    for pname, pattern in PATTERNS.items():
+        for sname, size in SIZES.items():
+            text = value(pattern, size)
+            raw = text.encode()
+            for impl, fn in impls:
+                # The shared decoder is handed what the parser hands Wifi.py: bytes
+                arg = raw if impl == "form_codec" else text
+                per_s = rate(lambda fn=fn, arg=arg: fn(arg), args.seconds)
+                results.append({
+                    "value": pname, "size": sname, "impl": impl, "bytes": len(raw),
+                    "us": round(1e6 / per_s, 2), "MBps": round(per_s * len(raw) / 1e6, 2),
+                })
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+    print(f"{'value':<8}{'size':<6}{'impl':<12}{'bytes':>6}{'us/value':>11}{'MB/s':>8}")
+    for r in results:
+        print(f"{r['value']:<8}{r['size']:<6}{r['impl']:<12}{r['bytes']:>6}{r['us']:>11.2f}{r['MBps']:>8.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
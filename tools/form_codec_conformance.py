@@ -0,0 +1,140 @@
+"""Conformance check for form_codec.url_decode against CPython's urllib (runs on CPython).
+
+Decodes hand-picked edge cases (escapes at the very end, truncated and
+invalid escapes, '+', multibyte and invalid UTF-8, str/bytes/memoryview
+input, input longer than the decoder's buffer) and random form values, and
+compares each result with ``urllib.parse.unquote_plus(..., errors="replace")``.
+Invalid UTF-8 is also checked against expected strings written out by hand
+(one U+FFFD per maximal invalid subpart), so the replacement the decoder does
+itself, for CircuitPython, is not only compared with CPython's codec.
+It also lists the inputs the old per-character decoder (tools/wifi_legacy.py)
+got wrong. Exits 1 on the first mismatch.
+
+    python3 tools/form_codec_conformance.py [--random 20000] [--seed 1]
+"""
+
+import argparse
+import os
+import random
+import sys
+from urllib.parse import unquote_plus, unquote_to_bytes
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(TOOLS_DIR, ".."))
+sys.path.insert(0, TOOLS_DIR)
+
+import wifi_legacy  # noqa: E402
+from form_codec import FormDecoder, url_decode  # noqa: E402
+
+EDGE_CASES = [
+    "", "a", "+", "++", "%", "%%", "%4", "%41", "a%41", "%41%", "%41%4", "%%41",
+    "%ZZ", "%4G", "%g4", "%4%41", "100%", "100%25", "a+b", "a%2Bb", "%2b%2B",
+    "Hello+World%21", "%C3%A9", "caf%C3%A9", "%E2%9C%85+done", "%F0%9F%98%80",
+    "%C3", "%C3%28", "%FF%FE", "%E2%9C", "%ED%A0%80", "abc%C3%A9%",
+    "%7E%7e", "%00", "%0D%0A", "line%0Abreak",
+]
+
+R = "\ufffd"
+# Invalid UTF-8 and the text it must decode to, not derived from a codec
+INVALID_UTF8 = [
+    ("%C3", R),
+    ("%C3%28", R + "("),
+    ("a%80b", "a" + R + "b"),
+    ("%FF%FE", R + R),
+    ("%E2%9C", R),  # cut short: one U+FFFD for both bytes
+    ("%E2%9C+x", R + " x"),
+    ("%F0%9F%98", R),
+    ("%F0%9F%98%80%F0%9F", "\U0001f600" + R),
+    ("%C0%AF", R + R),  # overlong '/'
+    ("%E0%80%AF", R + R + R),
+    ("%ED%A0%80", R + R + R),  # surrogate
+    ("%F4%90%80%80", R + R + R + R),  # above U+10FFFF
+    ("%F5%80", R + R),
+    ("caf%C3%A9%FF", "caf\u00e9" + R),
+    ("%E2%9C%85%E2", "\u2705" + R),
+    ("%C3%A9%C3", "\u00e9" + R),
+]
+
+
+def expected(data):
+    if isinstance(data, str):
+        return unquote_plus(data, errors="replace")
+    return unquote_to_bytes(bytes(data).replace(b"+", b" ")).decode("utf-8", "replace")
+
+
+def random_value(rng):
+    pieces = []
+    for _ in range(rng.randrange(0, 24)):
+        kind = rng.randrange(7)
+        if kind == 0:
+            pieces.append("+")
+        elif kind == 1:
+            pieces.append("%%%02X" % rng.randrange(256))
+        elif kind == 2:
+            pieces.append("%%%02x" % rng.randrange(256))
+        elif kind == 3:
+            # Percent-encoded UTF-8 of a random non-ASCII character
+            ch = chr(rng.choice((rng.randrange(0x80, 0x800), rng.randrange(0x800, 0xD800),
+                                 rng.randrange(0x10000, 0x110000))))
+            pieces.append("".join("%%%02X" % b for b in ch.encode("utf-8")))
+        elif kind == 4:
+            pieces.append(rng.choice(("%", "%4", "%G1", "%%")))
+        else:
+            pieces.append("".join(rng.choice("abcXYZ019-_.~=&") for _ in range(rng.randrange(1, 6))))
+    return "".join(pieces)
+
+
+def check(data, label, failures):
+    got = url_decode(data)
+    want = expected(data)
+    if got != want:
+        failures.append((label, data, got, want))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--random", type=int, default=20000, help="random values to check")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    failures = []
+    for case in EDGE_CASES:
+        raw = case.encode()
+        check(case, "str", failures)
+        check(raw, "bytes", failures)
+        check(bytearray(raw), "bytearray", failures)
+        check(memoryview(b"t=" + raw + b"&x=1")[2:2 + len(raw)], "memoryview", failures)
+    for case, want in INVALID_UTF8:
+        for data in (case, case.encode()):
+            got = url_decode(data)
+            if got != want:
+                failures.append(("invalid UTF-8", data, got, want))
+    # A value longer than the shared decoder's buffer, then a short one again
+    long_value = "caf%C3%A9+" * 300 + "%41"
+    check(long_value, "long", failures)
+    check("%41", "after long", failures)
+    small = FormDecoder(4)
+    if small.decode("%E2%9C%85+ok%21") != "✅ ok!":
+        failures.append(("small buffer", "%E2%9C%85+ok%21", small.decode("%E2%9C%85+ok%21"), "✅ ok!"))
+
+    rng = random.Random(args.seed)
+    for _ in range(args.random):
+        check(random_value(rng), "random", failures)
+
+    if failures:
+        for label, data, got, want in failures[:10]:
+            print(f"MISMATCH [{label}] {data!r}: got {got!r}, want {want!r}")
+        print(f"{len(failures)} mismatches")
+        return 1
+
+    legacy_wrong = [case for case in EDGE_CASES if wifi_legacy.url_decode(case) != expected(case)]
+    print(f"ok: {len(EDGE_CASES)} edge cases x 4 input types, {len(INVALID_UTF8)} invalid UTF-8 cases, "
+          f"long input, {args.random} random values")
+    print(f"old Wifi.py decoder differs on {len(legacy_wrong)} edge cases:")
+    for case in legacy_wrong:
+        print(f"  {case!r}: {wifi_legacy.url_decode(case)!r} (want {expected(case)!r})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
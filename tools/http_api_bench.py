@@ -0,0 +1,151 @@
+"""Scene-update benchmark for HTTP_server.py's JSON API (runs on CPython).
+
+A scene is a text, a background colour, a scale and an alignment. The
+benchmark sets a series of scenes on HTTP_server.py's routes, served by the
+adafruit_httpserver stand-in over 127.0.0.1 (tools/http_server_host.py), in
+four ways:
+- form: POST /submit and POST /color, each followed by its redirect to /.
+  The forms cannot set scale or alignment.
+- single: POST /api/text and POST /api/color.
+- patch: one PATCH /api/state.
+- batch: one POST /api/batch.
+Reports requests, bytes both ways, display refreshes and latency per scene.
+
+    python3 tools/http_api_bench.py [--scenes 200] [--json]
+"""
+
+import argparse
+import json
+import os
+import socket
+import sys
+import threading
+import time
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, TOOLS_DIR)
+sys.path.insert(0, os.path.join(TOOLS_DIR, "blesim", "stubs"))
+
+from http_server_host import load_http_server, main_loop_step  # noqa: E402
+
+COLORS = ("#00FF00", "#AA0088", "#000000", "#FFFFFF")
+ALIGNS = ("left", "center", "right")
+
+
+def scene(i):
+    return {"text": "Scene %d: the quick brown fox jumps over the lazy dog" % i,
+            "color": COLORS[i % len(COLORS)], "scale": 1 + i % 3, "align": ALIGNS[i % len(ALIGNS)]}
+
+
+# ---------- client ----------
+class Client:
+    def __init__(self, port):
+        self.port = port
+        self.requests = 0
+        self.sent = 0
+        self.received = 0
+
+    def request(self, method, path, body=b"", content_type=None):
+        head = b"%s %s HTTP/1.1\r\nHost: 192.168.4.1\r\n" % (method, path)
+        if content_type:
+            head += b"Content-Type: %s\r\nContent-Length: %d\r\n" % (content_type, len(body))
+        raw = head + b"\r\n" + body
+        sock = socket.create_connection(("127.0.0.1", self.port))
+        sock.sendall(raw)
+        data = b""
+        while True:
+            chunk = sock.recv(4096)
+            if not chunk:
+                break
+            data += chunk
+        sock.close()
+        self.requests += 1
+        self.sent += len(raw)
+        self.received += len(data)
+        status = int(data[9:12])
+        if status == 302:  # a browser follows the redirect
+            self.request(b"GET", b"/")
+        return status
+
+    def form(self, path, fields):
+        body = "&".join("%s=%s" % (k, v.replace("#", "%23").replace(" ", "+")) for k, v in fields.items())
+        return self.request(b"POST", path, body.encode(), b"application/x-www-form-urlencoded")
+
+    def json(self, method, path, obj):
+        return self.request(method, path, json.dumps(obj).encode(), b"application/json")
+
+
+def set_scene(client, flow, s):
+    if flow == "form":
+        return {client.form(b"/submit", {"t": s["text"]}), client.form(b"/color", {"color": s["color"]})}
+    if flow == "single":
+        return {client.json(b"POST", b"/api/text", {"text": s["text"]}),
+                client.json(b"POST", b"/api/color", {"color": s["color"]})}
+    if flow == "patch":
+        return {client.json(b"PATCH", b"/api/state", s)}
+    return {client.json(b"POST", b"/api/batch", [{"text": s["text"]}, {"color": s["color"]},
+                                                  {"scale": s["scale"]}, {"align": s["align"]}])}
+
+
+def serve(ns, stop):
+    while not stop.is_set():
+        main_loop_step(ns)
+
+
+def run(flow, scenes):
+    ns = load_http_server()
+    server = ns["server"]
+    server.start("127.0.0.1", 0)
+    stop = threading.Event()
+    thread = threading.Thread(target=serve, args=(ns, stop))
+    thread.start()
+    client = Client(server.port)
+    display = ns["display"]
+    latencies = []
+    statuses = set()
+    refreshes0 = display.refreshes
+    try:
+        for i in range(scenes):
+            t0 = time.perf_counter()
+            statuses |= set_scene(client, flow, scene(i))
+            latencies.append(time.perf_counter() - t0)
+    finally:
+        stop.set()
+        thread.join()
+        server.stop()
+    last = scene(scenes - 1)
+    state = ns["state"]()
+    reached = all(state[k] == last[k] for k in (("text", "color") if flow in ("form", "single") else last))
+    latencies.sort()
+    return {
+        "flow": flow, "status": "/".join(map(str, sorted(statuses))), "final_state_ok": reached,
+        "requests": client.requests / scenes,
+        "bytes_up": round(client.sent / scenes), "bytes_down": round(client.received / scenes),
+        "refreshes": (display.refreshes - refreshes0) / scenes,
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 2),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99)] * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenes", type=int, default=200, help="scenes per flow")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args()
+
+    results = [run(flow, args.scenes) for flow in ("form", "single", "patch", "batch")]
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+    print(f"{'flow':<8}{'status':<12}{'req/scene':>10}{'up B':>7}{'down B':>8}{'refreshes':>10}"
+          f"{'p50 ms':>8}{'p99 ms':>8}  state")
+    for r in results:
+        print(f"{r['flow']:<8}{r['status']:<12}{r['requests']:>10.1f}{r['bytes_up']:>7}{r['bytes_down']:>8}"
+              f"{r['refreshes']:>10.1f}{r['p50_ms']:>8.2f}{r['p99_ms']:>8.2f}  "
+              f"{'ok' if r['final_state_ok'] else 'WRONG'}")
+    print("form and single set only text and colour; the forms have no scale or alignment")
+    return 0 if all(r["final_state_ok"] for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,193 @@
+"""Concurrent /events check for HTTP_server.py (runs on CPython).
+
+Runs HTTP_server.py's routes and main loop (requests, then hub.tick())
+through the adafruit_httpserver stand-in on 127.0.0.1. Opens as many event
+streams as the cap allows plus one more, then changes text and colour
+through the JSON endpoints and the old form routes. It checks that:
+- the extra stream gets 503;
+- every stream gets the initial state and then every change, in order;
+- idle streams get keepalive pings;
+- a viewer that disappears is dropped, which frees its slot for a new one.
+It also compares bytes per change with a full page reload. Exits 1 if a
+check fails.
+
+    python3 tools/http_events_check.py [--changes 20] [--ping 0.3]
+"""
+
+import argparse
+import json
+import os
+import socket
+import sys
+import threading
+import time
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(TOOLS_DIR, ".."))
+sys.path.insert(0, TOOLS_DIR)
+sys.path.insert(0, os.path.join(TOOLS_DIR, "blesim", "stubs"))
+
+from blesim.checks import Checks  # noqa: E402
+from event_hub import EventHub  # noqa: E402
+from http_server_host import load_http_server, main_loop_step  # noqa: E402
+
+
+def serve(server, ns, stop):
+    while not stop.is_set():
+        main_loop_step(ns)
+    ns["hub"].close()
+    server.stop()
+
+
+# ---------- clients ----------
+class StreamClient:
+    """Reads one /events stream in a thread, keeping (event, data) pairs."""
+
+    def __init__(self, port):
+        self.sock = socket.create_connection(("127.0.0.1", port))
+        self.sock.sendall(b"GET /events HTTP/1.1\r\nHost: 192.168.4.1\r\nAccept: text/event-stream\r\n\r\n")
+        self.status = None
+        self.events = []
+        self.bytes = 0
+        self.thread = threading.Thread(target=self._read, daemon=True)
+        self.thread.start()
+
+    def _read(self):
+        data = b""
+        try:
+            while True:
+                chunk = self.sock.recv(4096)
+                if not chunk:
+                    break
+                self.bytes += len(chunk)
+                data += chunk
+                if self.status is None and b"\r\n\r\n" in data:
+                    head, data = data.split(b"\r\n\r\n", 1)
+                    self.status = int(head[9:12])
+                while self.status is not None and b"\n\n" in data:
+                    block, data = data.split(b"\n\n", 1)
+                    fields = dict(line.split(": ", 1) for line in block.decode().split("\n") if ": " in line)
+                    self.events.append((fields.get("event"), fields.get("data", "")))
+        except OSError:
+            pass
+
+    def states(self):
+        return [json.loads(data) for event, data in self.events if event == "state"]
+
+    def pings(self):
+        return sum(1 for event, _ in self.events if event == "ping")
+
+    def close(self):
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+
+
+def request(port, raw):
+    sock = socket.create_connection(("127.0.0.1", port))
+    sock.sendall(raw)
+    data = b""
+    while True:
+        chunk = sock.recv(4096)
+        if not chunk:
+            break
+        data += chunk
+    sock.close()
+    return int(data[9:12]), len(data)
+
+
+def post_json(port, path, obj):
+    body = json.dumps(obj).encode()
+    return request(port, b"POST " + path + b" HTTP/1.1\r\nHost: 192.168.4.1\r\n"
+                   b"Content-Type: application/json\r\nContent-Length: %d\r\n\r\n" % len(body) + body)
+
+
+def wait_for(predicate, timeout=3.0):
+    end = time.monotonic() + timeout
+    while time.monotonic() < end:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return predicate()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--changes", type=int, default=20, help="changes pushed through the JSON endpoints")
+    parser.add_argument("--ping", type=float, default=0.3, help="keepalive interval for the check, seconds")
+    args = parser.parse_args()
+
+    ns = load_http_server()
+    server = ns["server"]
+    cap = ns["MAX_EVENT_STREAMS"]
+    ns["hub"] = hub = EventHub(cap, args.ping)
+    server.start("127.0.0.1", 0)
+    port = server.port
+    stop = threading.Event()
+    thread = threading.Thread(target=serve, args=(server, ns, stop))
+    thread.start()
+    check = Checks()
+    failures = check.failures
+
+    try:
+        clients = [StreamClient(port) for _ in range(cap)]
+        check(wait_for(lambda: all(c.states() for c in clients)), f"{cap} streams open and get the initial state")
+        extra = StreamClient(port)
+        check(wait_for(lambda: extra.status is not None) and extra.status == 503, "stream over the cap gets 503")
+        extra.close()
+
+        expected = []
+        statuses = set()
+        for i in range(args.changes):
+            text = "change %d" % i
+            statuses.add(post_json(port, b"/api/text", {"text": text})[0])
+            expected.append(text)
+        check(statuses == {204}, f"{args.changes} x POST /api/text -> 204")
+        status, _ = post_json(port, b"/api/color", {"color": "#AA0088"})
+        check(status == 204, "POST /api/color -> 204")
+        status, _ = post_json(port, b"/api/text", {"txt": "wrong field"})
+        check(status == 400, "POST /api/text without text -> 400")
+        form = b"t=from+form"
+        status, _ = request(port, b"POST /submit HTTP/1.1\r\nHost: 192.168.4.1\r\nContent-Type: "
+                            b"application/x-www-form-urlencoded\r\nContent-Length: %d\r\n\r\n" % len(form) + form)
+        check(status == 302, "form POST /submit still redirects")
+        expected.append("from form")
+
+        def got_all():
+            return all(len(c.states()) >= len(expected) + 2 for c in clients)
+        check(wait_for(got_all), "every stream gets every change")
+        for n, c in enumerate(clients):
+            texts = [s["text"] for s in c.states()[1:]]
+            texts = [t for k, t in enumerate(texts) if k == 0 or t != texts[k - 1]]  # colour repeats the text
+            check(texts == expected, f"stream {n}: changes arrive in order")
+            check(c.states()[-1]["color"] == "#AA0088", f"stream {n}: colour change arrives")
+
+        check(wait_for(lambda: all(c.pings() >= 2 for c in clients), 10 * args.ping),
+              "idle streams get keepalive pings")
+
+        clients[0].close()
+        check(wait_for(lambda: len(hub.streams) == cap - 1, 20 * args.ping), "a closed viewer is dropped on ping")
+        late = StreamClient(port)
+        check(wait_for(lambda: late.states()) and late.states()[-1]["text"] == "from form",
+              "the freed slot takes a new viewer, which gets the current state")
+
+        page_status, page_bytes = request(port, b"GET / HTTP/1.1\r\nHost: 192.168.4.1\r\n\r\n")
+        event_bytes = len(("event: state\ndata: %s\n\n" % ns["state_json"]()).encode())
+        print(f"per change: before, POST + redirect + page = 2 requests, {page_bytes} B page to the "
+              f"submitter only; now 1 request, about {event_bytes} B to each of the open pages")
+        for c in clients[1:] + [late]:
+            c.close()
+    finally:
+        stop.set()
+        thread.join()
+    print(f"hub: {hub.published} published, {hub.pings} pings, {hub.dropped} dropped")
+    if failures:
+        print(f"{len(failures)} checks failed")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
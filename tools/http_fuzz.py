@@ -0,0 +1,322 @@
+"""Fuzz suite for http_parser.RequestParser (runs on CPython).
+
+Generates random well-formed requests (methods, query strings, 0-20 headers,
+Content-Length or chunked bodies with extensions and trailers, form fields
+with look-alike names, pipelined pairs), feeds them in random segment sizes
+and checks every parsed field against what was generated, and that the
+result does not depend on how the bytes were split. Mutated requests (flips,
+insertions, deletions, truncation, oversize heads and bodies) must never
+raise, must leave every offset inside the buffer, may only fail with one of
+the parser's status codes, and must give the same result fed one byte at a
+time, which bypasses the parser's complete-head fast path. Exits 1 and prints a reproducer on the first
+failure.
+
+    python3 tools/http_fuzz.py [--iterations 20000] [--seed 1]
+"""
+
+import argparse
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from http_parser import COMPLETE, ERROR, INCOMPLETE, RequestParser  # noqa: E402
+
+STATUSES = (400, 413, 431, 501, 505)
+METHODS = ("GET", "POST", "PUT", "DELETE", "OPTIONS")
+TOKEN = "abcdefghijklmnopqrstuvwxyz0123456789-"
+VALUE = TOKEN + "ABCXYZ /;=,.%+"
+FIELD_NAMES = ("t", "st", "tt", "color", "hex", "x")
+
+
+class Failure(Exception):
+    pass
+
+
+def word(rng, alphabet, lo, hi):
+    return "".join(rng.choice(alphabet) for _ in range(rng.randint(lo, hi)))
+
+
+def form(rng):
+    """An urlencoded string and the raw value of each field (first wins)."""
+    pairs, fields = [], {}
+    for _ in range(rng.randint(0, 5)):
+        name = rng.choice(FIELD_NAMES)
+        value = word(rng, TOKEN + "%+", 0, 12)
+        pairs.append(name + "=" + value)
+        fields.setdefault(name, value)
+    return "&".join(pairs), fields
+
+
+def chunked(body, rng):
+    out = bytearray()
+    pos = 0
+    while pos < len(body):
+        size = rng.randint(1, max(1, len(body) - pos))
+        ext = ";ext=%d" % size if rng.random() < 0.2 else ""
+        out += b"%x%s\r\n" % (size, ext.encode()) + body[pos:pos + size] + b"\r\n"
+        pos += size
+    out += b"0\r\n"
+    for i in range(rng.randint(0, 2)):
+        out += b"X-Trailer-%d: v\r\n" % i
+    return bytes(out) + b"\r\n"
+
+
+def valid_request(rng):
+    """(bytes, expected) for a random well-formed request."""
+    method = rng.choice(METHODS)
+    path = "/" + word(rng, TOKEN + "/", 0, 20)
+    query, query_fields = form(rng) if rng.random() < 0.5 else ("", {})
+    target = path + ("?" + query if query or rng.random() < 0.2 else "")
+    version = rng.choice(("HTTP/1.1", "HTTP/1.1", "HTTP/1.0"))
+    headers = []
+    for _ in range(rng.randint(0, 12)):
+        name = word(rng, TOKEN, 1, 10)
+        if name.lower() in ("content-length", "transfer-encoding", "connection"):
+            continue
+        headers.append((rng.choice((name, name.upper(), name.title())), word(rng, VALUE, 0, 30).strip()))
+    connection = rng.choice((None, "close", "keep-alive", "Keep-Alive"))
+    if connection:
+        headers.append(("Connection", connection))
+    body_text, body_fields = form(rng) if method in ("POST", "PUT") else ("", {})
+    body = body_text.encode()
+    encoding = rng.choice(("length", "chunked")) if body else rng.choice(("none", "length"))
+    if encoding == "chunked":
+        headers.append(("Transfer-Encoding", rng.choice(("chunked", "Chunked"))))
+        wire_body = chunked(body, rng)
+    else:
+        if encoding == "length":
+            headers.append(("Content-Length", str(len(body))))
+        wire_body = body
+    rng.shuffle(headers)
+    head = "%s %s %s\r\n" % (method, target, version)
+    head += "".join("%s:%s%s\r\n" % (n, rng.choice(("", " ", "  ", "\t")), v) for n, v in headers)
+    raw = head.encode() + b"\r\n" + wire_body
+    if version == "HTTP/1.1":
+        keep_alive = (connection or "").lower() != "close"
+    else:
+        keep_alive = (connection or "").lower() == "keep-alive"
+    expected = {
+        "method": method,
+        "path": path,
+        "query": query.encode() if "?" in target else b"",
+        "body": body,
+        "keep_alive": keep_alive,
+        "headers": {n.lower(): v.encode() for n, v in headers},
+        "query_fields": query_fields,
+        "body_fields": body_fields,
+    }
+    return raw, expected
+
+
+def feed_in_pieces(parser, raw, rng, max_piece):
+    """Feed raw in random pieces, parsing after each. Returns the parse result."""
+    pos = 0
+    result = INCOMPLETE
+    while pos < len(raw):
+        piece = rng.randint(1, max_piece)
+        took = parser.feed(raw[pos:pos + piece])
+        pos += took
+        result = parser.parse()
+        if result != INCOMPLETE or (took == 0 and parser.room() == 0):
+            break
+    return result
+
+
+def check_invariants(parser, complete=True):
+    # An incomplete body may end past what has arrived, never past the buffer
+    n = parser.n if complete else parser.size
+    for name in ("pos", "body_start", "body_end", "method_start", "method_end", "path_end",
+                 "target_end", "query_start", "head_end"):
+        value = getattr(parser, name)
+        if not 0 <= value <= n:
+            raise Failure("%s=%d outside 0..%d" % (name, value, n))
+    if parser.body_end < parser.body_start:
+        raise Failure("body_end before body_start")
+
+
+def check_valid(parser, raw, expected, rng, max_piece):
+    parser.clear()
+    result = feed_in_pieces(parser, raw, rng, max_piece)
+    if result != COMPLETE:
+        raise Failure("valid request not COMPLETE (result %d, error %d)" % (result, parser.error))
+    check_invariants(parser)
+    if parser.method != expected["method"]:
+        raise Failure("method %r" % parser.method)
+    if parser.path != expected["path"]:
+        raise Failure("path %r" % parser.path)
+    if bytes(parser.query) != expected["query"]:
+        raise Failure("query %r" % bytes(parser.query))
+    if bytes(parser.body) != expected["body"]:
+        raise Failure("body %r != %r" % (bytes(parser.body), expected["body"]))
+    if parser.keep_alive != expected["keep_alive"]:
+        raise Failure("keep_alive %r" % parser.keep_alive)
+    for name, value in expected["headers"].items():
+        got = parser.header(name.encode())
+        if got is None:
+            raise Failure("header %r missing" % name)
+    for name in FIELD_NAMES:
+        for fields, query in ((expected["query_fields"], True), (expected["body_fields"], False)):
+            got = parser.form_field(name.encode(), query=query)
+            want = fields.get(name)
+            if (None if got is None else bytes(got).decode()) != want:
+                raise Failure("form_field(%r, query=%r) = %r, expected %r"
+                              % (name, query, None if got is None else bytes(got), want))
+    return (parser.method, parser.path, bytes(parser.query), bytes(parser.body), parser.keep_alive)
+
+
+def mutate(raw, rng):
+    data = bytearray(raw)
+    for _ in range(rng.randint(1, 4)):
+        op = rng.randrange(6)
+        i = rng.randrange(len(data) + 1)
+        if op == 0 and data:
+            data[min(i, len(data) - 1)] = rng.randrange(256)
+        elif op == 1:
+            data[i:i] = bytes(rng.choice((b"\r\n", b" ", b":", b"\r", b"\n", b"0", b"\x00", b"\xff", b"ffffffff")))
+        elif op == 2:
+            del data[i:i + rng.randint(1, 8)]
+        elif op == 3:
+            data = data[:i]
+        elif op == 4:
+            data[i:i] = b"X-Pad: " + b"a" * rng.randint(100, 3000) + b"\r\n"
+        else:
+            data[i:i] = b"Content-Length: %d\r\n" % rng.choice((0, 5, 99999999, 2 ** 40))
+    return bytes(data)
+
+
+def outcome(parser, result):
+    if result != COMPLETE:
+        return result, parser.error
+    # Every accessor must work on whatever was accepted
+    fields = [parser.form_field(name.encode(), query=query) for name in FIELD_NAMES for query in (False, True)]
+    return (result, parser.method, parser.path, parser.version, parser.keep_alive,
+            bytes(parser.query), bytes(parser.body), [None if f is None else bytes(f) for f in fields])
+
+
+def check_mutated(parser, raw, rng, max_piece):
+    parser.clear()
+    result = feed_in_pieces(parser, raw, rng, max_piece)
+    check_invariants(parser, result == COMPLETE)
+    if result == ERROR and parser.error not in STATUSES:
+        raise Failure("unexpected status %r" % parser.error)
+    got = outcome(parser, result)
+    # Fed one byte at a time the request line is parsed before the headers
+    # arrive, so the complete-head fast path never runs; both must agree
+    parser.clear()
+    slow = outcome(parser, feed_in_pieces(parser, raw, rng, 1))
+    if got != slow:
+        raise Failure("%d-byte pieces gave %r, 1-byte pieces %r" % (max_piece, got, slow))
+
+
+def check_pipelined(parser, rng, max_piece):
+    first, exp1 = valid_request(rng)
+    second, exp2 = valid_request(rng)
+    if max(len(first), len(second)) > parser.size:
+        return
+    both = first + second
+    parser.clear()
+    took = parser.feed(both)
+    if parser.parse() != COMPLETE or bytes(parser.body) != exp1["body"]:
+        raise Failure("first of a pipelined pair")
+    parser.next_request()
+    while took < len(both) and parser.parse() == INCOMPLETE:
+        took += parser.feed(both[took:took + max_piece])
+    if parser.parse() != COMPLETE or bytes(parser.body) != exp2["body"] or parser.path != exp2["path"]:
+        raise Failure("second of a pipelined pair")
+
+
+def check_limits(size):
+    parser = RequestParser(size, max_headers=8)
+    cases = (
+        (b"GET / HTTP/1.1\r\nX: " + b"a" * size + b"\r\n\r\n", 431),
+        (b"GET / HTTP/1.1\r\n" + b"".join(b"H%d: v\r\n" % i for i in range(9)) + b"\r\n", 431),
+        (b"POST / HTTP/1.1\r\nContent-Length: %d\r\n\r\n" % size, 413),
+        (b"POST / HTTP/1.1\r\nTransfer-Encoding: gzip\r\n\r\n", 501),
+        (b"GET / HTTP/2.0\r\n\r\n", 505),
+        (b"GET /\r\n\r\n", 400),
+        (b"get / HTTP/1.1\r\n\r\n", 400),
+        (b"POST / HTTP/1.1\r\nContent-Length: -1\r\n\r\n", 400),
+        (b"POST / HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\nzz\r\n", 400),
+        (b"POST / HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n%x\r\n" % size, 413),
+        (b"GET / HTTP/1.1\r\n folded: no\r\n\r\n", 400),
+    )
+    for raw, status in cases:
+        parser.clear()
+        pos = 0
+        result = INCOMPLETE
+        while result == INCOMPLETE and pos < len(raw):
+            took = parser.feed(raw[pos:pos + 97])
+            pos += took
+            result = parser.parse()
+            if took == 0 and result == INCOMPLETE:
+                if parser.room() == 0:
+                    result = ERROR if parser.recv_into(None) is None else result
+                break
+        if result != ERROR or parser.error != status:
+            raise Failure("limit case %r: result %d error %d, expected %d" % (raw[:40], result, parser.error, status))
+
+    # A target that is not UTF-8 keeps its ASCII bytes
+    parser.clear()
+    parser.feed(b"GET /a\xffb\xc3 HTTP/1.1\r\n\r\n")
+    if parser.parse() != COMPLETE or parser.path != "/ab":
+        raise Failure("non-UTF-8 path (error %d)" % parser.error)
+
+    # A chunked body nearly as large as the buffer fits once framing is compacted
+    body = bytes(range(256)) * (size // 256 - 1)
+    raw = b"POST / HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n" + chunked(body, random.Random(size))
+    parser.clear()
+    pos = 0
+    while pos < len(raw):
+        pos += parser.feed(raw[pos:pos + 64])
+        if parser.parse() != INCOMPLETE:
+            break
+    if parser.parse() != COMPLETE or bytes(parser.body) != body:
+        raise Failure("large chunked body (error %d)" % parser.error)
+
+
+def main():
+    parser_ = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser_.add_argument("--iterations", type=int, default=20000)
+    parser_.add_argument("--seed", type=int, default=1)
+    parser_.add_argument("--size", type=int, default=2048, help="parser buffer size")
+    args = parser_.parse_args()
+
+    parser = RequestParser(args.size)
+    counts = {"valid": 0, "mutated": 0, "pipelined": 0}
+    try:
+        check_limits(args.size)
+    except Failure as e:
+        print("FAIL limits:", e)
+        return 1
+    for i in range(args.iterations):
+        rng = random.Random(args.seed * 1000003 + i)
+        raw, expected = valid_request(rng)
+        if len(raw) > args.size:
+            continue
+        kind = rng.randrange(10)
+        try:
+            if kind < 5:
+                whole = check_valid(parser, raw, expected, rng, len(raw))
+                split = check_valid(parser, raw, expected, rng, rng.choice((1, 2, 7, 64)))
+                if whole != split:
+                    raise Failure("split changed the result: %r vs %r" % (whole, split))
+                counts["valid"] += 1
+            elif kind < 9:
+                raw = mutate(raw, rng)
+                check_mutated(parser, raw, rng, rng.choice((1, 13, 512, 4096)))
+                counts["mutated"] += 1
+            else:
+                check_pipelined(parser, rng, 64)
+                counts["pipelined"] += 1
+        except Exception as e:  # noqa: BLE001 - any exception is a finding
+            print("FAIL iteration %d (seed %d): %s: %s" % (i, args.seed, type(e).__name__, e))
+            print("request:", raw)
+            return 1
+    print("ok: %d valid, %d mutated, %d pipelined, limits" % (counts["valid"], counts["mutated"], counts["pipelined"]))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,274 @@
+"""Upload benchmark for HTTP_server.py's POST /api/image (runs on CPython).
+
+Posts 1-bit test images as packed bits, PBM (P4) and BMP to HTTP_server.py's
+route over 127.0.0.1. The route runs through the adafruit_httpserver stand-in,
+with displayio and bitmaptools stand-ins as the framebuffer
+(tools/http_server_host.py). It is served two ways:
+- buffered: the library's own server, which reads the whole body before the
+  handler runs.
+- streamed: HTTP_server.py's UploadServer, which leaves the body on the
+  socket for the handler to read in fixed chunks.
+Every upload is checked pixel by pixel on the stand-in framebuffer after the
+main loop's show_image(). Reports throughput, latency, display refreshes and
+the server's peak allocation per upload (tracemalloc, in a separate pass).
+Then checks that bad uploads are rejected before their pixels are read.
+
+    python3 tools/http_image_bench.py [--uploads 50] [--json]
+"""
+
+import argparse
+import json
+import os
+import random
+import socket
+import struct
+import sys
+import threading
+import time
+import tracemalloc
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, TOOLS_DIR)
+sys.path.insert(0, os.path.join(TOOLS_DIR, "blesim", "stubs"))
+
+import adafruit_httpserver  # noqa: E402
+from http_server_host import load_http_server, main_loop_step  # noqa: E402
+
+FORMATS = ("raw", "pbm", "bmp")
+SIZES = ((240, 135), (237, 130))  # the whole TFT, and rows that are not byte-aligned
+
+
+# ---------- test images ----------
+def test_image(width, height, seed):
+    """Rows of 0/1 pixels (1 = black): a border, a diagonal and some noise."""
+    rnd = random.Random(seed)
+    rows = []
+    for y in range(height):
+        row = []
+        for x in range(width):
+            edge = x in (0, width - 1) or y in (0, height - 1)
+            row.append(1 if edge or x == y or rnd.random() < 0.1 else 0)
+        rows.append(row)
+    return rows
+
+
+def pack(bits):
+    out = bytearray((len(bits) + 7) // 8)
+    for i, bit in enumerate(bits):
+        if bit:
+            out[i >> 3] |= 0x80 >> (i & 7)
+    return bytes(out)
+
+
+def encode(fmt, rows):
+    """(query, body) for one image."""
+    width, height = len(rows[0]), len(rows)
+    if fmt == "raw":
+        return b"?w=%d&h=%d" % (width, height), pack([bit for row in rows for bit in row])
+    if fmt == "pbm":
+        return b"", b"P4\n# bench\n%d %d\n" % (width, height) + b"".join(pack(row) for row in rows)
+    # BMP as most tools write it: bottom-up, palette 0 = black, so a set bit is white
+    stride = (width + 31) // 32 * 4
+    pixels = b"".join(pack([1 - bit for bit in row]).ljust(stride, b"\0") for row in reversed(rows))
+    offset = 14 + 40 + 8
+    header = (b"BM" + struct.pack("<IHHI", offset + len(pixels), 0, 0, offset)
+              + struct.pack("<IiiHHIIiiII", 40, width, height, 1, 1, 0, len(pixels), 2835, 2835, 2, 0)
+              + b"\0\0\0\0\xff\xff\xff\0")
+    return b"", header + pixels
+
+
+def shown_correctly(ns, rows):
+    # What the stand-in TFT shows, compared with the source pixels
+    bitmap, palette, tile = ns["image_bitmap"], ns["image_palette"], ns["image_tile"]
+    if tile.hidden:
+        return False
+    width, height = len(rows[0]), len(rows)
+    x0 = (bitmap.width - width) // 2
+    y0 = (bitmap.height - height) // 2
+    for y in range(bitmap.height):
+        for x in range(bitmap.width):
+            inside = x0 <= x < x0 + width and y0 <= y < y0 + height
+            black = inside and rows[y - y0][x - x0]
+            if palette[bitmap[x, y]] != (0x000000 if black else 0xFFFFFF):
+                return False
+    return True
+
+
+# ---------- client ----------
+def upload(port, query, body, expect=False, length=None):
+    """POST /api/image; returns (status, body bytes actually sent)."""
+    head = (b"POST /api/image" + query + b" HTTP/1.1\r\nHost: 192.168.4.1\r\n"
+            b"Content-Type: application/octet-stream\r\nContent-Length: %d\r\n"
+            % (len(body) if length is None else length))
+    sock = socket.create_connection(("127.0.0.1", port))
+    sent = 0
+    if expect:
+        # Like curl: send the body only after "100 Continue"
+        sock.sendall(head + b"Expect: 100-continue\r\n\r\n")
+        data = sock.recv(4096)
+        if data.startswith(b"HTTP/1.1 100"):
+            sock.sendall(body)
+            sent = len(body)
+            data = data[data.index(b"\r\n\r\n") + 4:]
+    else:
+        sock.sendall(head + b"\r\n")
+        sock.sendall(body)
+        sent = len(body)
+        data = b""
+    while True:
+        chunk = sock.recv(4096)
+        if not chunk:
+            break
+        data += chunk
+    sock.close()
+    return int(data[9:12]), sent
+
+
+# ---------- servers ----------
+def make_server(mode):
+    ns = load_http_server()
+    if mode == "buffered":
+        server = adafruit_httpserver.Server(socket, "/static")
+        server.route("/api/image", adafruit_httpserver.POST)(ns["api_image"])
+        ns["server"] = server
+    return ns
+
+
+def serve(ns, stop):
+    while not stop.is_set():
+        main_loop_step(ns)
+
+
+def throughput(mode, fmt, size, uploads):
+    ns = make_server(mode)
+    server = ns["server"]
+    display = ns["display"]
+    server.start("127.0.0.1", 0)
+    stop = threading.Event()
+    thread = threading.Thread(target=serve, args=(ns, stop))
+    thread.start()
+    latencies = []
+    statuses = set()
+    correct = 0
+    sent = 0
+    refreshes0 = display.refreshes
+    try:
+        for i in range(uploads):
+            rows = test_image(size[0], size[1], i)
+            query, body = encode(fmt, rows)
+            before = display.refreshes
+            t0 = time.perf_counter()
+            status, n = upload(server.port, query, body)
+            latencies.append(time.perf_counter() - t0)
+            statuses.add(status)
+            sent += n
+            # show_image() runs on the loop pass after the response
+            end = time.monotonic() + 2
+            while display.refreshes == before and time.monotonic() < end:
+                time.sleep(0.0005)
+            correct += shown_correctly(ns, rows)
+    finally:
+        stop.set()
+        thread.join()
+        server.stop()
+    total = sum(latencies)
+    latencies.sort()
+    return {
+        "mode": mode, "format": fmt, "size": "%dx%d" % size, "status": "/".join(map(str, sorted(statuses))),
+        "body_B": len(body), "kB_s": round(sent / total / 1000, 1),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 2),
+        "refreshes": (display.refreshes - refreshes0) / uploads, "correct": correct == uploads,
+    }
+
+
+def peak_alloc(mode, fmt, size, uploads):
+    # Server allocation per upload; the client's bodies are built before
+    # tracing and sent without copying them
+    ns = make_server(mode)
+    server = ns["server"]
+    server.start("127.0.0.1", 0)
+    bodies = [encode(fmt, test_image(size[0], size[1], i)) for i in range(uploads)]
+    results = []
+    thread = threading.Thread(target=lambda: results.extend(upload(server.port, q, b) for q, b in bodies))
+    peaks = []
+    tracemalloc.start()
+    thread.start()
+    while thread.is_alive():
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        if server.poll() == adafruit_httpserver.REQUEST_HANDLED_RESPONSE_SENT:
+            peaks.append(tracemalloc.get_traced_memory()[1] - base)
+        else:
+            time.sleep(0)
+    tracemalloc.stop()
+    thread.join()
+    server.stop()
+    peaks.sort()
+    return peaks[len(peaks) // 2]
+
+
+# ---------- rejection ----------
+def rejections():
+    """(what, status, body bytes sent, expected status) for uploads that must fail."""
+    ns = make_server("streamed")
+    server = ns["server"]
+    server.start("127.0.0.1", 0)
+    stop = threading.Event()
+    thread = threading.Thread(target=serve, args=(ns, stop))
+    thread.start()
+    limit = ns["upload"].max_length()
+    big = b"\0" * (limit + 1)
+    wide = encode("pbm", test_image(300, 40, 0))[1]
+    _, good = encode("pbm", test_image(240, 135, 0))
+    out = []
+    try:
+        out.append(("Content-Length over the limit", *upload(server.port, b"", big, expect=True), 413))
+        out.append(("raw bits, wrong length for ?w=&h=", *upload(server.port, b"?w=240&h=135", b"\0" * 100,
+                                                                  expect=True), 400))
+        out.append(("raw bits, larger than the screen", *upload(server.port, b"?w=241&h=135",
+                                                                 b"\0" * 4067, expect=True), 400))
+        out.append(("PBM wider than the screen", *upload(server.port, b"", wide), 400))
+        out.append(("not an image", *upload(server.port, b"", b"GIF89a" + b"\0" * 100), 400))
+        out.append(("body shorter than Content-Length", *upload(server.port, b"", good[:2000],
+                                                                 length=len(good)), 400))
+        out.append(("PBM after the failures", *upload(server.port, b"", good), 202))
+    finally:
+        stop.set()
+        thread.join()
+        server.stop()
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--uploads", type=int, default=50, help="uploads per mode, format and size")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args()
+
+    rows = []
+    for size in SIZES:
+        for fmt in FORMATS:
+            for mode in ("buffered", "streamed"):
+                r = throughput(mode, fmt, size, args.uploads)
+                r["peak_alloc_B"] = peak_alloc(mode, fmt, size, min(args.uploads, 20))
+                rows.append(r)
+    rejected = rejections()
+    ok = all(r["correct"] for r in rows) and all(status == want for _, status, _, want in rejected)
+
+    if args.json:
+        print(json.dumps({"uploads": rows, "rejections": rejected}, indent=2))
+        return 0 if ok else 1
+    print(f"{'mode':<10}{'format':<7}{'size':<9}{'status':<8}{'body B':>7}{'kB/s':>9}{'p50 ms':>8}"
+          f"{'refreshes':>10}{'peak alloc B':>13}  pixels")
+    for r in rows:
+        print(f"{r['mode']:<10}{r['format']:<7}{r['size']:<9}{r['status']:<8}{r['body_B']:>7}{r['kB_s']:>9}"
+              f"{r['p50_ms']:>8.2f}{r['refreshes']:>10.1f}{r['peak_alloc_B']:>13}  "
+              f"{'ok' if r['correct'] else 'WRONG'}")
+    print()
+    for what, status, sent, want in rejected:
+        print(f"{'ok  ' if status == want else 'FAIL'}  {what}: {status}, {sent} body bytes sent")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
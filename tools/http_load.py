@@ -0,0 +1,233 @@
+"""Localhost load test for Wifi.py's HTTP server (runs on CPython).
+
+Serves Wifi.py's own request handler over real 127.0.0.1 sockets, once with
+a copy of the old loop (accept polled every 50 ms, one client at a time, one
+recv, close) and once per http_engine.HTTPEngine configuration (select.poll
+or round-robin scan, keep-alive on or off). Client threads hammer it for a
+fixed time; --slow opens extra connections that send half a request and then
+stall, like a phone that went to sleep. Reports requests/s and latency
+percentiles.
+
+    python3 tools/http_load.py [--clients 8] [--duration 3] [--slow 1] [--json]
+"""
+
+import argparse
+import json
+import os
+import socket
+import sys
+import threading
+import time
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.join(TOOLS_DIR, "..")
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, TOOLS_DIR)
+
+from blesim.extract import load_defs  # noqa: E402
+from form_codec import url_decode  # noqa: E402
+from http_engine import HTTPEngine, ResponseBuffer, http_response  # noqa: E402
+import wifi_legacy  # noqa: E402
+
+REQUESTS = (
+    b"GET / HTTP/1.1\r\nHost: 192.168.4.1\r\nUser-Agent: load\r\nAccept: text/html\r\n\r\n",
+    b"GET /?t=Hello+from+the+load+test HTTP/1.1\r\nHost: 192.168.4.1\r\n\r\n",
+    b"POST / HTTP/1.1\r\nHost: 192.168.4.1\r\nContent-Type: application/x-www-form-urlencoded\r\n"
+    b"Content-Length: 18\r\n\r\nt=Posted%20by+load",
+)
+
+
+class _Viewer:
+    text = "Hello from the load test"
+
+
+def load_wifi():
+    """Wifi.py's request handling, loaded from the script with the TFT left out."""
+    ns = {
+        "set_text": lambda msg: None,
+        "viewer": _Viewer(),
+        "ResponseBuffer": ResponseBuffer,
+        "http_response": http_response,
+        "url_decode": url_decode,
+    }
+    return load_defs(
+        os.path.join(REPO_ROOT, "Wifi.py"),
+        ["SSID", "FORM_HEAD", "FORM_TOP", "FORM_BOTTOM", "HTML_REDIRECT", "PAGE_TEXT_MAX", "page_buffer",
+         "escaped_text", "form_page", "handle_request"],
+        ns,
+    )
+
+
+def listener(backlog):
+    srv = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    srv.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    srv.bind(("127.0.0.1", 0))
+    srv.listen(backlog)
+    return srv
+
+
+# ---------- servers ----------
+def engine_server(engine, stop):
+    while not stop.is_set():
+        engine.poll()
+    engine.close()
+
+
+# ---------- clients ----------
+def read_response(sock):
+    """Read one response; returns (status, connection header) or None on EOF."""
+    data = b""
+    while b"\r\n\r\n" not in data:
+        chunk = sock.recv(4096)
+        if not chunk:
+            return None
+        data += chunk
+    head, body = data.split(b"\r\n\r\n", 1)
+    lines = head.decode("latin-1").split("\r\n")
+    headers = {}
+    for line in lines[1:]:
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip().lower()
+    length = int(headers.get("content-length", "0"))
+    while len(body) < length:
+        chunk = sock.recv(4096)
+        if not chunk:
+            return None
+        body += chunk
+    return int(lines[0].split(" ")[1]), headers.get("connection", "")
+
+
+def client(port, keep_alive, deadline, latencies, errors, index):
+    sock = None
+    i = index
+    while time.perf_counter() < deadline:
+        request = REQUESTS[i % len(REQUESTS)]
+        if not keep_alive:
+            request = request.replace(b"HTTP/1.1\r\n", b"HTTP/1.1\r\nConnection: close\r\n", 1)
+        i += 1
+        t0 = time.perf_counter()
+        try:
+            result = None
+            if sock is not None:
+                # Like a browser: a reused connection the server has dropped
+                # meanwhile (timeout, or its slot went to a new client) is retried
+                try:
+                    sock.sendall(request)
+                    result = read_response(sock)
+                except OSError:
+                    pass
+                if result is None:
+                    sock.close()
+                    sock = None
+            if sock is None:
+                sock = socket.create_connection(("127.0.0.1", port), timeout=10)
+                sock.sendall(request)
+                result = read_response(sock)
+            if result is None or result[0] >= 400:
+                raise OSError("bad response %r" % (result,))
+            latencies.append(time.perf_counter() - t0)
+            if result[1] != "keep-alive":
+                sock.close()
+                sock = None
+        except OSError:
+            errors.append(1)
+            if sock is not None:
+                sock.close()
+                sock = None
+    if sock is not None:
+        sock.close()
+
+
+def stalled_clients(port, count):
+    """Connections that send half a request and then go quiet."""
+    socks = []
+    for _ in range(count):
+        s = socket.create_connection(("127.0.0.1", port), timeout=10)
+        s.sendall(b"GET / HTTP/1.1\r\nHost: 192.")
+        socks.append(s)
+    return socks
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p))]
+
+
+def run(name, port, clients, duration, keep_alive, slow):
+    stalled = stalled_clients(port, slow)
+    latencies, errors = [], []
+    deadline = time.perf_counter() + duration
+    threads = [
+        threading.Thread(target=client, args=(port, keep_alive, deadline, latencies, errors, i))
+        for i in range(clients)
+    ]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    for s in stalled:
+        s.close()
+    latencies.sort()
+    ms = lambda v: None if v is None else round(v * 1000, 2)  # noqa: E731
+    return {
+        "server": name,
+        "requests": len(latencies),
+        "errors": len(errors),
+        "req_per_s": round(len(latencies) / elapsed, 1),
+        "p50_ms": ms(percentile(latencies, 0.50)),
+        "p99_ms": ms(percentile(latencies, 0.99)),
+        "max_ms": ms(latencies[-1] if latencies else None),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=8, help="concurrent client threads")
+    parser.add_argument("--duration", type=float, default=3.0, help="seconds per server")
+    parser.add_argument("--slow", type=int, default=1, help="stalled connections held open during the run")
+    parser.add_argument("--max-conns", type=int, default=4, help="HTTPEngine connection cap")
+    parser.add_argument("--timeout", type=float, default=5.0, help="HTTPEngine client timeout")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args()
+
+    handler = load_wifi()["handle_request"]
+    configs = [("legacy", None, False)]
+    for use_select in (True, False):
+        for keep_alive in (False, True):
+            mode = "poll" if use_select else "scan"
+            configs.append(("engine-%s%s" % (mode, "+ka" if keep_alive else ""), use_select, keep_alive))
+
+    results = []
+    for name, use_select, keep_alive in configs:
+        stop = threading.Event()
+        srv = listener(args.max_conns if use_select is not None else 1)
+        if use_select is None:
+            server = threading.Thread(target=wifi_legacy.serve, args=(srv, stop))
+        else:
+            engine = HTTPEngine(srv, handler, max_conns=args.max_conns, timeout=args.timeout,
+                                keep_alive=keep_alive, use_select=use_select)
+            server = threading.Thread(target=engine_server, args=(engine, stop))
+        server.start()
+        try:
+            result = run(name, srv.getsockname()[1], args.clients, args.duration, keep_alive, args.slow)
+        finally:
+            stop.set()
+            server.join()
+            srv.close()
+        if use_select is not None:
+            result.update(accepted=engine.accepted, timeouts=engine.timeouts, evicted=engine.evicted)
+        results.append(result)
+        if not args.json:
+            print(f"{name:<16}{result['req_per_s']:>9.1f} req/s  p50 {result['p50_ms']} ms  "
+                  f"p99 {result['p99_ms']} ms  max {result['max_ms']} ms  "
+                  f"({result['requests']} ok, {result['errors']} errors)")
+    if args.json:
+        print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
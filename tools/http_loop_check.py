@@ -0,0 +1,230 @@
+"""Main-loop cadence check for HTTP_server.py under a request flood (runs on CPython).
+
+Runs HTTP_server.py's routes and Scheduler (tools/http_server_host.py) on a
+fake socket pool whose listener always has another client waiting. Time is
+simulated: each request costs --cost-ms and sleeping only moves the clock, so
+the run is fast and the same every time. Next to the server's own tasks, a
+30 Hz display task and a 10 Hz sensor task are added. Three loops are
+compared:
+- drain: poll until no request is waiting, then the tasks. Under a flood that
+  never happens, as with serve_forever().
+- per_request: one poll, then the due tasks (the loop before the scheduler,
+  which ran its tasks on every pass and never slept).
+- scheduler: HTTP_server.py's loop.tick(serve_http).
+The check passes if, under the scheduler, both added tasks keep their rate
+and are never more than one request late beyond the budget, and the HTTP
+time per tick stays within the budget plus one request. It also checks that
+an idle loop sleeps instead of spinning. Exits 1 if a check fails.
+
+    python3 tools/http_loop_check.py [--seconds 20] [--cost-ms 8]
+"""
+
+import argparse
+import json
+import os
+import sys
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(TOOLS_DIR, ".."))
+sys.path.insert(0, TOOLS_DIR)
+sys.path.insert(0, os.path.join(TOOLS_DIR, "blesim", "stubs"))
+
+from blesim.checks import Checks  # noqa: E402
+from http_server_host import load_http_server  # noqa: E402
+
+EAGAIN = 11
+PERIODIC = (("display", 1 / 30), ("sensor", 1 / 10))
+REQUESTS = (
+    b"GET / HTTP/1.1\r\nHost: 192.168.4.1\r\n\r\n",
+    b"GET /api/state HTTP/1.1\r\nHost: 192.168.4.1\r\n\r\n",
+    b"POST /api/text HTTP/1.1\r\nHost: 192.168.4.1\r\nContent-Type: application/json\r\n"
+    b"Content-Length: 17\r\n\r\n{\"text\": \"flood\"}",
+)
+
+
+class Clock:
+    """Simulated time.monotonic() and time.sleep()."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+# ---------- fake socket pool ----------
+class FakeConnection:
+    """One client: hands out its request, keeps the response. Reading the
+    request costs ``cost`` seconds of simulated time."""
+
+    def __init__(self, request, clock, cost):
+        self._data = request
+        self._clock = clock
+        self._cost = cost
+        self.sent = 0
+
+    def settimeout(self, timeout):
+        pass
+
+    def recv_into(self, buffer, nbytes=0):
+        if self._cost:
+            self._clock.sleep(self._cost)
+            self._cost = 0
+        n = min(nbytes or len(buffer), len(buffer), len(self._data))
+        buffer[:n] = self._data[:n]
+        self._data = self._data[n:]
+        return n
+
+    def send(self, data):
+        self.sent += len(data)
+        return len(data)
+
+    def sendall(self, data):
+        self.sent += len(data)
+
+    def close(self):
+        pass
+
+
+class FakeListener:
+    def __init__(self, pool):
+        self._pool = pool
+
+    def setsockopt(self, *args):
+        pass
+
+    def bind(self, address):
+        self._address = address
+
+    def listen(self, backlog):
+        pass
+
+    def setblocking(self, flag):
+        pass
+
+    def getsockname(self):
+        return self._address
+
+    def accept(self):
+        pool = self._pool
+        if not pool.flood:
+            raise OSError(EAGAIN)
+        request = REQUESTS[pool.accepted % len(REQUESTS)]
+        pool.accepted += 1
+        return FakeConnection(request, pool.clock, pool.cost), ("192.168.4.2", 50000 + pool.accepted % 1000)
+
+    def close(self):
+        pass
+
+
+class FakePool:
+    """socketpool.SocketPool stand-in: one listening socket that always has a
+    client waiting while ``flood`` is set."""
+
+    AF_INET = 2
+    SOCK_STREAM = 1
+    SOL_SOCKET = 0xFFF
+    SO_REUSEADDR = 4
+
+    def __init__(self, clock, cost):
+        self.clock = clock
+        self.cost = cost
+        self.flood = True
+        self.accepted = 0
+
+    def socket(self, family, kind):
+        return FakeListener(self)
+
+
+# ---------- loops ----------
+def setup(cost):
+    clock = Clock()
+    pool = FakePool(clock, cost)
+    ns = load_http_server(pool=pool)
+    ns["time"] = clock  # publish_state() reads the simulated clock too
+    loop = ns["loop"]
+    loop.clock = clock.monotonic
+    loop.sleep = clock.sleep
+    added = [loop.every(name, period, lambda now: None) for name, period in PERIODIC]
+    ns["server"].start("192.168.4.1", 80)
+    return clock, pool, ns, loop, added
+
+
+def run(kind, seconds, cost):
+    clock, pool, ns, loop, added = setup(cost)
+    serve = ns["serve_http"]
+    while clock.now < seconds:
+        if kind == "scheduler":
+            loop.tick(serve)
+            continue
+        if kind == "drain":
+            while clock.now < seconds and serve():
+                pass
+        else:
+            serve()
+        # The tasks by hand, with the same bookkeeping as Scheduler.tick()
+        now = clock.now
+        for task in loop.tasks:
+            if now >= task.due:
+                if task.runs and now - task.due > task.late_max:
+                    task.late_max = now - task.due
+                task.func(now)
+                task.runs += 1
+                task.due = max(task.due + task.period, now)
+    return pool, loop, added
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=20.0, help="simulated seconds per loop")
+    parser.add_argument("--cost-ms", type=float, default=8.0, help="simulated time to handle one request")
+    parser.add_argument("--json", action="store_true", help="print the scheduler's report as JSON")
+    args = parser.parse_args()
+    cost = args.cost_ms / 1000
+    check = Checks()
+    failures = check.failures
+
+    print(f"{'loop':<13}{'req/s':>8}" + "".join(f"{name + ' runs/s':>17}{'late max ms':>13}"
+                                                 for name, _ in PERIODIC))
+    results = {}
+    for kind in ("drain", "per_request", "scheduler"):
+        pool, loop, added = run(kind, args.seconds, cost)
+        results[kind] = (pool, loop, added)
+        print(f"{kind:<13}{pool.accepted / args.seconds:>8.1f}" + "".join(
+            f"{t.runs / args.seconds:>17.1f}{t.late_max * 1000:>13.1f}" for t in added))
+
+    pool, loop, added = results["scheduler"]
+    budget = loop.budget
+    for task, (name, period) in zip(added, PERIODIC):
+        check(task.runs >= 0.95 * args.seconds / period,
+              f"{name} keeps its rate under the flood ({task.runs / args.seconds:.1f}/s of {1 / period:.0f}/s)")
+        check(task.late_max <= budget + cost + 1e-9,
+              f"{name} is never later than the budget plus one request ({task.late_max * 1000:.1f} ms)")
+    check(loop.http_max <= budget + cost + 1e-9,
+          f"HTTP time per tick stays within the budget plus one request ({loop.http_max * 1000:.1f} ms)")
+    check(results["drain"][2][0].runs <= 1, "a drain loop (serve_forever) starves the tasks")
+    check(pool.accepted >= 0.9 * results["per_request"][0].accepted,
+          "the scheduler serves as many requests as one poll per pass")
+
+    # Idle: no clients, so the loop should sleep between task deadlines
+    clock, pool, ns, loop, added = setup(cost)
+    pool.flood = False
+    while clock.now < args.seconds:
+        loop.tick(ns["serve_http"])
+    wakeups = loop.ticks / args.seconds
+    limit = 1 / loop.idle_sleep + sum(1 / period for _, period in PERIODIC)
+    check(wakeups <= limit + 1, f"idle loop sleeps: {wakeups:.0f} wakeups/s, at most 1/IDLE_SLEEP "
+                                f"plus the task rates ({limit:.0f}/s)")
+    if args.json:
+        print(json.dumps(results["scheduler"][1].report(), indent=2))
+    if failures:
+        print(f"{len(failures)} checks failed")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+"""Page-load benchmark for HTTP_server.py's status page (runs on CPython).
+
+Serves HTTP_server.py's own routes through the adafruit_httpserver stand-in
+(tools/blesim/stubs) over real 127.0.0.1 sockets, once with the original
+page path (tools/http_server_legacy.py: whole document concatenated per GET)
+and once with the current one (static template bytes, page cached per text
+version, ETag/304). A client thread plays three kinds of page load: a first
+load, a reload that sends If-None-Match, and a form POST followed by its
+redirect. Reports response bytes, server CPU time and the part of it spent
+in the route handlers (building the page) per page load. Exits 1 if a page
+load gets a 5xx status.
+
+    python3 tools/http_page_bench.py [--loads 300] [--json]
+"""
+
+import argparse
+import json
+import os
+import socket
+import sys
+import threading
+import time
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(TOOLS_DIR, ".."))
+sys.path.insert(0, TOOLS_DIR)
+sys.path.insert(0, os.path.join(TOOLS_DIR, "blesim", "stubs"))
+
+import adafruit_httpserver  # noqa: E402
+from http_server_host import load_http_server  # noqa: E402
+import http_server_legacy  # noqa: E402
+
+KINDS = ("load", "reload", "post_redirect")
+
+
+def make_servers():
+    ns = load_http_server()
+    current = ns["server"]
+    ns["set_text"]("Hello from the page benchmark")
+    legacy = adafruit_httpserver.Server(socket, "/static")
+    # The old page read text_label.text; the viewer has the same property
+    legacy.route("/")(lambda request: http_server_legacy.index(request, ns["viewer"]))
+    legacy.route("/submit", adafruit_httpserver.POST)(ns["submit"])
+    return {"legacy": legacy, "current": current}
+
+
+# ---------- client ----------
+def fetch(port, raw):
+    sock = socket.create_connection(("127.0.0.1", port))
+    sock.sendall(raw)
+    data = b""
+    while True:
+        chunk = sock.recv(4096)
+        if not chunk:
+            break
+        data += chunk
+    sock.close()
+    etag = None
+    for line in data.split(b"\r\n\r\n", 1)[0].split(b"\r\n"):
+        if line.lower().startswith(b"etag:"):
+            etag = line[5:].strip()
+    return data, etag
+
+
+def get(etag):
+    validator = b"If-None-Match: " + etag + b"\r\n" if etag else b""
+    return b"GET / HTTP/1.1\r\nHost: 192.168.4.1\r\n" + validator + b"\r\n"
+
+
+def post(i):
+    body = b"t=Hello+from+the+page+benchmark%%2C+post+%d" % i
+    return (b"POST /submit HTTP/1.1\r\nHost: 192.168.4.1\r\n"
+            b"Content-Type: application/x-www-form-urlencoded\r\n"
+            b"Content-Length: %d\r\n\r\n" % len(body) + body)
+
+
+def client(port, loads, statuses):
+    etag = None
+    for kind in KINDS:
+        for i in range(loads):
+            if kind == "post_redirect":
+                data, _ = fetch(port, post(i))
+                statuses.add((kind, data[9:12]))
+            data, new_etag = fetch(port, get(etag if kind != "load" else None))
+            statuses.add((kind, data[9:12]))
+            etag = new_etag or etag
+
+
+def run(name, server, loads):
+    server.start("127.0.0.1", 0)
+    statuses = set()
+    thread = threading.Thread(target=client, args=(server.port, loads, statuses))
+    thread.start()
+    result = {"path": name}
+    for kind in KINDS:
+        per_load = 2 if kind == "post_redirect" else 1
+        sent0, handler0 = server.bytes_sent, server.handler_cpu
+        cpu = 0.0
+        handled = 0
+        while handled < loads * per_load:
+            t0 = time.thread_time()
+            if server.poll() == adafruit_httpserver.REQUEST_HANDLED_RESPONSE_SENT:
+                cpu += time.thread_time() - t0
+                handled += 1
+        result[kind + "_bytes"] = round((server.bytes_sent - sent0) / loads)
+        result[kind + "_cpu_us"] = round(cpu / loads * 1e6, 1)
+        result[kind + "_handler_us"] = round((server.handler_cpu - handler0) / loads * 1e6, 1)
+    thread.join()
+    for kind in KINDS:
+        result[kind + "_status"] = "/".join(sorted(s.decode() for k, s in statuses if k == kind))
+    server.stop()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--loads", type=int, default=300, help="page loads per kind")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args()
+
+    results = [run(name, server, args.loads) for name, server in make_servers().items()]
+    failed = [f"{r['path']} {kind}" for r in results for kind in KINDS
+              if any(code.startswith("5") for code in r[kind + "_status"].split("/"))]
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 1 if failed else 0
+    print(f"{'path':<10}{'page load':<15}{'status':<10}{'bytes':>8}{'cpu us':>10}{'handler us':>12}")
+    for r in results:
+        for kind in KINDS:
+            print(f"{r['path']:<10}{kind:<15}{r[kind + '_status']:<10}{r[kind + '_bytes']:>8}{r[kind + '_cpu_us']:>10.1f}"
+                  f"{r[kind + '_handler_us']:>12.1f}")
+    print("post_redirect counts the POST and the GET that follows its redirect")
+    if failed:
+        print(f"server errors on: {', '.join(failed)}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
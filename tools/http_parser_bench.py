@@ -0,0 +1,152 @@
+"""Parse-throughput benchmark for http_parser.RequestParser (runs on CPython).
+
+Parses typical requests (short GET, a phone browser's GET with its usual
+headers, a 1 KB form POST, the same POST chunked) delivered whole, in
+1460-byte TCP segments and in 64-byte pieces, and reports microseconds per
+request and MB/s. For comparison it runs the ad-hoc parsing the Wi-Fi scripts
+used before: Wifi.py's split-based method/path/``t=`` extraction on the whole
+request, and WifiMonitor.py's ``req += data`` header-end search for pieces.
+
+    python3 tools/http_parser_bench.py [--seconds 0.5] [--json]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from http_parser import COMPLETE, RequestParser  # noqa: E402
+
+FORM_1K = ("t=" + "Hello+from+the+phone%21+" * 40 + "&color=%2300FF00&hex=").encode()
+
+
+def _chunk(body, size):
+    out = b""
+    for i in range(0, len(body), size):
+        piece = body[i:i + size]
+        out += b"%x\r\n" % len(piece) + piece + b"\r\n"
+    return out + b"0\r\n\r\n"
+
+
+REQUESTS = {
+    "get_short": b"GET /?t=Hi HTTP/1.1\r\nHost: 192.168.4.1\r\n\r\n",
+    "get_browser": (
+        b"GET / HTTP/1.1\r\nHost: 192.168.4.1\r\nConnection: keep-alive\r\n"
+        b"Upgrade-Insecure-Requests: 1\r\n"
+        b"User-Agent: Mozilla/5.0 (iPhone; CPU iPhone OS 17_4 like Mac OS X) AppleWebKit/605.1.15 "
+        b"(KHTML, like Gecko) Version/17.4 Mobile/15E148 Safari/604.1\r\n"
+        b"Accept: text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8\r\n"
+        b"Accept-Language: en-US,en;q=0.9\r\nAccept-Encoding: gzip, deflate\r\n\r\n"
+    ),
+    "post_form_1k": (
+        b"POST / HTTP/1.1\r\nHost: 192.168.4.1\r\nContent-Type: application/x-www-form-urlencoded\r\n"
+        b"Origin: http://192.168.4.1\r\nReferer: http://192.168.4.1/\r\n"
+        b"Content-Length: %d\r\n\r\n" % len(FORM_1K) + FORM_1K
+    ),
+    "post_chunked_1k": (
+        b"POST / HTTP/1.1\r\nHost: 192.168.4.1\r\nContent-Type: application/x-www-form-urlencoded\r\n"
+        b"Transfer-Encoding: chunked\r\n\r\n" + _chunk(FORM_1K, 256)
+    ),
+}
+SEGMENTS = {"whole": None, "mss_1460": 1460, "pieces_64": 64}
+
+
+def pieces(raw, size):
+    if size is None:
+        return [raw]
+    return [raw[i:i + size] for i in range(0, len(raw), size)]
+
+
+def parse_new(parser, segs):
+    parser.clear()
+    for seg in segs:
+        parser.feed(seg)
+        if parser.parse() == COMPLETE:
+            break
+    method = parser.method
+    field = parser.form_field(b"t", query=(method == "GET"))
+    return method, parser.path, field
+
+
+def parse_legacy(segs):
+    # WifiMonitor.py: accumulate until the end of the headers
+    req = b""
+    for seg in segs:
+        req += seg
+        if b"\r\n\r\n" in req:
+            break
+    # Wifi.py: request line and t= by splitting
+    head = req.split(b"\r\n", 1)[0].decode("utf-8", "ignore")
+    parts = head.split(" ")
+    method = parts[0] if parts else "GET"
+    path = parts[1] if len(parts) > 1 else "/"
+    t = None
+    if method == "POST":
+        header, body = req.split(b"\r\n\r\n", 1)
+        if b"t=" in body:
+            t = body.split(b"t=", 1)[1]
+            amp = t.find(b"&")
+            if amp != -1:
+                t = t[:amp]
+    elif "?" in path and "t=" in path:
+        for kv in path.split("?", 1)[1].split("&"):
+            if kv.startswith("t="):
+                t = kv[2:]
+                break
+    return method, path, t
+
+
+def rate(fn, seconds):
+    """Calls per second of fn, best of three windows."""
+    best = 0.0
+    for _ in range(3):
+        count = 0
+        t0 = time.perf_counter()
+        end = t0 + seconds / 3
+        while True:
+            for _ in range(50):
+                fn()
+            count += 50
+            now = time.perf_counter()
+            if now >= end:
+                break
+        best = max(best, count / (now - t0))
+    return best
+
+
+def main():
+    parser_ = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser_.add_argument("--seconds", type=float, default=0.5, help="time per case")
+    parser_.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser_.parse_args()
+
+    parser = RequestParser(4096)
+    results = []
+    for name, raw in REQUESTS.items():
+        for seg_name, size in SEGMENTS.items():
+            segs = pieces(raw, size)
+            cases = [("parser", lambda segs=segs: parse_new(parser, segs))]
+            if not name.startswith("post_chunked"):
+                # The old code never read past one segment; only "whole" is comparable
+                cases.append(("legacy", lambda segs=segs: parse_legacy(segs)))
+            for impl, fn in cases:
+                per_s = rate(fn, args.seconds)
+                results.append({
+                    "request": name, "delivery": seg_name, "impl": impl, "bytes": len(raw),
+                    "us": round(1e6 / per_s, 2), "MBps": round(per_s * len(raw) / 1e6, 2),
+                })
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+    print(f"{'request':<18}{'delivery':<11}{'impl':<8}{'bytes':>6}{'us/req':>10}{'MB/s':>8}")
+    for r in results:
+        print(f"{r['request']:<18}{r['delivery']:<11}{r['impl']:<8}{r['bytes']:>6}{r['us']:>10.2f}{r['MBps']:>8.2f}")
+    print("legacy reads only the first segment on the device, so its POST results past 'whole' are not comparable")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,214 @@
+"""Per-request CPU and allocation benchmark for Wifi.py's responses (runs on CPython).
+
+Compares the original response path (tools/wifi_legacy.py: response string
+patched by add_content_length, encoded per request, sent with
+``resp_bytes[sent:]``) with the current one (responses prebuilt as bytes, the
+form page rendered into a ResponseBuffer, sent through a memoryview). Each
+request goes over a real localhost TCP connection; a client thread sends the
+requests and drains the responses. Only the server side is measured: thread
+CPU time, peak bytes allocated (tracemalloc) and bytes copied by send-loop
+slicing. --sndbuf shrinks the server's send buffer; on Linux loopback the
+kernel minimum still takes these pages in one send, on the ESP32 they may not.
+
+Before timing, it checks that form pages showing text longer than
+PAGE_TEXT_MAX are cut without splitting a UTF-8 character or an HTML entity.
+Exits 1 if a check fails.
+
+    python3 tools/http_response_bench.py [--requests 2000] [--sndbuf 1024] [--json]
+"""
+
+import argparse
+import json
+import os
+import select
+import socket
+import sys
+import threading
+import time
+import tracemalloc
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(TOOLS_DIR, ".."))
+sys.path.insert(0, TOOLS_DIR)
+
+import wifi_legacy  # noqa: E402
+from blesim.checks import Checks  # noqa: E402
+from http_parser import RequestParser  # noqa: E402
+from http_load import REQUESTS, load_wifi, read_response  # noqa: E402
+
+
+class SendCounter:
+    """Counts partial sends and the bytes the send loop copied to make them."""
+
+    def __init__(self):
+        self.calls = 0
+        self.copied = 0
+
+    def send(self, sock, data, copied):
+        while True:
+            try:
+                n = sock.send(data)
+                break
+            except BlockingIOError:
+                select.select([], [sock], [])
+        self.calls += 1
+        if copied:
+            self.copied += len(data)
+        return n
+
+
+def legacy_send(sock, req, counter):
+    resp_bytes = wifi_legacy.add_content_length(wifi_legacy.handle_request(req)).encode("utf-8")
+    sent = 0
+    while sent < len(resp_bytes):
+        sent += counter.send(sock, resp_bytes[sent:], sent > 0)
+
+
+def make_current_send(handle_request):
+    parser = RequestParser(4096)
+
+    def current_send(sock, req, counter):
+        # What the engine does once recv_into has filled the parser
+        parser.clear()
+        parser.feed(req)
+        parser.parse()
+        tx = memoryview(handle_request(parser, False))
+        sent = 0
+        while sent < len(tx):
+            sent += counter.send(sock, tx[sent:], False)
+    return current_send
+
+
+def connected_pair(sndbuf):
+    srv = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    srv.bind(("127.0.0.1", 0))
+    srv.listen(1)
+    client = socket.create_connection(srv.getsockname())
+    server, _ = srv.accept()
+    srv.close()
+    if sndbuf:
+        server.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, sndbuf)
+    server.setblocking(False)
+    return server, client
+
+
+def drain(client, requests, count):
+    for i in range(count):
+        client.sendall(requests[i % len(requests)])
+        read_response(client)
+
+
+def recv_request(sock, length):
+    data = b""
+    while len(data) < length:
+        try:
+            data += sock.recv(length - len(data))
+        except BlockingIOError:
+            select.select([sock], [], [])
+    return data
+
+
+KINDS = ("form", "get_text", "post_text")  # REQUESTS, in order
+
+# Texts whose escaped form runs past PAGE_TEXT_MAX with the cut landing
+# inside a multi-byte character or an entity
+LONG_TEXTS = {
+    "2-byte": "é" * 700,
+    "3-byte": "a" + "✅" * 400,
+    "4-byte": "ab" + "🎉" * 300,
+    "entities": "<b>&" * 300,
+    "entity at the cut": "x" * 1022 + "&y",
+    "mixed": "é<✅>&" * 200,
+}
+
+
+def check_truncation(wifi):
+    """Names of LONG_TEXTS whose form page splits a character or an entity."""
+    bad = []
+    top, bottom = wifi["FORM_TOP"], wifi["FORM_BOTTOM"]
+    for name, text in LONG_TEXTS.items():
+        wifi["viewer"].text = text
+        page = bytes(wifi["form_page"](False))
+        shown = page[page.index(top) + len(top):page.rindex(bottom)]
+        escaped = text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").encode("utf-8")
+        try:
+            shown.decode("utf-8")
+            ok = len(shown) <= wifi["PAGE_TEXT_MAX"] and escaped.startswith(shown)
+            amp = shown.rfind(b"&")
+            ok = ok and (amp < 0 or b";" in shown[amp:])
+            ok = ok and len(shown) > wifi["PAGE_TEXT_MAX"] - 8  # cut no further back than needed
+        except UnicodeDecodeError:
+            ok = False
+        if not ok:
+            bad.append(name)
+    return bad
+
+
+def run(name, send, count, sndbuf, trace):
+    server, client = connected_pair(sndbuf)
+    counter = SendCounter()
+    drainer = threading.Thread(target=drain, args=(client, REQUESTS, count))
+    drainer.start()
+    cpu = [0.0] * len(REQUESTS)
+    peaks = [[] for _ in REQUESTS]
+    if trace:
+        tracemalloc.start()
+    for i in range(count):
+        kind = i % len(REQUESTS)
+        req = recv_request(server, len(REQUESTS[kind]))
+        if trace:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+        t0 = time.thread_time()
+        send(server, req, counter)
+        cpu[kind] += time.thread_time() - t0
+        if trace:
+            peaks[kind].append(tracemalloc.get_traced_memory()[1] - base)
+    if trace:
+        tracemalloc.stop()
+    drainer.join()
+    server.close()
+    client.close()
+    per_kind = count / len(REQUESTS)
+    result = {"path": name, "requests": count, "send_calls": round(counter.calls / count, 2),
+              "copied_B": round(counter.copied / count, 1)}
+    for kind, kname in enumerate(KINDS):
+        result[kname + "_cpu_us"] = round(cpu[kind] / per_kind * 1e6, 2)
+        if trace:
+            values = sorted(peaks[kind])
+            result[kname + "_peak_alloc_B"] = values[len(values) // 2]
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000, help="requests per path")
+    parser.add_argument("--sndbuf", type=int, default=0, help="server SO_SNDBUF in bytes (0 = OS default)")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args()
+
+    wifi = load_wifi()
+    bad = check_truncation(wifi)
+    Checks(quiet=args.json)(not bad, f"long text cut on a character/entity boundary {bad}")
+    wifi["viewer"].text = "Hello from the load test"
+    paths = (("legacy", legacy_send), ("current", make_current_send(wifi["handle_request"])))
+    results = []
+    for name, send in paths:
+        # CPU is timed without tracemalloc, which slows allocation down a lot
+        result = run(name, send, args.requests, args.sndbuf, trace=False)
+        traced = run(name, send, max(300, args.requests // 10), args.sndbuf, trace=True)
+        result.update((k, v) for k, v in traced.items() if k.endswith("_peak_alloc_B"))
+        results.append(result)
+    if args.json:
+        print(json.dumps({"results": results, "bad_truncation": bad}, indent=2))
+        return 1 if bad else 0
+    print(f"{'path':<10}{'request':<12}{'cpu us':>10}{'peak alloc B':>14}")
+    for r in results:
+        for kname in KINDS:
+            print(f"{r['path']:<10}{kname:<12}{r[kname + '_cpu_us']:>10.2f}{r[kname + '_peak_alloc_B']:>14}")
+        print(f"{r['path']:<10}{'(all)':<12} {r['send_calls']:.2f} sends/req, {r['copied_B']:.1f} B/req copied by slicing")
+    return 1 if bad else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,159 @@
+# Runs HTTP_server.py's routes on CPython: loads its state and route
+# functions with blesim.extract, registers them on an adafruit_httpserver
+# stand-in (blesim/stubs) through HTTP_server.py's own UploadServer, and gives
+# them a display, row labels, palettes and bitmap that count display
+# refreshes. Used by the HTTP_server benchmarks and checks.
+
+import json
+import os
+import socket
+import sys
+import time
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.join(TOOLS_DIR, "..")
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.join(TOOLS_DIR, "blesim", "stubs"))
+
+import adafruit_httpserver  # noqa: E402
+import bitmaptools  # noqa: E402
+import displayio  # noqa: E402
+import terminalio  # noqa: E402
+from blesim.extract import load_defs  # noqa: E402
+from event_hub import EventHub  # noqa: E402
+from form_codec import url_decode  # noqa: E402
+from image_upload import ImageUpload  # noqa: E402
+from scheduler import Scheduler  # noqa: E402
+from static_files import StaticFiles, byte_range, content_type  # noqa: E402
+from text_pager import TextPager, TextView  # noqa: E402
+
+# Everything between the display setup and the main loop
+SERVER_NAMES = ["STREAMED_ROUTES", "UploadServer"]
+NAMES = [
+    "AP_SSID", "SCALE", "MAX_SCALE", "ALIGNMENTS", "MAX_TEXT", "PADDING", "AUTO_PAGE", "STATIC_ROOT",
+    "MAX_EVENT_STREAMS", "PING_INTERVAL",
+    "page_version", "text_source", "text_scale", "text_align", "set_text",
+    "PAGE_TOP", "PAGE_BOTTOM", "NOT_MODIFIED_304", "PAGE_TAG", "page_cache", "html_page",
+    "NO_CONTENT_204", "BAD_REQUEST_400", "SERVICE_UNAVAILABLE_503", "hub",
+    "state", "state_json", "publish_state", "json_field", "events", "index", "submit",
+    "PARTIAL_CONTENT_206", "RANGE_NOT_SATISFIABLE_416", "static", "static_file",
+    "parse_hex_color", "apply_color", "set_color",
+    "check_patch", "update_state", "json_error", "api_text", "api_page", "api_color", "api_state", "api_batch",
+    "ACCEPTED_202", "PAYLOAD_TOO_LARGE_413", "CONTINUE_100", "upload", "image_pending",
+    "receive_image", "api_image", "show_image",
+    "HTTP_BUDGET", "loop", "serve_http", "tick_events", "tick_image", "tick_pager", "events_task", "image_task",
+    "pager_task", "api_loop",
+]
+
+
+class Display:
+    """board.DISPLAY's size and auto_refresh. Counts refreshes: a change
+    refreshes at once under auto_refresh, otherwise when it is turned back on."""
+
+    width = 240
+    height = 135
+
+    def __init__(self):
+        self._auto = True
+        self._pending = False
+        self.refreshes = 0
+
+    @property
+    def auto_refresh(self):
+        return self._auto
+
+    @auto_refresh.setter
+    def auto_refresh(self, value):
+        if value and not self._auto and self._pending:
+            self.refreshes += 1
+            self._pending = False
+        self._auto = value
+
+    def changed(self):
+        if self._auto:
+            self.refreshes += 1
+        else:
+            self._pending = True
+
+
+class Label:
+    def __init__(self, display):
+        self._display = display
+        self._text = ""
+        self.scale = 1
+
+    @property
+    def text(self):
+        return self._text
+
+    @text.setter
+    def text(self, value):
+        self._text = value
+        self._display.changed()
+
+
+class Palette(list):
+    def __init__(self, display, color=0x000000):
+        super().__init__([color])
+        self._display = display
+
+    def __setitem__(self, index, value):
+        super().__setitem__(index, value)
+        self._display.changed()
+
+
+class Bitmap(displayio.Bitmap):
+    def __init__(self, display, width, height, value_count):
+        super().__init__(width, height, value_count)
+        self._display = display
+
+    def __setitem__(self, index, value):
+        super().__setitem__(index, value)
+        self._display.changed()
+
+    def fill(self, value):
+        super().fill(value)
+        self._display.changed()
+
+
+def text_view(display):
+    # HTTP_server.py's row labels and pager, with the stand-in font's size
+    char_w, char_h = terminalio.FONT.get_bounding_box()
+    pager = TextPager(display.width - 16, display.height - 16, char_w, char_h)
+    return TextView(pager, [Label(display) for _ in range(pager.rows(1))], 8, 8, display=display)
+
+
+def load_http_server(server=None, static_root=None, pool=socket):
+    """HTTP_server.py's namespace with its routes registered on ``server``
+    (by default its own UploadServer on ``pool``, as ``ns["server"]``).
+    ``static_root`` replaces STATIC_ROOT for the /static/... route."""
+    path = os.path.join(REPO_ROOT, "HTTP_server.py")
+    display = Display()
+    image_bitmap = Bitmap(display, display.width, display.height, 2)
+    image_palette = displayio.Palette(2)
+    ns = {
+        "json": json, "os": os, "time": time, "terminalio": terminalio, "bitmaptools": bitmaptools,
+        "EventHub": EventHub, "url_decode": url_decode, "ImageUpload": ImageUpload, "Scheduler": Scheduler,
+        "StaticFiles": StaticFiles, "byte_range": byte_range, "content_type": content_type,
+        "display": display,
+        "viewer": text_view(display),
+        "bg_palette": Palette(display),
+        "image_palette": image_palette,
+        "image_bitmap": image_bitmap,
+        "image_tile": displayio.TileGrid(image_bitmap, pixel_shader=image_palette),
+    }
+    ns["image_tile"].hidden = True
+    for name in ("Request", "Response", "ChunkedResponse", "JSONResponse", "SSEResponse", "Server", "Status",
+                 "GET", "POST", "PATCH", "Redirect", "OK_200", "NOT_FOUND_404", "NO_REQUEST"):
+        ns[name] = getattr(adafruit_httpserver, name)
+    load_defs(path, SERVER_NAMES, ns)
+    ns["server"] = server or ns["UploadServer"](pool, "/static")
+    load_defs(path, NAMES, ns)
+    if static_root is not None:
+        ns["static"] = StaticFiles(static_root)
+    return ns
+
+
+def main_loop_step(ns):
+    """One tick of HTTP_server.py's main loop; returns the requests served."""
+    return ns["loop"].tick(ns["serve_http"])
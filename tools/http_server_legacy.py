@@ -0,0 +1,41 @@
+# Frozen copy of HTTP_server.py's original page path (the whole document
+# concatenated and escaped on every GET of /, no validators). The page
+# benchmark runs it as the baseline to compare the current HTTP_server.py against.
+
+from adafruit_httpserver import Response
+
+AP_SSID = "CapstoneTestWifi"
+
+
+def html_page(message):
+    return (
+        "<!doctype html><html><head><meta name=\"viewport\" content=\"width=device-width,initial-scale=1\">"
+        "<title>Feather Text</title>"
+        "<style>body{font-family:system-ui;margin:1rem;}" \
+        "input,button,textarea{font:inherit;padding:.6rem;width:100%;margin:.5rem 0;}" \
+        "code{background:#eee;padding:.2rem .4rem;border-radius:.25rem}</style></head><body>"
+        "<h2>Capstone Test</h2>"
+        "<p>Connected to <b>" + AP_SSID + "</b>. Send text to the TFT:</p>"
+        "<form method=\"POST\" action=\"/submit\">"
+        "<textarea name=\"t\" rows=\"6\" placeholder=\"Type here...\"></textarea>"
+        "<button type=\"submit\">Show</button>"
+        "</form>"
+        "<hr>"
+        "<h3>Background color</h3>"
+        "<form method=\"POST\" action=\"/color\">"
+        "<div style=\"display:flex;gap:.5rem;flex-wrap:wrap\">"
+        "<button name=\"color\" value=\"#00FF00\" type=\"submit\" style=\"background:#00FF00\">Green</button>"
+        "<button name=\"color\" value=\"#AA0088\" type=\"submit\" style=\"background:#AA0088;color:#fff\">Purple</button>"
+        "<button name=\"color\" value=\"#000000\" type=\"submit\" style=\"background:#000;color:#fff\">Black</button>"
+        "<button name=\"color\" value=\"#FFFFFF\" type=\"submit\" style=\"background:#fff\">White</button>"
+        "</div>"
+        "<div>Or hex: <input name=\"hex\" placeholder=\"#RRGGBB or RRGGBB\"> <button type=\"submit\">Set</button></div>"
+        "</form>"
+        "<p>Or GET: <code>/?t=Hello%20World</code></p>"
+        "<p>Current: <code>" + message.replace("<", "&lt;").replace(">", "&gt;") + "</code></p>"
+        "</body></html>"
+    )
+
+
+def index(request, text_label):
+    return Response(request, html_page(text_label.text), content_type="text/html")
@@ -0,0 +1,189 @@
+"""Fake-clock check of the BLE-final.py playlist scheduler (runs on CPython).
+
+Runs BLE-final.py unmodified in the blesim simulator, whose clock skips
+sleeps, so hours of rotation take seconds. A scripted central sends three
+images, adds each to the playlist with {"t":"pl","op":"add"}, sets the
+interval to the panel's 180 s limit and starts the playlist. It then stays
+connected for --connected rotations, sending {"t":"bat"} every --ping seconds,
+and disconnects for --idle more.
+
+Checks that every rotation happens at the panel's refresh limit (never
+earlier, and no more than --slack seconds later), that the frames shown are
+the three images in order with the same framebuffer hash as when they were
+transferred, and that BLE is serviced while frames are composed and
+refreshed: every ping is answered, and the UART is polled at least every
+--max-gap seconds (sleeps included) from the moment the playlist starts until
+the phone disconnects. In the simulator a write only arrives when the firmware
+polls, so the longest gap between polls is the longest a phone can wait.
+Exits 1 if a check fails.
+
+    python3 tools/playlist_check.py [--connected 3] [--idle 3] [--ping 1.0] [--json]
+"""
+
+import argparse
+import json
+import os
+import sys
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(TOOLS_DIR, ".."))
+sys.path.insert(0, TOOLS_DIR)
+
+from blesim import ScriptedCentral, Simulator  # noqa: E402
+from blesim.checks import Checks  # noqa: E402
+from playlist import MIN_INTERVAL  # noqa: E402
+
+IMAGES = (("pl1", 1, "first"), ("pl2", 2, "second"), ("pl3", 3, "third"))
+
+
+class PingCentral(ScriptedCentral):
+    """ScriptedCentral that remembers when each write went out."""
+
+    def __init__(self, steps):
+        super().__init__(steps)
+        self.writes = []  # (time, json)
+        self.started = False  # {"t":"pl","op":"on"} has been sent
+
+    def _do_write(self, step):
+        self.writes.append((self.sim.clock.now(), step.get("json")))
+        self.started = self.started or step.get("json") == {"t": "pl", "op": "on"}
+        super()._do_write(step)
+
+
+def steps_for(args):
+    steps = [{"at": 1.0, "do": "connect"}]
+    for transfer_id, seed, prompt in IMAGES:
+        steps += [
+            {"after": 0.5, "do": "image", "w": 122, "h": 122, "id": transfer_id, "p": prompt, "seed": seed},
+            {"do": "wait", "for": {"t": "ack", "id": transfer_id, "st": "rendering"}, "timeout": 10},
+            {"after": 8.0, "do": "write", "json": {"t": "pl", "op": "add"}},
+            {"do": "wait", "for": {"t": "pl"}, "timeout": 5},
+        ]
+    steps += [
+        {"after": 0.2, "do": "write", "json": {"t": "pl", "op": "int", "s": MIN_INTERVAL}},
+        {"do": "wait", "for": {"t": "pl"}, "timeout": 5},
+        {"after": 0.2, "do": "write", "json": {"t": "pl", "op": "on"}},
+        {"do": "wait", "for": {"t": "pl"}, "timeout": 5},
+    ]
+    # Pings until the connected rotations are done (the first one comes at most
+    # one refresh limit after the last transfer)
+    for _ in range(int((args.connected + 1) * MIN_INTERVAL / args.ping)):
+        steps += [
+            {"after": args.ping, "do": "write", "json": {"t": "bat"}},
+            {"do": "wait", "for": {"t": "bat"}, "timeout": 5},
+        ]
+    steps += [
+        {"after": 0.5, "do": "disconnect"},
+        {"after": (args.idle + 1) * MIN_INTERVAL, "do": "end"},
+    ]
+    return steps
+
+
+def unanswered_pings(central, since):
+    """{"t":"bat"} writes after ``since`` without a reply before the next one."""
+    replies = [t for t, msg in central.messages if msg.get("t") == "bat"]
+    pings = [t for t, msg in central.writes if t >= since and msg == {"t": "bat"}]
+    missing = 0
+    for t, after in zip(pings, pings[1:] + [float("inf")]):
+        if not any(t <= r < after for r in replies):
+            missing += 1
+    return len(pings), missing
+
+
+class PollGaps:
+    """Longest time between two UART polls while ``active()`` holds, and when
+    it began. Kept as it goes: the loop polls millions of times per run."""
+
+    def __init__(self, active):
+        self.active = active
+        self.last = None
+        self.polls = 0
+        self.worst = (0.0, None)
+
+    def poll(self, now):
+        if not self.active():
+            self.last = None
+            return
+        self.polls += 1
+        if self.last is not None and now - self.last > self.worst[0]:
+            self.worst = (now - self.last, self.last)
+        self.last = now
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--connected", type=int, default=3, help="rotations while a phone is connected")
+    parser.add_argument("--idle", type=int, default=3, help="rotations after it disconnects")
+    parser.add_argument("--ping", type=float, default=1.0, help="seconds between bat requests while connected")
+    parser.add_argument("--slack", type=float, default=0.5, help="seconds a rotation may come after the limit")
+    parser.add_argument("--max-gap", type=float, default=0.25, help="longest allowed time between UART polls")
+    parser.add_argument("--log", metavar="FILE", help="write the firmware's console output here")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args()
+    check = Checks(quiet=args.json)
+    failures = check.failures
+
+    central = PingCentral(steps_for(args))
+    log = open(args.log, "w") if args.log else None
+    try:
+        sim = Simulator(central, until=(args.connected + args.idle + 4) * MIN_INTERVAL, log=log)
+        # From the moment the playlist starts until the phone disconnects
+        poll_gaps = PollGaps(lambda: central.started and sim.radio.connected)
+
+        def on_poll():
+            poll_gaps.poll(sim.clock.now())
+            sim.pump()
+        sim.uart.on_poll = on_poll
+        report = sim.run()
+    finally:
+        if log is not None:
+            log.close()
+
+    check(report["error"] is None, f"firmware ran without error ({report['error']})")
+    check(not report["central_errors"], f"every step got its reply {report['central_errors']}")
+    started = next((t for t, msg in central.writes if msg == {"t": "pl", "op": "on"}), None)
+    disconnected = next((t for t, event, _ in report["radio"] if event == "disconnect"), None)
+    refreshes = report["refreshes"]
+    transfers = [r for r in refreshes if started is None or r["t"] < started]
+    rotations = [r for r in refreshes if started is not None and r["t"] >= started]
+    expected = [transfers[i % len(transfers)]["hash"] for i in range(len(rotations))] if transfers else []
+    gaps = [round(b["t"] - a["t"], 3) for a, b in zip(transfers[-1:] + rotations, rotations)]
+
+    check(len(transfers) == len(IMAGES), f"{len(IMAGES)} transfers rendered ({len(transfers)})")
+    wanted = args.connected + args.idle
+    check(len(rotations) >= wanted, f"at least {wanted} rotations ({len(rotations)})")
+    check(all(MIN_INTERVAL <= g <= MIN_INTERVAL + args.slack for g in gaps),
+          f"every refresh {MIN_INTERVAL}-{MIN_INTERVAL + args.slack:g} s after the one before {gaps}")
+    check([r["hash"] for r in rotations] == expected, "rotation shows the images in order, as transferred")
+    connected_rotations = [r for r in rotations if disconnected is None or r["t"] < disconnected]
+    check(len(connected_rotations) >= args.connected,
+          f"{args.connected} rotations while connected ({len(connected_rotations)})")
+    pings, missing = unanswered_pings(central, started or 0.0)
+    check(pings and not missing, f"every ping answered ({pings - missing}/{pings})")
+    gap, gap_at = poll_gaps.worst
+    check(0 < gap <= args.max_gap, f"UART polled at least every {args.max_gap} s (worst {gap:.4f} s at {gap_at})")
+
+    results = {
+        "sim_time": report["sim_time"],
+        "wall_time": report["wall_time"],
+        "rotations": [(r["t"], r["hash"]) for r in rotations],
+        "gaps_s": gaps,
+        "pings": pings,
+        "unanswered": missing,
+        "longest_poll_gap_ms": round(gap * 1000, 2),
+        "failures": failures,
+    }
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print()
+        print(f"{len(rotations)} rotations in {report['sim_time']} s simulated ({report['wall_time']} s wall)")
+        print(f"gaps {gaps}")
+        print(f"{pings} pings, {missing} unanswered; longest gap between UART polls {results['longest_poll_gap_ms']} ms")
+        if failures:
+            print(f"{len(failures)} checks failed")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,300 @@
+"""Render-pipeline benchmark suite with regression thresholds (runs on CPython).
+
+Times the hot paths of BLE-final.py (_mix_seed/_rand01, generate_ink_blot,
+compose_frame with and without prompt text, set_text), the set_text of
+Wifi.py and HTTP_server.py (which wraps and pages the text on every call)
+and the form_codec url_decode they share, across a matrix of seeds, prompt
+lengths, text lengths and image sizes. The functions are loaded straight from the scripts (see
+blesim/extract.py) and run against the blesim displayio stand-ins.
+
+Each case is compared with a JSON baseline: it fails if its time, normalised by
+a calibration loop run before every timing so baselines carry across machines
+and CPU clock changes, grows by more than --threshold and by more than
+--min-slowdown ms at the baseline's speed, or if the hash of its output changed
+(a speedup must not change what is drawn or decoded). The normalised time is
+the median over --repeat runs. A case over both limits is measured again and
+only fails if it is still over them, so one noisy measurement does not fail
+the suite.
+
+    python3 tools/render_bench.py [--filter blot] [--repeat 9] [--threshold 0.25]
+    python3 tools/render_bench.py --update      # accept the current numbers
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import platform
+import sys
+import time
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.join(TOOLS_DIR, "..")
+sys.path.insert(0, os.path.join(TOOLS_DIR, "blesim", "stubs"))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, TOOLS_DIR)
+
+import displayio  # noqa: E402
+import terminalio  # noqa: E402
+from adafruit_display_text import label  # noqa: E402
+
+from blesim.extract import load_defs  # noqa: E402
+from form_codec import url_decode  # noqa: E402
+from render_pool import RenderPool  # noqa: E402
+from text_pager import TextPager, TextView  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(TOOLS_DIR, "bench_baselines", "render_bench.json")
+FRAME_W, FRAME_H = 122, 250  # e-ink framebuffer (250x122 panel rotated 270)
+TFT_W, TFT_H = 240, 135
+
+SEEDS = (1, 0xC0FFEE, 0xDEADBEEF)
+BLOT_SIZES = ((64, 64), (110, 122))
+IMAGE_SIZES = ((122, 122), (64, 64))
+PROMPTS = {
+    0: "",
+    33: "The ink remembers what you forget",
+    120: ("Somewhere between the folds of the paper a shape appears, "
+          "half moth and half mirror, waiting for you to name it first."),
+}
+TEXTS = ("Hi", "Receiving: 40%", "A forty character message for the TFT!!")
+# Wifi.py and HTTP_server.py also take long messages, wrapped over pages
+TFT_TEXTS = TEXTS + (PROMPTS[120] * 8,)
+URL_INPUTS = {
+    "plain": "text=" + "abcdefghij" * 20,
+    "plus": "text=" + "+".join(["word"] * 40),
+    "percent": "text=" + "h%C3%A9llo+w%C3%B6rld+%E2%9C%85+" * 8,
+    "mixed": "text=50%25+off%21+a%2Bb%3Dc&color=%23FF00AA&x=%ZZ%4",
+}
+
+
+def quiet_print(*args, **kwargs):
+    pass
+
+
+def load_firmware():
+    """BLE-final.py's render functions bound to stand-in displays and a render pool."""
+    ns = {"displayio": displayio, "terminalio": terminalio, "label": label, "time": time, "print": quiet_print}
+    load_defs(
+        os.path.join(REPO_ROOT, "BLE-final.py"),
+        ["EINK_MARGIN", "_mix_seed", "_rand01", "ink_blot_rows", "generate_ink_blot", "compose_frame", "set_text"],
+        ns,
+    )
+    margin = ns["EINK_MARGIN"]
+    ns["render_pool"] = RenderPool(FRAME_W, FRAME_H, FRAME_W - margin * 2, FRAME_H - margin * 3, 4096)
+    splash = displayio.Group()
+    palette = displayio.Palette(1)
+    ns["splash"] = splash
+    ns["bg"] = displayio.TileGrid(displayio.Bitmap(TFT_W, TFT_H, 1), pixel_shader=palette)
+    ns["text_label"] = label.Label(terminalio.FONT, text="Booting...", color=0x00FFFF)
+    return ns
+
+
+def load_tft_scripts():
+    """set_text of Wifi.py and HTTP_server.py, each bound to a paged text view
+    on a stand-in TFT built the way the script builds it."""
+    scripts = {}
+    for name, script in (("wifi", "Wifi.py"), ("http", "HTTP_server.py")):
+        ns = {"time": time, "print": quiet_print}
+        load_defs(os.path.join(REPO_ROOT, script), ["SCALE", "PADDING", "AUTO_PAGE", "TEXT_COLOR", "set_text"], ns)
+        padding = ns["PADDING"]
+        char_w, char_h = terminalio.FONT.get_bounding_box()
+        pager = TextPager(TFT_W - 2 * padding, TFT_H - 2 * padding, char_w, char_h)
+        labels = [label.Label(terminalio.FONT, text="", color=ns["TEXT_COLOR"]) for _ in range(pager.rows(1))]
+        ns["viewer"] = TextView(pager, labels, padding, padding, auto=ns["AUTO_PAGE"])
+        ns["text_labels"] = labels
+        # HTTP_server.py's set_text also tracks these
+        ns.update(page_version=0, text_source="", text_scale=ns["SCALE"], text_align="left",
+                  image_tile=displayio.TileGrid(displayio.Bitmap(1, 1, 2), pixel_shader=displayio.Palette(2)))
+        scripts[name] = ns
+    return scripts
+
+
+def load_url_decoders():
+    # Wifi.py and HTTP_server.py share form_codec.url_decode
+    return {"shared": url_decode}
+
+
+def digest(data):
+    return hashlib.sha1(data).hexdigest()[:16]
+
+
+def bitmap_digest(bitmap):
+    return digest(bytes(bitmap._data))  # stand-in Bitmap storage
+
+
+def build_cases(fw, decoders, tft_scripts):
+    """name -> (run, result_hash); run() does the work once, result_hash() hashes its output."""
+    cases = {}
+    mix_seed, rand01 = fw["_mix_seed"], fw["_rand01"]
+
+    chain_out = []
+
+    def seed_chain():
+        s, total = 0xC0FFEE, 0.0
+        for i in range(20000):
+            s = mix_seed(s, i)
+            total += rand01(s)
+        chain_out[:] = [s, round(total, 6)]
+
+    cases["mix_seed+rand01[20k]"] = (seed_chain, lambda: digest(repr(chain_out).encode()))
+
+    scratch = fw["render_pool"].scratch
+    for seed in SEEDS:
+        for w, h in BLOT_SIZES:
+            def blot(seed=seed, w=w, h=h):
+                scratch.fill(0)
+                fw["generate_ink_blot"](scratch, seed, w, h)
+            cases["ink_blot[seed=%x,%dx%d]" % (seed, w, h)] = (blot, lambda: bitmap_digest(scratch))
+
+    frame = fw["render_pool"].acquire_frame()
+    for seed in SEEDS[:2]:
+        payload = bytes((seed * 31 + i * 7) & 0xFF for i in range(1861))
+        for plen, prompt in PROMPTS.items():
+            for w, h in IMAGE_SIZES:
+                def compose(payload=payload, prompt=prompt, w=w, h=h):
+                    data = payload[:(w * h + 7) // 8]
+                    for _ in fw["compose_frame"](frame.bitmap, data, w, h, prompt):
+                        pass
+                name = "compose[seed=%x,prompt=%d,%dx%d]" % (seed, plen, w, h)
+                cases[name] = (compose, lambda: bitmap_digest(frame.bitmap))
+
+    for text in TEXTS:
+        def show(text=text):
+            # Two updates per pass, so the label really re-renders every time
+            for _ in range(20):
+                fw["set_text"]("", 0x00FFFF)
+                fw["set_text"](text, 0x00FFFF)
+        cases["set_text[%d]" % len(text)] = (
+            show, lambda: digest(bytes(fw["text_label"].bitmap._data) + repr(fw["text_label"].text).encode())
+        )
+
+    for sname, script in tft_scripts.items():
+        for text in TFT_TEXTS:
+            def show_tft(text=text, set_text=script["set_text"]):
+                for _ in range(20):
+                    set_text("")
+                    set_text(text)
+
+            def rows(labels=script["text_labels"]):
+                return digest(b"".join(bytes(row.bitmap._data) + repr(row.text).encode() for row in labels))
+            cases["set_text[%s,%d]" % (sname, len(text))] = (show_tft, rows)
+
+    for dname, decode in decoders.items():
+        for iname, raw in URL_INPUTS.items():
+            out = []
+
+            def run(decode=decode, raw=raw, out=out):
+                for _ in range(500):
+                    result = decode(raw)
+                out[:] = [result]
+            cases["url_decode[%s,%s]" % (dname, iname)] = (
+                run, lambda out=out: digest(out[0].encode("utf-8", "surrogatepass"))
+            )
+    return cases
+
+
+def calibration_loop():
+    """Fixed pure-Python int/float loop that case timings are divided by."""
+    acc, s = 0.0, 1
+    for _ in range(50000):
+        s = (s * 1664525 + 1013904223) & 0xFFFFFFFF
+        acc += ((s >> 8) & 0xFFFF) / 65535.0 * 0.5
+    return acc
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    fn()
+    return time.perf_counter() - t0
+
+
+def measure(run, repeat):
+    """(fastest time, median of time / calibration). The calibration loop runs
+    right before every timed run, so CPU clock drift hits both alike."""
+    times, ratios = [], []
+    for _ in range(repeat):
+        cal = timed(calibration_loop)
+        elapsed = timed(run)
+        times.append(elapsed)
+        ratios.append(elapsed / cal)
+    ratios.sort()
+    return min(times), ratios[len(ratios) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline JSON file")
+    parser.add_argument("--update", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown (0.25 = 25%%)")
+    parser.add_argument("--min-slowdown", type=float, default=0.2,
+                        help="ms a case must also lose, at the baseline's speed, to count as slower")
+    parser.add_argument("--repeat", type=int, default=9,
+                        help="runs per case; the median time/calibration ratio is compared")
+    parser.add_argument("--filter", default="", help="only cases whose name contains this")
+    parser.add_argument("--json", metavar="FILE", help="also write this run's results here")
+    args = parser.parse_args()
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    base_cases = baseline.get("cases", {})
+
+    cases = build_cases(load_firmware(), load_url_decoders(), load_tft_scripts())
+    results = {}
+    failures = 0
+    print(f"threshold {args.threshold:.0%}")
+    print(f"{'case':<40}{'ms':>10}{'vs base':>10}  status")
+    for name, (run, result_hash) in cases.items():
+        if args.filter not in name:
+            continue
+        run()  # warm-up; its output is what gets hashed
+        out_hash = result_hash()
+        elapsed, norm = measure(run, args.repeat)
+        results[name] = {"ms": round(elapsed * 1000, 3), "norm": round(norm, 4), "hash": out_hash}
+
+        base = base_cases.get(name)
+        ratio = ""
+        status = "new"
+        if base is not None:
+            def slower(norm):
+                change = norm / base["norm"] - 1
+                return change, change > args.threshold and change * base["ms"] > args.min_slowdown
+            change, over = slower(norm)
+            status = "ok"
+            if base["hash"] != out_hash:
+                status = "OUTPUT CHANGED"
+            elif over:
+                # Measure again: only a slowdown that repeats counts
+                elapsed, norm = measure(run, args.repeat)
+                results[name] = {"ms": round(elapsed * 1000, 3), "norm": round(norm, 4), "hash": out_hash}
+                change, over = slower(norm)
+                status = "SLOWER" if over else "ok (remeasured)"
+            ratio = f"{change:+.0%}"
+            if status not in ("ok", "ok (remeasured)"):
+                failures += 1
+        print(f"{name:<40}{elapsed * 1000:>10.2f}{ratio:>10}  {status}")
+
+    record = {
+        "python": platform.python_version(),
+        "cases": results,
+    }
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(record, f, indent=1, sort_keys=True)
+    if args.update:
+        if args.filter:
+            record["cases"] = dict(base_cases, **results)
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(record, f, indent=1, sort_keys=True)
+            f.write("\n")
+        print(f"baseline written to {args.baseline}")
+        return 0
+    if failures:
+        print(f"{failures} case(s) regressed")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
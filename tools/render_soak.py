@@ -0,0 +1,229 @@
+"""Render soak test for BLE-final.py's pooled render path (runs on CPython).
+
+Loads render_image, service_playlist and compose_frame from BLE-final.py (see
+blesim/extract.py) against the blesim displayio stand-ins, a stand-in panel and
+a three-image playlist, then renders --renders transfers. Before each one the
+playlist is stepped a varying number of ticks, so render_image often runs while
+the playlist composer is half-way through a frame that uses the same blot
+scratch and text label.
+
+Checks that every frame the panel shows, from render_image or from a playlist
+rotation, is identical to the same image composed on its own, that the frame
+pool never runs dry, and that the allocated heap blocks after a gc.collect()
+(sys.getallocatedblocks, CPython's stand-in for gc.mem_free) grow by no more
+than --max-growth after the warm-up. Exits 1 if a check fails.
+
+    python3 tools/render_soak.py [--renders 1000] [--max-growth 64] [--json]
+"""
+
+import argparse
+import array
+import gc
+import hashlib
+import json
+import os
+import random
+import sys
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.join(TOOLS_DIR, "..")
+sys.path.insert(0, os.path.join(TOOLS_DIR, "blesim", "stubs"))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, TOOLS_DIR)
+
+import displayio  # noqa: E402
+import terminalio  # noqa: E402
+
+from blesim.checks import Checks  # noqa: E402
+from blesim.extract import load_defs  # noqa: E402
+from playlist import Playlist  # noqa: E402
+from render_pool import HeapStats, RenderPool  # noqa: E402
+
+FRAME_W, FRAME_H = 122, 250  # e-ink framebuffer (250x122 panel rotated 270)
+PROMPTS = (
+    "",
+    "The ink remembers what you forget",
+    "Somewhere between the folds of the paper a shape appears, half moth and half mirror.",
+)
+SIZES = ((64, 64), (32, 32), (48, 40))  # small, so a thousand renders take about a minute
+WARMUP = 50  # renders before the memory baseline is taken
+SAMPLES = 20  # memory samples over the rest of the run
+ROTATE_EVERY = 4  # every 4th render the playlist first runs until it rotates
+MAX_TICKS = 5000
+
+
+def quiet_print(*args, **kwargs):
+    pass
+
+
+class FakeTime:
+    """time stand-in: sleeps return at once, monotonic() is set by the soak loop."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        pass
+
+
+class Panel:
+    """Stand-in e-ink display that hashes the frame on every refresh. Only the
+    last hash is kept, so the soak itself does not grow the heap."""
+
+    time_to_refresh = 0
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.root_group = None
+        self.refreshes = 0
+        self.last = None
+
+    def refresh(self):
+        frame = next(f for f in self.pool.frames if f.group is self.root_group)
+        self.refreshes += 1
+        self.last = bitmap_digest(frame.bitmap)
+
+
+def bitmap_digest(bitmap):
+    return hashlib.sha1(bytes(bitmap._data)).hexdigest()[:16]  # stand-in Bitmap storage
+
+
+def load_firmware():
+    """render_image and the playlist scheduler bound to a stand-in panel."""
+    ns = {"displayio": displayio, "terminalio": terminalio, "time": FakeTime(), "print": quiet_print}
+    load_defs(
+        os.path.join(REPO_ROOT, "BLE-final.py"),
+        ["EINK_MARGIN", "EINK_REFRESH_WAIT", "PLAYLIST_COMPOSE_STEPS", "_mix_seed", "_rand01",
+         "ink_blot_rows", "compose_frame", "show_frame", "render_image", "service_playlist"],
+        ns,
+    )
+    margin = ns["EINK_MARGIN"]
+    pool = RenderPool(FRAME_W, FRAME_H, FRAME_W - margin * 2, FRAME_H - margin * 3, 4096)
+    panel = Panel(pool)
+    ns.update({
+        "render_pool": pool,
+        "heap_stats": HeapStats(probe_limit=4096),
+        "eink_display": panel,
+        "init_eink_display": lambda force_reinit=False: panel,
+        "set_text": lambda t, c=0x00FFFF: quiet_print(t),
+        "playlist": Playlist(interval=1, min_interval=1),
+        "playlist_state": {"entry": None, "frame": None, "composer": None, "busy_until": 0},
+    })
+    return ns
+
+
+def payload(rng, w, h):
+    return bytes(rng.getrandbits(8) for _ in range((w * h + 7) // 8))
+
+
+def reference(fw, w, h, data, prompt):
+    """Hash of the image composed on its own, with nothing interleaved."""
+    pool = fw["render_pool"]
+    frame = pool.acquire_frame()
+    try:
+        for _ in fw["compose_frame"](frame.bitmap, data, w, h, prompt):
+            pass
+        return bitmap_digest(frame.bitmap)
+    finally:
+        pool.release_frame(frame)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--renders", type=int, default=1000, help="render_image calls")
+    parser.add_argument("--seed", type=int, default=1, help="seed for images and playlist ticks")
+    parser.add_argument("--max-growth", type=int, default=64,
+                        help="heap blocks the allocation may grow by after the warm-up")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args()
+    check = Checks(quiet=args.json)
+    failures = check.failures
+
+    rng = random.Random(args.seed)
+    fw = load_firmware()
+    clock, panel, playlist = fw["time"], fw["eink_display"], fw["playlist"]
+    rotation = set()
+    for i in range(3):
+        w, h = SIZES[i]
+        data = payload(rng, w, h)
+        playlist.add(w, h, data, PROMPTS[i])
+        rotation.add(reference(fw, w, h, data, PROMPTS[i]))
+    transfers = []
+    for i in range(8):
+        w, h = SIZES[i % len(SIZES)]
+        data = payload(rng, w, h)
+        prompt = PROMPTS[(i + 1) % len(PROMPTS)]
+        transfers.append((w, h, data, prompt, reference(fw, w, h, data, prompt)))
+    playlist.start(clock.now)
+
+    errors = []
+    wrong_render = wrong_rotation = interrupted = rotations = 0
+    # Preallocated, so storing a sample does not allocate the block it measures
+    memory = array.array("q", bytes(8 * (SAMPLES + 2)))
+    samples = 0
+    sample_every = max(1, (args.renders - WARMUP) // SAMPLES)
+    for n in range(args.renders):
+        # Let the playlist compose for a few ticks, or until it rotates
+        rotate = n % ROTATE_EVERY == 0
+        for _ in range(MAX_TICKS if rotate else rng.randrange(0, 40)):
+            clock.now += 0.25
+            shown = panel.refreshes
+            try:
+                fw["service_playlist"](clock.now)
+            except Exception as e:
+                errors.append("service_playlist: %r" % e)
+            if panel.refreshes != shown:
+                rotations += 1
+                wrong_rotation += panel.last not in rotation
+                if rotate:
+                    break
+        w, h, data, prompt, expected = transfers[n % len(transfers)]
+        interrupted += fw["playlist_state"]["composer"] is not None
+        shown = panel.refreshes
+        fw["render_image"](data, w, h, prompt)
+        if panel.refreshes != shown + 1 or panel.last != expected:
+            wrong_render += 1
+            if panel.refreshes == shown:
+                errors.append("render %d: nothing shown" % n)
+        if n >= WARMUP and (n - WARMUP) % sample_every == 0:
+            if samples < len(memory):
+                gc.collect()
+                memory[samples] = sys.getallocatedblocks()
+                samples += 1
+
+    memory = list(memory[:samples])
+    growth = memory[-1] - memory[0] if len(memory) > 1 else 0
+    check(not errors, f"no errors ({'; '.join(errors[:3])})")
+    check(interrupted > 0, f"render_image ran while a playlist frame was half-composed ({interrupted} times)")
+    check(wrong_render == 0, f"every render shows its image as composed on its own ({wrong_render} differ)")
+    check(rotations > 0 and wrong_rotation == 0,
+          f"every rotation shows a playlist image as composed on its own ({wrong_rotation} of {rotations} differ)")
+    check(len(memory) > 1 and growth <= args.max_growth,
+          f"heap grows at most {args.max_growth} blocks after {WARMUP} renders ({growth:+d})")
+
+    results = {
+        "renders": args.renders,
+        "rotations": rotations,
+        "interrupted_composes": interrupted,
+        "wrong_renders": wrong_render,
+        "wrong_rotations": wrong_rotation,
+        "allocated_blocks": memory,
+        "growth": growth,
+        "failures": failures,
+    }
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print()
+        print(f"{args.renders} renders, {rotations} rotations, {interrupted} renders interrupted a compose")
+        print(f"allocated blocks after warm-up: {memory[0] if memory else 0}, growth {growth:+d}")
+        if failures:
+            print(f"{len(failures)} checks failed")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,187 @@
+"""Disconnect-injection benchmark for resumable image transfers (runs on CPython).
+
+Runs BLE-final.py unmodified in the blesim simulator. A scripted central
+sends an image in rn-ble-test's 180-byte chunks and drops the link at set
+points of the transfer: between two writes, once the device has read
+everything sent so far. After --reconnect seconds it connects again and
+either starts over with a new {"t":"img"} (restart) or asks
+{"t":"resume","id":...} and continues from the offset the device reports
+(resume; it starts over if the device answers ok:0).
+
+For each scenario, reports the payload bytes sent, how many of them were
+retransmitted, and the simulated time from the first start to the rendering
+ACK. Checks that both modes end with the same e-ink framebuffer as an
+uninterrupted transfer, that resume retransmits nothing while the partial is
+kept, and that a partial older than transfer_cache.GRACE_PERIOD is refused
+(ok:0) and sent again in full. Exits 1 if a check fails.
+
+    python3 tools/resume_bench.py [--reconnect 1.0] [--json]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(TOOLS_DIR, ".."))
+sys.path.insert(0, TOOLS_DIR)
+
+from blesim import ScriptedCentral, Simulator  # noqa: E402
+from blesim.central import ACK_TIMEOUT, APP_CHUNK, APP_GAP  # noqa: E402
+from blesim.checks import Checks  # noqa: E402
+from transfer_cache import GRACE_PERIOD  # noqa: E402
+
+# name -> (width, height, drop points as fractions of the payload, reconnect delay or None)
+SCENARIOS = {
+    "one_drop": (122, 122, (0.5,), None),
+    "three_drops": (122, 122, (0.25, 0.5, 0.75), None),
+    "late_drop": (122, 122, (0.9,), None),
+    "full_panel_two_drops": (122, 250, (0.4, 0.8), None),
+    "expired": (122, 122, (0.5,), GRACE_PERIOD + 10.0),
+}
+MODES = ("restart", "resume")
+
+
+class DroppingCentral(ScriptedCentral):
+    """ScriptedCentral with an "upload" step: one transfer, link drops at
+    "drops" (byte offsets), reconnecting "reconnect" seconds later and then
+    resuming or restarting ("resume")."""
+
+    def __init__(self, steps):
+        super().__init__(steps)
+        self.uploads = []
+
+    def _ask(self, msg, pattern):
+        """Write ``msg`` and wait for a reply matching ``pattern``; returns it (or None)."""
+        found = []
+        self.sim.uart.central_write((json.dumps(msg) + "\n").encode("utf-8"))
+        yield self._reply(pattern, ACK_TIMEOUT, found)
+        return found[0][1]
+
+    def _do_upload(self, step):
+        w, h = step["w"], step["h"]
+        length = (w * h + 7) // 8
+        transfer_id = step["id"]
+        payload = random.Random(step.get("seed", 1)).randbytes(length)
+        drops = sorted(step.get("drops", ()))
+        start = {"t": "img", "id": transfer_id, "w": w, "h": h, "len": length, "p": step.get("p", "")}
+        record = {"id": transfer_id, "len": length, "sent": 0, "drops": 0, "resumed_at": [],
+                  "refused": 0, "start": round(self.sim.clock.now(), 4)}
+        self.uploads.append(record)
+        started = False
+        while True:
+            if not self.sim.radio.connected:
+                yield from self._do_connect(step)
+            offset = 0
+            if started and step.get("resume"):
+                reply = yield from self._ask({"t": "resume", "id": transfer_id},
+                                             {"t": "ack", "id": transfer_id, "st": "resume"})
+                if reply and reply.get("ok"):
+                    offset = reply["rx"]
+                    record["resumed_at"].append(offset)
+                else:
+                    record["refused"] += 1
+            if not offset:
+                reply = yield from self._ask(start, {"t": "ack", "id": transfer_id, "st": "start"})
+                if not reply or not reply.get("ok"):
+                    self.errors.append("transfer %s: start not acknowledged" % transfer_id)
+                    return
+            started = True
+            while offset < length:
+                if drops and offset >= drops[0]:
+                    drops.pop(0)
+                    break
+                piece = payload[offset:offset + APP_CHUNK]
+                self.sim.uart.central_write(piece)
+                record["sent"] += len(piece)
+                offset += len(piece)
+                if offset < length:
+                    yield self._until(self.sim.clock.now() + APP_GAP)
+            if offset >= length:
+                return
+            # Drop the link once the device has read everything sent so far
+            yield lambda now: not self.sim.uart.rx
+            self.sim.radio.disconnect()
+            record["drops"] += 1
+            yield self._until(self.sim.clock.now() + step.get("reconnect", 1.0))
+
+
+def run(w, h, drops, reconnect, resume):
+    length = (w * h + 7) // 8
+    steps = [
+        {"at": 1.0, "do": "connect"},
+        {"after": 0.5, "do": "upload", "id": "rb1", "w": w, "h": h, "seed": 7, "p": "Resumed",
+         "drops": [int(length * f) for f in drops], "reconnect": reconnect, "resume": resume},
+        {"do": "wait", "for": {"t": "ack", "id": "rb1", "st": "rendering"}, "timeout": ACK_TIMEOUT},
+        {"after": 8.0, "do": "end"},
+    ]
+    central = DroppingCentral(steps)
+    report = Simulator(central, until=reconnect * (len(drops) + 1) + 600.0).run()
+    done = next((t for t, msg in central.messages
+                 if msg.get("t") == "ack" and msg.get("st") == "rendering"), None)
+    upload = central.uploads[0] if central.uploads else {"sent": 0, "drops": 0, "resumed_at": [], "refused": 0}
+    return {
+        "len": length,
+        "sent": upload["sent"],
+        "retransmitted": upload["sent"] - length,
+        "drops": upload["drops"],
+        "resumed_at": upload["resumed_at"],
+        "refused": upload["refused"],
+        "seconds": None if done is None else round(done - upload["start"], 3),
+        "hash": report["refreshes"][-1]["hash"] if report["refreshes"] else None,
+        "error": report["error"] or "; ".join(report["central_errors"]) or None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reconnect", type=float, default=1.0, help="seconds from a drop to reconnecting")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args()
+    check = Checks(quiet=args.json)
+    failures = check.failures
+
+    rows = []
+    clean = {}
+    for name, (w, h, drops, reconnect) in SCENARIOS.items():
+        if (w, h) not in clean:
+            clean[(w, h)] = run(w, h, (), args.reconnect, False)["hash"]
+        row = {"scenario": name}
+        for mode in MODES:
+            row[mode] = run(w, h, drops, reconnect or args.reconnect, mode == "resume")
+        rows.append(row)
+
+        restart, resume = row["restart"], row["resume"]
+        for mode in MODES:
+            r = row[mode]
+            check(r["error"] is None and r["seconds"] is not None,
+                  f"{name}/{mode}: transfer completes ({r['error']})")
+            check(r["hash"] == clean[(w, h)], f"{name}/{mode}: same framebuffer as an uninterrupted transfer")
+        check(restart["drops"] == resume["drops"] == len(drops), f"{name}: {len(drops)} drops injected")
+        if reconnect is None:
+            check(resume["retransmitted"] == 0 and len(resume["resumed_at"]) == len(drops),
+                  f"{name}: resume continues where the device stopped ({resume['resumed_at']})")
+            check(restart["retransmitted"] > 0, f"{name}: restart sends {restart['retransmitted']} B again")
+        else:
+            check(resume["refused"] == len(drops) and resume["retransmitted"] == restart["retransmitted"],
+                  f"{name}: a partial older than {GRACE_PERIOD} s is refused and sent again in full")
+
+    if args.json:
+        print(json.dumps({"results": rows, "failures": failures}, indent=2))
+    else:
+        print()
+        print(f"{'scenario':<22}{'bytes':>7}{'drops':>7}{'restart resent':>16}{'resume resent':>15}"
+              f"{'restart s':>11}{'resume s':>10}")
+        for row in rows:
+            restart, resume = row["restart"], row["resume"]
+            print(f"{row['scenario']:<22}{restart['len']:>7}{restart['drops']:>7}{restart['retransmitted']:>16}"
+                  f"{resume['retransmitted']:>15}{restart['seconds'] or 0:>11.2f}{resume['seconds'] or 0:>10.2f}")
+        if failures:
+            print(f"{len(failures)} checks failed")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
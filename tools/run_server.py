@@ -0,0 +1,60 @@
+"""Runs Wifi.py, WifiMonitor.py or HTTP_server.py unmodified on CPython.
+
+The wifi and socketpool stand-ins (tools/blesim/stubs) make the access point
+the loopback interface and back the sockets with CPython's. Port 80 is
+served on 80 + $SOCKETPOOL_PORT_OFFSET (8000 by default, so
+http://127.0.0.1:8080/). The TFT is blesim's SimDisplay; nothing draws it,
+but the text each label is set to is counted. Time is real: the scripts'
+own sleeps and timeouts apply. Runs until interrupted.
+
+    python3 tools/run_server.py Wifi.py
+    SOCKETPOOL_PORT_OFFSET=9000 python3 tools/run_server.py HTTP_server.py
+"""
+
+import argparse
+import os
+import runpy
+import sys
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.abspath(os.path.join(TOOLS_DIR, ".."))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, TOOLS_DIR)
+sys.path.insert(0, os.path.join(TOOLS_DIR, "blesim", "stubs"))
+
+from blesim import displays, runtime  # noqa: E402
+from blesim.simulator import TFT_HEIGHT, TFT_WIDTH  # noqa: E402
+
+
+class HostRuntime:
+    """What the board, displayio and label stand-ins ask of a blesim run,
+    without the BLE side or the simulated clock."""
+
+    def __init__(self):
+        self.tft = displays.SimDisplay(self, "tft", TFT_WIDTH, TFT_HEIGHT)
+        self.texts = 0
+
+    def note_text(self, label, text):
+        self.texts += 1
+
+    def release_displays(self):
+        self.tft.released = True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("script", help="Wifi.py, WifiMonitor.py or HTTP_server.py (or a path)")
+    args = parser.parse_args()
+    path = args.script if os.path.exists(args.script) else os.path.join(REPO_ROOT, args.script)
+    runtime.install(HostRuntime())
+    try:
+        runpy.run_path(path, run_name="__main__")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        runtime.uninstall()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
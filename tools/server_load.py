@@ -0,0 +1,258 @@
+"""Load test for Wifi.py, WifiMonitor.py and HTTP_server.py as shipped (runs on Linux).
+
+Starts each script unmodified in its own process (tools/run_server.py, with
+the wifi and socketpool stand-ins on 127.0.0.1) and drives it for a fixed
+time from --concurrency client threads. Each client request is picked from a
+weighted mix:
+- form: GET / (the form page)
+- text: POST the form field t (Wifi.py and WifiMonitor.py at /,
+  HTTP_server.py at /submit)
+- color: POST /color with a colour button (HTTP_server.py only; left out of
+  the mix for the scripts that have no colour route)
+--slow more clients trickle each request out in 8-byte pieces, --slow-delay
+apart, like a phone on a weak signal. Every connection sends
+"Connection: close" and reads to EOF.
+
+Prints one JSON object per script: requests/s, latency percentiles overall,
+per request kind and for the slow clients, errors by kind, and the server
+process's CPU time (user + system, from /proc) while under load.
+
+    python3 tools/server_load.py [--script Wifi.py] [--concurrency 8] [--duration 5]
+                                 [--mix form=2,text=1,color=1] [--slow 2] [--slow-delay 0.05]
+"""
+
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, TOOLS_DIR)
+
+from http_load import percentile  # noqa: E402
+
+SCRIPTS = ("Wifi.py", "WifiMonitor.py", "HTTP_server.py")
+TEXT = b"t=Hello+from+the+load+test"
+
+
+def get(path):
+    return b"GET %s HTTP/1.1\r\nHost: 192.168.4.1\r\nConnection: close\r\n\r\n" % path
+
+
+def post(path, body):
+    return (b"POST %s HTTP/1.1\r\nHost: 192.168.4.1\r\nConnection: close\r\n"
+            b"Content-Type: application/x-www-form-urlencoded\r\nContent-Length: %d\r\n\r\n%s"
+            % (path, len(body), body))
+
+
+# What each kind of request is for each script; None: the script has no such route
+REQUESTS = {
+    "Wifi.py": {"form": get(b"/"), "text": post(b"/", TEXT), "color": None},
+    "WifiMonitor.py": {"form": get(b"/"), "text": post(b"/", TEXT), "color": None},
+    "HTTP_server.py": {"form": get(b"/"), "text": post(b"/submit", TEXT),
+                       "color": post(b"/color", b"color=%2300AA55")},
+}
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name not in REQUESTS["HTTP_server.py"]:
+            raise argparse.ArgumentTypeError("unknown request kind %r" % name)
+        mix[name] = int(weight or 1)
+    return mix
+
+
+def free_port():
+    s = socket.socket()
+    s.bind(("127.0.0.1", 0))
+    port = s.getsockname()[1]
+    s.close()
+    return port
+
+
+# ---------- server process ----------
+def start_server(script, port, timeout):
+    """run_server.py serving ``script`` on ``port``; returns the process once
+    it accepts connections."""
+    env = dict(os.environ, SOCKETPOOL_PORT_OFFSET=str(port - 80))
+    proc = subprocess.Popen([sys.executable, os.path.join(TOOLS_DIR, "run_server.py"), script],
+                            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError("%s exited: %s" % (script, proc.stderr.read().decode(errors="replace")))
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return proc
+        except OSError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError("%s did not start listening within %.0f s" % (script, timeout))
+
+
+def cpu_seconds(pid):
+    """User + system CPU time of a process, or None without /proc."""
+    try:
+        with open("/proc/%d/stat" % pid) as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+    except OSError:
+        return None
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+# ---------- clients ----------
+def exchange(port, request, timeout, piece=0, delay=0.0):
+    """Send one request and read to EOF; returns the status code. ``piece``
+    bytes at a time, ``delay`` apart, for slow clients."""
+    sock = socket.create_connection(("127.0.0.1", port), timeout=timeout)
+    try:
+        if piece:
+            for i in range(0, len(request), piece):
+                sock.sendall(request[i:i + piece])
+                time.sleep(delay)
+        else:
+            sock.sendall(request)
+        data = b""
+        while True:
+            chunk = sock.recv(4096)
+            if not chunk:
+                break
+            data += chunk
+    finally:
+        sock.close()
+    if not data.startswith(b"HTTP/1.1 "):
+        raise ConnectionError("no response")
+    return int(data[9:12])
+
+
+class Results:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = {}  # kind -> [seconds]
+        self.errors = {}  # "connect" / "timeout" / "reset" / "http_4xx" ... -> count
+
+    def ok(self, kind, seconds):
+        with self.lock:
+            self.latencies.setdefault(kind, []).append(seconds)
+
+    def error(self, what):
+        with self.lock:
+            self.errors[what] = self.errors.get(what, 0) + 1
+
+
+def client(port, sequence, start, deadline, timeout, results, piece=0, delay=0.0):
+    i = start
+    while time.monotonic() < deadline:
+        kind, request = sequence[i % len(sequence)]
+        i += 1
+        t0 = time.perf_counter()
+        try:
+            status = exchange(port, request, timeout, piece, delay)
+        except socket.timeout:
+            results.error("timeout")
+            continue
+        except ConnectionRefusedError:
+            results.error("connect")
+            time.sleep(0.01)
+            continue
+        except OSError:
+            results.error("reset")
+            continue
+        if status >= 400:
+            results.error("http_%d" % status)
+            continue
+        results.ok("slow" if piece else kind, time.perf_counter() - t0)
+
+
+def summary(latencies):
+    latencies = sorted(latencies)
+    ms = lambda v: None if v is None else round(v * 1000, 2)  # noqa: E731
+    return {
+        "requests": len(latencies),
+        "p50_ms": ms(percentile(latencies, 0.50)),
+        "p90_ms": ms(percentile(latencies, 0.90)),
+        "p99_ms": ms(percentile(latencies, 0.99)),
+        "max_ms": ms(latencies[-1] if latencies else None),
+    }
+
+
+def run(script, args):
+    requests = REQUESTS[script]
+    sequence = []
+    for kind, weight in args.mix.items():
+        if requests[kind] is not None:
+            sequence.extend([(kind, requests[kind])] * weight)
+    skipped = sorted(kind for kind in args.mix if requests[kind] is None)
+    port = free_port()
+    proc = start_server(script, port, args.start_timeout)
+    results = Results()
+    try:
+        for kind, request in sequence:  # warm-up, not counted
+            exchange(port, request, args.timeout)
+        cpu0 = cpu_seconds(proc.pid)
+        t0 = time.monotonic()
+        deadline = t0 + args.duration
+        threads = [threading.Thread(target=client, args=(port, sequence, i, deadline, args.timeout, results))
+                   for i in range(args.concurrency)]
+        threads += [threading.Thread(target=client, args=(port, sequence, i, deadline, args.timeout, results,
+                                                          8, args.slow_delay))
+                    for i in range(args.slow)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.monotonic() - t0
+        cpu1 = cpu_seconds(proc.pid)
+    finally:
+        proc.kill()
+        proc.wait()
+
+    fast = [v for kind, values in results.latencies.items() if kind != "slow" for v in values]
+    cpu = None if cpu0 is None or cpu1 is None else round(cpu1 - cpu0, 3)
+    out = {
+        "script": script,
+        "concurrency": args.concurrency,
+        "slow_clients": args.slow,
+        "duration_s": round(elapsed, 2),
+        "mix": {kind: weight for kind, weight in args.mix.items() if kind not in skipped},
+        "skipped": skipped,
+        "req_per_s": round(len(fast) / elapsed, 1),
+        "latency": summary(fast),
+        "by_kind": {kind: summary(values) for kind, values in sorted(results.latencies.items())
+                    if kind != "slow"},
+        "slow": summary(results.latencies.get("slow", [])),
+        "errors": dict(sorted(results.errors.items())),
+        "server_cpu_s": cpu,
+        "server_cpu_ms_per_request": None if cpu is None or not fast else
+        round(cpu * 1000 / (len(fast) + len(results.latencies.get("slow", []))), 3),
+    }
+    out["server_cpu_share"] = None if cpu is None else round(cpu / elapsed, 3)
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--script", action="append", choices=SCRIPTS,
+                        help="script to load (repeatable; all three by default)")
+    parser.add_argument("--concurrency", type=int, default=8, help="client threads sending back to back")
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds of load per script")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("form=2,text=1,color=1"),
+                        help="request kinds and weights (form, text, color)")
+    parser.add_argument("--slow", type=int, default=0, help="extra clients that trickle their requests")
+    parser.add_argument("--slow-delay", type=float, default=0.05, help="seconds between a slow client's pieces")
+    parser.add_argument("--timeout", type=float, default=10.0, help="client socket timeout")
+    parser.add_argument("--start-timeout", type=float, default=20.0, help="seconds to wait for a script to listen")
+    args = parser.parse_args()
+    results = [run(script, args) for script in args.script or SCRIPTS]
+    print(json.dumps(results if len(results) > 1 else results[0], indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
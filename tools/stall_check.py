@@ -0,0 +1,116 @@
+"""Stalled-transfer check for BLE-final.py (runs on CPython).
+
+Runs BLE-final.py unmodified in the blesim simulator. A scripted central
+starts a 122x122 transfer, sends --chunks 180-byte chunks and then goes quiet
+for --stall seconds, while staying connected. It then asks to resume the
+transfer.
+
+Checks that the transfer is given up IMAGE_RX_TIMEOUT seconds after the last
+chunk, even though nothing arrives to trigger the check. The TFT must show
+"Timeout!" within --slack seconds of the limit. It also checks that the loop
+backs off while the sender is quiet (no more than --max-rate UART polls per
+second), that it polls flat out while chunks arrive, and that the partial was
+parked: the resume answers ok:1 from the bytes already sent. Exits 1 if a
+check fails.
+
+    python3 tools/stall_check.py [--chunks 3] [--stall 30] [--json]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(TOOLS_DIR, ".."))
+sys.path.insert(0, TOOLS_DIR)
+
+from blesim import ScriptedCentral, Simulator  # noqa: E402
+from blesim.central import APP_CHUNK, APP_GAP  # noqa: E402
+from blesim.checks import Checks  # noqa: E402
+
+W = H = 122
+LENGTH = (W * H + 7) // 8
+
+
+class StallCentral(ScriptedCentral):
+    """ScriptedCentral that remembers when each write went out."""
+
+    def __init__(self, steps):
+        super().__init__(steps)
+        self.writes = []
+
+    def _do_write(self, step):
+        self.writes.append(self.sim.clock.now())
+        super()._do_write(step)
+
+
+def steps_for(args):
+    payload = random.Random(3).randbytes(LENGTH)
+    steps = [
+        {"at": 1.0, "do": "connect"},
+        {"after": 0.5, "do": "write", "json": {"t": "img", "id": "st1", "w": W, "h": H, "len": LENGTH}},
+        {"do": "wait", "for": {"t": "ack", "id": "st1", "st": "start"}, "timeout": 5},
+    ]
+    for i in range(args.chunks):
+        steps.append({"after": APP_GAP, "do": "write", "hex": payload[i * APP_CHUNK:(i + 1) * APP_CHUNK].hex()})
+    steps += [
+        {"after": args.stall, "do": "write", "json": {"t": "resume", "id": "st1"}},
+        {"do": "wait", "for": {"t": "ack", "id": "st1", "st": "resume"}, "timeout": 5},
+        {"after": 1.0, "do": "end"},
+    ]
+    return steps
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=3, help="chunks sent before the stall")
+    parser.add_argument("--stall", type=float, default=30.0, help="seconds the sender stays quiet")
+    parser.add_argument("--slack", type=float, default=0.25, help="seconds the timeout may fire late")
+    parser.add_argument("--max-rate", type=float, default=10.0, help="UART polls per second allowed while quiet")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args()
+    check = Checks(quiet=args.json)
+    failures = check.failures
+
+    central = StallCentral(steps_for(args))
+    sim = Simulator(central, until=args.stall + 60.0)
+    polls = []
+
+    def on_poll():
+        polls.append(sim.clock.now())
+        sim.pump()
+    sim.uart.on_poll = on_poll
+    report = sim.run()
+    timeout = sim.globals.get("IMAGE_RX_TIMEOUT")
+
+    check(report["error"] is None, f"firmware ran without error ({report['error']})")
+    first_chunk, last_chunk, resume = central.writes[1], central.writes[-2], central.writes[-1]
+    timed_out = next((t for t, text in report["tft_text"] if t > last_chunk and text == "Timeout!"), None)
+    late = None if timed_out is None or timeout is None else round(timed_out - last_chunk - timeout, 4)
+    check(late is not None and 0 <= late <= args.slack,
+          f"transfer given up {timeout} s after the last chunk (+{late} s)")
+    quiet_start, quiet_end = last_chunk + 1.0, (timed_out or resume)
+    quiet = [t for t in polls if quiet_start <= t < quiet_end]
+    rate = len(quiet) / max(1e-9, quiet_end - quiet_start)
+    check(rate <= args.max_rate, f"at most {args.max_rate:g} polls/s while the sender is quiet ({rate:.1f})")
+    during = [t for t in polls if first_chunk <= t <= last_chunk]
+    gap = max((b - a for a, b in zip(during, during[1:])), default=0.0)
+    check(gap < APP_GAP, f"no sleep between chunks (longest poll gap {gap * 1000:.1f} ms)")
+    reply = next((m for t, m in central.messages if m.get("st") == "resume"), None)
+    sent = min(LENGTH, args.chunks * APP_CHUNK)
+    check(reply is not None and reply.get("ok") == 1 and reply.get("rx") == sent,
+          f"the partial was parked and resumes at {sent} B ({reply})")
+
+    results = {"timeout_late_s": late, "quiet_polls_per_s": round(rate, 2),
+               "longest_gap_during_transfer_ms": round(gap * 1000, 2), "resume": reply, "failures": failures}
+    if args.json:
+        print(json.dumps(results, indent=2))
+    elif failures:
+        print(f"{len(failures)} checks failed")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,207 @@
+"""Transfer and RAM benchmark for HTTP_server.py's static files (runs on CPython).
+
+Builds a small site (page, stylesheet, script, screenshot from imgs/) with
+tools/build_static.py into a temporary directory. It is served through the
+adafruit_httpserver stand-in over 127.0.0.1 two ways: the library's own file
+serving, as HTTP_server.py used to (raw files, no caching headers), and the
+current ``/static/...`` route (.gz siblings, immutable caching of hashed
+names, Range, 1 KB streaming buffer). A client plays a first visit, a repeat
+visit (keeping what Cache-Control lets it keep) and a resumed download of
+the largest file. Reports bytes on the wire, requests, and the server's peak
+allocation (tracemalloc) per request.
+
+    python3 tools/static_bench.py [--repeat 20] [--json]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import socket
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.join(TOOLS_DIR, "..")
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, TOOLS_DIR)
+sys.path.insert(0, os.path.join(TOOLS_DIR, "blesim", "stubs"))
+
+import adafruit_httpserver  # noqa: E402
+from build_static import build  # noqa: E402
+from http_server_host import load_http_server  # noqa: E402
+
+SCENARIOS = ("first_visit", "repeat_visit", "resume")
+
+
+def write_site(src):
+    """A page with the kind of assets a phone UI for the TFT would pull in."""
+    os.makedirs(src)
+    rules = "".join(
+        ".btn-%d{display:inline-block;padding:.6rem %drem;margin:.25rem;border-radius:.25rem;"
+        "background:#%06x;color:#fff;font:inherit}\n" % (i, 1 + i % 3, (i * 2654435761) & 0xFFFFFF)
+        for i in range(60))
+    script = "".join(
+        "function update%d(state){const el=document.getElementById('field%d');"
+        "if(!el)return;el.textContent=state.text||'';el.style.background=state.color||'#000';}\n"
+        "document.addEventListener('DOMContentLoaded',()=>fetch('/api/state').then(r=>r.json())"
+        ".then(update%d));\n" % (i, i, i)
+        for i in range(120))
+    page = ("<!doctype html><html><head><meta name=\"viewport\" content=\"width=device-width\">"
+            "<link rel=\"stylesheet\" href=\"style.css\"><script src=\"app.js\" defer></script>"
+            "</head><body><h2>Feather Text</h2><img src=\"screen.png\" alt=\"TFT\">"
+            "<form method=\"POST\" action=\"/submit\"><textarea name=\"t\"></textarea>"
+            "<button type=\"submit\">Show</button></form></body></html>")
+    files = {"index.html": page.encode(), "style.css": rules.encode(), "app.js": script.encode()}
+    for name, data in files.items():
+        with open(os.path.join(src, name), "wb") as f:
+            f.write(data)
+    shutil.copy(os.path.join(REPO_ROOT, "imgs", "screen1.png"), os.path.join(src, "screen.png"))
+
+
+def current_server(out):
+    return load_http_server(static_root=out)["server"]
+
+
+# ---------- client ----------
+class Client:
+    """Fetches into preallocated buffers (the response head stays in ``head``)
+    so its own allocations stay out of the server's tracemalloc peak."""
+
+    def __init__(self, port, gzip_ok, head, sink):
+        self.port = port
+        self.gzip_ok = gzip_ok
+        self.head = head
+        self.sink = sink
+        self.cache = set()
+        self.wire = 0
+        self.requests = 0
+
+    def get(self, path, range_from=None):
+        if path in self.cache:
+            return 200
+        req = b"GET " + path + b" HTTP/1.1\r\nHost: 192.168.4.1\r\n"
+        if self.gzip_ok:
+            req += b"Accept-Encoding: gzip, deflate\r\n"
+        if range_from is not None:
+            req += b"Range: bytes=%d-\r\n" % range_from
+        sock = socket.create_connection(("127.0.0.1", self.port))
+        sock.sendall(req + b"\r\n")
+        head = self.head
+        first = sock.recv_into(head)
+        n = first
+        while True:
+            got = sock.recv_into(self.sink)
+            if not got:
+                break
+            n += got
+        sock.close()
+        self.wire += n
+        self.requests += 1
+        head_end = head.find(b"\r\n\r\n", 0, first)
+        if head.find(b"immutable", 0, head_end) >= 0:
+            self.cache.add(path)
+        return (head[9] - 48) * 100 + (head[10] - 48) * 10 + head[11] - 48
+
+
+def visit(client, urls, statuses):
+    for url in urls:
+        statuses.append(client.get(url))
+
+
+def play(port, urls, largest, repeat, buffers, results):
+    for scenario in SCENARIOS:
+        client = Client(port, True, *buffers)
+        statuses = []
+        wire = requests = 0
+        for _ in range(repeat):
+            client.cache.clear()
+            if scenario == "repeat_visit":
+                visit(client, urls, [])  # fills the cache; not counted
+            wire0, requests0 = client.wire, client.requests
+            if scenario == "resume":
+                statuses.append(client.get(largest[0], range_from=largest[1] // 2))
+            else:
+                visit(client, urls, statuses)
+            wire += client.wire - wire0
+            requests += client.requests - requests0
+        results[scenario] = (wire / repeat, requests / repeat, sorted(set(statuses)))
+
+
+def run(name, server, urls, largest, repeat):
+    server.start("127.0.0.1", 0)
+    results = {}
+    buffers = (bytearray(4096), bytearray(65536))
+    thread = threading.Thread(target=play, args=(server.port, urls, largest, repeat, buffers, results))
+    tracemalloc.start()
+    thread.start()
+    peaks = []
+    while thread.is_alive():
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        if server.poll() == adafruit_httpserver.REQUEST_HANDLED_RESPONSE_SENT:
+            peaks.append(tracemalloc.get_traced_memory()[1] - base)
+        else:
+            time.sleep(0)
+    tracemalloc.stop()
+    thread.join()
+    server.stop()
+    peaks.sort()
+    rows = []
+    for scenario in SCENARIOS:
+        wire, requests, statuses = results[scenario]
+        rows.append({"server": name, "scenario": scenario, "wire_B": round(wire),
+                     "requests": requests, "status": "/".join(map(str, statuses))})
+    return rows, {"server": name, "peak_alloc_B_median": peaks[len(peaks) // 2], "peak_alloc_B_max": peaks[-1]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20, help="visits per scenario")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="static_bench_")
+    try:
+        src, out = os.path.join(tmp, "src"), os.path.join(tmp, "static")
+        write_site(src)
+        report = build(src, out)
+        raw_urls = [b"/" + name.encode() for name, _, _, _ in reversed(report)]
+        built_urls = [b"/static/" + built.encode() for _, built, _, _ in reversed(report)]
+        by_size = max(report, key=lambda r: r[2])
+        sites = (
+            ("library", adafruit_httpserver.Server(socket, src), raw_urls,
+             (b"/" + by_size[0].encode(), by_size[2])),
+            ("static_files", current_server(out), built_urls,
+             (b"/static/" + by_size[1].encode(), by_size[3] or by_size[2])),
+        )
+        rows, peaks = [], []
+        for name, server, urls, largest in sites:
+            r, p = run(name, server, urls, largest, args.repeat)
+            rows.extend(r)
+            peaks.append(p)
+    finally:
+        shutil.rmtree(tmp)
+
+    if args.json:
+        print(json.dumps({"files": report, "transfers": rows, "peak_alloc": peaks}, indent=2))
+        return 0
+    print(f"{'file':<14}{'built as':<28}{'bytes':>8}{'gz':>8}")
+    for name, built, size, packed in report:
+        print(f"{name:<14}{built:<28}{size:>8}{packed or '-':>8}")
+    print()
+    print(f"{'server':<14}{'scenario':<14}{'status':<10}{'requests':>9}{'wire B':>9}")
+    for r in rows:
+        print(f"{r['server']:<14}{r['scenario']:<14}{r['status']:<10}{r['requests']:>9.1f}{r['wire_B']:>9}")
+    print()
+    for p in peaks:
+        print(f"{p['server']:<14}peak alloc per request: median {p['peak_alloc_B_median']} B, "
+              f"max {p['peak_alloc_B_max']} B")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
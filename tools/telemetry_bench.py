@@ -0,0 +1,98 @@
+"""Latency of the "bat" reply from telemetry.Telemetry with slow fake readers (runs on CPython).
+
+Drives the sampler with fake battery/temperature readers that block like a slow
+I2C fuel gauge, while a background thread loads the CPU, and times report()
+(what the "bat" handler now does) against reading the hardware inline.
+
+    python3 tools/telemetry_bench.py [--reader-ms 8] [--requests 2000] [--load-threads 2]
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from telemetry import Telemetry  # noqa: E402
+
+
+class FakeBattery:
+    """Discharging cell with ADC noise; each read blocks for ``delay`` seconds."""
+
+    def __init__(self, delay, mv=4100.0):
+        self.delay = delay
+        self.mv = mv
+        self.reads = 0
+
+    def __call__(self):
+        time.sleep(self.delay)
+        self.reads += 1
+        self.mv -= 0.5
+        noise = ((self.reads * 7919) % 41) - 20
+        return self.mv + noise, None
+
+
+def fake_temperature(delay):
+    def read():
+        time.sleep(delay)
+        return 31.0 + (time.monotonic() % 1.0)
+    return read
+
+
+def burn(stop):
+    x = 0
+    while not stop.is_set():
+        x = (x * 31 + 7) % 1000003
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reader-ms", type=float, default=8.0, help="blocking time of each hardware read")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--load-threads", type=int, default=2, help="CPU-burning threads running alongside")
+    args = parser.parse_args()
+    delay = args.reader_ms / 1000.0
+
+    stop = threading.Event()
+    load = [threading.Thread(target=burn, args=(stop,), daemon=True) for _ in range(args.load_threads)]
+    for t in load:
+        t.start()
+    try:
+        battery = FakeBattery(delay)
+        telemetry = Telemetry(battery=battery, temperature=fake_temperature(delay), source="fuel_gauge", period=0.05)
+        cached = []
+        deadline = time.monotonic()
+        for _ in range(args.requests):
+            # Idle-time sampling, as the main loops do between messages
+            telemetry.poll()
+            t0 = time.perf_counter()
+            telemetry.report()
+            cached.append(time.perf_counter() - t0)
+            deadline += 0.001
+            time.sleep(max(0.0, deadline - time.monotonic()))
+
+        inline = []
+        for _ in range(min(args.requests, 100)):
+            t0 = time.perf_counter()
+            battery()
+            fake_temperature(delay)()
+            inline.append(time.perf_counter() - t0)
+    finally:
+        stop.set()
+
+    print(f"{'reply path':<12}{'p50':>12}{'p99':>12}{'max':>12}")
+    for name, samples in (("cached", cached), ("inline", inline)):
+        print(f"{name:<12}{percentile(samples, 50) * 1e6:>10.1f}us{percentile(samples, 99) * 1e6:>10.1f}us"
+              f"{max(samples) * 1e6:>10.1f}us")
+    print(f"\n{telemetry.samples} samples, last reply {telemetry.report()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+"""Layout benchmark for the paged TFT text in Wifi.py and HTTP_server.py (runs on CPython).
+
+Shows 10 KB messages on the 240x135 TFT through the blesim displayio, terminalio
+and label stand-ins (the label stand-in really rasterises its text):
+- legacy: the old set_text, which wrapped the whole message and drew every
+  line into one label;
+- paged: text_pager.TextView, which wraps only the page shown and draws it
+  into one label per row.
+For the paged view it also times the next page, going back to a page whose
+line breaks are cached, a scale change, and the layout alone (cold and
+cached). Reports milliseconds (median of --repeat runs) and the pixels
+rasterised per update.
+
+Checks that only the first page is laid out on set_text, that every line
+fits, that the pages together hold the whole message, and that plain prose
+breaks exactly where the old wrap broke it. Exits 1 if a check fails.
+
+    python3 tools/text_pager_bench.py [--size 10240] [--repeat 3] [--json]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.join(TOOLS_DIR, "..")
+sys.path.insert(0, os.path.join(TOOLS_DIR, "blesim", "stubs"))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, TOOLS_DIR)
+
+import displayio  # noqa: E402
+import terminalio  # noqa: E402
+from adafruit_display_text import label  # noqa: E402
+
+from blesim.checks import Checks  # noqa: E402
+from text_pager import TextPager, TextView  # noqa: E402
+
+TFT_W, TFT_H = 240, 135
+PADDING = 8
+
+
+# ---------- messages ----------
+def prose(size, seed=1):
+    rnd = random.Random(seed)
+    words = []
+    n = 0
+    while n < size:
+        word = "".join(rnd.choice("etaoinshrdlu") for _ in range(rnd.randint(2, 9)))
+        words.append(word)
+        n += len(word) + 1
+    return " ".join(words)[:size]
+
+
+def paragraphs(size):
+    # Prose with a blank line every few hundred characters
+    text = prose(size, 2)
+    return "\n\n".join(text[i:i + 400].strip() for i in range(0, len(text), 400))[:size]
+
+
+def log_lines(size):
+    return "".join("%05d sensor=%d ok\n" % (i, i * 37 % 1000) for i in range(size // 20))[:size]
+
+
+def no_spaces(size):
+    rnd = random.Random(3)
+    return "".join(rnd.choice("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdef0123456789+/") for _ in range(size))
+
+
+MESSAGES = {"prose": prose, "paragraphs": paragraphs, "log_lines": log_lines, "no_spaces": no_spaces}
+
+
+# ---------- the old set_text ----------
+def legacy_wrap(msg, cols):
+    # Wifi.py's wrap before the pager, unchanged
+    lines_out = []
+    for paragraph in (msg.replace("\r", "")).split("\n"):
+        words = paragraph.split(" ")
+        line = ""
+        for w in words:
+            candidate = w if not line else (line + " " + w)
+            if len(candidate) <= cols:
+                line = candidate
+            else:
+                lines_out.append(line)
+                line = w
+        lines_out.append(line)
+    return lines_out
+
+
+class Legacy:
+    def __init__(self, scale=1):
+        self.scale = scale
+        self.label = label.Label(terminalio.FONT, text="", color=0xFFFFFF, line_spacing=1.1)
+        self.label.anchor_point = (0, 0)
+        self.label.anchored_position = (PADDING, PADDING)
+
+    def set_text(self, msg):
+        cols = max(1, (TFT_W - 2 * PADDING) // (terminalio.FONT.get_bounding_box()[0] * self.scale))
+        self.label.text = "\n".join(legacy_wrap(msg, cols))
+        self.label.scale = self.scale
+
+    def pixels(self):
+        return self.label.bitmap.width * self.label.bitmap.height
+
+
+# ---------- the paged view ----------
+def make_view():
+    char_w, char_h = terminalio.FONT.get_bounding_box()
+    pager = TextPager(TFT_W - 2 * PADDING, TFT_H - 2 * PADDING, char_w, char_h)
+    root = displayio.Group()
+    labels = []
+    for _ in range(pager.rows(1)):
+        row_label = label.Label(terminalio.FONT, text="", color=0xFFFFFF)
+        root.append(row_label)
+        labels.append(row_label)
+    return TextView(pager, labels, PADDING, PADDING, auto=0)
+
+
+def view_pixels(view):
+    return sum(lbl.bitmap.width * lbl.bitmap.height for lbl in view.labels if lbl.text)
+
+
+def timed(func, repeat, setup=None):
+    """Median seconds of ``func()`` over ``repeat`` runs, ``setup()`` before each."""
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        t0 = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - t0)
+    times.sort()
+    return times[len(times) // 2]
+
+
+def all_pages(pager, scale):
+    pages = []
+    while pager.has_page(len(pages), scale):
+        pages.append(pager.page(len(pages), scale))
+    return pages
+
+
+def covers(text, pages):
+    # Between consecutive lines only one space or newline may be dropped
+    pos = 0
+    for spans in pages:
+        for start, end in spans:
+            if start < pos or start - pos > 1 or (start > pos and text[pos] not in " \n"):
+                return False
+            pos = end
+    return len(text) - pos <= 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=10240, help="message size in characters")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per timing (the median is kept)")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args()
+    check = Checks(quiet=args.json)
+    failures = check.failures
+
+    ms = lambda s: round(s * 1000, 3)  # noqa: E731
+    rows = []
+    for name, make in MESSAGES.items():
+        text = make(args.size)
+        legacy = Legacy()
+        view = make_view()
+        pager = view.pager
+        r = {"message": name, "chars": len(text)}
+        r["legacy_ms"] = ms(timed(lambda: legacy.set_text(text), args.repeat, lambda: legacy.set_text("")))
+        r["legacy_px"] = legacy.pixels()
+        r["set_text_ms"] = ms(timed(lambda: view.set_text(text, 1), args.repeat, lambda: view.set_text("", 1)))
+        r["set_text_px"] = view_pixels(view)
+        laid_out = len(pager._starts.get(1, [0]))
+        r["next_page_ms"] = ms(timed(view.next_page, args.repeat, lambda: view.set_text(text, 1)))
+        # Page 0 again: its line breaks are cached, only the labels are redrawn
+        r["back_cached_ms"] = ms(timed(lambda: view.show_page(0), args.repeat, lambda: view.show_page(1)))
+
+        def toggle_scale():
+            view.scale = 2
+            view.draw()
+            view.scale = 1
+            view.draw()
+        view.set_text(text, 1)
+        r["scale_2_and_back_ms"] = ms(timed(toggle_scale, args.repeat))
+        r["layout_cold_us"] = round(timed(lambda: pager.page(0, 1), args.repeat,
+                                          lambda: pager.set_text(text)) * 1e6, 1)
+        r["layout_cached_us"] = round(timed(lambda: pager.page(0, 1), args.repeat) * 1e6, 2)
+        pages = all_pages(pager, 1)
+        r["pages"] = len(pages)
+        r["legacy_lines"] = len(legacy_wrap(text, pager.cols(1)))
+        rows.append(r)
+
+        check(laid_out == 1, f"{name}: set_text lays out only the first page")
+        check(all(end - start <= pager.cols(1) for spans in pages for start, end in spans),
+              f"{name}: every line fits in {pager.cols(1)} columns")
+        check(covers(pager.text, pages), f"{name}: the {len(pages)} pages hold the whole message")
+        if name in ("prose", "paragraphs", "log_lines"):
+            old = legacy_wrap(text, pager.cols(1))
+            if text.endswith("\n"):
+                old.pop()  # the old wrap drew an empty line after a trailing newline
+            new = [text[a:b] for spans in pages for a, b in spans]
+            check(new == old, f"{name}: lines break where the old wrap broke them")
+
+    if args.json:
+        print(json.dumps({"results": rows, "failures": failures}, indent=2))
+    else:
+        print()
+        print(f"{'message':<12}{'pages':>6}{'legacy ms':>11}{'legacy px':>11}{'set_text ms':>13}{'px':>7}"
+              f"{'next ms':>9}{'back ms':>9}{'scale ms':>10}{'layout us':>11}{'cached us':>11}")
+        for r in rows:
+            print(f"{r['message']:<12}{r['pages']:>6}{r['legacy_ms']:>11.1f}{r['legacy_px']:>11}"
+                  f"{r['set_text_ms']:>13.2f}{r['set_text_px']:>7}{r['next_page_ms']:>9.2f}"
+                  f"{r['back_cached_ms']:>9.2f}{r['scale_2_and_back_ms']:>10.2f}{r['layout_cold_us']:>11.1f}"
+                  f"{r['layout_cached_us']:>11.2f}")
+    if failures:
+        if not args.json:
+            print(f"{len(failures)} checks failed")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+"""Latency model for batched vs. one-at-a-time UART control messages (runs on CPython).
+
+Each unbatched op is a full round trip: the app writes one JSON line, then waits
+for the ACK before sending the next one. A batch sends every op in one write and
+waits for one aggregated ACK. The model counts BLE packets and connection events
+for the actual JSON the app and BLE-final.py exchange.
+
+    python3 tools/uart_latency_model.py [--mtu 185] [--packets-per-event 4] [--poll 0.05]
+"""
+
+import argparse
+import json
+import math
+
+TEXT_DRAW_S = 0.015  # one set_text redraw on the TFT
+PARSE_S = 0.001  # json.loads + dispatch of one op
+
+SEQUENCES = {
+    "scene": [
+        {"text": "Your fortune awaits", "color": "#FFAA00"},
+        {"text": "Hold still...", "color": "#00FFFF"},
+        {"t": "pl", "op": "int", "s": 300},
+        {"t": "pl", "op": "on"},
+        {"t": "img", "id": "a1b2c3", "w": 122, "h": 122, "len": 1861, "p": "The ink remembers"},
+    ],
+    "status": [
+        {"t": "bat"},
+        {"t": "pl", "op": "ls"},
+    ],
+    "text_burst": [{"text": "frame %d" % i} for i in range(8)],
+}
+
+# Replies as sent by BLE-final.py (sizes only matter).
+REPLY = {
+    "text": b'{"ok":true}\n',
+    "img": b'{"t": "ack", "id": "a1b2c3", "st": "start", "ok": 1, "rx": 0, "len": 1861}\n',
+    "bat": b'{"t": "bat", "mv": 0, "pct": 0, "tmp": null, "src": "unsupported"}\n',
+    "pl": b'{"t": "pl", "n": 3, "on": 1, "int": 300, "ord": "seq", "seq": [0, 1, 2], "pos": -1, "ok": 1}\n',
+}
+
+
+def line(obj):
+    # JSON.stringify in the app produces compact JSON
+    return (json.dumps(obj, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+def reply_for(op):
+    return REPLY.get(op.get("t"), REPLY["text"])
+
+
+def transfer_s(nbytes, payload, packets_per_event, ci):
+    """Time to move nbytes in one direction, waiting on average half an interval
+    for the next connection event."""
+    events = math.ceil(math.ceil(nbytes / payload) / packets_per_event)
+    return ci / 2 + (events - 1) * ci
+
+
+def round_trip_s(req_bytes, reply_bytes, draws, ops, args, ci):
+    payload = args.mtu - 3
+    return (
+        transfer_s(req_bytes, payload, args.packets_per_event, ci)
+        + args.poll / 2  # main loop only looks at uart.in_waiting every poll period
+        + ops * PARSE_S
+        + draws * TEXT_DRAW_S
+        + transfer_s(reply_bytes, payload, args.packets_per_event, ci)
+        + ci / 2  # the reply is notified on the following event at the earliest
+    )
+
+
+def model(ops, args, ci):
+    draws = [1 if ("text" in op or op.get("t") == "img") else 0 for op in ops]
+    unbatched = sum(
+        round_trip_s(len(line(op)), len(reply_for(op)), d, 1, args, ci) for op, d in zip(ops, draws)
+    )
+    batch_req = len(line({"t": "batch", "ops": ops}))
+    batch_reply = len(b'{"t": "batch", "ok": 1, "n": %d, "r": []}\n' % len(ops)) + sum(
+        len(reply_for(op)) + 1 for op in ops
+    )
+    batched = round_trip_s(batch_req, batch_reply, 1 if any(draws) else 0, len(ops), args, ci)
+    return unbatched, batched, sum(len(line(op)) for op in ops), batch_req
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mtu", type=int, default=185, help="negotiated ATT MTU")
+    parser.add_argument("--packets-per-event", type=int, default=4)
+    parser.add_argument("--poll", type=float, default=0.05, help="device main-loop poll period (s)")
+    args = parser.parse_args()
+
+    print(f"{'sequence':<12}{'ops':>4}{'CI ms':>7}{'unbatched':>12}{'batched':>10}{'speedup':>9}{'bytes u/b':>13}")
+    for name, ops in SEQUENCES.items():
+        for ci_ms in (7.5, 15, 30):
+            unbatched, batched, ub_bytes, b_bytes = model(ops, args, ci_ms / 1000.0)
+            print(f"{name:<12}{len(ops):>4}{ci_ms:>7}{unbatched * 1000:>10.1f}ms{batched * 1000:>8.1f}ms"
+                  f"{unbatched / batched:>8.1f}x{ub_bytes:>6}/{b_bytes:<5}")
+
+
+if __name__ == "__main__":
+    main()
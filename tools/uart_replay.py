@@ -0,0 +1,186 @@
+"""Replay a recorded UART trace into BLE-final.py's receive loop (runs on CPython).
+
+Traces come from the firmware (UART_TRACE_PATH in BLE-final.py), from
+tools/ble_sim.py --record, or from --make-synthetic. The firmware runs
+unmodified in the blesim simulator and gets every recorded read as one read, at
+the recorded pace (--speed 1), N times faster (--speed N) or as fast as it can
+consume them (--speed max). The report has ingestion throughput, receive
+state transitions, progress/ack messages emitted and the final e-ink
+framebuffer hash.
+
+    python3 tools/uart_replay.py tools/uart_traces/merged_json_binary.trc [--speed max] [--json]
+    python3 tools/uart_replay.py --make-synthetic tools/uart_traces
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(TOOLS_DIR, ".."))
+sys.path.insert(0, TOOLS_DIR)
+
+import uart_trace  # noqa: E402
+from blesim import Simulator, TraceCentral  # noqa: E402
+
+IMAGE_W = IMAGE_H = 122
+IMAGE_LEN = (IMAGE_W * IMAGE_H + 7) // 8
+CHUNK = 180
+GAP = 0.03
+
+
+class StateProbe:
+    """Watches the firmware's image_state and records receive-state changes."""
+
+    def __init__(self, sim):
+        self.sim = sim
+        self.state = None
+        self.transitions = []
+
+    def __call__(self, now):
+        image_state = self.sim.globals.get("image_state")
+        if image_state is None:
+            return
+        state = "receiving" if image_state["receiving"] else "idle"
+        if state != self.state:
+            self.transitions.append((round(now, 4), self.state, state, image_state["rx"]))
+            self.state = state
+
+
+def replay(records, speed, log=None):
+    central = TraceCentral(records, speed=speed)
+    sim = Simulator(central, log=log)
+    probe = StateProbe(sim)
+    central.probe = probe
+    wall_start = time.perf_counter()
+    report = sim.run()
+    wall = time.perf_counter() - wall_start
+
+    reads = sim.uart.reads
+    span = reads[-1][0] - reads[0][0] if len(reads) > 1 else 0.0
+    replies = [msg for _, msg in central.messages]
+    return {
+        "records": len(records),
+        "reads": len([r for r in records if r[1] == uart_trace.READ]),
+        "bytes": central.delivered,
+        "sim_time": report["sim_time"],
+        "wall_time": round(wall, 3),
+        "ingest_Bps": round(sim.uart.rx_bytes / span, 1) if span > 0 else None,
+        "transitions": probe.transitions,
+        "progress": [(m.get("pct"), m.get("rx")) for m in replies if m.get("t") == "prog"],
+        "acks": [m.get("st") for m in replies if m.get("t") == "ack"],
+        "replies": len(replies),
+        "tft_text": [text for _, text in report["tft_text"]],
+        "refreshes": len(report["refreshes"]),
+        "framebuffer": report["refreshes"][-1]["hash"] if report["refreshes"] else None,
+        "error": report["error"],
+    }
+
+
+# ---------- synthetic traces ----------
+def _start_line(transfer_id, prompt="Synthetic trace"):
+    msg = {"t": "img", "id": transfer_id, "w": IMAGE_W, "h": IMAGE_H, "len": IMAGE_LEN, "p": prompt}
+    return (json.dumps(msg) + "\n").encode("utf-8")
+
+
+def _payload(seed):
+    return random.Random(seed).randbytes(IMAGE_LEN)
+
+
+def _chunks(data, t, size=CHUNK, gap=GAP):
+    records = []
+    for offset in range(0, len(data), size):
+        records.append((t, uart_trace.READ, data[offset:offset + size]))
+        t += gap
+    return records, t
+
+
+def synthetic_traces():
+    """name -> records. Each starts with a connect, like a firmware recording."""
+    traces = {}
+
+    # The app's normal flow: start line, then 180-byte chunks 30 ms apart
+    payload = _payload(1)
+    records = [(0.2, uart_trace.CONNECT, b""), (0.5, uart_trace.READ, _start_line("clean1"))]
+    chunks, t = _chunks(payload, 0.6)
+    traces["clean"] = records + chunks + [(t + 8.0, uart_trace.DISCONNECT, b"")]
+
+    # Start line and the first image bytes arrive in the same read
+    payload = _payload(2)
+    start = _start_line("merge1")
+    records = [(0.2, uart_trace.CONNECT, b""), (0.5, uart_trace.READ, start + payload[:CHUNK])]
+    chunks, t = _chunks(payload[CHUNK:], 0.53)
+    traces["merged_json_binary"] = records + chunks + [(t + 8.0, uart_trace.DISCONNECT, b"")]
+
+    # The start line is split across two reads
+    payload = _payload(3)
+    start = _start_line("split1")
+    records = [
+        (0.2, uart_trace.CONNECT, b""),
+        (0.5, uart_trace.READ, start[:20]),
+        (0.51, uart_trace.READ, start[20:]),
+    ]
+    chunks, t = _chunks(payload, 0.6)
+    traces["split_header"] = records + chunks + [(t + 8.0, uart_trace.DISCONNECT, b"")]
+
+    # The device fell behind: large merged reads, and the last one carries 40
+    # bytes more than announced plus the next text command
+    payload = _payload(4)
+    records = [(0.2, uart_trace.CONNECT, b""), (0.5, uart_trace.READ, _start_line("over1"))]
+    body = payload + bytes(40) + b'{"text":"after overrun"}\n'
+    chunks, t = _chunks(body, 0.6, size=512, gap=0.12)
+    traces["overrun"] = records + chunks + [(t + 8.0, uart_trace.DISCONNECT, b"")]
+    return traces
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("trace", nargs="*", help="trace file(s) to replay")
+    parser.add_argument("--speed", default="1", help="1 = recorded pace, N = N times faster, max = unthrottled")
+    parser.add_argument("--make-synthetic", metavar="DIR", help="write the synthetic traces to DIR and exit")
+    parser.add_argument("--log", metavar="FILE", help="write the firmware's console output here")
+    parser.add_argument("--json", action="store_true", help="print the full report as JSON")
+    args = parser.parse_args()
+
+    if args.make_synthetic:
+        os.makedirs(args.make_synthetic, exist_ok=True)
+        for name, records in synthetic_traces().items():
+            path = os.path.join(args.make_synthetic, name + ".trc")
+            with open(path, "wb") as f:
+                f.write(uart_trace.dump(records))
+            print(f"{path}: {len(records)} records")
+        return 0
+    if not args.trace:
+        parser.error("give a trace file or --make-synthetic")
+
+    speed = None if args.speed == "max" else float(args.speed)
+    log = open(args.log, "w") if args.log else None
+    failed = False
+    try:
+        for path in args.trace:
+            result = replay(uart_trace.load(path), speed, log)
+            failed = failed or bool(result["error"])
+            if args.json:
+                print(json.dumps({"trace": path, **result}, indent=2))
+                continue
+            print(f"== {path} ({result['reads']} reads, {result['bytes']} B, speed {args.speed})")
+            print(f"  ingest      {result['ingest_Bps']} B/s over sim time; replay took {result['wall_time']}s wall")
+            for t, old, new, rx in result["transitions"]:
+                print(f"  {t:>9.3f}s  {old or '-'} -> {new} (rx={rx})")
+            print(f"  progress    {result['progress']}")
+            print(f"  acks        {result['acks']}")
+            print(f"  tft text    {[text[:24] for text in result['tft_text']]}")
+            print(f"  refreshes   {result['refreshes']}, final framebuffer {result['framebuffer']}")
+            if result["error"]:
+                print(f"  ERROR       {result['error']}")
+    finally:
+        if log is not None:
+            log.close()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
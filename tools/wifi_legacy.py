@@ -0,0 +1,140 @@
+# Frozen copy of Wifi.py's original HTTP path (string responses patched by
+# add_content_length, one client at a time, tail-slicing send loop). The
+# benchmarks run it as the baseline to compare the current Wifi.py against.
+
+import time
+
+SSID = "Capstone Test Wifi!"
+
+HTML_FORM = f"""\
+HTTP/1.1 200 OK\r
+Content-Type: text/html; charset=utf-8\r
+Connection: close\r
+\r
+<!doctype html><html><head><meta name="viewport" content="width=device-width,initial-scale=1">
+<title>Feather Text</title>
+<style>
+body{{font-family:system-ui;margin:1rem;}}
+input,button,textarea{{font:inherit;padding:.6rem;width:100%;margin:.5rem 0;}}
+code{{background:#eee;padding:.2rem .4rem;border-radius:.25rem}}
+</style></head><body>
+<h2>Feather Text</h2>
+<p>Connected to <b>{SSID}</b>. Send text to the TFT:</p>
+<form method="POST">
+<textarea name="t" rows="6" placeholder="Type here…"></textarea>
+<button type="submit">Show</button>
+</form>
+<p>Or GET: <code>/?t=Hello%20World</code></p>
+</body></html>
+"""
+
+HTML_REDIRECT = "HTTP/1.1 303 See Other\r\nLocation: /\r\nConnection: close\r\nContent-Length: 0\r\n\r\n"
+
+
+def set_text(msg):
+    pass
+
+
+def url_decode(s: str) -> str:
+    out, i = [], 0
+    while i < len(s):
+        c = s[i]
+        if c == '+':
+            out.append(' '); i += 1
+        elif c == '%' and i + 2 < len(s):
+            try:
+                out.append(chr(int(s[i+1:i+3], 16))); i += 3
+            except Exception:
+                out.append('%'); i += 1
+        else:
+            out.append(c); i += 1
+    return ''.join(out)
+
+
+def add_content_length(content: str) -> str:
+    """Add Content-Length header to HTTP response"""
+    lines = content.split("\r\n")
+    # Find the blank line separating headers from body
+    for i, line in enumerate(lines):
+        if line == "":
+            body = "\r\n".join(lines[i+1:])
+            body_len = len(body.encode("utf-8"))
+            # Insert Content-Length before blank line
+            lines.insert(i, f"Content-Length: {body_len}")
+            return "\r\n".join(lines)
+    return content
+
+
+def handle_request(raw: bytes):
+    if not raw:
+        return HTML_FORM
+    head = raw.split(b"\r\n", 1)[0].decode("utf-8", "ignore")
+    parts = head.split(" ")
+    method = parts[0] if parts else "GET"
+    path = parts[1] if len(parts) > 1 else "/"
+
+    if method == "GET":
+        if "?" in path and "t=" in path:
+            q = path.split("?", 1)[1]
+            tval = ""
+            for kv in q.split("&"):
+                if kv.startswith("t="):
+                    tval = kv[2:]; break
+            msg = url_decode(tval)
+            set_text(msg)
+            return HTML_REDIRECT
+        return HTML_FORM
+
+    if method == "POST":
+        # crude parse body
+        try:
+            header, body = raw.split(b"\r\n\r\n", 1)
+        except ValueError:
+            return HTML_FORM
+        # form-encoded: t=...
+        if b"t=" in body:
+            t = body.split(b"t=", 1)[1]
+            amp = t.find(b"&")
+            if amp != -1:
+                t = t[:amp]
+            msg = url_decode(t.decode("utf-8", "ignore"))
+            set_text(msg)
+            return HTML_REDIRECT
+        return HTML_FORM
+
+    return HTML_FORM
+
+
+def send_response(client, req):
+    """One request's work in the old loop: build, patch, encode, send."""
+    resp = handle_request(req)
+    # Add Content-Length header for proper HTTP
+    resp = add_content_length(resp)
+    # Send response in chunks if needed
+    resp_bytes = resp.encode("utf-8")
+    sent = 0
+    while sent < len(resp_bytes):
+        chunk = client.send(resp_bytes[sent:])
+        if chunk == 0:
+            break
+        sent += chunk
+
+
+def serve(srv, stop):
+    """The old serve loop, with a stop flag added."""
+    srv.settimeout(0)
+    while not stop.is_set():
+        try:
+            client, _ = srv.accept()
+        except OSError:
+            time.sleep(0.05)
+            continue
+        try:
+            client.settimeout(5)
+            req = client.recv(2048)
+            if req:
+                send_response(client, req)
+        except Exception:
+            pass
+        finally:
+            client.close()
@@ -0,0 +1,366 @@
+"""Burst load test for WifiMonitor.py (runs on CPython).
+
+Runs WifiMonitor.py's main loop (monitor_step() and its AdaptivePoller) over
+real 127.0.0.1 sockets, with the TFT replaced by a counter of show_lines()
+calls. Client threads open --clients connections, --concurrency at a time,
+from --ips different loopback addresses (127.0.0.2, 127.0.0.3, ...) so the
+per-client records fill up. The same burst is run against a copy of the old
+loop (50 ms sleep and a TFT redraw per connection) for comparison.
+
+Checks that every client gets a complete response, that the TFT redraws at
+most 1/REDRAW_INTERVAL times a second and ends up showing the last
+connection, and that /metrics adds up: per-client requests and bytes match
+the totals and what the clients received. A client that sends part of a
+request and one more byte just before CLIENT_TIME runs out must not hold up
+the loop for longer than CLIENT_TIME. Exits 1 if a check fails.
+
+    python3 tools/wifimonitor_load.py [--clients 300] [--concurrency 30] [--ips 12] [--json]
+"""
+
+import argparse
+import json
+import os
+import socket
+import sys
+import threading
+import time
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.join(TOOLS_DIR, "..")
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, TOOLS_DIR)
+
+from blesim.checks import Checks  # noqa: E402
+from blesim.extract import load_defs  # noqa: E402
+from client_stats import MAX_CLIENTS, ConnectionStats  # noqa: E402
+from http_engine import http_response  # noqa: E402
+from http_parser import COMPLETE, INCOMPLETE, RequestParser  # noqa: E402
+from poller import AdaptivePoller  # noqa: E402
+
+REQUEST = b"GET / HTTP/1.1\r\nHost: 192.168.4.1\r\nUser-Agent: burst\r\n\r\n"
+METRICS = b"GET /metrics HTTP/1.1\r\nHost: 192.168.4.1\r\n\r\n"
+
+
+class Screen:
+    """show_lines() stand-in that remembers when it was called."""
+
+    def __init__(self):
+        self.times = []
+        self.lines = []
+
+    def show_lines(self, lines):
+        self.times.append(time.monotonic())
+        self.lines = list(lines)
+
+    def max_per_second(self):
+        # Most redraws inside any one-second window
+        best = 0
+        start = 0
+        for end, t in enumerate(self.times):
+            while t - self.times[start] >= 1.0:
+                start += 1
+            best = max(best, end - start + 1)
+        return best
+
+
+def listener(backlog=5):
+    srv = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    srv.settimeout(0)
+    srv.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    srv.bind(("127.0.0.1", 0))
+    srv.listen(backlog)
+    return srv
+
+
+# ---------- servers ----------
+def load_monitor(srv, screen):
+    """WifiMonitor.py's main loop, loaded from the script with the TFT left out."""
+    ns = {
+        "time": time,
+        "srv": srv,
+        "show_lines": screen.show_lines,
+        "ConnectionStats": ConnectionStats,
+        "http_response": http_response,
+        "RequestParser": RequestParser,
+        "AdaptivePoller": AdaptivePoller,
+        "COMPLETE": COMPLETE,
+        "INCOMPLETE": INCOMPLETE,
+    }
+    return load_defs(
+        os.path.join(REPO_ROOT, "WifiMonitor.py"),
+        ["REDRAW_INTERVAL", "CLIENT_TIME", "SIMPLE_RESPONSE", "METRICS_HEADERS", "stats", "request", "redraw_state",
+         "poller", "send_all", "handle_client", "draw_status", "monitor_step"],
+        ns,
+    )
+
+
+def monitor_server(ns, stop):
+    poller = ns["poller"]
+    step = ns["monitor_step"]
+    while not stop.is_set():
+        poller.wait(busy=step())
+
+
+LEGACY_RESPONSE = "HTTP/1.1 200 OK\r\nContent-Type: text/plain\r\nConnection: close\r\nContent-Length: 17\r\n\r\nConnected!\n"
+
+
+def legacy_server(srv, screen, stop):
+    # The old WifiMonitor.py loop, minus the clock on the TFT
+    count = 0
+    history = []
+    request = RequestParser(1024)
+    while not stop.is_set():
+        try:
+            client, addr = srv.accept()
+            count += 1
+            history.append({"num": count, "ip": str(addr[0])})
+            if len(history) > 10:
+                history.pop(0)
+            lines = [f"Connection #{count}", f"IP: {addr[0]}", "", "Total: " + str(count), ""]
+            if len(history) > 1:
+                lines.append("Recent:")
+                for conn in history[-3:]:
+                    lines.append(f"  #{conn['num']}: {conn['ip']}")
+            screen.show_lines(lines)
+            time.sleep(0.05)
+        except Exception:
+            time.sleep(0.05)
+            continue
+        try:
+            client.settimeout(1.0)
+            request.clear()
+            deadline = time.monotonic() + 1.0
+            while request.parse() == INCOMPLETE and time.monotonic() < deadline:
+                try:
+                    if not request.recv_into(client):
+                        break
+                except OSError:
+                    break
+            try:
+                client.send(LEGACY_RESPONSE.encode("utf-8"))
+            except OSError:
+                pass
+        finally:
+            client.close()
+
+
+# ---------- clients ----------
+def fetch(port, source, request):
+    """One connection: returns (response bytes, seconds). Reads to EOF, since
+    the server closes every connection."""
+    t0 = time.perf_counter()
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.settimeout(10)
+    try:
+        sock.bind((source, 0))
+        sock.connect(("127.0.0.1", port))
+        sock.sendall(request)
+        data = b""
+        while True:
+            chunk = sock.recv(4096)
+            if not chunk:
+                break
+            data += chunk
+    finally:
+        sock.close()
+    return data, time.perf_counter() - t0
+
+
+def complete(data):
+    """True for a 200 whose body is exactly Content-Length bytes."""
+    head, sep, body = data.partition(b"\r\n\r\n")
+    if not sep or not head.startswith(b"HTTP/1.1 200"):
+        return False
+    for line in head.split(b"\r\n")[1:]:
+        name, _, value = line.partition(b":")
+        if name.strip().lower() == b"content-length":
+            return int(value) == len(body)
+    return False
+
+
+def source_ip(i, ips):
+    return "127.0.0.%d" % (2 + i % ips)
+
+
+def burst(port, clients, concurrency, ips):
+    latencies, received, errors = [], [], []
+    incomplete = [0]
+    next_index = [0]
+    lock = threading.Lock()
+
+    def worker():
+        while True:
+            with lock:
+                i = next_index[0]
+                next_index[0] += 1
+            if i >= clients:
+                return
+            try:
+                data, seconds = fetch(port, source_ip(i, ips), REQUEST)
+            except OSError as e:
+                errors.append(repr(e))
+                continue
+            latencies.append(seconds)
+            received.append((source_ip(i, ips), len(data)))
+            if not complete(data):
+                incomplete[0] += 1
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    latencies.sort()
+    ms = lambda p: round(latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000, 1)  # noqa: E731
+    return {
+        "served": len(latencies),
+        "errors": len(errors),
+        "incomplete": incomplete[0],
+        "seconds": round(elapsed, 2),
+        "conn_per_s": round(len(latencies) / elapsed, 1),
+        "p50_ms": ms(0.50) if latencies else None,
+        "p99_ms": ms(0.99) if latencies else None,
+    }, received
+
+
+def parse_metrics(text):
+    """{(name, label value or ""): float} from Prometheus text."""
+    out = {}
+    for line in text.splitlines():
+        if not line or line.startswith("#"):
+            continue
+        key, value = line.rsplit(" ", 1)
+        label = ""
+        if "{" in key:
+            key, _, rest = key.partition("{")
+            label = rest.split("\"")[1]
+        out[(key, label)] = float(value)
+    return out
+
+
+def run(kind, args):
+    srv = listener()
+    screen = Screen()
+    stop = threading.Event()
+    ns = None
+    if kind == "legacy":
+        thread = threading.Thread(target=legacy_server, args=(srv, screen, stop))
+    else:
+        ns = load_monitor(srv, screen)
+        thread = threading.Thread(target=monitor_server, args=(ns, stop))
+    thread.start()
+    try:
+        result, received = burst(srv.getsockname()[1], args.clients, args.concurrency, args.ips)
+        metrics = None
+        if ns is not None:
+            # Let the throttled redraw catch up, then read the counters
+            time.sleep(ns["REDRAW_INTERVAL"] * 2)
+            result["shown"] = screen.lines[0]
+            data, _ = fetch(srv.getsockname()[1], "127.0.0.1", METRICS)
+            metrics = data.partition(b"\r\n\r\n")[2].decode()
+    finally:
+        stop.set()
+        thread.join()
+        srv.close()
+    result["redraws"] = len(screen.times)
+    result["redraws_per_s_max"] = screen.max_per_second()
+    return result, received, ns, metrics
+
+
+def slow_client_seconds():
+    """Time one monitor_step spends on a client that sends part of a request,
+    then one more byte shortly before its time is up, then nothing."""
+    srv = listener()
+    ns = load_monitor(srv, Screen())
+    limit = ns["CLIENT_TIME"]
+    client = socket.create_connection(srv.getsockname())
+
+    def trickle():
+        client.sendall(REQUEST[:8])
+        time.sleep(limit * 0.9)
+        client.sendall(REQUEST[8:9])
+    thread = threading.Thread(target=trickle)
+    thread.start()
+    time.sleep(0.02)  # the connection is waiting in the backlog
+    t0 = time.monotonic()
+    ns["monitor_step"]()
+    elapsed = time.monotonic() - t0
+    thread.join()
+    client.close()
+    srv.close()
+    return elapsed, limit
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=300, help="connections in the burst")
+    parser.add_argument("--concurrency", type=int, default=30, help="connections open at once")
+    parser.add_argument("--ips", type=int, default=12, help=f"client addresses, at most {MAX_CLIENTS} "
+                                                           "for the per-client sums to be checked")
+    parser.add_argument("--skip-legacy", action="store_true", help="run the current loop only")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args()
+    check = Checks(quiet=args.json)
+    failures = check.failures
+
+    results = {}
+    for kind in (("monitor",) if args.skip_legacy else ("legacy", "monitor")):
+        results[kind], received, ns, metrics = run(kind, args)
+        if not args.json:
+            r = results[kind]
+            print(f"{kind:<8}{r['conn_per_s']:>8.1f} conn/s  p50 {r['p50_ms']} ms  p99 {r['p99_ms']} ms  "
+                  f"{r['seconds']} s  redraws {r['redraws']} (max {r['redraws_per_s_max']}/s)  "
+                  f"{r['served']} served, {r['errors']} errors, {r['incomplete']} incomplete")
+
+    r = results["monitor"]
+    limit = 1 / ns["REDRAW_INTERVAL"]
+    check(r["served"] == args.clients and not r["errors"], f"all {args.clients} clients served")
+    check(not r["incomplete"], "every response is a 200 with a body of exactly Content-Length bytes")
+    check(r["redraws_per_s_max"] <= limit + 1, f"TFT redraws at most {limit:.0f} times a second "
+                                                f"({r['redraws_per_s_max']} in the busiest second)")
+    check(r["shown"] == f"Connection #{args.clients}", f"TFT ends up showing the last connection ({r['shown']})")
+
+    m = parse_metrics(metrics)
+    total = m[("wifimonitor_connections_total", "")]
+    check(total == args.clients, f"/metrics counts every connection ({total:.0f})")
+    check(m[("wifimonitor_request_duration_seconds_count", "")] == total, "latency summary covers every request")
+    check(m[("wifimonitor_sent_bytes_total", "")] == sum(n for _, n in received),
+          "sent bytes match what the clients received")
+    if args.ips <= MAX_CLIENTS:
+        per_client = {}
+        for ip, n in received:
+            requests, sent = per_client.get(ip, (0, 0))
+            per_client[ip] = (requests + 1, sent + n)
+        check(all(m.get(("wifimonitor_client_requests_total", ip)) == requests
+                  and m.get(("wifimonitor_client_sent_bytes_total", ip)) == sent
+                  for ip, (requests, sent) in per_client.items()),
+              f"per-client requests and bytes match for all {len(per_client)} addresses")
+        check(sum(v for (k, _), v in m.items() if k == "wifimonitor_client_received_bytes_total")
+              == m[("wifimonitor_received_bytes_total", "")] == total * len(REQUEST),
+              "per-client received bytes add up to the total")
+
+    elapsed, limit = slow_client_seconds()
+    results["slow_client_s"] = round(elapsed, 3)
+    check(elapsed <= limit + 0.1, f"a trickling client holds the loop at most {limit:g} s ({elapsed:.2f} s)")
+
+    # Eviction: more addresses than records keeps the most recently seen
+    stats = ConnectionStats()
+    ips = ["10.0.0.%d" % i for i in range(MAX_CLIENTS + 8)]
+    for i, ip in enumerate(ips):
+        stats.record(ip, float(i), 0, 10, 20, 0.001)
+    check(sorted(stats.clients) == sorted(ips[8:]) and stats.evicted == 8,
+          f"{len(ips)} addresses keep the {MAX_CLIENTS} seen last")
+
+    if args.json:
+        print(json.dumps({"results": results, "failures": failures}, indent=2))
+    if failures:
+        if not args.json:
+            print(f"{len(failures)} checks failed")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
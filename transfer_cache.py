@@ -0,0 +1,77 @@
+# Partial image transfers kept across BLE disconnects so a sender can resume.
+
+MAX_PARTIALS = 2  # transfers kept at once; the oldest is dropped first
+MAX_PARTIAL_BYTES = 16384  # total bytes held across all kept transfers
+GRACE_PERIOD = 120  # seconds a partial survives without being resumed
+
+
+class PartialTransfer:
+    __slots__ = ("width", "height", "expected_len", "prompt", "data", "parked_at")
+
+    def __init__(self, width, height, expected_len, prompt, data, parked_at):
+        self.width = width
+        self.height = height
+        self.expected_len = expected_len
+        self.prompt = prompt
+        self.data = data
+        self.parked_at = parked_at
+
+
+class PartialCache:
+    """Interrupted transfers keyed by transfer id, bounded by count, size and age.
+
+    ``now`` is passed in by the caller (usually ``time.monotonic()``).
+    """
+
+    def __init__(self, max_entries=MAX_PARTIALS, max_bytes=MAX_PARTIAL_BYTES, grace=GRACE_PERIOD):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.grace = grace
+        self._entries = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, transfer_id):
+        return transfer_id in self._entries
+
+    def total_bytes(self):
+        return sum(len(p.data) for p in self._entries.values())
+
+    def park(self, transfer_id, width, height, expected_len, prompt, data, now):
+        """Keep a partial transfer. The data buffer is stored, not copied.
+
+        Returns False if the transfer is empty or larger than the byte budget.
+        """
+        if transfer_id is None or not data or len(data) > self.max_bytes:
+            return False
+        self.expire(now)
+        self._entries.pop(transfer_id, None)
+        while self._entries and (
+            len(self._entries) >= self.max_entries
+            or self.total_bytes() + len(data) > self.max_bytes
+        ):
+            self._drop_oldest()
+        self._entries[transfer_id] = PartialTransfer(width, height, expected_len, prompt, data, now)
+        return True
+
+    def take(self, transfer_id, now):
+        """Remove and return the partial for ``transfer_id``, or None if unknown or expired."""
+        self.expire(now)
+        return self._entries.pop(transfer_id, None)
+
+    def discard(self, transfer_id):
+        self._entries.pop(transfer_id, None)
+
+    def expire(self, now):
+        for transfer_id in [k for k, p in self._entries.items() if now - p.parked_at > self.grace]:
+            print("Dropping expired partial transfer:", transfer_id)
+            del self._entries[transfer_id]
+
+    def _drop_oldest(self):
+        oldest = None
+        for transfer_id, p in self._entries.items():
+            if oldest is None or p.parked_at < self._entries[oldest].parked_at:
+                oldest = transfer_id
+        print("Dropping partial transfer to make room:", oldest)
+        del self._entries[oldest]
@@ -0,0 +1,209 @@
+# Compact binary encoding ("bin1") for the high-frequency BLE UART control
+# messages of BLE-final.py. JSON stays the default; a sender opts in with
+# {"t":"hello","enc":["bin1"]}.
+#
+# Frame: MAGIC (0xB1) | type (u8) | payload length (u16 LE) | payload
+# Transfer ids are sent as a u8 length + ASCII bytes; messages whose id is not
+# ASCII or longer than MAX_ID_LEN bytes go out as JSON. Multi-byte fields are
+# little-endian. MAGIC can never start a JSON or UTF-8 text line.
+
+import struct
+
+ENCODING = "bin1"
+MAGIC = 0xB1
+HEADER_LEN = 4
+
+T_IMG = 0x01  # sender -> device: image start
+T_PROG = 0x02  # device -> sender: transfer progress
+T_ACK = 0x03  # device -> sender: transfer ack
+T_BAT = 0x04  # both ways: battery request (empty) / telemetry reply
+T_TEXT = 0x05  # sender -> device: text + colour
+T_OK = 0x06  # device -> sender: text ack
+T_RESUME = 0x07  # sender -> device: resume request
+
+# Order is the wire code; append only.
+ACK_STATES = ("start", "rendering", "render_error", "decode_error", "bad_params", "resume")
+BAT_SOURCES = ("unsupported", "vbat", "fuel_gauge")
+TMP_NONE = -32768
+MAX_ID_LEN = 40  # longer transfer ids fall back to JSON
+# Fields each reply frame carries; a reply with any other field goes out as JSON
+FIELDS = {
+    "prog": ("t", "id", "pct", "rx"),
+    "ack": ("t", "id", "st", "ok", "rx", "len"),
+    "bat": ("t", "mv", "pct", "tmp", "src", "up"),
+}
+
+_TX = bytearray(64)  # reused for every outgoing frame; see encode()
+_TX_VIEW = memoryview(_TX)
+
+
+def id_bytes(transfer_id):
+    """The bytes bin1 sends for ``transfer_id``, or None if it has no binary
+    form (not ASCII, or longer than MAX_ID_LEN bytes)."""
+    if transfer_id is None:
+        return b""
+    text = str(transfer_id)
+    # MicroPython's str.encode ignores the codec name, so test for ASCII by
+    # length: any other character takes more than one UTF-8 byte
+    raw = text.encode("utf-8")
+    if len(raw) != len(text) or len(raw) > MAX_ID_LEN:
+        return None
+    return raw
+
+
+def _put_id(buf, offset, raw):
+    n = len(raw)
+    buf[offset] = n
+    buf[offset + 1:offset + 1 + n] = raw
+    return offset + 1 + n
+
+
+def _get_id(buf, offset):
+    n = buf[offset]
+    offset += 1
+    return (str(bytes(buf[offset:offset + n]), "ascii") if n else None), offset + n
+
+
+def encode(payload):
+    """Encode a reply dict into the shared TX buffer.
+
+    Returns a memoryview of the frame (valid until the next encode call), or
+    None if this message type has no binary form and must go out as JSON.
+    """
+    t = payload.get("t")
+    fields = FIELDS.get(t)
+    if fields is not None:
+        for key in payload:
+            if key not in fields:
+                return None
+    if t in ("prog", "ack"):
+        raw_id = id_bytes(payload.get("id"))
+        if raw_id is None:
+            return None
+    buf = _TX
+    pos = HEADER_LEN
+    if t == "prog":
+        pos = _put_id(buf, pos, raw_id)
+        struct.pack_into("<BI", buf, pos, payload["pct"], payload["rx"])
+        pos += 5
+        kind = T_PROG
+    elif t == "ack":
+        if payload.get("st") not in ACK_STATES:
+            return None
+        pos = _put_id(buf, pos, raw_id)
+        struct.pack_into(
+            "<BBII", buf, pos, ACK_STATES.index(payload["st"]), payload.get("ok", 0),
+            payload.get("rx", 0), payload.get("len", 0),
+        )
+        pos += 10
+        kind = T_ACK
+    elif t == "bat":
+        tmp = payload.get("tmp")
+        src = payload.get("src", "unsupported")
+        struct.pack_into(
+            "<HBhBI", buf, pos, payload.get("mv", 0), payload.get("pct", 0),
+            TMP_NONE if tmp is None else int(tmp * 100),
+            BAT_SOURCES.index(src) if src in BAT_SOURCES else 0, payload.get("up", 0),
+        )
+        pos += 10
+        kind = T_BAT
+    elif payload.get("ok") is True and len(payload) == 1:
+        kind = T_OK
+    else:
+        return None
+    buf[0] = MAGIC
+    struct.pack_into("<BH", buf, 1, kind, pos - HEADER_LEN)
+    return _TX_VIEW[:pos]
+
+
+def is_frame(raw):
+    """True if ``raw`` starts a frame, even one whose header is not all here yet."""
+    return len(raw) > 0 and raw[0] == MAGIC
+
+
+def decode(raw):
+    """Decode every frame in ``raw`` into the dicts the JSON protocol would produce.
+
+    Returns (messages, bytes consumed); a truncated trailing frame is left unconsumed.
+    """
+    messages = []
+    pos = 0
+    end = len(raw)
+    while end - pos >= HEADER_LEN and raw[pos] == MAGIC:
+        kind, n = struct.unpack_from("<BH", raw, pos + 1)
+        start = pos + HEADER_LEN
+        if start + n > end:
+            break
+        messages.append(_decode_one(kind, raw, start, n))
+        pos = start + n
+        if kind == T_IMG:
+            break  # whatever follows an image start is image data
+    return messages, pos
+
+
+def _decode_one(kind, raw, pos, n):
+    if kind == T_IMG:
+        transfer_id, pos = _get_id(raw, pos)
+        w, h, length, plen = struct.unpack_from("<HHIH", raw, pos)
+        pos += 10
+        prompt = str(bytes(raw[pos:pos + plen]), "utf-8")
+        return {"t": "img", "id": transfer_id, "w": w, "h": h, "len": length, "p": prompt}
+    if kind == T_PROG:
+        transfer_id, pos = _get_id(raw, pos)
+        pct, rx = struct.unpack_from("<BI", raw, pos)
+        return {"t": "prog", "id": transfer_id, "pct": pct, "rx": rx}
+    if kind == T_ACK:
+        transfer_id, pos = _get_id(raw, pos)
+        st, ok, rx, length = struct.unpack_from("<BBII", raw, pos)
+        return {"t": "ack", "id": transfer_id, "st": ACK_STATES[st], "ok": ok, "rx": rx, "len": length}
+    if kind == T_BAT:
+        if n == 0:
+            return {"t": "bat"}
+        mv, pct, tmp, src = struct.unpack_from("<HBhB", raw, pos)
+        msg = {
+            "t": "bat", "mv": mv, "pct": pct,
+            "tmp": None if tmp == TMP_NONE else tmp / 100,
+            "src": BAT_SOURCES[src] if src < len(BAT_SOURCES) else "unsupported",
+        }
+        if n >= 10:
+            msg["up"] = struct.unpack_from("<I", raw, pos + 6)[0]
+        return msg
+    if kind == T_TEXT:
+        color = raw[pos] << 16 | raw[pos + 1] << 8 | raw[pos + 2]
+        return {"text": str(bytes(raw[pos + 3:pos + n]), "utf-8"), "color": "#%06X" % color}
+    if kind == T_OK:
+        return {"ok": True}
+    if kind == T_RESUME:
+        transfer_id, _ = _get_id(raw, pos)
+        return {"t": "resume", "id": transfer_id}
+    raise ValueError("unknown frame type %d" % kind)
+
+
+def encode_request(msg):
+    """Sender side: encode an outgoing request dict (img, bat, text, resume) as a frame.
+
+    Used by host tools; the app builds the same bytes.
+    """
+    t = msg.get("t")
+    body = bytearray()
+    raw_id = id_bytes(msg.get("id")) if t in ("img", "resume") else b""
+    if raw_id is None:
+        raise ValueError("transfer id %r has no binary form" % (msg.get("id"),))
+    if t == "img":
+        prompt = msg.get("p", "").encode("utf-8")
+        body += bytes((len(raw_id),)) + raw_id
+        body += struct.pack("<HHIH", msg["w"], msg["h"], msg["len"], len(prompt)) + prompt
+        kind = T_IMG
+    elif t == "bat":
+        kind = T_BAT
+    elif t == "resume":
+        body += bytes((len(raw_id),)) + raw_id
+        kind = T_RESUME
+    elif "text" in msg:
+        color = int(msg.get("color", "#00FFFF").lstrip("#"), 16)
+        body += bytes(((color >> 16) & 0xFF, (color >> 8) & 0xFF, color & 0xFF))
+        body += msg["text"].encode("utf-8")
+        kind = T_TEXT
+    else:
+        raise ValueError("no binary form for %r" % (msg,))
+    return struct.pack("<BBH", MAGIC, kind, len(body)) + bytes(body)
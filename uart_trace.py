@@ -0,0 +1,93 @@
+# Compact binary trace of raw BLE UART reads, for replaying the receive loop
+# of BLE-final.py off-device (tools/uart_replay.py).
+#
+# File: MAGIC, then records of
+#   kind (u8) | time since previous record in us (u32 LE) | length (u16 LE) | bytes
+# kind is READ (one uart.read() result), CONNECT or DISCONNECT (length 0).
+
+import struct
+
+MAGIC = b"UTR1"
+READ = 0
+CONNECT = 1
+DISCONNECT = 2
+RECORD_HEADER = 7
+MAX_READ = 0xFFFF
+
+
+class TraceWriter:
+    """Appends records to ``path``, buffered in RAM and flushed every
+    ``flush_bytes``. If the filesystem is read-only (CIRCUITPY mounted over
+    USB) recording is switched off after one message."""
+
+    def __init__(self, path, now, flush_bytes=1024):
+        self.path = path
+        self.flush_bytes = flush_bytes
+        self.last = now
+        self.buf = bytearray(MAGIC)
+        self.enabled = True
+        self.records = 0
+        self._append = False
+
+    def _record(self, kind, now, data=b""):
+        if not self.enabled:
+            return
+        delta_us = int((now - self.last) * 1000000)
+        self.last = now
+        n = min(len(data), MAX_READ)
+        self.buf += struct.pack("<BIH", kind, max(0, min(delta_us, 0xFFFFFFFF)), n)
+        self.buf += data[:n]
+        self.records += 1
+        if len(self.buf) >= self.flush_bytes:
+            self.flush()
+
+    def read(self, data, now):
+        self._record(READ, now, data)
+
+    def event(self, kind, now):
+        self._record(kind, now)
+
+    def flush(self):
+        if not self.enabled or not self.buf:
+            return
+        try:
+            with open(self.path, "ab" if self._append else "wb") as f:
+                f.write(self.buf)
+            self._append = True
+            self.buf = bytearray()
+        except OSError as e:
+            print("UART trace disabled:", e)
+            self.enabled = False
+
+
+def parse(raw):
+    """Records of a trace as (time since start in s, kind, bytes)."""
+    if bytes(raw[:4]) != MAGIC:
+        raise ValueError("not a UART trace")
+    records = []
+    pos = 4
+    t = 0.0
+    while pos + RECORD_HEADER <= len(raw):
+        kind, delta_us, n = struct.unpack_from("<BIH", raw, pos)
+        pos += RECORD_HEADER
+        t += delta_us / 1000000
+        records.append((t, kind, bytes(raw[pos:pos + n])))
+        pos += n
+    return records
+
+
+def load(path):
+    with open(path, "rb") as f:
+        return parse(f.read())
+
+
+def dump(records):
+    """Encode (time, kind, bytes) records as a trace (for synthetic traces)."""
+    out = bytearray(MAGIC)
+    last_us = 0
+    for t, kind, data in records:
+        t_us = int(round(t * 1000000))
+        out += struct.pack("<BIH", kind, t_us - last_us, len(data))
+        out += data
+        last_us = t_us
+    return bytes(out)